@@ -0,0 +1,57 @@
+# benchmarks/bench_batch.py
+"""
+Headless batch processor throughput in commands per second, per storage
+mode and batch size: a generated stream of register / purchase / reserve /
+cancel commands (with a share of rejected ones) is run through
+BatchProcessor. Batch size 1 persists every command on its own.
+
+Run: python -m benchmarks.bench_batch [--commands 30000] [--batch-sizes 1,50,500] [--modes journal,sqlite]
+"""
+import argparse
+import io
+import json
+import random
+
+from models.ticket_system import TicketSystem
+from server.batch_processor import BatchProcessor
+from benchmarks.common import isolated_storage, parse_sizes
+
+
+def command_stream(n: int, ts: TicketSystem, rng: random.Random) -> list:
+    """About a third registrations, each followed by a purchase; the rest reservations and cancellations."""
+    pass_ids = [p.pass_id for p in ts.passes]
+    workshop_ids = [w.workshop_id for ex in ts.exhibitions for w in ex.workshops]
+    lines, emails = [], []
+    while len(lines) < n:
+        i = len(emails)
+        email = f"batch{i}@example.com"
+        emails.append(email)
+        lines.append({"op": "register", "params": {"name": f"Batch {i}", "email": email, "phone": "00971-555-000"}})
+        lines.append({"op": "purchase", "params": {"email": email, "pass_id": rng.choice(pass_ids)}})
+        op = rng.choice(("reserve", "reserve", "cancel"))
+        lines.append({"op": op, "params": {"email": rng.choice(emails), "workshop_id": rng.choice(workshop_ids),
+                                           "waitlist": True}})
+    return [json.dumps(dict(cmd, id=n)) for n, cmd in enumerate(lines[:n])]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--commands", type=int, default=30000)
+    parser.add_argument("--batch-sizes", default="1,50,500")
+    parser.add_argument("--modes", default="journal,sqlite")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    print(f"{'mode':<10} {'batch':>6} {'commands/s':>12} {'ok':>8} {'failed':>8}")
+    for mode in args.modes.split(","):
+        for size in parse_sizes(args.batch_sizes):
+            with isolated_storage():
+                ts = TicketSystem(mode)
+                lines = command_stream(args.commands, ts, random.Random(args.seed))
+                stats = BatchProcessor(ts, batch_size=size).run(lines, io.StringIO())
+                ts.close()
+            print(f"{mode:<10} {size:>6} {stats.commands_per_sec:>12,.0f} {stats.ok:>8} {stats.failed:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+# benchmarks/bench_checkin.py
+"""
+Gate check-in throughput in scans per second: verifying badge tokens alone,
+a full gate scan (verify, access check, local seen-set), the same with the
+central recorder appending entries in batches, and with a write per entry.
+Attendees are spread over --gates exhibition gates; the "rescan" column
+scans every badge a second time (duplicates answered by the seen-sets).
+
+Run: python -m benchmarks.bench_checkin [--attendees 20000] [--gates 8]
+"""
+import argparse
+import random
+import time
+
+from models.attendee import Attendee
+from models.checkin import BadgeSigner, CheckInRecorder, Gate
+from models.passes import ExhibitionPass
+from benchmarks.common import isolated_storage
+
+
+def badges(n: int, gates: int, signer: BadgeSigner, rng: random.Random):
+    """(exhibition id, token) per attendee; every pass covers one to three of the gates' exhibitions."""
+    out = []
+    for i in range(n):
+        a = Attendee(i + 1, f"Attendee {i}", f"a{i}@example.com", "00971-555-000")
+        access = rng.sample(range(1, gates + 1), rng.randint(1, min(3, gates)))
+        a.purchased_pass = ExhibitionPass(1000 + i % 50, 45.0, access)
+        a.reservations = tuple(rng.sample(range(100, 140), rng.randint(0, 2)))
+        out.append((rng.choice(access), signer.issue(a)))
+    return out
+
+
+def rate(fn, items) -> float:
+    start = time.perf_counter()
+    for item in items:
+        fn(*item)
+    return len(items) / (time.perf_counter() - start)
+
+
+def scan_all(gates, scans) -> float:
+    return rate(lambda eid, token: gates[eid].scan(token), scans)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--attendees", type=int, default=20000)
+    parser.add_argument("--gates", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    with isolated_storage():
+        signer = BadgeSigner.default()
+        scans = badges(args.attendees, args.gates, signer, rng)
+        print(f"{args.attendees} badges, {args.gates} gates, token length ~{len(scans[0][1])} chars")
+        print(f"{'mode':<32} {'first scan':>14} {'rescan':>14}")
+        print(f"{'verify token only':<32} {rate(lambda eid, t: signer.verify(t), scans):>10.0f}/s {'':>14}")
+        for label, recorder in (("gate, no recorder", None),
+                                ("gate + recorder (batched)", CheckInRecorder("batched.bin")),
+                                ("gate + recorder (write per entry)", CheckInRecorder("single.bin", batch_size=1))):
+            gates = {eid: Gate(eid, signer, exhibition_id=eid, recorder=recorder)
+                     for eid in range(1, args.gates + 1)}
+            first = scan_all(gates, scans)
+            again = scan_all(gates, scans)
+            if recorder is not None:
+                recorder.close()
+                assert recorder.recorded == len(scans)
+            print(f"{label:<32} {first:>10.0f}/s {again:>10.0f}/s")
+
+
+if __name__ == "__main__":
+    main()
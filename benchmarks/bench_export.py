@@ -0,0 +1,85 @@
+# benchmarks/bench_export.py
+"""
+Roster export: the streaming exporter against building every row in a list
+first and writing it afterwards, per storage mode. Reports time and the
+peak memory allocated during the export (tracemalloc), for plain CSV and
+gzip. On the lazy and sqlite backends attendees are read from disk, so the
+streaming peak stays flat as the roster grows.
+
+Run: python -m benchmarks.bench_export [--attendees 100000] [--modes lazy,sqlite]
+"""
+import argparse
+import csv
+import os
+import random
+import time
+import tracemalloc
+
+from models.attendee import Attendee
+from models.bulk_export import ROSTER_FIELDS, Roster, export_roster
+from models.ticket_system import TicketSystem
+from benchmarks.common import isolated_storage
+
+
+def populate(ts: TicketSystem, n: int, rng: random.Random) -> None:
+    workshops = [w for ex in ts.exhibitions for w in ex.workshops]
+    for w in workshops:
+        ts.set_workshop_capacity(w, n)
+    with ts.transaction():
+        for i in range(n):
+            a = Attendee(i + 1, f"Attendee {i}", f"e{i}@example.com", "00971-555-000")
+            ts.register_attendee(a)
+            ts.purchase_pass(a, rng.choice(ts.passes))
+            for w in rng.sample(workshops, 2):
+                try:
+                    ts.reserve_workshop(a, w)
+                except (ValueError, PermissionError):
+                    pass
+
+
+def materialized(ts: TicketSystem, path: str) -> None:
+    roster = Roster(ts)
+    rows = [roster.row(a) for a in list(ts.iter_attendees())]
+    with open(path, "w", encoding="utf-8", newline="") as out:
+        writer = csv.DictWriter(out, fieldnames=ROSTER_FIELDS)
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def measure(fn):
+    """(seconds, peak bytes); timed on a separate untraced run, since tracing slows allocation down."""
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--attendees", type=int, default=100_000)
+    parser.add_argument("--modes", default="lazy,sqlite")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    print(f"{args.attendees} attendees")
+    print(f"{'mode':<8} {'export':<14} {'seconds':>8} {'peak MiB':>9} {'file MiB':>9}")
+    for mode in args.modes.split(","):
+        with isolated_storage() as tmp:
+            ts = TicketSystem(mode)
+            populate(ts, args.attendees, random.Random(args.seed))
+            runs = (("materialized", os.path.join(tmp, "list.csv"), lambda p: materialized(ts, p)),
+                    ("streaming", os.path.join(tmp, "stream.csv"), lambda p: export_roster(ts, p)),
+                    ("streaming gz", os.path.join(tmp, "stream.csv.gz"), lambda p: export_roster(ts, p)))
+            for label, path, fn in runs:
+                elapsed, peak = measure(lambda: fn(path))
+                print(f"{mode:<8} {label:<14} {elapsed:>8.2f} {peak / 2 ** 20:>9.1f} "
+                      f"{os.path.getsize(path) / 2 ** 20:>9.1f}")
+            ts.close()
+
+
+if __name__ == "__main__":
+    main()
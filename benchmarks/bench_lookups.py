@@ -0,0 +1,60 @@
+# benchmarks/bench_lookups.py
+"""
+Per-call latency of the TicketSystem lookups as the attendee count grows.
+With the hash indexes the numbers should stay flat from 1k to 1M attendees.
+
+Run: python -m benchmarks.bench_lookups [--sizes 1000,10000,100000,1000000]
+"""
+import argparse
+import random
+
+from models.attendee import Attendee
+from models.ticket_system import TicketSystem
+from benchmarks.common import time_per_call, parse_sizes
+
+SAMPLES = 20_000
+
+
+def populate(ts: TicketSystem, n: int) -> None:
+    ts.attendees = [
+        Attendee(i, f"Attendee {i}", f"User{i}@Example.com", "00971-555-000")
+        for i in range(1, n + 1)
+    ]
+    ts._rebuild_indexes()
+
+
+def run(size: int, rng: random.Random) -> dict:
+    # in-memory backend: registration is timed without any persistence cost
+    ts = TicketSystem("memory")
+    populate(ts, size)
+    ids = [rng.randint(1, size) for _ in range(SAMPLES)]
+    emails = [(f"user{i}@example.com",) for i in ids]
+    workshop_ids = [(w.workshop_id,) for ex in ts.exhibitions for w in ex.workshops]
+    new = [(Attendee(size + i, "New", f"new{i}@example.com", "00971-555-000"),)
+           for i in range(1, SAMPLES + 1)]
+
+    return {
+        "attendees": size,
+        "find_attendee_by_email": time_per_call(ts.find_attendee_by_email, emails),
+        "find_attendee_by_id": time_per_call(ts.find_attendee_by_id, [(i,) for i in ids]),
+        "find_workshop_by_id": time_per_call(ts.find_workshop_by_id, workshop_ids * 1000),
+        "register_attendee": time_per_call(ts.register_attendee, new),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", default="1000,10000,100000,1000000")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    columns = ["find_attendee_by_email", "find_attendee_by_id", "find_workshop_by_id", "register_attendee"]
+    print(f"{'attendees':>10} " + " ".join(f"{c:>24}" for c in columns))
+    for size in parse_sizes(args.sizes):
+        row = run(size, rng)
+        print(f"{size:>10} " + " ".join(f"{row[c] * 1e9:>21.0f} ns" for c in columns))
+
+
+if __name__ == "__main__":
+    main()
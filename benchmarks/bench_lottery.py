@@ -0,0 +1,92 @@
+# benchmarks/bench_lottery.py
+"""
+Workshop lottery at scale: --attendees attendees rank up to --choices of
+--workshops workshops (popularity is skewed, so the top workshops are
+heavily oversubscribed), then the draw (allocate) and the booking of every
+seat in one transaction (commit). Each storage mode runs in a throw-away
+data directory. Also checks that the same seed gives the same allocation.
+
+Run: python -m benchmarks.bench_lottery [--attendees 100000] [--workshops 300] [--modes memory,journal]
+"""
+import argparse
+import random
+import time
+
+from models.attendee import Attendee
+from models.exhibition import Exhibition
+from models.lottery import Lottery
+from models.passes import ExhibitionPass
+from models.ticket_system import TicketSystem
+from models.workshop import Workshop
+from benchmarks.common import isolated_storage
+
+EXHIBITIONS = 10
+
+
+def build(mode: str, n_attendees: int, n_workshops: int, rng: random.Random) -> TicketSystem:
+    ts = TicketSystem(mode)
+    with ts.transaction():
+        for e in range(EXHIBITIONS):
+            ex = Exhibition(1000 + e, f"Hall {e}", "Lottery benchmark")
+            ts.add_exhibition(ex)
+            for w in range(e, n_workshops, EXHIBITIONS):
+                ex.add_workshop(Workshop(10_000 + w, f"Session {w}", rng.randint(20, 200)))
+        passes = [ExhibitionPass(5000 + i, 50.0, rng.sample(range(1000, 1000 + EXHIBITIONS), rng.randint(2, EXHIBITIONS)))
+                  for i in range(20)]
+        for p in passes:
+            ts.add_pass(p)
+    first = ts.next_attendee_id()
+    for start in range(0, n_attendees, 5000):
+        with ts.transaction():
+            for i in range(start, min(n_attendees, start + 5000)):
+                a = Attendee(first + i, f"Attendee {i}", f"lottery{i}@example.com", "00971-555-000")
+                ts.register_attendee(a)
+                ts.purchase_pass(a, rng.choice(passes))
+    return ts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--attendees", type=int, default=100_000)
+    parser.add_argument("--workshops", type=int, default=300)
+    parser.add_argument("--choices", type=int, default=5)
+    parser.add_argument("--max-seats", type=int, default=2)
+    parser.add_argument("--modes", default="memory,journal")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    for mode in args.modes.split(","):
+        with isolated_storage():
+            rng = random.Random(args.seed)
+            ts = build(mode, args.attendees, args.workshops, rng)
+            workshop_ids = sorted(w.workshop_id for ex in ts.exhibitions for w in ex.workshops)
+            weights = [1 / (rank + 1) for rank in range(len(workshop_ids))]  # Zipf-like popularity
+            entries = [(a, list(dict.fromkeys(rng.choices(workshop_ids, weights, k=args.choices))))
+                       for a in ts.iter_attendees() if a.purchased_pass is not None]
+            lottery = Lottery(ts)
+
+            start = time.perf_counter()
+            for attendee, ranked in entries:
+                lottery.submit(attendee, ranked)
+            submit = time.perf_counter() - start
+            lottery.close()
+
+            allocation = lottery.allocate(args.seed, args.max_seats)
+            again = lottery.allocate(args.seed, args.max_seats)
+            assert again.assignments == allocation.assignments, "same seed, different allocation"
+
+            start = time.perf_counter()
+            lottery.commit(allocation)
+            commit = time.perf_counter() - start
+            seats = sum(w.capacity for ex in ts.exhibitions for w in ex.workshops)
+            assert all(len(w.attendees) <= w.capacity for ex in ts.exhibitions for w in ex.workshops)
+            ts.close()
+
+            print(f"[{mode}] {len(entries)} entrants, {len(workshop_ids)} workshops, {seats} seats")
+            print(f"  submit   {submit:8.2f}s ({len(entries) / submit:,.0f}/s)")
+            print(f"  allocate {allocation.elapsed:8.2f}s  {allocation.summary()}")
+            print(f"  commit   {commit:8.2f}s ({allocation.seats / commit:,.0f} seats/s, one flush)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+# benchmarks/bench_memory.py
+"""
+Memory footprint per attendee: heap bytes (tracemalloc) and pickled bytes,
+for the __slots__ models versus a replica of the old dict-backed layout
+(reservations as Workshop objects, rosters as lists).
+
+"system" also counts TicketSystem's lookup indexes. Set rosters cost more per
+entry than the old lists (the price of O(1) membership), so the heap gap
+narrows as reservations per workshop grow; see --workshops.
+
+Run: python -m benchmarks.bench_memory [--sizes 100000,1000000] [--workshops 50]
+"""
+import argparse
+import gc
+import pickle
+import random
+import tracemalloc
+
+from models.attendee import Attendee
+from models.passes import AllAccessPass
+from models.ticket_system import TicketSystem
+from models.workshop import Workshop
+from benchmarks.common import parse_sizes
+
+RESERVATIONS = (0, 1, 1, 2, 3)  # per attendee, drawn at random
+
+
+class LegacyWorkshop:
+    def __init__(self, workshop_id, title, capacity):
+        self.workshop_id = workshop_id
+        self.title = title
+        self.capacity = capacity
+        self.attendees = []
+
+
+class LegacyAttendee:
+    def __init__(self, attendee_id, name, email, phone):
+        self.attendee_id = attendee_id
+        self.name = name
+        self.email = email
+        self.phone = phone
+        self.purchased_pass = None
+        self.reservations = []
+
+
+def people(n: int, workshops: int, seed: int):
+    rng = random.Random(seed)
+    for i in range(1, n + 1):
+        yield (i, f"Attendee {i}", f"user{i}@example.com", f"00971-555-{i:07d}",
+               rng.sample(range(workshops), rng.choice(RESERVATIONS)))
+
+
+def build_legacy(n: int, w: int, seed: int):
+    p = AllAccessPass(99, 100.0)
+    workshops = [LegacyWorkshop(i, f"Workshop {i}", n) for i in range(w)]
+    attendees = []
+    for aid, name, email, phone, picks in people(n, w, seed):
+        a = LegacyAttendee(aid, name, email, phone)
+        a.purchased_pass = p
+        for k in picks:
+            workshops[k].attendees.append(aid)
+            a.reservations.append(workshops[k])
+        attendees.append(a)
+    return attendees, workshops
+
+
+def build_models(n: int, w: int, seed: int):
+    p = AllAccessPass(99, 100.0)
+    workshops = [Workshop(i, f"Workshop {i}", n) for i in range(w)]
+    attendees = []
+    for aid, name, email, phone, picks in people(n, w, seed):
+        a = Attendee(aid, name, email, phone)
+        a.purchased_pass = p
+        for k in picks:
+            workshops[k].reserve_spot(aid)
+            a.reserve_workshop(workshops[k])
+        attendees.append(a)
+    return attendees, workshops
+
+
+def build_system(n: int, w: int, seed: int):
+    ts = TicketSystem("memory")
+    attendees, workshops = build_models(n, w, seed)
+    ts.attendees = attendees
+    ts._rebuild_indexes()
+    return ts, workshops
+
+
+def heap_bytes(build, *args):
+    """Bytes allocated by build(*args) that are still alive, and its result."""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build(*args)
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return after - before, result
+
+
+def run(n: int, workshops: int, seed: int) -> dict:
+    row = {}
+    size, (attendees, _) = heap_bytes(build_legacy, n, workshops, seed)
+    row["legacy heap"] = size / n
+    # the old attendees.pkl: every attendee drags its reserved Workshop objects along
+    row["legacy pickle"] = len(pickle.dumps(attendees, protocol=pickle.HIGHEST_PROTOCOL)) / n
+    del attendees
+
+    size, (attendees, _) = heap_bytes(build_models, n, workshops, seed)
+    row["slots heap"] = size / n
+    row["slots pickle"] = len(pickle.dumps(attendees, protocol=pickle.HIGHEST_PROTOCOL)) / n
+    del attendees
+
+    size, result = heap_bytes(build_system, n, workshops, seed)
+    row["system heap"] = size / n
+    result[0].close()
+    return row
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", default="100000,1000000")
+    parser.add_argument("--workshops", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    columns = ["legacy heap", "slots heap", "system heap", "legacy pickle", "slots pickle"]
+    print(f"bytes per attendee ({args.workshops} workshops, tracemalloc: slow at 1M)")
+    print(f"{'attendees':>10} " + " ".join(f"{c:>14}" for c in columns))
+    for size in parse_sizes(args.sizes):
+        row = run(size, args.workshops, args.seed)
+        print(f"{size:>10} " + " ".join(f"{row[c]:>14,.0f}" for c in columns))
+
+
+if __name__ == "__main__":
+    main()
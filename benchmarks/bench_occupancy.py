@@ -0,0 +1,87 @@
+# benchmarks/bench_occupancy.py
+"""
+Cost of answering an admin dashboard poll as the number of workshops grows:
+the full workshop_capacity_report() against the maintained occupancy view
+(totals, top 10 fullest, workshops with >= 150 spots left, deltas since the
+last poll), plus what the view adds to each reserve + cancel pair.
+
+Run: python -m benchmarks.bench_occupancy [--sizes 100,1000,10000]
+"""
+import argparse
+import random
+
+from models.attendee import Attendee
+from models.exhibition import Exhibition
+from models.ticket_system import TicketSystem
+from models.workshop import Workshop
+from benchmarks.common import time_per_call, parse_sizes
+
+POLLS = 200
+PAIRS = 20_000
+
+
+def build(n_workshops: int, rng: random.Random) -> TicketSystem:
+    ts = TicketSystem("memory")
+    for e in range(10):
+        ex = Exhibition(1000 + e, f"Exhibition {e}")
+        ts.add_exhibition(ex)
+        for i in range(n_workshops // 10):
+            w = Workshop(100_000 + e * 10_000 + i, f"Workshop {e}/{i}", rng.randint(10, 200))
+            ex.add_workshop(w)
+            w.attendees.update(range(1, rng.randint(0, w.capacity) + 1))
+            ts.occupancy.update(w)
+    return ts
+
+
+def reserve_cancel(ts: TicketSystem, attendee: Attendee, workshop: Workshop) -> None:
+    ts.reserve_workshop(attendee, workshop)
+    ts.cancel_reservation(attendee, workshop)
+
+
+def run(n_workshops: int, rng: random.Random) -> dict:
+    ts = build(n_workshops, rng)
+    occ = ts.occupancy
+    attendee = Attendee(10_000_000, "Poller", "poller@example.com", "00971-555-000")
+    ts.register_attendee(attendee)
+    ts.purchase_pass(attendee, ts.find_pass_by_id(99))
+    ts.upgrade_pass(attendee, [ex.exhibition_id for ex in ts.exhibitions])
+    open_workshops = [w for ex in ts.exhibitions for w in ex.workshops if w.spots_left()]
+    pairs = [(ts, attendee, rng.choice(open_workshops)) for _ in range(PAIRS)]
+
+    row = {"workshops": n_workshops}
+    row["capacity_report"] = time_per_call(ts.workshop_capacity_report, [()] * POLLS)
+    row["totals"] = time_per_call(occ.totals, [()] * POLLS)
+    row["top_fullest(10)"] = time_per_call(occ.top_fullest, [(10,)] * POLLS)
+    row["with_spots_left(150)"] = time_per_call(occ.with_spots_left, [(150,)] * POLLS)
+    # a poll that finds 10 new deltas since the previous one
+    seq = occ.seq
+    for _, a, w in pairs[:5]:
+        reserve_cancel(ts, a, w)
+    row["changes_since"] = time_per_call(occ.changes_since, [(seq,)] * POLLS)
+
+    row["reserve+cancel"] = time_per_call(reserve_cancel, pairs)
+    for ex in ts.exhibitions:
+        for w in ex.workshops:
+            w._registry = None  # the same pair without occupancy tracking
+    row["untracked"] = time_per_call(reserve_cancel, pairs)
+    ts.close()
+    return row
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", default="100,1000,10000")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    columns = ["capacity_report", "totals", "top_fullest(10)", "with_spots_left(150)", "changes_since",
+               "reserve+cancel", "untracked"]
+    print(f"{'workshops':>10} " + " ".join(f"{c:>19}" for c in columns))
+    for size in parse_sizes(args.sizes):
+        row = run(size, rng)
+        print(f"{size:>10} " + " ".join(f"{row[c] * 1e6:>16.1f} us" for c in columns))
+
+
+if __name__ == "__main__":
+    main()
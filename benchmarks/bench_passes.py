@@ -0,0 +1,71 @@
+# benchmarks/bench_passes.py
+"""
+Pass access checks: allows_exhibition() against the list scan it replaced,
+as passes cover more exhibitions, and attendees_allowed() (one pass over
+the attendees, each distinct pass checked once) against checking every
+attendee's pass for every exhibition.
+
+Run: python -m benchmarks.bench_passes [--attendees 100000] [--exhibitions 5,50,500]
+"""
+import argparse
+import random
+import time
+
+from models.attendee import Attendee
+from models.passes import AllAccessPass, ExhibitionPass
+from models.ticket_system import TicketSystem
+from benchmarks.common import time_per_call, parse_sizes
+
+OPS = 20000
+
+
+def per_attendee(ts: TicketSystem, exhibition_ids) -> dict:
+    allowed = {eid: [] for eid in exhibition_ids}
+    for a in ts.iter_attendees():
+        p = a.purchased_pass
+        if p is None:
+            continue
+        for eid in exhibition_ids:
+            if p.allows_exhibition(eid):
+                allowed[eid].append(a.attendee_id)
+    return allowed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--attendees", type=int, default=100_000)
+    parser.add_argument("--exhibitions", default="5,50,500", help="exhibitions covered per pass")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+
+    print(f"{'covered':>10} {'frozenset':>14} {'list scan':>14}")
+    for size in parse_sizes(args.exhibitions):
+        p = ExhibitionPass(1, 10.0, range(size))
+        as_list = list(range(size))
+        probes = [(rng.randrange(2 * size),) for _ in range(OPS)]
+        fast = time_per_call(p.allows_exhibition, probes)
+        slow = time_per_call(lambda eid: eid in as_list, probes)
+        print(f"{size:>10} {fast * 1e9:>11.0f} ns {slow * 1e9:>11.0f} ns")
+
+    ts = TicketSystem("memory")
+    eids = [ex.exhibition_id for ex in ts.exhibitions]
+    passes = ts.passes + [AllAccessPass(500, 100.0)]
+    for i in range(args.attendees):
+        a = Attendee(1000 + i, f"Attendee {i}", f"p{i}@example.com", "00971-555-000")
+        ts.register_attendee(a)
+        ts.purchase_pass(a, rng.choice(passes))
+        if i % 20 == 0:
+            ts.upgrade_pass(a, [rng.choice(eids)])  # a private copy for this holder
+    start = time.perf_counter()
+    allowed = ts.attendees_allowed(eids)
+    grouped = time.perf_counter() - start
+    start = time.perf_counter()
+    assert per_attendee(ts, eids) == allowed
+    naive = time.perf_counter() - start
+    print(f"attendees_allowed({len(eids)} exhibitions, {args.attendees} attendees): "
+          f"{grouped * 1e3:.1f} ms grouped by pass, {naive * 1e3:.1f} ms per attendee")
+
+
+if __name__ == "__main__":
+    main()
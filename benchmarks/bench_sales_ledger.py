@@ -0,0 +1,80 @@
+# benchmarks/bench_sales_ledger.py
+"""
+Aggregation latency of the columnar sales ledger as the number of events
+grows: revenue by day, hour, pass class and exhibition, a 7-day rolling
+window and a one-day range. Uses NumPy when it is installed; --python forces
+the pure-Python fallback for comparison.
+
+Run: python -m benchmarks.bench_sales_ledger [--sizes 100000,1000000,5000000] [--python]
+"""
+import argparse
+import datetime
+import random
+import time
+
+from models import sales_ledger
+from models.sales_ledger import SalesLedger, SALE, UPGRADE, event_rows, pack_rows, wall_clock
+from benchmarks.common import parse_sizes
+
+PASSES = ((1, 1, 30.0, (1,)), (2, 1, 45.0, (1, 2)), (99, 2, 100.0, (1, 2, 3)))  # id, class, price, access
+
+
+def build(n: int, rng: random.Random) -> SalesLedger:
+    """A ledger of n events spread over the 30 days before now (about 5% upgrades)."""
+    start = wall_clock() - 30 * 86400
+    rows = []
+    for i in range(n):
+        pid, cls, price, access = rng.choice(PASSES)
+        when = start + rng.random() * 30 * 86400
+        if rng.random() < 0.05:
+            rows.extend(event_rows((UPGRADE, when, i, pid, cls, 0.0, (rng.randint(2, 3),))))
+        else:
+            rows.extend(event_rows((SALE, when, i, pid, cls, price, access)))
+    ledger = SalesLedger()
+    ledger.extend_packed(pack_rows(rows))
+    return ledger
+
+
+def timed(fn, *args) -> float:
+    best = float("inf")
+    for _ in range(3):
+        start = time.perf_counter()
+        fn(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run(ledger: SalesLedger) -> dict:
+    today = datetime.datetime.combine(datetime.date.today(), datetime.time())
+    return {
+        "by_day": timed(ledger.revenue_by_day),
+        "by_hour": timed(ledger.revenue_by_hour),
+        "by_pass_class": timed(ledger.revenue_by_pass_class),
+        "by_exhibition": timed(ledger.revenue_by_exhibition),
+        "rolling_7d": timed(ledger.rolling_revenue, 7),
+        "last_day": timed(ledger.revenue_between, today - datetime.timedelta(days=1), today),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", default="100000,1000000,5000000")
+    parser.add_argument("--python", action="store_true", help="disable NumPy")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    if args.python:
+        sales_ledger.np = None
+    engine = "numpy" if sales_ledger.np is not None else "pure Python"
+    rng = random.Random(args.seed)
+    columns = ["by_day", "by_hour", "by_pass_class", "by_exhibition", "rolling_7d", "last_day"]
+    print(f"aggregation time ({engine})")
+    print(f"{'events':>10} {'rows':>10} " + " ".join(f"{c:>14}" for c in columns))
+    for size in parse_sizes(args.sizes):
+        ledger = build(size, rng)
+        row = run(ledger)
+        print(f"{size:>10} {len(ledger):>10} " + " ".join(f"{row[c] * 1000:>11.1f} ms" for c in columns))
+
+
+if __name__ == "__main__":
+    main()
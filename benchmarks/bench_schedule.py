@@ -0,0 +1,108 @@
+# benchmarks/bench_schedule.py
+"""
+Time-slot conflict checks as attendees hold more reservations and the
+programme grows: the interval-index check reserve_workshop() runs against a
+scan of the attendee's reservations, and free_workshops() for a two-hour
+window against a scan of every workshop.
+
+Run: python -m benchmarks.bench_schedule [--sizes 1000,10000,50000] [--reservations 20]
+"""
+import argparse
+import datetime
+import random
+
+from models.attendee import Attendee
+from models.exhibition import Exhibition
+from models.passes import AllAccessPass
+from models.ticket_system import TicketSystem
+from models.workshop import Workshop
+from benchmarks.common import time_per_call, parse_sizes
+
+OPS = 2000
+DAY0 = datetime.datetime(2026, 11, 1)
+
+
+def build(n_workshops: int, n_reservations: int, rng: random.Random):
+    """Workshops of 30-120 minutes spread over ten days in 200 rooms; one attendee per room slot row."""
+    ts = TicketSystem("memory")
+    ex = Exhibition(1000, "Programme", "Schedule benchmark")
+    ts.add_exhibition(ex)
+    room_free = {}
+    for wid in range(n_workshops):
+        room = f"Room {wid % 200}"
+        start = room_free.get(room, DAY0) + datetime.timedelta(minutes=rng.choice((0, 15, 30)))
+        end = start + datetime.timedelta(minutes=rng.choice((30, 60, 90, 120)))
+        room_free[room] = end
+        ex.add_workshop(Workshop(10_000 + wid, f"Session {wid}", 10 ** 6, start, end, room))
+    all_access = AllAccessPass(7000, 100.0)
+    ts.add_pass(all_access)
+    by_start = sorted(ex.workshops, key=lambda w: w.start)
+    people = []
+    for i in range(50):
+        a = Attendee(i + 1, f"Attendee {i}", f"s{i}@example.com", "00971-555-000")
+        ts.register_attendee(a)
+        ts.purchase_pass(a, all_access)
+        booked = 0
+        for w in rng.sample(by_start, len(by_start)):
+            if booked == n_reservations:
+                break
+            try:
+                ts.reserve_workshop(a, w)
+                booked += 1
+            except ValueError:
+                pass
+        people.append(a)
+    return ts, ex.workshops, people
+
+
+def scan_conflicts(ts: TicketSystem, attendee: Attendee, workshop: Workshop) -> list:
+    out = []
+    for wid in attendee.reservations:
+        w = ts.find_workshop_by_id(wid)
+        if w is not workshop and w.overlaps(workshop):
+            out.append(wid)
+    return out
+
+
+def scan_free(ts: TicketSystem, workshops, attendee: Attendee, start, end) -> list:
+    p = attendee.purchased_pass
+    return [w for w in workshops
+            if w.start < end and start < w.end and w.spots_left() > 0
+            and p.allows_exhibition(ts.find_workshop_exhibition(w).exhibition_id)
+            and w.workshop_id not in attendee.reservations
+            and not scan_conflicts(ts, attendee, w)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", default="1000,10000,50000", help="number of workshops")
+    parser.add_argument("--reservations", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    columns = ["conflict: index", "conflict: scan", "free: index", "free: scan"]
+    print(f"{args.reservations} reservations per attendee")
+    print(f"{'workshops':>10} " + " ".join(f"{c:>17}" for c in columns))
+    for size in parse_sizes(args.sizes):
+        ts, workshops, people = build(size, args.reservations, rng)
+        checks = [(rng.choice(people), rng.choice(workshops)) for _ in range(OPS)]
+        windows = []
+        for _ in range(OPS // 10):
+            start = DAY0 + datetime.timedelta(minutes=rng.randrange(0, 10 * 24 * 60, 15))
+            windows.append((rng.choice(people), start, start + datetime.timedelta(hours=2)))
+        find = ts.find_workshop_by_id
+        row = {
+            "conflict: index": time_per_call(lambda a, w: ts.schedule.attendee_conflicts(a, w, find), checks),
+            "conflict: scan": time_per_call(lambda a, w: scan_conflicts(ts, a, w), checks),
+            "free: index": time_per_call(ts.free_workshops, windows),
+            "free: scan": time_per_call(lambda a, s, e: scan_free(ts, workshops, a, s, e), windows),
+        }
+        for a, s, e in windows[:20]:
+            assert ({w.workshop_id for w in ts.free_workshops(a, s, e)}
+                    == {w.workshop_id for w in scan_free(ts, workshops, a, s, e)})
+        print(f"{size:>10} " + " ".join(f"{row[c] * 1e6:>14.1f} us" for c in columns))
+
+
+if __name__ == "__main__":
+    main()
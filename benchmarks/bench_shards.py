@@ -0,0 +1,110 @@
+# benchmarks/bench_shards.py
+"""
+Sharded deployment throughput: reservations per second through ShardRouter
+as the number of shard processes grows, against one in-process TicketSystem
+running the same commands through BatchProcessor. Attendees (all-access
+passes) are registered first; the timed phase sends reserve commands for
+random workshops of --exhibitions exhibitions in batches of --batch-size.
+Scaling is bounded by the cores available (printed first): with fewer
+cores than shards the extra processes only add overhead.
+
+Run: python -m benchmarks.bench_shards [--shards 1,2,4] [--reservations 40000] [--storage journal]
+"""
+import argparse
+import io
+import json
+import os
+import random
+import time
+
+from models.exhibition import Exhibition
+from models.ticket_system import TicketSystem
+from models.workshop import Workshop
+from server.batch_processor import BatchProcessor
+from server.shard_router import ShardRouter
+from benchmarks.common import isolated_storage, parse_sizes
+
+
+def catalogue(n_exhibitions: int, per_exhibition: int):
+    out = []
+    for e in range(n_exhibitions):
+        eid = 1000 + e
+        ex = Exhibition(eid, f"Exhibition {eid}", "Shard benchmark")
+        for k in range(per_exhibition):
+            ex.add_workshop(Workshop(eid * 100 + k, f"Workshop {eid}-{k}", 10 ** 6))
+        out.append(ex)
+    return out
+
+
+def workload(n_attendees: int, n_reservations: int, workshop_ids, rng: random.Random):
+    setup = []
+    for i in range(n_attendees):
+        setup.append(("register", {"name": f"Attendee {i}", "email": f"s{i}@example.com",
+                                   "phone": "00971-555-000", "attendee_id": i + 1}))
+        setup.append(("purchase", {"attendee_id": i + 1, "pass_id": 99}))
+    reserves = [("reserve", {"attendee_id": rng.randrange(1, n_attendees + 1),
+                             "workshop_id": rng.choice(workshop_ids)}) for _ in range(n_reservations)]
+    return setup, reserves
+
+
+def batches(commands, size):
+    for start in range(0, len(commands), size):
+        yield commands[start:start + size]
+
+
+def run_single(storage: str, exhibitions, setup, reserves, batch_size: int) -> float:
+    ts = TicketSystem(storage)
+    for ex in exhibitions:
+        ts.add_exhibition(ex)
+    processor = BatchProcessor(ts, batch_size)
+    processor.run([json.dumps({"op": op, "params": params}) for op, params in setup], io.StringIO())
+    lines = [json.dumps({"op": op, "params": params}) for op, params in reserves]
+    start = time.perf_counter()
+    processor.run(lines, io.StringIO())
+    elapsed = time.perf_counter() - start
+    ts.close()
+    return len(reserves) / elapsed
+
+
+def run_sharded(shards: int, storage: str, root: str, exhibitions, setup, reserves, batch_size: int) -> float:
+    with ShardRouter(shards, storage, root) as router:
+        for ex in exhibitions:
+            router.add_exhibition(ex)
+        for batch in batches(setup, batch_size):
+            router.execute(batch)
+        start = time.perf_counter()
+        for batch in batches(reserves, batch_size):
+            router.execute(batch)
+        return len(reserves) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--shards", default="1,2,4")
+    parser.add_argument("--storage", default="journal", choices=["journal", "sqlite", "memory"])
+    parser.add_argument("--attendees", type=int, default=5000)
+    parser.add_argument("--reservations", type=int, default=40000)
+    parser.add_argument("--exhibitions", type=int, default=32)
+    parser.add_argument("--batch-size", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    exhibitions = catalogue(args.exhibitions, 8)
+    workshop_ids = [w.workshop_id for ex in exhibitions for w in ex.workshops]
+    setup, reserves = workload(args.attendees, args.reservations, workshop_ids, rng)
+
+    print(f"{os.cpu_count()} cores, storage={args.storage}, {args.reservations} reservations "
+          f"over {len(workshop_ids)} workshops")
+    with isolated_storage():
+        base = run_single(args.storage, catalogue(args.exhibitions, 8), setup, reserves, args.batch_size)
+    print(f"{'single process':<16} {base:>10,.0f}/s")
+    for shards in parse_sizes(args.shards):
+        with isolated_storage() as tmp:
+            rate = run_sharded(shards, args.storage, os.path.join(tmp, "shards"), exhibitions, setup, reserves,
+                               args.batch_size)
+        print(f"{shards:>2} shard(s)       {rate:>10,.0f}/s  x{rate / base:.2f}")
+
+
+if __name__ == "__main__":
+    main()
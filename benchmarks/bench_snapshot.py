@@ -0,0 +1,80 @@
+# benchmarks/bench_snapshot.py
+"""
+Journal snapshot save and load: the pickle of the live objects the journal
+used to write against storage/snapshot.py's binary format, single-threaded
+and with --workers threads. The state has n attendees holding passes (one
+in ten with an upgrade) and one or two reservations, plus one sales-ledger
+row each. Reports seconds per save / load and the file size.
+
+Run: python -m benchmarks.bench_snapshot [--sizes 100000,1000000] [--workers 4]
+"""
+import argparse
+import gc
+import os
+import random
+import time
+
+from models.attendee import Attendee
+from models.ticket_system import TicketSystem
+from models.sales_ledger import SALE, sale_event
+from storage import data_manager
+from storage.data_manager import save_data, load_data
+from storage.snapshot import save_snapshot, load_snapshot
+from benchmarks.common import isolated_storage, parse_sizes
+
+
+def build_state(n: int, rng: random.Random) -> dict:
+    ts = TicketSystem("memory")
+    workshops = [w for ex in ts.exhibitions for w in ex.workshops]
+    passes = ts.passes
+    for i in range(1, n + 1):
+        a = Attendee(i, f"Attendee {i}", f"user{i}@example.com", f"00971-555-{i % 1000:03d}")
+        p = passes[i % len(passes)]
+        a.purchased_pass = p.upgraded([2]) if i % 10 == 0 and not p.all_access else p
+        reserved = rng.sample(workshops, 1 + i % 2)
+        a.reservations = tuple(w.workshop_id for w in reserved)
+        for w in reserved:
+            w.attendees.add(i)
+        ts.attendees.append(a)
+        ts.sales_ledger.append(sale_event(SALE, 1.7e9 + i, i, p, p.price, sorted(p.exhibitions_access)))
+    ts.sales_log["2026-05-01"] = n
+    return {"attendees": ts.attendees, "exhibitions": ts.exhibitions, "passes": ts.passes,
+            "sales_log": ts.sales_log, "sales_ledger": ts.sales_ledger, "idempotency": ts.idempotency}
+
+
+def timed(fn, *args):
+    gc.collect()
+    start = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - start, result
+
+
+def size_of(filename: str) -> float:
+    return os.path.getsize(os.path.join(data_manager.ROOT_DATA_DIR, filename)) / 2 ** 20
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", default="100000,1000000")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    print(f"{os.cpu_count()} cores")
+    print(f"{'attendees':>10} {'format':<16} {'save s':>8} {'load s':>8} {'MiB':>8}")
+    for n in parse_sizes(args.sizes):
+        state = build_state(n, random.Random(args.seed))
+        with isolated_storage():
+            save, _ = timed(save_data, "snapshot.pkl", {"seq": 0, "state": state})
+            load, _ = timed(load_data, "snapshot.pkl")
+            print(f"{n:>10} {'pickle':<16} {save:>8.2f} {load:>8.2f} {size_of('snapshot.pkl'):>8.1f}")
+            for workers in sorted({1, args.workers}):
+                save, _ = timed(save_snapshot, "snapshot.bin", state, 0, workers)
+                load, _ = timed(load_snapshot, "snapshot.bin", workers)
+                label = f"binary x{workers}"
+                print(f"{n:>10} {label:<16} {save:>8.2f} {load:>8.2f} {size_of('snapshot.bin'):>8.1f}")
+        del state
+
+
+if __name__ == "__main__":
+    main()
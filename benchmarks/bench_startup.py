@@ -0,0 +1,111 @@
+# benchmarks/bench_startup.py
+"""
+Cold-start time and peak RSS of TicketSystem as the attendee count grows,
+for the eager pickle mode and the on-demand lazy and sqlite modes.
+
+Each measurement runs in a fresh interpreter: it times TicketSystem(mode)
+plus one lookup by email, and reports the process's peak RSS. With the
+on-demand modes both should stay flat from 10k to 1M attendees. (Workshop
+rosters still load eagerly; they are bounded by workshop capacity, so the
+generated attendees hold passes but no reservations.)
+
+Run: python -m benchmarks.bench_startup [--sizes 10000,100000,1000000] [--modes pickle,lazy,sqlite]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+from models.attendee import Attendee
+from models.ticket_system import TicketSystem
+from storage import data_manager
+from storage.backend import PickleBackend
+from storage.sqlite_backend import SQLiteBackend
+from benchmarks.common import isolated_storage, parse_sizes
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHILD = """
+import json, resource, sys, time
+
+def peak_rss_mb():
+    # VmHWM restarts at exec; ru_maxrss would include the parent's peak on Linux
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+from storage import data_manager
+data_manager.ROOT_DATA_DIR = sys.argv[1]
+from models.ticket_system import TicketSystem
+start = time.perf_counter()
+ts = TicketSystem(sys.argv[2])
+loaded = time.perf_counter()
+assert ts.find_attendee_by_email(sys.argv[3]) is not None
+done = time.perf_counter()
+print(json.dumps({"startup": loaded - start, "first_lookup": done - loaded,
+                  "rss_mb": peak_rss_mb()}))
+ts.close()
+"""
+
+
+def prepare(n: int, modes) -> dict:
+    """Write n attendees for every mode into the current data directory; return setup seconds per mode."""
+    ts = TicketSystem("pickle")
+    p = ts.find_pass_by_id(99)
+    for i in range(1, n + 1):
+        a = Attendee(i, f"Attendee {i}", f"user{i}@example.com", "00971-555-000")
+        a.purchased_pass = p
+        ts.attendees.append(a)
+    setup = {}
+    start = time.perf_counter()
+    ts._backend.save_all(ts)
+    setup["pickle"] = time.perf_counter() - start
+    if "sqlite" in modes:
+        start = time.perf_counter()
+        db = SQLiteBackend()
+        db.import_state(PickleBackend().load()[0])
+        db.close()
+        setup["sqlite"] = time.perf_counter() - start
+    if "lazy" in modes:
+        # the first lazy start imports attendees.pkl into the store
+        start = time.perf_counter()
+        TicketSystem("lazy").close()
+        setup["lazy"] = time.perf_counter() - start
+    ts.close()
+    return setup
+
+
+def measure(mode: str, n: int) -> dict:
+    out = subprocess.run([sys.executable, "-c", CHILD, data_manager.ROOT_DATA_DIR, mode,
+                          f"user{n // 2}@example.com"],
+                         cwd=ROOT, capture_output=True, text=True, check=True)
+    return json.loads(out.stdout)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", default="10000,100000,1000000")
+    parser.add_argument("--modes", default="pickle,lazy,sqlite")
+    args = parser.parse_args()
+    modes = [m.strip() for m in args.modes.split(",") if m.strip()]
+
+    print(f"{'attendees':>10} {'mode':>8} {'startup':>12} {'first lookup':>14} {'peak RSS':>10} {'setup':>9}")
+    for size in parse_sizes(args.sizes):
+        with isolated_storage():
+            setup = prepare(size, modes)
+            for mode in modes:
+                row = measure(mode, size)
+                print(f"{size:>10} {mode:>8} {row['startup'] * 1000:>9.1f} ms "
+                      f"{row['first_lookup'] * 1e6:>11.0f} us {row['rss_mb']:>7.0f} MB "
+                      f"{setup.get(mode, 0):>8.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+# benchmarks/bench_waitlist.py
+"""
+Waitlist operations as the queue for one full workshop grows: joining
+(reserve_workshop(..., waitlist=True)), looking up a position, and a
+cancellation that promotes the head of the queue (the canceller then
+rejoins at the back, so the size stays constant). Runs with the FIFO
+policy and with all-access holders first.
+
+Run: python -m benchmarks.bench_waitlist [--sizes 1000,10000,100000]
+"""
+import argparse
+import random
+
+from models.attendee import Attendee
+from models.ticket_system import TicketSystem
+from models.waitlist import fifo, all_access_first
+from models.workshop import Workshop
+from benchmarks.common import time_per_call, parse_sizes
+
+OPS = 2000
+CAPACITY = 50
+
+
+def build(n_waiting: int, policy, rng: random.Random):
+    ts = TicketSystem("memory", waitlist_priority=policy)
+    ex = ts.exhibitions[0]
+    workshop = Workshop(900_000, "Popular session", CAPACITY)
+    ex.add_workshop(workshop)
+    passes = [p for p in ts.passes if p.allows_exhibition(ex.exhibition_id)]
+    people = []
+    for i in range(CAPACITY + n_waiting + OPS):
+        a = Attendee(i + 1, f"Attendee {i}", f"a{i}@example.com", "00971-555-000")
+        ts.register_attendee(a)
+        ts.purchase_pass(a, rng.choice(passes))
+        people.append(a)
+    for a in people[:CAPACITY + n_waiting]:
+        ts.reserve_workshop(a, workshop, waitlist=True)
+    return ts, workshop, people
+
+
+def cancel_and_rejoin(ts: TicketSystem, attendee: Attendee, workshop: Workshop) -> None:
+    ts.cancel_reservation(attendee, workshop)  # promotes the head of the waitlist
+    ts.reserve_workshop(attendee, workshop, waitlist=True)
+
+
+def run(n_waiting: int, policy, rng: random.Random) -> dict:
+    ts, workshop, people = build(n_waiting, policy, rng)
+    waiting = people[CAPACITY:CAPACITY + n_waiting]
+    row = {}
+    row["position"] = time_per_call(ts.waitlist_position,
+                                    [(rng.choice(waiting), workshop) for _ in range(OPS)])
+    row["join"] = time_per_call(ts.reserve_workshop,
+                                [(a, workshop, True) for a in people[CAPACITY + n_waiting:]])
+    booked = list(people[:CAPACITY])
+    row["cancel+promote"] = time_per_call(cancel_and_rejoin, [(ts, a, workshop) for a in booked])
+    ts.close()
+    return row
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", default="1000,10000,100000")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    columns = ["join", "position", "cancel+promote"]
+    for name, policy in (("fifo", fifo), ("all_access_first", all_access_first)):
+        print(f"policy: {name}")
+        print(f"{'waiting':>10} " + " ".join(f"{c:>17}" for c in columns))
+        for size in parse_sizes(args.sizes):
+            row = run(size, policy, rng)
+            print(f"{size:>10} " + " ".join(f"{row[c] * 1e6:>14.1f} us" for c in columns))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+# benchmarks/common.py
+"""
+Shared helpers for the benchmark scripts.
+Benchmarks never touch storage/data/: every run points the data manager at a
+throw-away directory.
+"""
+import contextlib
+import shutil
+import tempfile
+import time
+
+from storage import data_manager
+
+
+@contextlib.contextmanager
+def isolated_storage():
+    """Redirect storage/data_manager to a temporary directory for the block."""
+    original = data_manager.ROOT_DATA_DIR
+    tmp = tempfile.mkdtemp(prefix="greenwave-bench-")
+    data_manager.ROOT_DATA_DIR = tmp
+    try:
+        yield tmp
+    finally:
+        data_manager.ROOT_DATA_DIR = original
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def time_per_call(fn, args_list):
+    """Call fn(*args) for every entry of args_list and return mean seconds per call."""
+    start = time.perf_counter()
+    for args in args_list:
+        fn(*args)
+    elapsed = time.perf_counter() - start
+    return elapsed / max(1, len(args_list))
+
+
+def parse_sizes(text):
+    return [int(x.replace("_", "")) for x in text.split(",") if x.strip()]
@@ -0,0 +1,180 @@
+# benchmarks/load_client.py
+"""
+Load generator for server/ticket_server.py.
+
+Each simulated user opens its own connection, registers, buys the all-access
+pass, then repeatedly reserves a random workshop and cancels it again, with a
+capacity report every few requests. Rejected requests (full workshops) are
+expected and counted separately from transport failures.
+
+Prints p50/p99 latency, requests/sec and the server's average batch size.
+
+Run: python -m benchmarks.load_client [--users 200] [--ops 20] [--host 127.0.0.1 --port 8765]
+     python -m benchmarks.load_client --spawn journal   (starts a throw-away server)
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+
+
+class Connection:
+    """One client connection; requests are sent one at a time."""
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self._ids = itertools.count(1)
+
+    @classmethod
+    async def open(cls, host: str, port: int) -> "Connection":
+        return cls(*await asyncio.open_connection(host, port))
+
+    async def call(self, op: str, **params) -> dict:
+        self.writer.write(json.dumps({"id": next(self._ids), "op": op, "params": params}).encode() + b"\n")
+        await self.writer.drain()
+        line = await self.reader.readline()
+        if not line:
+            raise ConnectionError("server closed the connection")
+        return json.loads(line)
+
+    async def close(self) -> None:
+        self.writer.close()
+        await self.writer.wait_closed()
+
+
+class Stats:
+    def __init__(self):
+        self.latencies = []
+        self.rejected = 0
+        self.failed = 0
+
+    def percentile(self, q: float) -> float:
+        data = sorted(self.latencies)
+        if not data:
+            return 0.0
+        return data[min(len(data) - 1, int(q * len(data)))]
+
+
+async def user(host: str, port: int, n: int, ops: int, run_id: str, pass_id: int,
+               workshop_ids: list, stats: Stats) -> None:
+    rng = random.Random(n)
+    conn = await Connection.open(host, port)
+
+    async def timed(op, **params):
+        start = time.perf_counter()
+        try:
+            response = await conn.call(op, **params)
+        except ConnectionError:
+            stats.failed += 1
+            raise
+        stats.latencies.append(time.perf_counter() - start)
+        if not response["ok"]:
+            if response.get("type") == "InternalError":
+                stats.failed += 1
+            else:
+                stats.rejected += 1
+        return response
+
+    try:
+        response = await timed("register", name=f"Load {n}", email=f"load-{run_id}-{n}@example.com",
+                               phone="00971-555-000")
+        if not response["ok"]:
+            return
+        aid = response["result"]["attendee_id"]
+        await timed("purchase_pass", attendee_id=aid, pass_id=pass_id)
+        for i in range(ops):
+            if i % 10 == 9:
+                await timed("capacity_report")
+                continue
+            wid = rng.choice(workshop_ids)
+            response = await timed("reserve", attendee_id=aid, workshop_id=wid)
+            if response["ok"]:
+                await timed("cancel", attendee_id=aid, workshop_id=wid)
+    finally:
+        await conn.close()
+
+
+async def run(args) -> Stats:
+    conn = await Connection.open(args.host, args.port)
+    passes = (await conn.call("passes"))["result"]
+    exhibitions = (await conn.call("exhibitions"))["result"]
+    before = (await conn.call("stats"))["result"]
+    # the pass with the widest access, so every workshop is reservable
+    pass_id = max(passes, key=lambda p: len(p["exhibitions_access"]))["pass_id"]
+    workshop_ids = [w["workshop_id"] for ex in exhibitions for w in ex["workshops"]]
+
+    stats = Stats()
+    run_id = uuid.uuid4().hex[:8]
+    start = time.perf_counter()
+    await asyncio.gather(*(user(args.host, args.port, n, args.ops, run_id, pass_id, workshop_ids, stats)
+                           for n in range(args.users)))
+    elapsed = time.perf_counter() - start
+
+    after = (await conn.call("stats"))["result"]
+    await conn.close()
+
+    batches = after["batches"] - before["batches"]
+    mutations = after["requests"] - before["requests"]
+    print(f"{len(stats.latencies)} requests from {args.users} users in {elapsed:.2f}s "
+          f"({len(stats.latencies) / elapsed:,.0f} req/s)")
+    print(f"latency p50 {stats.percentile(0.50) * 1000:.2f} ms, p99 {stats.percentile(0.99) * 1000:.2f} ms")
+    print(f"{stats.rejected} rejected, {stats.failed} failed; "
+          f"{mutations} mutations in {batches} batches "
+          f"(avg {mutations / batches if batches else 0:.1f} per persist)")
+    return stats
+
+
+def spawn_server(storage: str, data_dir: str, extra: list) -> subprocess.Popen:
+    """Start server/ticket_server.py on a free port with its data in data_dir; return the process."""
+    code = ("import sys; from storage import data_manager; data_manager.ROOT_DATA_DIR = sys.argv[1]; "
+            "from server.ticket_server import main; sys.exit(main(sys.argv[2:]))")
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    return subprocess.Popen(
+        [sys.executable, "-c", code, data_dir, "--port", "0", "--storage", storage] + extra,
+        cwd=root, stdout=subprocess.PIPE, text=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--users", type=int, default=200, help="concurrent connections")
+    parser.add_argument("--ops", type=int, default=20, help="reserve/report rounds per user")
+    parser.add_argument("--spawn", metavar="STORAGE", choices=["pickle", "journal", "sqlite", "lazy", "memory"],
+                        help="start a server with this storage in a temporary directory")
+    parser.add_argument("--max-batch", type=int, default=256, help="passed to a spawned server")
+    parser.add_argument("--max-delay-ms", type=float, default=0.0, help="passed to a spawned server")
+    args = parser.parse_args()
+
+    if not args.spawn:
+        asyncio.run(run(args))
+        return 0
+
+    data_dir = tempfile.mkdtemp(prefix="greenwave-load-")
+    proc = spawn_server(args.spawn, data_dir,
+                        ["--max-batch", str(args.max_batch), "--max-delay-ms", str(args.max_delay_ms)])
+    try:
+        line = proc.stdout.readline()  # "listening on host:port"
+        if not line.startswith("listening on "):
+            raise SystemExit("server failed to start")
+        args.host, port = line.split()[-1].rsplit(":", 1)
+        args.port = int(port)
+        asyncio.run(run(args))
+    finally:
+        proc.terminate()
+        proc.wait()
+        shutil.rmtree(data_dir, ignore_errors=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,197 @@
+# benchmarks/stress_reservations.py
+"""
+Concurrency stress test and throughput benchmark for workshop reservations.
+
+stress:     many threads race for the seats of one workshop, then reserve and
+            cancel at random while a monitor thread watches the roster. Fails
+            (exit code 1) on overbooking or on rosters that
+            disagree with attendee.reservations.
+throughput: reservations/sec across many workshops, comparing one global lock
+            around reserve_workshop (the simplest safe version of the old code)
+            with the fine-grained locks. Under the GIL the gain comes from not
+            serializing persistence and lock waits, not from parallel bytecode.
+
+Run: python -m benchmarks.stress_reservations [--threads 16] [--storage memory|journal]
+"""
+import argparse
+import random
+import sys
+import threading
+import time
+
+from models.attendee import Attendee
+from models.exhibition import Exhibition
+from models.passes import AllAccessPass
+from models.ticket_system import TicketSystem
+from models.workshop import Workshop
+from benchmarks.common import isolated_storage
+
+EXHIBITION_ID = 900
+PASS_ID = 900
+
+
+def build(storage: str, attendees: int, workshops: int, capacity: int):
+    ts = TicketSystem(storage)
+    ex = Exhibition(EXHIBITION_ID, "Stress Hall")
+    ts.add_exhibition(ex)
+    for i in range(workshops):
+        ex.add_workshop(Workshop(9000 + i, f"Stress {i}", capacity))
+    p = AllAccessPass(PASS_ID, 0.0)
+    ts.add_pass(p)
+    people = []
+    with ts.transaction():
+        for i in range(1, attendees + 1):
+            a = Attendee(100_000 + i, f"Stress {i}", f"stress{i}@example.com", "00971-555-000")
+            ts.register_attendee(a)
+            ts.purchase_pass(a, p)
+            people.append(a)
+    return ts, people, list(ex.workshops)
+
+
+def run_threads(n: int, target, *args) -> float:
+    barrier = threading.Barrier(n)
+
+    def worker(i):
+        barrier.wait()
+        target(i, *args)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(n)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return time.perf_counter() - start
+
+
+def check_consistency(ts: TicketSystem, people, workshops) -> list:
+    problems = []
+    for w in workshops:
+        if len(w.attendees) > w.capacity:
+            problems.append(f"workshop {w.workshop_id} overbooked: {len(w.attendees)}/{w.capacity}")
+        for aid in w.attendees:
+            a = ts.find_attendee_by_id(aid)
+            if a is None or w.workshop_id not in a.reservations:
+                problems.append(f"attendee {aid} seated in {w.workshop_id} without a reservation")
+    for a in people:
+        for wid in a.reservations:
+            if a.attendee_id not in ts.find_workshop_by_id(wid).attendees:
+                problems.append(f"attendee {a.attendee_id} holds {wid} without a seat")
+    return problems
+
+
+# -------------------------
+# Stress
+# -------------------------
+def stress(storage: str, threads: int, capacity: int, rounds: int) -> list:
+    # more attendees than seats, so the race always fills the workshop
+    ts, people, (workshop,) = build(storage, max(threads * 4, 2 * capacity), 1, capacity)
+    problems = []
+
+    # phase 1: everybody races for the same seats, some twice
+    won = []
+
+    def grab(i):
+        for a in people[i::threads]:
+            for _ in range(2):
+                try:
+                    ts.reserve_workshop(a, workshop)
+                    won.append(a.attendee_id)
+                except ValueError:
+                    pass
+
+    run_threads(threads, grab)
+    if len(won) != capacity or len(workshop.attendees) != capacity:
+        problems.append(f"race: {len(won)} successful reservations, "
+                        f"{len(workshop.attendees)} seats taken, capacity {capacity}")
+
+    # phase 2: random reserve/cancel churn while a monitor watches the roster
+    stop = threading.Event()
+
+    def monitor():
+        while not stop.is_set():
+            if len(workshop.attendees) > workshop.capacity:
+                problems.append(f"monitor saw {len(workshop.attendees)}/{workshop.capacity}")
+                return
+
+    def churn(i):
+        rng = random.Random(i)
+        mine = people[i::threads]
+        for _ in range(rounds):
+            a = rng.choice(mine)
+            if a.has_reservation(workshop):
+                ts.cancel_reservation(a, workshop)
+            else:
+                try:
+                    ts.reserve_workshop(a, workshop)
+                except ValueError:
+                    pass
+
+    watcher = threading.Thread(target=monitor)
+    watcher.start()
+    run_threads(threads, churn)
+    stop.set()
+    watcher.join()
+
+    problems.extend(check_consistency(ts, people, [workshop]))
+    ts.close()
+    return problems
+
+
+# -------------------------
+# Throughput
+# -------------------------
+def throughput(storage: str, threads: int, per_thread: int, global_lock: bool) -> float:
+    workshops = threads * 4
+    ts, people, rooms = build(storage, threads * per_thread, workshops, per_thread)
+    big_lock = threading.Lock()
+
+    def book(i):
+        rng = random.Random(i)
+        for a in people[i * per_thread:(i + 1) * per_thread]:
+            w = rng.choice(rooms)
+            try:
+                if global_lock:
+                    with big_lock:
+                        ts.reserve_workshop(a, w)
+                else:
+                    ts.reserve_workshop(a, w)
+            except ValueError:
+                pass
+
+    elapsed = run_threads(threads, book)
+    problems = check_consistency(ts, people, rooms)
+    ts.close()
+    if problems:
+        raise AssertionError("; ".join(problems[:5]))
+    return threads * per_thread / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--capacity", type=int, default=25)
+    parser.add_argument("--rounds", type=int, default=2000, help="churn operations per thread")
+    parser.add_argument("--per-thread", type=int, default=2000, help="reservations per thread (throughput)")
+    parser.add_argument("--storage", default="memory", choices=["memory", "journal", "sqlite", "lazy"])
+    args = parser.parse_args()
+
+    # switch threads far more often than the default 5ms to shake out races
+    sys.setswitchinterval(1e-6)
+    with isolated_storage():
+        problems = stress(args.storage, args.threads, args.capacity, args.rounds)
+    for p in problems[:20]:
+        print("FAIL:", p)
+    print(f"stress ({args.threads} threads, capacity {args.capacity}): "
+          f"{'FAILED' if problems else 'ok'}")
+
+    sys.setswitchinterval(0.005)
+    for label, global_lock in (("global lock", True), ("fine-grained", False)):
+        with isolated_storage():
+            rate = throughput(args.storage, args.threads, args.per_thread, global_lock)
+        print(f"{label:>14}: {rate:>10,.0f} reservations/sec")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,340 @@
+# benchmarks/suite.py
+"""
+Reproducible benchmark suite for the ticketing core, with JSON results and
+regression checks against a stored baseline.
+
+For every attendee count it generates a seeded synthetic event (exhibitions,
+workshops, a pass catalogue, attendees holding passes and reservations), then
+measures:
+
+  register_attendee, purchase_pass, upgrade_pass, reserve_workshop,
+  cancel_reservation      mean seconds per call (--ops calls each) on the
+                          --ops-storage backend (memory: the models alone)
+  workshop_capacity_report  mean seconds per call
+  save_all[mode]          full save of the event by that mode's backend
+  load[mode]              backend.load() of what was saved
+  cold_start[mode]        TicketSystem(mode) on the saved data
+
+Every metric is the best of --repeat rounds.
+
+  python -m benchmarks.suite --output results.json
+  python -m benchmarks.suite --baseline results.json   # exit code 1 on a regression
+
+A metric regresses when it is more than --tolerance slower than the baseline
+(default 25%) and by at least --min-delta seconds; metrics or sizes missing
+from either side are listed but never fail the run.
+
+Run: python -m benchmarks.suite [--attendees 1000,10000,100000] [--modes pickle,journal,sqlite,lazy]
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+
+from models.attendee import Attendee
+from models.exhibition import Exhibition
+from models.passes import ExhibitionPass, AllAccessPass
+from models.sales_ledger import SALE, sale_event, wall_clock
+from models.ticket_system import TicketSystem
+from models.workshop import Workshop
+from storage import data_manager
+from storage.backend import make_backend
+from benchmarks.common import isolated_storage, time_per_call, parse_sizes
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FORMAT = 1
+# settings that must match for a comparison to mean anything
+COMPARABLE = ("python", "seed", "exhibitions", "workshops_per_exhibition", "passes", "ops", "ops_storage")
+
+EXHIBITION_BASE, WORKSHOP_BASE, PASS_BASE = 10_000, 1_000_000, 10_000
+
+
+# -------------------------
+# Synthetic event
+# -------------------------
+def build_catalogue(ts: TicketSystem, exhibitions: int, workshops: int, passes: int, rng: random.Random) -> None:
+    """Add exhibitions (each with workshops) and a pass catalogue: exhibition passes plus one all-access."""
+    eids = []
+    for e in range(exhibitions):
+        ex = Exhibition(EXHIBITION_BASE + e, f"Exhibition {e}", "Synthetic benchmark exhibition")
+        ts.add_exhibition(ex)
+        for i in range(workshops):
+            ex.add_workshop(Workshop(WORKSHOP_BASE + e * 1000 + i, f"Workshop {e}/{i}", rng.randint(20, 200)))
+        eids.append(ex.exhibition_id)
+    for i in range(max(0, passes - 1)):
+        access = rng.sample(eids, rng.randint(1, min(3, len(eids))))
+        ts.add_pass(ExhibitionPass(PASS_BASE + i, float(rng.choice((30, 45, 60))), access))
+    if passes:
+        all_access = AllAccessPass(PASS_BASE + passes - 1, 100.0)
+        for eid in eids:
+            all_access.add_exhibition(eid)
+        ts.add_pass(all_access)
+
+
+def bench_passes(ts: TicketSystem):
+    return [p for p in ts.passes if getattr(p, "pass_id", 0) >= PASS_BASE]
+
+
+def bench_workshops(ts: TicketSystem):
+    return [w for ex in ts.exhibitions if ex.exhibition_id >= EXHIBITION_BASE for w in ex.workshops]
+
+
+def populate(ts: TicketSystem, n: int, rng: random.Random, fill: float = 0.7) -> None:
+    """
+    Add n attendees with passes and, up to `fill` of every workshop's
+    capacity, reservations; sales are logged as if bought today.
+    Written straight into the lists (no persistence), then re-indexed.
+    """
+    passes = bench_passes(ts)
+    workshops = bench_workshops(ts)
+    parent = {w.workshop_id: ex.exhibition_id for ex in ts.exhibitions for w in ex.workshops}
+    room = {w.workshop_id: int(w.capacity * fill) - len(w.attendees) for w in workshops}
+    today = datetime.date.today().isoformat()
+    now = wall_clock()
+    attendees = []
+    for i in range(n):
+        aid = 1_000_000 + i
+        a = Attendee(aid, f"Attendee {i}", f"attendee{i}@example.com", "00971-555-000")
+        p = rng.choice(passes)
+        a.purchased_pass = p
+        w = rng.choice(workshops)
+        if room[w.workshop_id] > 0 and p.allows_exhibition(parent[w.workshop_id]):
+            room[w.workshop_id] -= 1
+            w.attendees.add(aid)
+            a.reservations = (w.workshop_id,)
+        ts.sales_ledger.append(sale_event(SALE, now, aid, p, p.price, p.exhibitions_access))
+        attendees.append(a)
+    ts.sales_log[today] = ts.sales_log.get(today, 0) + n
+    ts.attendees.extend(attendees)
+    ts._rebuild_indexes()
+
+
+def new_attendees(n: int, start: int):
+    return [Attendee(start + i, f"New {i}", f"new{start + i}@example.com", "00971-555-000") for i in range(n)]
+
+
+def plan_reservations(ts: TicketSystem, attendees, rng: random.Random):
+    """One (attendee, workshop) per attendee, to a workshop their pass allows that still has room for them."""
+    workshops = [(w, ts.find_workshop_exhibition(w).exhibition_id) for w in bench_workshops(ts)]
+    room = {w.workshop_id: w.spots_left() for w, _ in workshops}
+    plan = []
+    for a in attendees:
+        options = [w for w, eid in workshops if room[w.workshop_id] > 0 and a.purchased_pass.allows_exhibition(eid)]
+        if not options:
+            continue
+        w = rng.choice(options)
+        room[w.workshop_id] -= 1
+        plan.append((a, w))
+    return plan
+
+
+# -------------------------
+# Measurements
+# -------------------------
+def best_of(repeat: int, fn, *args) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def measure_ops(ts: TicketSystem, ops: int, repeat: int, rng: random.Random) -> dict:
+    """Best per-call mean of repeat rounds; every round registers ops new attendees."""
+    rounds = [measure_ops_once(ts, ops, rng) for _ in range(repeat)]
+    return {name: min(r[name] for r in rounds) for name in rounds[0]}
+
+
+def measure_ops_once(ts: TicketSystem, ops: int, rng: random.Random) -> dict:
+    row = {}
+    fresh = new_attendees(ops, ts.next_attendee_id())
+    row["register_attendee"] = time_per_call(ts.register_attendee, [(a,) for a in fresh])
+    passes = bench_passes(ts)
+    row["purchase_pass"] = time_per_call(ts.purchase_pass, [(a, rng.choice(passes)) for a in fresh])
+    eids = [ex.exhibition_id for ex in ts.exhibitions if ex.exhibition_id >= EXHIBITION_BASE]
+    row["upgrade_pass"] = time_per_call(ts.upgrade_pass, [(a, [rng.choice(eids)]) for a in fresh])
+    plan = plan_reservations(ts, fresh, rng)
+    row["reserve_workshop"] = time_per_call(ts.reserve_workshop, plan)
+    row["cancel_reservation"] = time_per_call(ts.cancel_reservation, plan)
+    row["workshop_capacity_report"] = time_per_call(ts.workshop_capacity_report, [()] * 50)
+    return row
+
+
+def measure_storage(ts: TicketSystem, mode: str, repeat: int) -> dict:
+    """save_all / load / cold_start of ts's data in mode, each in its own directory."""
+    root = data_manager.ROOT_DATA_DIR
+    data_manager.ROOT_DATA_DIR = os.path.join(root, mode)
+    os.makedirs(data_manager.ROOT_DATA_DIR, exist_ok=True)
+    try:
+        backend = make_backend(mode)
+        save = best_of(repeat, backend.save_all, ts)
+        backend.close()
+
+        def load():
+            b = make_backend(mode)
+            b.load()
+            b.close()
+
+        def cold_start():
+            TicketSystem(mode).close()
+
+        return {f"save_all[{mode}]": save, f"load[{mode}]": best_of(repeat, load),
+                f"cold_start[{mode}]": best_of(repeat, cold_start)}
+    finally:
+        data_manager.ROOT_DATA_DIR = root
+
+
+def run_size(n: int, args) -> dict:
+    rng = random.Random(f"{args.seed}:{n}")
+    with isolated_storage():
+        ts = TicketSystem("memory")
+        build_catalogue(ts, args.exhibitions, args.workshops, args.passes, rng)
+        populate(ts, n, rng)
+        row = {}
+        for mode in args.modes:
+            row.update(measure_storage(ts, mode, args.repeat))
+        if args.ops_storage != "memory":
+            # time the operations through that backend, on a copy of the event saved with it
+            data_manager.ROOT_DATA_DIR = os.path.join(data_manager.ROOT_DATA_DIR, "ops")
+            os.makedirs(data_manager.ROOT_DATA_DIR)
+            backend = make_backend(args.ops_storage)
+            backend.save_all(ts)
+            backend.close()
+            ts.close()
+            ts = TicketSystem(args.ops_storage)
+        row.update(measure_ops(ts, args.ops, args.repeat, rng))
+        ts.close()
+    return row
+
+
+# -------------------------
+# Results
+# -------------------------
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, timeout=10).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return ""
+
+
+def metadata(args) -> dict:
+    return {
+        "format": FORMAT,
+        "created": datetime.datetime.now().isoformat(timespec="seconds"),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "seed": args.seed,
+        "exhibitions": args.exhibitions,
+        "workshops_per_exhibition": args.workshops,
+        "passes": args.passes,
+        "ops": args.ops,
+        "ops_storage": args.ops_storage,
+        "modes": args.modes,
+    }
+
+
+def compare(results: dict, baseline: dict, tolerance: float, min_delta: float) -> list:
+    """Rows of (size, metric, baseline, current, ratio, status); status is ok, faster, REGRESSION or missing."""
+    rows = []
+    current, previous = results["results"], baseline.get("results", {})
+    for size in sorted(set(current) | set(previous), key=int):
+        metrics = current.get(size, {})
+        old = previous.get(size, {})
+        for name in sorted(set(metrics) | set(old)):
+            if name not in metrics or name not in old:
+                rows.append((size, name, old.get(name), metrics.get(name), None, "missing"))
+                continue
+            before, after = old[name], metrics[name]
+            ratio = after / before if before > 0 else float("inf")
+            if ratio > 1 + tolerance and after - before >= min_delta:
+                status = "REGRESSION"
+            elif ratio < 1 / (1 + tolerance):
+                status = "faster"
+            else:
+                status = "ok"
+            rows.append((size, name, before, after, ratio, status))
+    return rows
+
+
+def print_results(results: dict) -> None:
+    print(f"{'attendees':>10} {'metric':<28} {'time':>14}")
+    for size, metrics in results["results"].items():
+        for name, seconds in metrics.items():
+            print(f"{size:>10} {name:<28} {format_seconds(seconds):>14}")
+
+
+def print_comparison(rows: list) -> None:
+    print(f"{'attendees':>10} {'metric':<28} {'baseline':>12} {'current':>12} {'ratio':>7}  status")
+    for size, name, before, after, ratio, status in rows:
+        print(f"{size:>10} {name:<28} {format_seconds(before):>12} {format_seconds(after):>12} "
+              f"{'' if ratio is None else f'{ratio:.2f}':>7}  {status}")
+
+
+def format_seconds(seconds) -> str:
+    if seconds is None:
+        return "-"
+    if seconds >= 1:
+        return f"{seconds:.2f} s"
+    if seconds >= 1e-3:
+        return f"{seconds * 1e3:.2f} ms"
+    return f"{seconds * 1e6:.1f} us"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--attendees", default="1000,10000,100000", help="comma-separated sizes (up to 1000000)")
+    parser.add_argument("--exhibitions", type=int, default=10)
+    parser.add_argument("--workshops", type=int, default=20, help="workshops per exhibition")
+    parser.add_argument("--passes", type=int, default=20, help="catalogue passes (the last one is all-access)")
+    parser.add_argument("--ops", type=int, default=2000, help="calls per operation")
+    parser.add_argument("--ops-storage", default="memory", help="backend the operations are timed on")
+    parser.add_argument("--modes", default="pickle,journal,sqlite,lazy", help="backends for save/load/cold start")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    parser.add_argument("--baseline", help="JSON results to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown, as a fraction")
+    parser.add_argument("--min-delta", type=float, default=1e-6, help="ignore slowdowns smaller than this (s)")
+    args = parser.parse_args()
+    args.modes = [m for m in args.modes.split(",") if m.strip()]
+
+    results = {"meta": metadata(args), "results": {}}
+    for size in parse_sizes(args.attendees):
+        results["results"][str(size)] = run_size(size, args)
+        print(f"{size} attendees done", file=sys.stderr, flush=True)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    if not args.baseline:
+        print_results(results)
+        return
+
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    if baseline.get("meta", {}).get("format") != FORMAT:
+        sys.exit(f"{args.baseline}: not a benchmark suite result (format {FORMAT})")
+    rows = compare(results, baseline, args.tolerance, args.min_delta)
+    print(f"baseline: {args.baseline} (commit {baseline['meta'].get('commit') or '?'}, "
+          f"{baseline['meta'].get('created', '?')})")
+    for key in COMPARABLE:
+        if baseline["meta"].get(key) != results["meta"][key]:
+            print(f"warning: {key} differs from the baseline ({baseline['meta'].get(key)!r} vs "
+                  f"{results['meta'][key]!r})", file=sys.stderr)
+    print_comparison(rows)
+    regressions = [r for r in rows if r[5] == "REGRESSION"]
+    if regressions:
+        print(f"{len(regressions)} regression(s) beyond {args.tolerance:.0%}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
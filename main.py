@@ -87,7 +87,7 @@ def demo_flow():
     # Upgrade Alice to include exhibition 2, then reserve workshop in exhibition 2
     print("\n=== Upgrade Pass & Reserve in Exhibition 2 ===")
     ts.upgrade_pass(attendee, [2])
-    print("Alice pass after upgrade:", attendee.purchased_pass.exhibitions_access)
+    print("Alice pass after upgrade:", sorted(attendee.purchased_pass.exhibitions_access))
     try:
         ts.reserve_workshop(attendee, workshop2)
         print("Alice successfully reserved workshop in exhibition 2:", workshop2)
@@ -99,7 +99,7 @@ def demo_flow():
     print(ts.daily_sales())
 
     print("\n=== Capacity report ===")
-    for row in ts.workshop_capacity_report():
+    for row in ts.iter_capacity_report():
         print(row)
 
     print("\nDemo complete. Data saved to storage/data/ as pickle files.")
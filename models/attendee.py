@@ -1,4 +1,7 @@
-class Attendee:
+from models.slotted import SlottedModel
+
+
+class Attendee(SlottedModel):
     """
     Represents a registered conference attendee.
     
@@ -8,68 +11,106 @@ class Attendee:
     - Manage workshop reservations
     - Allow modification of profile information
     - Provide helper utilities for GUI and backend logic
+
+    Reservations are kept as a tuple of workshop ids; no reservations is the
+    shared empty tuple, so an attendee costs one slot for them.
     """
 
+    __slots__ = ("attendee_id", "name", "email", "phone", "purchased_pass", "reservations",
+                 "_registry", "__weakref__")
+    # _registry: TicketSystem this attendee is registered with (never pickled)
+    _transient = ("_registry",)
+
     def __init__(self, attendee_id, name, email, phone):
         self.attendee_id = attendee_id
         self.name = name
         self.email = email
         self.phone = phone
+        self._registry = None
         
         # The pass that the attendee purchased (None initially)
         self.purchased_pass = None
         
-        # List of Workshop objects the attendee has reserved
-        self.reservations = []
+        # Ids of the workshops the attendee has reserved
+        self.reservations = ()
 
     # ----------------------------------------------------------
     # Profile Management
     # ----------------------------------------------------------
 
+    @staticmethod
+    def validate_name(name):
+        if not name.strip():
+            raise ValueError("Name cannot be empty.")
+
+    @staticmethod
+    def validate_email(email):
+        if "@" not in email or "." not in email:
+            raise ValueError("Invalid email address.")
+
+    @staticmethod
+    def validate_phone(phone):
+        if len(phone) < 5:
+            raise ValueError("Phone number too short.")
+
     def update_name(self, new_name):
         """Update attendee's name."""
-        if not new_name.strip():
-            raise ValueError("Name cannot be empty.")
+        self.validate_name(new_name)
+        old = self.name
         self.name = new_name
+        self._changed("name", old)
 
     def update_email(self, new_email):
         """Update attendee's email."""
-        if "@" not in new_email or "." not in new_email:
-            raise ValueError("Invalid email address.")
+        self.validate_email(new_email)
+        if self._registry is not None:
+            # keeps the email index in sync; raises if the email is taken
+            self._registry._on_email_changing(self, new_email)
+        old = self.email
         self.email = new_email
+        self._changed("email", old)
 
     def update_phone(self, new_phone):
         """Update phone number."""
-        if len(new_phone) < 5:
-            raise ValueError("Phone number too short.")
+        self.validate_phone(new_phone)
+        old = self.phone
         self.phone = new_phone
+        self._changed("phone", old)
+
+    def _changed(self, field, old_value):
+        """Tell the owning TicketSystem a profile field changed (for persistence/rollback)."""
+        if self._registry is not None:
+            self._registry._on_attendee_changed(self, field, old_value)
 
     # ----------------------------------------------------------
     # Workshop Reservations
     # ----------------------------------------------------------
 
+    def has_reservation(self, workshop):
+        return workshop.workshop_id in self.reservations
+
     def reserve_workshop(self, workshop):
         """
         Reserve a workshop.
         This method is used internally by TicketSystem.
         """
-        if workshop in self.reservations:
+        if workshop.workshop_id in self.reservations:
             raise ValueError("Workshop already reserved.")
 
-        self.reservations.append(workshop)
+        self.reservations += (workshop.workshop_id,)
 
     def cancel_reservation(self, workshop):
         """
         Cancel a previously reserved workshop.
         """
-        if workshop not in self.reservations:
+        wid = workshop.workshop_id
+        if wid not in self.reservations:
             raise ValueError("You have not reserved this workshop.")
 
-        self.reservations.remove(workshop)
+        self.reservations = tuple(r for r in self.reservations if r != wid)
 
         # Remove attendee from workshop attendee list as well
-        if self.attendee_id in workshop.attendees:
-            workshop.attendees.remove(self.attendee_id)
+        workshop.cancel_reservation(self.attendee_id)
 
     # ----------------------------------------------------------
     # Utility Methods
@@ -80,8 +121,16 @@ class Attendee:
         return self.purchased_pass is not None
 
     def get_reserved_workshop_titles(self):
-        """Return list of workshop names for GUI display."""
-        return [w.title for w in self.reservations]
+        """Return list of workshop names for GUI display (looked up in the owning TicketSystem)."""
+        if self._registry is None:
+            return []
+        workshops = (self._registry.find_workshop_by_id(wid) for wid in self.reservations)
+        return [w.title for w in workshops if w is not None]
+
+    def __setstate__(self, state):
+        super().__setstate__(state)
+        # pickles from before the switch to ids hold Workshop objects in a list
+        self.reservations = tuple(getattr(w, "workshop_id", w) for w in self.reservations)
 
     def __str__(self):
         """Human-readable formatting."""
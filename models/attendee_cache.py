@@ -0,0 +1,43 @@
+# models/attendee_cache.py
+import collections
+import threading
+from typing import Iterator
+
+
+class AttendeeCache:
+    """
+    Bounded LRU of the attendees a TicketSystem with a non-resident backend
+    keeps in memory. It stands in for the attendees list (append, remove,
+    iteration, len).
+
+    Evicting only drops the cache's reference: TicketSystem's indexes are
+    weak in this mode, so an attendee still held elsewhere (a GUI window, an
+    open transaction) keeps resolving to the same object, and one nobody holds
+    is simply read back from the backend on the next lookup.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = max(1, capacity)
+        self._items = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def append(self, attendee) -> None:
+        """Add attendee, or mark it most recently used."""
+        with self._lock:
+            items = self._items
+            items[attendee.attendee_id] = attendee
+            items.move_to_end(attendee.attendee_id)
+            while len(items) > self.capacity:
+                items.popitem(last=False)
+
+    def remove(self, attendee) -> None:
+        with self._lock:
+            if self._items.get(attendee.attendee_id) is attendee:
+                del self._items[attendee.attendee_id]
+
+    def __iter__(self) -> Iterator:
+        with self._lock:
+            return iter(list(self._items.values()))
+
+    def __len__(self) -> int:
+        return len(self._items)
@@ -0,0 +1,284 @@
+# models/bulk_export.py
+"""
+Streaming exports of the attendee roster and the workshop capacity report
+to CSV or JSONL, optionally gzip-compressed.
+
+Rows are produced by generators (TicketSystem.iter_attendees(),
+iter_capacity_report()) and written one at a time, so memory use does not
+depend on the number of attendees: on the lazy and sqlite backends
+attendees are read from disk page by page and never all loaded. Workshop
+titles come from one id -> title map built up front.
+
+Roster filters:
+- exhibition: attendees whose pass covers the exhibition
+- workshop: attendees holding a seat in the workshop (only they are read)
+- pass_type: "all_access", "exhibition", "none" (no pass), or a pass id
+  (the catalogue pass, whether or not the holder upgraded it)
+
+A progress callback gets (rows scanned, rows to scan) every progress_every
+rows and once at the end; rows to scan is None when the count is unknown.
+It runs on the exporting thread, so a GUI should hand the numbers to its
+event loop and keep the export off that loop. An exception raised by the
+callback stops the export. Exports to a path are written to a temporary
+file that replaces the target only once it is complete.
+
+Run: python -m models.bulk_export roster|capacity FILE [--format csv|jsonl] [--gzip]
+                                 [--exhibition ID] [--workshop ID] [--pass-type TYPE] [--storage pickle]
+"""
+import argparse
+import csv
+import gzip
+import json
+import os
+import sys
+import time
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, TextIO, Union
+
+from models.attendee import Attendee
+from models.ticket_system import TicketSystem
+
+Progress = Callable[[int, Optional[int]], None]
+
+ROSTER_FIELDS = ["attendee_id", "name", "email", "phone", "pass_id", "pass_type", "exhibitions", "workshops"]
+CAPACITY_FIELDS = ["exhibition_id", "exhibition_name", "workshop_id", "workshop_title",
+                   "capacity", "registered", "spots_left"]
+PASS_TYPES = ("all_access", "exhibition", "none")
+
+
+class ExportReport:
+    """Counters for one export run."""
+
+    def __init__(self):
+        self.scanned = 0
+        self.written = 0
+        self.started = time.perf_counter()
+        self.elapsed = 0.0
+
+    @property
+    def rows_per_sec(self) -> float:
+        return self.written / self.elapsed if self.elapsed else 0.0
+
+    def summary(self) -> str:
+        return (f"{self.written} rows written ({self.scanned} scanned) in {self.elapsed:.2f}s "
+                f"({self.rows_per_sec:,.0f} rows/sec)")
+
+
+# -------------------------
+# Row sources
+# -------------------------
+def _pass_type(p) -> str:
+    if p is None:
+        return "none"
+    return "all_access" if p.all_access else "exhibition"
+
+
+def _pass_matches(p, pass_type: Union[str, int]) -> bool:
+    if isinstance(pass_type, int):
+        return p is not None and p.original.pass_id == pass_type
+    if pass_type not in PASS_TYPES:
+        raise ValueError(f"Unknown pass type: {pass_type} (expected one of {', '.join(PASS_TYPES)} or a pass id)")
+    return _pass_type(p) == pass_type
+
+
+class Roster:
+    """
+    Roster rows for one TicketSystem, filtered. len() is the number of
+    attendees that will be scanned (not the number of rows that match).
+    """
+
+    def __init__(self, ts: TicketSystem, exhibition_id: Optional[int] = None,
+                 workshop_id: Optional[int] = None, pass_type: Union[str, int, None] = None):
+        self.ts = ts
+        self.exhibition_id = exhibition_id
+        self.pass_type = pass_type
+        self.workshop = None
+        if workshop_id is not None:
+            self.workshop = ts.find_workshop_by_id(workshop_id)
+            if self.workshop is None:
+                raise KeyError("Workshop not found.")
+        if exhibition_id is not None and ts.find_exhibition_by_id(exhibition_id) is None:
+            raise KeyError("Exhibition not found.")
+        if pass_type is not None:
+            _pass_matches(None, pass_type)  # reject an unknown type before the scan
+        self._titles: Dict[int, str] = {w.workshop_id: w.title for ex in ts.exhibitions for w in ex.workshops}
+
+    def __len__(self):
+        if self.workshop is not None:
+            return len(self.workshop.attendees)
+        return self.ts.attendee_count()
+
+    def _candidates(self) -> Iterator[Attendee]:
+        if self.workshop is None:
+            return self.ts.iter_attendees()
+        find = self.ts.find_attendee_by_id
+        return (a for a in map(find, list(self.workshop.attendees)) if a is not None)
+
+    def matches(self, attendee: Attendee) -> bool:
+        p = attendee.purchased_pass
+        if self.exhibition_id is not None and (p is None or not p.allows_exhibition(self.exhibition_id)):
+            return False
+        return self.pass_type is None or _pass_matches(p, self.pass_type)
+
+    def row(self, attendee: Attendee) -> dict:
+        p = attendee.purchased_pass
+        if p is None:
+            exhibitions = ""
+        else:
+            exhibitions = "all" if p.all_access else ";".join(map(str, sorted(p.exhibitions_access)))
+        titles = self._titles
+        return {
+            "attendee_id": attendee.attendee_id,
+            "name": attendee.name,
+            "email": attendee.email,
+            "phone": attendee.phone,
+            "pass_id": None if p is None else p.pass_id,
+            "pass_type": _pass_type(p),
+            "exhibitions": exhibitions,
+            "workshops": "; ".join(titles[wid] for wid in attendee.reservations if wid in titles),
+        }
+
+    def scan(self) -> Iterator[Optional[dict]]:
+        """One item per attendee scanned: its row, or None if it is filtered out."""
+        for attendee in self._candidates():
+            yield self.row(attendee) if self.matches(attendee) else None
+
+
+class CapacityReport:
+    """Rows of TicketSystem.iter_capacity_report(), optionally for one exhibition."""
+
+    def __init__(self, ts: TicketSystem, exhibition_id: Optional[int] = None):
+        self.ts = ts
+        self.exhibition_id = exhibition_id
+
+    def __len__(self):
+        return sum(len(ex.workshops) for ex in self.ts.exhibitions
+                   if self.exhibition_id is None or ex.exhibition_id == self.exhibition_id)
+
+    def scan(self) -> Iterator[Optional[dict]]:
+        for row in self.ts.iter_capacity_report():
+            yield row if self.exhibition_id is None or row["exhibition_id"] == self.exhibition_id else None
+
+
+# -------------------------
+# Writers
+# -------------------------
+def write_csv(rows: Iterable[dict], out: TextIO, fields: List[str]) -> None:
+    writer = csv.DictWriter(out, fieldnames=fields, extrasaction="ignore")
+    writer.writeheader()
+    for row in rows:
+        writer.writerow(row)
+
+
+def write_jsonl(rows: Iterable[dict], out: TextIO, fields: List[str]) -> None:
+    for row in rows:
+        out.write(json.dumps(row) + "\n")
+
+
+WRITERS = {"csv": write_csv, "jsonl": write_jsonl}
+
+
+def detect_format(path: str) -> str:
+    base = path[:-3] if path.endswith(".gz") else path
+    ext = os.path.splitext(base)[1].lower()
+    return "jsonl" if ext in (".jsonl", ".ndjson", ".json") else "csv"
+
+
+def export(source, target: Union[str, TextIO], fields: List[str], fmt: str = "csv",
+           compress: Optional[bool] = None, progress: Optional[Progress] = None,
+           progress_every: int = 10_000) -> ExportReport:
+    """
+    Write a Roster or CapacityReport to target, a path or an open text stream.
+    compress: gzip the file (default: when the path ends in .gz; paths only).
+    """
+    report = ExportReport()
+    total = len(source) if progress is not None else None
+
+    def rows() -> Iterator[dict]:
+        for row in source.scan():
+            report.scanned += 1
+            if progress is not None and report.scanned % progress_every == 0:
+                progress(report.scanned, total)
+            if row is not None:
+                report.written += 1
+                yield row
+
+    writer = WRITERS[fmt]
+    if not isinstance(target, str):
+        writer(rows(), target, fields)
+    else:
+        if compress is None:
+            compress = target.endswith(".gz")
+        tmp = target + ".tmp"
+        try:
+            if compress:
+                with gzip.open(tmp, "wt", encoding="utf-8", newline="") as out:
+                    writer(rows(), out, fields)
+            else:
+                with open(tmp, "w", encoding="utf-8", newline="") as out:
+                    writer(rows(), out, fields)
+            os.replace(tmp, target)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+    if progress is not None:
+        progress(report.scanned, total)
+    report.elapsed = time.perf_counter() - report.started
+    return report
+
+
+def export_roster(ts: TicketSystem, target: Union[str, TextIO], fmt: Optional[str] = None,
+                  exhibition_id: Optional[int] = None, workshop_id: Optional[int] = None,
+                  pass_type: Union[str, int, None] = None, **options) -> ExportReport:
+    """Attendees with their pass and reserved workshop titles (options: see export())."""
+    fmt = fmt or (detect_format(target) if isinstance(target, str) else "csv")
+    return export(Roster(ts, exhibition_id, workshop_id, pass_type), target, ROSTER_FIELDS, fmt, **options)
+
+
+def export_capacity(ts: TicketSystem, target: Union[str, TextIO], fmt: Optional[str] = None,
+                    exhibition_id: Optional[int] = None, **options) -> ExportReport:
+    """The workshop capacity report (options: see export())."""
+    fmt = fmt or (detect_format(target) if isinstance(target, str) else "csv")
+    return export(CapacityReport(ts, exhibition_id), target, CAPACITY_FIELDS, fmt, **options)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export the attendee roster or the capacity report.")
+    parser.add_argument("what", choices=["roster", "capacity"])
+    parser.add_argument("file", help="output file, or - for stdout")
+    parser.add_argument("--format", choices=sorted(WRITERS), help="default: from the file extension")
+    parser.add_argument("--gzip", action="store_true", help="compress (default for .gz files)")
+    parser.add_argument("--exhibition", type=int)
+    parser.add_argument("--workshop", type=int, help="roster only")
+    parser.add_argument("--pass-type", help=f"roster only: {', '.join(PASS_TYPES)} or a pass id")
+    parser.add_argument("--storage", default="pickle", choices=["pickle", "journal", "sqlite", "lazy"])
+    parser.add_argument("--quiet", action="store_true", help="no progress on stderr")
+    args = parser.parse_args(argv)
+
+    pass_type = args.pass_type
+    if pass_type is not None and pass_type.isdigit():
+        pass_type = int(pass_type)
+    target = sys.stdout if args.file == "-" else args.file
+    options = {"compress": args.gzip or None}
+    if not args.quiet:
+        options["progress"] = lambda done, total: print(f"\r{done}/{total if total is not None else '?'}",
+                                                        end="", file=sys.stderr)
+    ts = TicketSystem(args.storage)
+    try:
+        if args.what == "roster":
+            report = export_roster(ts, target, args.format, args.exhibition, args.workshop, pass_type, **options)
+        else:
+            report = export_capacity(ts, target, args.format, args.exhibition, **options)
+    except (KeyError, ValueError) as e:
+        print(e.args[0] if e.args else e, file=sys.stderr)
+        return 1
+    finally:
+        ts.close()
+    if not args.quiet:
+        print(file=sys.stderr)
+    print(report.summary(), file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,251 @@
+# models/bulk_import.py
+"""
+Streaming bulk import of attendees (optionally with a pass and workshop
+reservations) from CSV or JSONL.
+
+Rows flow through a generator pipeline (read -> normalize -> chunk), so memory
+use does not depend on the file size. Each chunk runs in one
+TicketSystem.transaction() and is persisted once; each row runs in a nested
+savepoint so a failing row is rolled back and reported without aborting the
+rest of the batch.
+
+Recognized columns: attendee_id (optional, assigned when blank), name, email,
+phone, pass_id (optional), workshops (optional; a JSON list or ids separated
+by ';' / ',' / spaces).
+
+Run: python -m models.bulk_import FILE [--format csv|jsonl] [--storage pickle|journal|sqlite|lazy]
+"""
+import argparse
+import csv
+import io
+import itertools
+import json
+import os
+import re
+import sys
+import time
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple
+
+from models.attendee import Attendee
+from models.ticket_system import TicketSystem
+
+Row = Tuple[int, dict]  # (line number, raw fields)
+
+
+class RowError:
+    """A rejected input row."""
+
+    def __init__(self, line: int, email: str, message: str):
+        self.line = line
+        self.email = email
+        self.message = message
+
+    def __str__(self):
+        return f"line {self.line} ({self.email or '-'}): {self.message}"
+
+
+class ImportReport:
+    """Counters for one import run. Only the first max_errors errors are kept."""
+
+    def __init__(self, max_errors: int = 1000):
+        self.rows = 0
+        self.imported = 0
+        self.passes = 0
+        self.reservations = 0
+        self.failed = 0
+        self.chunks = 0
+        self.errors: List[RowError] = []
+        self.max_errors = max_errors
+        self.started = time.perf_counter()
+        self.elapsed = 0.0
+
+    @property
+    def rows_per_sec(self) -> float:
+        return self.rows / self.elapsed if self.elapsed else 0.0
+
+    def summary(self) -> str:
+        return (f"{self.rows} rows in {self.elapsed:.2f}s ({self.rows_per_sec:,.0f} rows/sec): "
+                f"{self.imported} imported, {self.failed} failed, {self.passes} passes, "
+                f"{self.reservations} reservations, {self.chunks} chunks persisted")
+
+
+# -------------------------
+# Readers
+# -------------------------
+def read_csv(stream) -> Iterator[Row]:
+    reader = csv.DictReader(stream)
+    for row in reader:
+        yield reader.line_num, row
+
+
+def read_jsonl(stream) -> Iterator[Row]:
+    for line_no, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as e:
+            row = {"_error": f"Invalid JSON: {e}"}
+        yield line_no, row
+
+
+READERS = {"csv": read_csv, "jsonl": read_jsonl}
+
+
+def detect_format(path: str) -> str:
+    ext = os.path.splitext(path)[1].lower()
+    return "jsonl" if ext in (".jsonl", ".ndjson", ".json") else "csv"
+
+
+# -------------------------
+# Normalization
+# -------------------------
+def _text(row: dict, key: str) -> str:
+    value = row.get(key)
+    return "" if value is None else str(value).strip()
+
+
+def _optional_int(row: dict, key: str) -> Optional[int]:
+    text = _text(row, key)
+    return int(text) if text else None
+
+
+def _workshop_ids(value) -> List[int]:
+    if value is None or value == "":
+        return []
+    if isinstance(value, (list, tuple)):
+        return [int(v) for v in value]
+    return [int(v) for v in re.split(r"[;,\s]+", str(value).strip()) if v]
+
+
+# -------------------------
+# Importer
+# -------------------------
+class BulkImporter:
+    """
+    Imports rows into a TicketSystem.
+
+    Emails are deduplicated with the indexed lookup by email: rows are
+    registered as they go, so it covers earlier rows of the same batch too,
+    and a row that was rolled back leaves nothing behind that would reject
+    a later, corrected row.
+    """
+
+    def __init__(self, ts: TicketSystem, chunk_size: int = 1000,
+                 on_error: Optional[Callable[[RowError], None]] = None,
+                 max_errors: int = 1000):
+        self.ts = ts
+        self.chunk_size = chunk_size
+        self.on_error = on_error
+        self.max_errors = max_errors
+
+    def import_rows(self, rows: Iterable[Row]) -> ImportReport:
+        report = ImportReport(self.max_errors)
+        next_id = self.ts.next_attendee_id()
+
+        rows = iter(rows)
+        while True:
+            chunk = list(itertools.islice(rows, self.chunk_size))
+            if not chunk:
+                break
+            with self.ts.transaction():
+                for line, raw in chunk:
+                    report.rows += 1
+                    try:
+                        with self.ts.transaction():
+                            attendee, pass_id, workshops = self._prepare(raw, next_id)
+                            if attendee.attendee_id >= next_id:
+                                next_id = attendee.attendee_id + 1
+                            self._apply(attendee, pass_id, workshops, report)
+                        report.imported += 1
+                    except (ValueError, PermissionError, TypeError) as e:
+                        self._fail(report, RowError(line, _text(raw, "email"), str(e)))
+            report.chunks += 1
+
+        report.elapsed = time.perf_counter() - report.started
+        return report
+
+    def _prepare(self, raw: dict, next_id: int) -> Tuple[Attendee, Optional[int], List[int]]:
+        if "_error" in raw:
+            raise ValueError(raw["_error"])
+        name, email, phone = _text(raw, "name"), _text(raw, "email"), _text(raw, "phone")
+
+        # same rules as Attendee.update_name/update_email/update_phone
+        Attendee.validate_name(name)
+        Attendee.validate_email(email)
+        Attendee.validate_phone(phone)
+
+        if self.ts.find_attendee_by_email(email):
+            raise ValueError("Email already registered.")
+
+        aid = _optional_int(raw, "attendee_id")
+        if aid is None:
+            aid = next_id
+        elif self.ts.find_attendee_by_id(aid):
+            raise ValueError("Attendee ID already registered.")
+
+        pass_id = _optional_int(raw, "pass_id")
+        workshops = _workshop_ids(raw.get("workshops"))
+        if workshops and pass_id is None:
+            raise PermissionError("Attendee must purchase a pass before reserving workshops.")
+        return Attendee(aid, name, email, phone), pass_id, workshops
+
+    def _apply(self, attendee: Attendee, pass_id: Optional[int], workshops: List[int],
+               report: ImportReport) -> None:
+        ts = self.ts
+        ts.register_attendee(attendee)
+        if pass_id is not None:
+            p = ts.find_pass_by_id(pass_id)
+            if p is None:
+                raise ValueError(f"Unknown pass id {pass_id}.")
+            ts.purchase_pass(attendee, p)
+        for wid in workshops:
+            w = ts.find_workshop_by_id(wid)
+            if w is None:
+                raise ValueError(f"Unknown workshop id {wid}.")
+            ts.reserve_workshop(attendee, w)
+        # counted only once the whole row has gone through
+        report.passes += pass_id is not None
+        report.reservations += len(workshops)
+
+    def _fail(self, report: ImportReport, error: RowError) -> None:
+        report.failed += 1
+        if len(report.errors) < report.max_errors:
+            report.errors.append(error)
+        if self.on_error is not None:
+            self.on_error(error)
+
+    def import_file(self, path: str, fmt: Optional[str] = None) -> ImportReport:
+        """Import from a file path ('-' reads stdin)."""
+        fmt = fmt or ("csv" if path == "-" else detect_format(path))
+        reader = READERS[fmt]
+        if path == "-":
+            return self.import_rows(reader(io.TextIOWrapper(sys.stdin.buffer, encoding="utf-8", newline="")))
+        with open(path, newline="", encoding="utf-8") as f:
+            return self.import_rows(reader(f))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk-import attendees from CSV or JSONL.")
+    parser.add_argument("file", help="input file, or - for stdin")
+    parser.add_argument("--format", choices=sorted(READERS), help="default: from the file extension")
+    parser.add_argument("--storage", default="pickle", choices=["pickle", "journal", "sqlite", "lazy"])
+    parser.add_argument("--chunk-size", type=int, default=1000, help="rows persisted per flush")
+    parser.add_argument("--errors", help="write rejected rows to this file instead of stderr")
+    args = parser.parse_args(argv)
+
+    err_out = open(args.errors, "w", encoding="utf-8") if args.errors else sys.stderr
+    ts = TicketSystem(args.storage)
+    try:
+        importer = BulkImporter(ts, args.chunk_size, on_error=lambda e: print(e, file=err_out))
+        report = importer.import_file(args.file, args.format)
+    finally:
+        ts.close()
+        if err_out is not sys.stderr:
+            err_out.close()
+    print(report.summary())
+    return 0 if report.failed == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,276 @@
+# models/checkin.py
+import base64
+import binascii
+import hmac
+import os
+import secrets
+import struct
+import threading
+import time
+from typing import Dict, FrozenSet, Iterable, List, NamedTuple, Optional, Set
+
+from storage.data_manager import append_bytes, load_bytes, save_bytes, sync_file
+
+# Badge token: header, then exhibition ids, then reserved workshop ids, then the MAC.
+# header: version, key id, attendee id, pass id (-1: none), expiry (epoch seconds),
+#         number of exhibitions, number of workshops
+_HEADER = struct.Struct("<BBqqIHH")
+_ID = "I"  # exhibition / workshop ids are stored as uint32
+ALL_EXHIBITIONS = 0xFFFF  # number of exhibitions for an all-access badge (no ids follow)
+VERSION = 1
+MAC_SIZE = 16  # truncated HMAC-SHA256
+DEFAULT_VALIDITY = 3 * 86400
+
+KEY_FILE = "checkin.key"
+KEY_ENV = "GREENWAVE_CHECKIN_KEY"  # hex; overrides the key file (e.g. on gate machines)
+
+# scan outcomes
+ADMITTED = "admitted"     # first entry through this gate
+DUPLICATE = "duplicate"   # already admitted here: let through, not recorded again
+DENIED = "denied"         # genuine badge without access to this gate
+EXPIRED = "expired"
+INVALID = "invalid"       # malformed or forged
+
+
+class InvalidToken(ValueError):
+    pass
+
+
+class Badge(NamedTuple):
+    attendee_id: int
+    pass_id: Optional[int]
+    exhibitions: FrozenSet[int]
+    workshops: FrozenSet[int]
+    expires: int
+    all_access: bool = False
+
+    def allows_exhibition(self, exhibition_id: int) -> bool:
+        return self.all_access or exhibition_id in self.exhibitions
+
+
+class ScanResult(NamedTuple):
+    status: str
+    attendee_id: Optional[int] = None
+
+    @property
+    def admitted(self) -> bool:
+        return self.status in (ADMITTED, DUPLICATE)
+
+
+def load_or_create_key() -> bytes:
+    """The signing key: $GREENWAVE_CHECKIN_KEY, else storage/data/checkin.key (created on first use)."""
+    env = os.environ.get(KEY_ENV)
+    if env:
+        return bytes.fromhex(env)
+    key = load_bytes(KEY_FILE)
+    if not key:
+        key = secrets.token_bytes(32)
+        save_bytes(KEY_FILE, key)
+    return key
+
+
+class BadgeSigner:
+    """
+    Issues and verifies badge tokens: the attendee id, pass, the exhibitions
+    the pass covers (or an all-access marker, which also admits to exhibitions
+    added later) and the workshops reserved at issue time, signed with
+    HMAC-SHA256 (truncated to 128 bits) and base64url-encoded (about 80
+    characters for a typical badge, small enough for a QR code).
+
+    Verification needs only the key, so a gate can admit attendees offline.
+    A token reflects the attendee when it was issued: reissue it after a
+    pass upgrade or a reservation change. Several keys can be loaded at once
+    (by key id) to rotate keys while old badges are still in circulation.
+    """
+
+    def __init__(self, keys: Dict[int, bytes], active: Optional[int] = None):
+        if not keys:
+            raise ValueError("At least one signing key is required.")
+        self.keys = dict(keys)
+        self.active = max(self.keys) if active is None else active
+        if self.active not in self.keys:
+            raise ValueError("Active key id is not among the keys.")
+
+    @classmethod
+    def default(cls) -> "BadgeSigner":
+        return cls({1: load_or_create_key()})
+
+    def issue(self, attendee, valid_for: float = DEFAULT_VALIDITY, now: Optional[float] = None) -> str:
+        p = attendee.purchased_pass
+        if p is None:
+            raise PermissionError("Attendee must purchase a pass before a badge is issued.")
+        exhibitions = [] if p.all_access else sorted(p.exhibitions_access)
+        if len(exhibitions) >= ALL_EXHIBITIONS:
+            raise ValueError("Badge cannot encode this many exhibitions.")
+        workshops = sorted(set(attendee.reservations))
+        expires = int((time.time() if now is None else now) + valid_for)
+        pid = getattr(p, "pass_id", None)
+        try:
+            body = (_HEADER.pack(VERSION, self.active, attendee.attendee_id, -1 if pid is None else pid, expires,
+                                 ALL_EXHIBITIONS if p.all_access else len(exhibitions), len(workshops))
+                    + struct.pack(f"<{len(exhibitions) + len(workshops)}{_ID}", *exhibitions, *workshops))
+        except struct.error as e:
+            raise ValueError(f"Badge cannot encode this attendee: {e}") from None
+        mac = hmac.digest(self.keys[self.active], body, "sha256")[:MAC_SIZE]
+        return base64.urlsafe_b64encode(body + mac).rstrip(b"=").decode("ascii")
+
+    def verify(self, token: str) -> Badge:
+        """Decode and authenticate a token; raises InvalidToken. Expiry is left to the caller."""
+        try:
+            raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        except (binascii.Error, ValueError, TypeError):
+            raise InvalidToken("Badge is not valid base64.") from None
+        if len(raw) < _HEADER.size + MAC_SIZE:
+            raise InvalidToken("Badge is too short.")
+        body, mac = raw[:-MAC_SIZE], raw[-MAC_SIZE:]
+        version, key_id, aid, pid, expires, n_ex, n_ws = _HEADER.unpack_from(body)
+        key = self.keys.get(key_id)
+        if version != VERSION or key is None:
+            raise InvalidToken("Unknown badge version or key.")
+        if not hmac.compare_digest(hmac.digest(key, body, "sha256")[:MAC_SIZE], mac):
+            raise InvalidToken("Badge signature does not match.")
+        all_access = n_ex == ALL_EXHIBITIONS
+        if all_access:
+            n_ex = 0
+        count = n_ex + n_ws
+        if len(body) != _HEADER.size + count * 4:
+            raise InvalidToken("Badge length does not match its contents.")
+        ids = struct.unpack_from(f"<{count}{_ID}", body, _HEADER.size)
+        return Badge(aid, None if pid == -1 else pid, frozenset(ids[:n_ex]), frozenset(ids[n_ex:]), expires,
+                     all_access)
+
+
+class CheckInRecorder:
+    """
+    Central record of gate entries: one entry per (gate, attendee), kept in
+    a seen-set per gate so duplicates are dropped in O(1), and appended to
+    storage/data/checkins.bin in batches (every batch_size entries, or
+    flush_interval seconds, and on flush()/close()) rather than one write
+    per scan. filename=None keeps entries in memory only.
+    """
+
+    ROW = struct.Struct("<qqd")  # gate id, attendee id, time
+
+    def __init__(self, filename: Optional[str] = "checkins.bin", batch_size: int = 512,
+                 flush_interval: float = 1.0):
+        self.filename = filename
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._seen: Dict[int, Set[int]] = {}
+        self._pending: List[bytes] = []
+        self._last_flush = time.monotonic()
+        self._unsynced = False  # entries appended since the last sync()
+        self.recorded = 0
+        self.duplicates = 0
+        if filename is not None:
+            self._load()
+
+    def _load(self) -> None:
+        data = load_bytes(self.filename) or b""
+        if len(data) % self.ROW.size:
+            # torn last row: cut it off so later batches stay aligned
+            data = data[:len(data) - len(data) % self.ROW.size]
+            save_bytes(self.filename, data)
+        for gate_id, aid, _ in self.ROW.iter_unpack(data):
+            self._seen.setdefault(gate_id, set()).add(aid)
+            self.recorded += 1
+
+    def record(self, gate_id: int, attendee_id: int, when: Optional[float] = None) -> bool:
+        """Record an entry; False if this attendee was already recorded at this gate."""
+        with self._lock:
+            seen = self._seen.get(gate_id)
+            if seen is None:
+                seen = self._seen[gate_id] = set()
+            if attendee_id in seen:
+                self.duplicates += 1
+                return False
+            seen.add(attendee_id)
+            self.recorded += 1
+            if self.filename is not None:
+                self._pending.append(self.ROW.pack(gate_id, attendee_id, time.time() if when is None else when))
+                if (len(self._pending) >= self.batch_size
+                        or time.monotonic() - self._last_flush >= self.flush_interval):
+                    self._flush()
+            return True
+
+    def record_many(self, entries: Iterable[tuple]) -> int:
+        """Record (gate_id, attendee_id, when) entries; returns how many were new."""
+        return sum(self.record(*entry) for entry in entries)
+
+    def seen(self, gate_id: int, attendee_id: int) -> bool:
+        return attendee_id in self._seen.get(gate_id, ())
+
+    def admitted(self, gate_id: int) -> int:
+        return len(self._seen.get(gate_id, ()))
+
+    def counts(self) -> Dict[int, int]:
+        with self._lock:
+            return {gate_id: len(seen) for gate_id, seen in self._seen.items()}
+
+    def flush(self) -> None:
+        with self._lock:
+            self._flush()
+
+    def _flush(self) -> None:
+        if self._pending:
+            append_bytes(self.filename, b"".join(self._pending))
+            self._pending.clear()
+            self._unsynced = True
+        self._last_flush = time.monotonic()
+
+    def sync(self) -> None:
+        """Write the pending entries and fsync the file, so every entry recorded so far is durable."""
+        if self.filename is None:
+            return
+        with self._lock:
+            self._flush()
+            if self._unsynced:
+                sync_file(self.filename)
+                self._unsynced = False
+
+    def close(self) -> None:
+        if self.filename is not None:
+            self.flush()
+
+
+class Gate:
+    """
+    A door scanner for one exhibition or one workshop. Verifies badges with
+    the signer alone (no TicketSystem lookups), keeps its own seen-set so
+    repeated scans are answered locally, and reports first entries to the
+    central recorder, if it has one.
+    """
+
+    def __init__(self, gate_id: int, signer: BadgeSigner, exhibition_id: Optional[int] = None,
+                 workshop_id: Optional[int] = None, recorder: Optional[CheckInRecorder] = None):
+        if (exhibition_id is None) == (workshop_id is None):
+            raise ValueError("A gate guards either an exhibition or a workshop.")
+        self.gate_id = gate_id
+        self.signer = signer
+        self.exhibition_id = exhibition_id
+        self.workshop_id = workshop_id
+        self.recorder = recorder
+        self.seen: Set[int] = set()
+
+    def scan(self, token: str, now: Optional[float] = None) -> ScanResult:
+        try:
+            badge = self.signer.verify(token)
+        except InvalidToken:
+            return ScanResult(INVALID)
+        now = time.time() if now is None else now
+        if badge.expires < now:
+            return ScanResult(EXPIRED, badge.attendee_id)
+        if self.workshop_id is not None:
+            allowed = self.workshop_id in badge.workshops
+        else:
+            allowed = badge.allows_exhibition(self.exhibition_id)
+        if not allowed:
+            return ScanResult(DENIED, badge.attendee_id)
+        aid = badge.attendee_id
+        if aid in self.seen:
+            return ScanResult(DUPLICATE, aid)
+        self.seen.add(aid)
+        if self.recorder is not None and not self.recorder.record(self.gate_id, aid, now):
+            return ScanResult(DUPLICATE, aid)  # admitted here before this gate (re)started
+        return ScanResult(ADMITTED, aid)
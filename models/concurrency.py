@@ -0,0 +1,81 @@
+# models/concurrency.py
+import threading
+
+
+class RWLock:
+    """
+    Many holders of the shared side, or one holder of the exclusive side.
+    Waiting writers block new readers so full-state snapshots are not starved.
+    Not reentrant.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writer = False
+        self._waiting_writers = 0
+        self._shared = _Guard(self.acquire_shared, self.release_shared)
+        self._exclusive = _Guard(self.acquire_exclusive, self.release_exclusive)
+
+    def acquire_shared(self) -> None:
+        with self._cond:
+            while self._writer or self._waiting_writers:
+                self._cond.wait()
+            self._readers += 1
+
+    def release_shared(self) -> None:
+        with self._cond:
+            self._readers -= 1
+            if not self._readers and self._waiting_writers:
+                self._cond.notify_all()
+
+    def acquire_exclusive(self) -> None:
+        with self._cond:
+            self._waiting_writers += 1
+            while self._writer or self._readers:
+                self._cond.wait()
+            self._waiting_writers -= 1
+            self._writer = True
+
+    def release_exclusive(self) -> None:
+        with self._cond:
+            self._writer = False
+            self._cond.notify_all()
+
+    def shared(self) -> "_Guard":
+        """Context manager for the shared side."""
+        return self._shared
+
+    def exclusive(self) -> "_Guard":
+        """Context manager for the exclusive side."""
+        return self._exclusive
+
+
+class _Guard:
+    """Reusable, allocation-free context manager around an acquire/release pair."""
+
+    __slots__ = ("_acquire", "_release")
+
+    def __init__(self, acquire, release):
+        self._acquire = acquire
+        self._release = release
+
+    def __enter__(self):
+        self._acquire()
+
+    def __exit__(self, *exc):
+        self._release()
+        return False
+
+
+class StripedLock:
+    """
+    A fixed pool of locks addressed by key (attendee id, email, ...): operations
+    on different keys rarely contend, without keeping one lock per object.
+    """
+
+    def __init__(self, stripes: int = 256):
+        self._locks = [threading.Lock() for _ in range(stripes)]
+
+    def __call__(self, key) -> threading.Lock:
+        return self._locks[hash(key) % len(self._locks)]
@@ -1,24 +1,36 @@
 # models/exhibition.py
 from typing import List
+from models.slotted import SlottedModel
 from models.workshop import Workshop
 
-class Exhibition:
+class Exhibition(SlottedModel):
     """
     Represents an Exhibition which contains multiple workshops.
     """
+    __slots__ = ("exhibition_id", "name", "description", "workshops", "_registry")
+    # _registry: TicketSystem this exhibition belongs to (never pickled)
+    _transient = ("_registry",)
+
     def __init__(self, exhibition_id: int, name: str, description: str = ""):
         self.exhibition_id = exhibition_id
         self.name = name
         self.description = description
         self.workshops: List[Workshop] = []
+        self._registry = None
 
     def add_workshop(self, workshop: Workshop):
         if workshop not in self.workshops:
+            if self._registry is not None:
+                self._registry._on_workshop_adding(self, workshop)  # raises on a room double-booking
             self.workshops.append(workshop)
+            if self._registry is not None:
+                self._registry._on_workshop_added(self, workshop)
 
     def remove_workshop(self, workshop: Workshop):
         if workshop in self.workshops:
             self.workshops.remove(workshop)
+            if self._registry is not None:
+                self._registry._on_workshop_removed(self, workshop)
 
     def get_workshop_by_id(self, wid: int):
         for w in self.workshops:
@@ -0,0 +1,116 @@
+# models/idempotency.py
+import collections
+import functools
+import threading
+import time
+from typing import Any, Callable, Optional, Tuple
+
+Entry = Tuple[tuple, Any, float]  # (request fingerprint, result, expires at: wall-clock seconds)
+
+
+class IdempotencyCache:
+    """
+    Results of operations called with an idempotency key, so a retried call
+    returns the first call's result instead of running again.
+
+    Bounded two ways: an entry expires ttl seconds after it was stored, and
+    beyond max_keys entries the least recently used one is dropped. Expiry
+    times are wall-clock, so they survive a restart; a key that expired or
+    was evicted is treated as new.
+
+    Each entry remembers a fingerprint of the request; a key reused for a
+    different request is rejected rather than answered with the other
+    request's result.
+    """
+
+    TTL = 24 * 3600.0
+    MAX_KEYS = 100_000
+
+    def __init__(self, max_keys: Optional[int] = None, ttl: Optional[float] = None,
+                 clock: Callable[[], float] = time.time):
+        self.max_keys = max_keys or self.MAX_KEYS
+        self.ttl = self.TTL if ttl is None else ttl
+        self.clock = clock
+        self._entries: "collections.OrderedDict[str, Entry]" = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.conflicts = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __getstate__(self):
+        # persisted: the live entries (and the limits), not the counters
+        now = self.clock()
+        with self._lock:
+            entries = [(key, *entry) for key, entry in self._entries.items() if entry[2] > now]
+        return {"max_keys": self.max_keys, "ttl": self.ttl, "entries": entries}
+
+    def __setstate__(self, state):
+        self.__init__(state.get("max_keys"), state.get("ttl"))
+        for key, fingerprint, result, expires in state.get("entries", ()):
+            self.store(key, fingerprint, result, expires)
+
+    def lookup(self, key: str, fingerprint: tuple) -> Optional[Entry]:
+        """The stored entry for key, or None (counted as a miss) if there is none or it expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[2] <= self.clock():
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry[0] != fingerprint:
+                self.conflicts += 1
+                raise ValueError("Idempotency key was already used for a different request.")
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def expiry(self) -> float:
+        """Expiry time for an entry stored now."""
+        return self.clock() + self.ttl
+
+    def store(self, key: str, fingerprint: tuple, result: Any, expires: float) -> None:
+        with self._lock:
+            if expires <= self.clock():
+                return  # replayed after it expired
+            self._entries[key] = (fingerprint, result, expires)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_keys:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def discard(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def entries(self):
+        """(key, fingerprint, result, expires) of the entries not yet expired, least recently used first."""
+        return self.__getstate__()["entries"]
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {"keys": len(self._entries), "hits": self.hits, "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "conflicts": self.conflicts, "evictions": self.evictions}
+
+
+def idempotent(fingerprint: Callable[..., tuple]):
+    """
+    Decorator for TicketSystem operations: adds an idempotency_key keyword
+    argument. fingerprint gets the call's arguments (without self) and
+    returns what identifies the request; see TicketSystem._idempotent().
+    """
+    def wrap(fn):
+        @functools.wraps(fn)
+        def wrapper(self, *args, idempotency_key: Optional[str] = None, **kwargs):
+            if idempotency_key is None:
+                return fn(self, *args, **kwargs)
+            return self._idempotent(idempotency_key, fingerprint(*args, **kwargs),
+                                    lambda: fn(self, *args, **kwargs))
+        return wrapper
+    return wrap
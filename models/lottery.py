@@ -0,0 +1,282 @@
+# models/lottery.py
+"""
+Batch workshop allocation for oversubscribed workshops.
+
+Instead of racing reserve_workshop() when bookings open, attendees submit
+ranked workshop preferences while the lottery window is open. allocate()
+then hands out seats in one pass by random serial dictatorship: attendees
+are put in a random order drawn from the seed, and each in turn gets their
+highest-ranked workshop that still has a seat and that their pass covers.
+With max_seats > 1 the order snakes (reversed every other round), so whoever
+picks last in one round picks first in the next. The same preferences and
+seed always give the same allocation.
+
+commit() books the allocation in one TicketSystem.transaction(), so it is
+persisted in a single flush and either every seat is booked or none is.
+Before the seats are flushed the allocation is appended (and fsynced) as
+"committing", and the "committed" marker follows once the flush succeeded.
+A rolled-back commit leaves the lottery open to retry; if the process dies
+between the flush and the marker, loading finds the pending allocation's
+seats booked and treats the lottery as committed, so it is never drawn twice.
+
+Preferences are appended to storage/data/lottery-<name>.jsonl (one JSON
+object per submission, the latest per attendee wins), so an open lottery
+survives a restart; nothing is written in memory mode.
+"""
+import json
+import random
+import re
+import threading
+import time
+from typing import Dict, List, Optional
+
+from models.metrics import instrumented
+from models.ticket_system import TicketSystem
+from storage.data_manager import append_bytes, load_bytes, sync_file
+
+# lottery names end up in a file name
+NAME = re.compile(r"[A-Za-z0-9_-]{1,64}")
+
+
+class Allocation:
+    """The outcome of one lottery draw (not yet booked)."""
+
+    def __init__(self, seed: int, max_seats: int):
+        self.seed = seed
+        self.max_seats = max_seats
+        self.assignments: Dict[int, List[int]] = {}  # attendee id -> workshop ids, in the order won
+        self.unassigned: List[int] = []  # submitted but got no seat
+        self.by_rank: Dict[int, int] = {}  # 1-based rank of the choice -> seats won with it
+        self.elapsed = 0.0
+
+    @property
+    def seats(self) -> int:
+        return sum(len(wids) for wids in self.assignments.values())
+
+    def summary(self) -> str:
+        ranks = ", ".join(f"#{rank}: {n}" for rank, n in sorted(self.by_rank.items())[:5])
+        return (f"seed {self.seed}: {self.seats} seats to {len(self.assignments)} attendees, "
+                f"{len(self.unassigned)} without a seat ({ranks}) in {self.elapsed:.2f}s")
+
+
+class Lottery:
+    """Collects ranked preferences for one allocation round and runs the draw."""
+
+    def __init__(self, ts: TicketSystem, name: str = "default", max_choices: int = 10):
+        if not NAME.fullmatch(name):
+            raise ValueError(f"Invalid lottery name {name!r}.")
+        self.ts = ts
+        self.name = name
+        self.max_choices = max_choices
+        self.filename: Optional[str] = None if ts.storage_mode == "memory" else f"lottery-{name}.jsonl"
+        self.preferences: Dict[int, List[int]] = {}
+        self.closed = False
+        self.committed_seed: Optional[int] = None
+        self._unsynced = False  # appended to the file since the last sync()
+        self._lock = threading.Lock()
+        if self.filename is not None:
+            self._load()
+
+    def _load(self) -> None:
+        data = load_bytes(self.filename) or b""
+        pending = None  # allocation of a commit not (yet) marked committed
+        for line in data.splitlines():
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue  # torn last line from a crash mid-append
+            if "attendee_id" in entry:
+                self._set(entry["attendee_id"], entry["workshops"])
+            elif entry.get("closed"):
+                self.closed = True
+            elif "committing" in entry:
+                pending = entry
+            elif "committed" in entry:
+                self.closed = True
+                self.committed_seed = entry["committed"]
+                pending = None
+        if pending is not None and self._booked(pending["assignments"]):
+            # the seats were flushed but the marker was not written
+            self.closed = True
+            self.committed_seed = pending["committing"]
+            self._append({"committed": self.committed_seed})
+
+    def _booked(self, assignments: List[list]) -> bool:
+        """True if every (attendee id, workshop ids) pair is held: allocations never include held seats."""
+        if not assignments:
+            return False
+        for aid, wids in assignments:
+            attendee = self.ts.find_attendee_by_id(aid)
+            if attendee is None or not set(wids) <= set(attendee.reservations):
+                return False
+        return True
+
+    def _set(self, aid: int, workshop_ids: List[int]) -> None:
+        if workshop_ids:
+            self.preferences[aid] = workshop_ids
+        else:
+            self.preferences.pop(aid, None)
+
+    def _reopen(self, closed: bool) -> None:
+        with self._lock:
+            self.closed = closed
+            self.committed_seed = None
+
+    def _write_committed(self, seed: int) -> None:
+        with self._lock:
+            self._append({"committed": seed})
+
+    def _append(self, entry: dict) -> None:
+        if self.filename is not None:
+            append_bytes(self.filename, json.dumps(entry, separators=(",", ":")).encode() + b"\n")
+            self._unsynced = True
+
+    def sync(self) -> None:
+        """fsync the preferences file, so every submission so far is durable."""
+        with self._lock:
+            if self._unsynced:
+                sync_file(self.filename)
+                self._unsynced = False
+
+    # -------------------------
+    # Submission window
+    # -------------------------
+    def submit(self, attendee, workshop_ids: List[int]) -> List[int]:
+        """
+        Record an attendee's ranked choices (best first), replacing any earlier
+        submission; an empty list withdraws. Duplicates are dropped. Returns
+        the choices as stored.
+        """
+        ranked = list(dict.fromkeys(int(wid) for wid in workshop_ids))
+        if len(ranked) > self.max_choices:
+            raise ValueError(f"At most {self.max_choices} workshops can be ranked.")
+        for wid in ranked:
+            if self.ts.find_workshop_by_id(wid) is None:
+                raise KeyError(f"Workshop {wid} not found.")
+        if attendee.purchased_pass is None:
+            raise PermissionError("Attendee must purchase a pass before entering the lottery.")
+        with self._lock:
+            if self.closed:
+                raise ValueError("The lottery is closed.")
+            self._set(attendee.attendee_id, ranked)
+            self._append({"attendee_id": attendee.attendee_id, "workshops": ranked})
+        return ranked
+
+    def close(self) -> None:
+        """End the submission window."""
+        with self._lock:
+            if not self.closed:
+                self.closed = True
+                self._append({"closed": True})
+
+    # -------------------------
+    # Draw
+    # -------------------------
+    @instrumented(op="lottery.allocate")
+    def allocate(self, seed: int, max_seats: int = 1) -> Allocation:
+        """
+        Draw an allocation (nothing is booked; see commit()). Each attendee
+        wins at most max_seats workshops from their list, none overlapping
+        each other or their reservations. Workshops they already hold are
+        skipped, and so are workshops with people on their waitlist: those
+        attendees have first claim on any free spot.
+        """
+        if max_seats < 1:
+            raise ValueError("max_seats must be at least 1.")
+        start = time.perf_counter()
+        result = Allocation(seed, max_seats)
+        with self._lock:
+            preferences = dict(self.preferences)
+
+        # seats left and parent exhibition per workshop, looked up once
+        seats: Dict[int, int] = {}
+        parent: Dict[int, int] = {}
+        workshops: Dict[int, object] = {}
+        for ex in self.ts.exhibitions:
+            for w in ex.workshops:
+                seats[w.workshop_id] = 0 if w.waitlist else w.spots_left()
+                parent[w.workshop_id] = ex.exhibition_id
+                workshops[w.workshop_id] = w
+
+        # per attendee: their choices filtered down to what their pass covers and
+        # what fits around their existing reservations, best first
+        schedule, find_workshop = self.ts.schedule, self.ts.find_workshop_by_id
+        choices: Dict[int, List[int]] = {}
+        for aid, ranked in preferences.items():
+            attendee = self.ts.find_attendee_by_id(aid)
+            p = attendee.purchased_pass if attendee is not None else None
+            if p is None:
+                result.unassigned.append(aid)
+                continue
+            choices[aid] = [wid for wid in ranked
+                            if wid in parent and p.allows_exhibition(parent[wid])
+                            and aid not in workshops[wid].attendees
+                            and not schedule.attendee_conflicts(attendee, workshops[wid], find_workshop)]
+
+        # sort first so the order depends only on the seed, not on submission order
+        order = sorted(choices)
+        random.Random(seed).shuffle(order)
+        cursor = dict.fromkeys(order, 0)
+        won: Dict[int, List[int]] = {}
+        for round_no in range(max_seats):
+            active = False
+            for aid in (order if round_no % 2 == 0 else reversed(order)):
+                ranked, i, mine = choices[aid], cursor[aid], won.get(aid, ())
+                # full, or overlapping a seat won in an earlier round: skipped for good
+                while i < len(ranked) and (seats[ranked[i]] <= 0 or any(
+                        workshops[ranked[i]].overlaps(workshops[wid]) for wid in mine)):
+                    i += 1
+                cursor[aid] = i + 1
+                if i >= len(ranked):
+                    continue
+                wid = ranked[i]
+                seats[wid] -= 1
+                won.setdefault(aid, []).append(wid)
+                rank = preferences[aid].index(wid) + 1
+                result.by_rank[rank] = result.by_rank.get(rank, 0) + 1
+                active = True
+            if not active:
+                break
+
+        result.assignments = won
+        result.unassigned.extend(aid for aid in order if aid not in won)
+        result.elapsed = time.perf_counter() - start
+        return result
+
+    @instrumented(op="lottery.commit")
+    def commit(self, allocation: Allocation) -> int:
+        """
+        Book every seat of the allocation in one transaction, and close the
+        lottery. If any booking fails (the roster changed since the draw),
+        nothing is booked and the error is raised: draw again and retry.
+        Returns the number of seats booked.
+        """
+        ts = self.ts
+        with ts.transaction():
+            with self._lock:
+                if self.committed_seed is not None:
+                    raise ValueError(f"The lottery was already committed (seed {self.committed_seed}).")
+                ts._undo(self._reopen, self.closed)
+                self.closed = True
+                self.committed_seed = allocation.seed
+                # durable before the seats are, so a lost marker can be recovered (see _load)
+                self._append({"committing": allocation.seed,
+                              "assignments": [[aid, wids] for aid, wids in allocation.assignments.items()]})
+            self.sync()
+            for aid, wids in allocation.assignments.items():
+                attendee = ts.find_attendee_by_id(aid)
+                if attendee is None:
+                    raise KeyError(f"Attendee {aid} not found.")
+                for wid in wids:
+                    ts.reserve_workshop(attendee, ts.find_workshop_by_id(wid))
+            # inside a server batch this block is only a savepoint: the marker
+            # is written once the outer flush has persisted the seats
+            ts._on_commit(self._write_committed, allocation.seed)
+        return allocation.seats
+
+    def run(self, seed: int, max_seats: int = 1) -> Allocation:
+        """Close the window, draw and commit."""
+        self.close()
+        allocation = self.allocate(seed, max_seats)
+        self.commit(allocation)
+        return allocation
@@ -0,0 +1,337 @@
+# models/metrics.py
+import bisect
+import cProfile
+import functools
+import io
+import itertools
+import pstats
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+# upper bounds of the histogram buckets (Prometheus "le"); +Inf is implicit
+LATENCY_BUCKETS = (1e-6, 2.5e-6, 5e-6, 1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 5e-4,
+                   1e-3, 2.5e-3, 5e-3, 1e-2, 2.5e-2, 5e-2, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = tuple(float(4 ** i) for i in range(4, 16))  # 256 B .. 256 MB
+
+
+class Histogram:
+    """
+    Fixed-bucket histogram: counts per bucket, sum and count.
+
+    Every thread records into its own shard (bucket counts followed by the
+    sum), so observe() takes no lock; readers add the shards up. A reading
+    taken while other threads record may miss their latest observations.
+    """
+
+    __slots__ = ("bounds", "_local", "_shards", "_lock")
+
+    def __init__(self, bounds: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.bounds = bounds
+        self._local = threading.local()
+        self._shards: List[list] = []
+        self._lock = threading.Lock()
+
+    def _shard(self) -> list:
+        shard = [0] * (len(self.bounds) + 1) + [0.0]
+        self._local.shard = shard
+        with self._lock:
+            self._shards.append(shard)
+        return shard
+
+    def observe(self, value: float) -> None:
+        try:
+            shard = self._local.shard
+        except AttributeError:
+            shard = self._shard()
+        shard[bisect.bisect_left(self.bounds, value)] += 1
+        shard[-1] += value
+
+    def reset(self) -> None:
+        with self._lock:
+            for shard in self._shards:
+                shard[:] = [0] * (len(shard) - 1) + [0.0]
+
+    def state(self) -> Tuple[List[int], float]:
+        with self._lock:
+            shards = list(self._shards)
+        totals = [0] * (len(self.bounds) + 2)
+        for shard in shards:
+            for i, value in enumerate(shard):
+                totals[i] += value
+        return totals[:-1], totals[-1]
+
+    def quantile(self, q: float, counts: Optional[List[int]] = None) -> Optional[float]:
+        """Upper bound of the bucket holding the q-quantile (None when empty or beyond the last bound)."""
+        counts = counts if counts is not None else self.state()[0]
+        total = sum(counts)
+        if not total:
+            return None
+        rank = q * total
+        for bound, cumulative in zip(self.bounds, itertools.accumulate(counts)):
+            if cumulative >= rank:
+                return bound
+        return None
+
+
+class _IOStats:
+    __slots__ = ("latency", "sizes")
+
+    def __init__(self):
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.sizes = Histogram(SIZE_BUCKETS)
+
+
+class _Timer:
+    __slots__ = ("metrics", "op", "hist", "start")
+
+    def __init__(self, metrics: "Metrics", op: str, hist: Histogram):
+        self.metrics = metrics
+        self.op = op
+        self.hist = hist
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self.metrics.enabled:
+            self.hist.observe(time.perf_counter() - self.start)
+            if exc is not None:
+                self.metrics._failure(self.op, exc)
+
+
+class _Sampler:
+    """Profiles one call in every `every` of the selected operations, one call at a time."""
+
+    def __init__(self, every: int, ops: Optional[Iterable[str]]):
+        self.every = max(1, int(every))
+        self.ops = frozenset(ops) if ops else None
+        self.ticks = itertools.count(1)
+        self.profile = cProfile.Profile()
+        self.busy = threading.Lock()  # cProfile cannot follow two threads at once
+        self.samples = 0
+
+    def run(self, op: str, fn, args, kwargs):
+        if (self.ops is not None and op not in self.ops) or next(self.ticks) % self.every:
+            return fn(*args, **kwargs)
+        if not self.busy.acquire(blocking=False):
+            return fn(*args, **kwargs)  # another sample is running (or this is a nested call)
+        try:
+            self.samples += 1
+            self.profile.enable()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self.profile.disable()
+        finally:
+            self.busy.release()
+
+
+class Metrics:
+    """
+    Process-wide operation metrics, cheap enough to leave on:
+
+    - per operation (TicketSystem public methods, backend calls): a latency
+      histogram, whose count is the number of calls, and failures counted by
+      exception type;
+    - per file (storage/data_manager.py, the journal, the attendee store):
+      reads and writes with a latency histogram and a bytes-per-call
+      histogram, whose sum is the bytes moved.
+
+    Recording takes no lock (see Histogram). snapshot() returns the
+    metrics as a dict, prometheus() in the Prometheus text format. start_profiling() turns on sampling cProfile for the
+    instrumented operations until stop_profiling().
+    """
+
+    PREFIX = "greenwave"
+
+    def __init__(self):
+        self.enabled = True
+        self._lock = threading.Lock()
+        self._ops: Dict[str, Histogram] = {}
+        self._failures: Dict[Tuple[str, str], int] = {}
+        self._io: Dict[Tuple[str, str], _IOStats] = {}
+        self._sampler: Optional[_Sampler] = None
+        self.started = time.time()
+
+    # -------------------------
+    # Recording
+    # -------------------------
+    def _histogram(self, op: str) -> Histogram:
+        hist = self._ops.get(op)
+        if hist is None:
+            with self._lock:
+                hist = self._ops.setdefault(op, Histogram())
+        return hist
+
+    def observe(self, op: str, seconds: float, error: Optional[BaseException] = None) -> None:
+        if not self.enabled:
+            return
+        self._histogram(op).observe(seconds)
+        if error is not None:
+            self._failure(op, error)
+
+    def _failure(self, op: str, error: BaseException) -> None:
+        key = (op, type(error).__name__)
+        with self._lock:
+            self._failures[key] = self._failures.get(key, 0) + 1
+
+    def timer(self, op: str) -> _Timer:
+        """Context manager recording the block's latency (and failure) under op."""
+        return _Timer(self, op, self._histogram(op))
+
+    def instrument(self, fn: Callable = None, *, op: Optional[str] = None):
+        """Decorator: record latency and failures of every call to fn (under op, default its name)."""
+        if fn is None:
+            return functools.partial(self.instrument, op=op)
+        name = op or fn.__name__
+        hist = self._histogram(name)
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not self.enabled:
+                return fn(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                sampler = self._sampler
+                if sampler is not None:
+                    return sampler.run(name, fn, args, kwargs)
+                return fn(*args, **kwargs)
+            except BaseException as e:
+                self._failure(name, e)
+                raise
+            finally:
+                hist.observe(time.perf_counter() - start)
+        return wrapper
+
+    def record_io(self, direction: str, target: str, nbytes: int, seconds: float) -> None:
+        """One read or write of nbytes to target (a file name) taking seconds."""
+        if not self.enabled:
+            return
+        key = (direction, target)
+        stats = self._io.get(key)
+        if stats is None:
+            with self._lock:
+                stats = self._io.setdefault(key, _IOStats())
+        stats.latency.observe(seconds)
+        stats.sizes.observe(nbytes)
+
+    def reset(self) -> None:
+        """Zero everything (histograms stay registered: instrumented functions hold them)."""
+        with self._lock:
+            for hist in self._ops.values():
+                hist.reset()
+            self._failures.clear()
+            self._io.clear()
+            self.started = time.time()
+
+    # -------------------------
+    # Profiling
+    # -------------------------
+    def start_profiling(self, every: int = 100, ops: Optional[Iterable[str]] = None) -> None:
+        """Profile one in every `every` instrumented calls (of ops only, if given)."""
+        self._sampler = _Sampler(every, ops)
+
+    def stop_profiling(self) -> Optional[pstats.Stats]:
+        """Stop sampling; returns the collected profile, or None if no call was sampled."""
+        sampler, self._sampler = self._sampler, None
+        if sampler is None or not sampler.samples:
+            return None
+        with sampler.busy:  # wait for a sample still running
+            return pstats.Stats(sampler.profile)
+
+    @property
+    def profiling(self) -> bool:
+        return self._sampler is not None
+
+    @staticmethod
+    def profile_report(stats: pstats.Stats, limit: int = 30, sort: str = "cumulative") -> str:
+        out = io.StringIO()
+        stats.stream = out
+        stats.sort_stats(sort).print_stats(limit)
+        return out.getvalue()
+
+    # -------------------------
+    # Exposition
+    # -------------------------
+    def snapshot(self) -> dict:
+        ops = {}
+        for op, hist in sorted(self._ops.items()):
+            counts, total = hist.state()
+            calls = sum(counts)
+            if not calls:
+                continue
+            ops[op] = {
+                "calls": calls,
+                "seconds_total": total,
+                "mean_seconds": total / calls,
+                "p50_seconds": hist.quantile(0.5, counts),
+                "p99_seconds": hist.quantile(0.99, counts),
+                "buckets": {le: n for le, n in zip([f"{b:g}" for b in hist.bounds] + ["+Inf"], counts) if n},
+            }
+        with self._lock:
+            failures = dict(self._failures)
+            io_stats = dict(self._io)
+        for (op, error), count in sorted(failures.items()):
+            ops.setdefault(op, {"calls": 0}).setdefault("failures", {})[error] = count
+        storage = {}
+        for (direction, target), stats in sorted(io_stats.items()):
+            counts, seconds = stats.latency.state()
+            sizes, nbytes = stats.sizes.state()
+            storage.setdefault(target, {})[direction] = {
+                "calls": sum(counts), "bytes": int(nbytes), "seconds_total": seconds,
+                "p99_seconds": stats.latency.quantile(0.99, counts),
+            }
+        return {"uptime_seconds": time.time() - self.started, "operations": ops, "storage": storage,
+                "profiling": self.profiling}
+
+    def prometheus(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)."""
+        p = self.PREFIX
+        lines = [f"# HELP {p}_operation_seconds Latency of TicketSystem operations and backend calls.",
+                 f"# TYPE {p}_operation_seconds histogram"]
+        for op, hist in sorted(self._ops.items()):
+            _histogram_lines(lines, f"{p}_operation_seconds", f'op="{_escape(op)}"', hist, int_sum=False)
+        lines += [f"# HELP {p}_operation_failures_total Failed operations by exception type.",
+                  f"# TYPE {p}_operation_failures_total counter"]
+        with self._lock:
+            failures = sorted(self._failures.items())
+            io_stats = sorted(self._io.items())
+        for (op, error), count in failures:
+            lines.append(f'{p}_operation_failures_total{{op="{_escape(op)}",type="{_escape(error)}"}} {count}')
+        for direction in ("write", "read"):
+            lines += [f"# HELP {p}_storage_{direction}_seconds Latency of storage {direction}s by file.",
+                      f"# TYPE {p}_storage_{direction}_seconds histogram"]
+            for (d, target), stats in io_stats:
+                if d == direction:
+                    _histogram_lines(lines, f"{p}_storage_{direction}_seconds", f'file="{_escape(target)}"',
+                                     stats.latency, int_sum=False)
+            lines += [f"# HELP {p}_storage_{direction}_bytes Bytes per storage {direction} by file.",
+                      f"# TYPE {p}_storage_{direction}_bytes histogram"]
+            for (d, target), stats in io_stats:
+                if d == direction:
+                    _histogram_lines(lines, f"{p}_storage_{direction}_bytes", f'file="{_escape(target)}"',
+                                     stats.sizes, int_sum=True)
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _histogram_lines(lines: List[str], name: str, labels: str, hist: Histogram, int_sum: bool) -> None:
+    counts, total = hist.state()
+    cumulative = 0
+    for bound, count in zip(hist.bounds, counts):
+        cumulative += count
+        lines.append(f'{name}_bucket{{{labels},le="{bound:g}"}} {cumulative}')
+    cumulative += counts[-1]
+    lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {cumulative}')
+    lines.append(f"{name}_sum{{{labels}}} {int(total) if int_sum else repr(total)}")
+    lines.append(f"{name}_count{{{labels}}} {cumulative}")
+
+
+# the process-wide registry used by TicketSystem and the storage layer
+METRICS = Metrics()
+instrumented = METRICS.instrument
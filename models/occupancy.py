@@ -0,0 +1,239 @@
+# models/occupancy.py
+import bisect
+import collections
+import itertools
+import threading
+import traceback
+from typing import Callable, Dict, List, Optional
+
+
+class _Entry:
+    """Last known occupancy of one tracked workshop and its keys in the ordered views."""
+
+    __slots__ = ("slot", "workshop", "exhibition_id", "registered", "capacity", "spots", "fill_key")
+
+    def __init__(self, slot: int, workshop, exhibition_id: int):
+        self.slot = slot
+        self.workshop = workshop
+        self.exhibition_id = exhibition_id
+        self.registered = 0
+        self.capacity = 0
+        self.spots = 0
+        self.fill_key = None
+
+    def row(self) -> dict:
+        return {
+            "exhibition_id": self.exhibition_id,
+            "workshop_id": self.workshop.workshop_id,
+            "workshop_title": self.workshop.title,
+            "capacity": self.capacity,
+            "registered": self.registered,
+            "spots_left": self.spots,
+        }
+
+
+class OccupancyView:
+    """
+    Occupancy counters per workshop, per exhibition and in total, kept up to
+    date on every reservation and cancellation instead of being recomputed.
+
+    Workshops call update() after every roster change; it re-reads the
+    workshop's size and capacity and adjusts the counters by the difference.
+    Two ordered structures answer the dashboard queries without a scan:
+    a sorted list keyed by fill ratio for "top N fullest" (bisect, then a
+    slice), and buckets per spots-left value with a sorted list of the values
+    in use for "at least k spots left".
+
+    Every change produces a delta: a dict with the workshop's new numbers,
+    its exhibition's and the overall totals, and an increasing "seq". Deltas
+    are passed to subscribe()d callbacks (in the thread that made the change,
+    after the view's lock is released) and kept in a short history for
+    clients that poll with changes_since(). Changes inside a transaction are
+    published as they happen; a rollback publishes the reverting deltas.
+    """
+
+    HISTORY = 4096
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._slots = itertools.count()
+        self._entries: Dict[int, _Entry] = {}  # id(workshop) -> entry, in tracking order
+        self._exhibitions: Dict[int, List[int]] = {}  # exhibition_id -> [registered, capacity]
+        self.registered = 0
+        self.capacity = 0
+        self._by_fill: List[tuple] = []  # (-fill, workshop_id, slot, entry), fullest first
+        self._by_spots: Dict[int, Dict[int, _Entry]] = {}  # spots left -> {slot: entry}
+        self._spot_levels: List[int] = []  # sorted keys of _by_spots
+        self.seq = 0
+        self._history = collections.deque(maxlen=self.HISTORY)
+        self._subscribers: List[Callable[[dict], None]] = []
+
+    # -------------------------
+    # Tracking
+    # -------------------------
+    def clear(self) -> None:
+        """Forget every workshop (subscribers stay)."""
+        with self._lock:
+            self._entries.clear()
+            self._exhibitions.clear()
+            self.registered = self.capacity = 0
+            self._by_fill.clear()
+            self._by_spots.clear()
+            self._spot_levels.clear()
+            self._history.clear()
+
+    def track(self, exhibition_id: int, workshop) -> None:
+        with self._lock:
+            if id(workshop) in self._entries:
+                return
+            entry = _Entry(next(self._slots), workshop, exhibition_id)
+            self._entries[id(workshop)] = entry
+            self._exhibitions.setdefault(exhibition_id, [0, 0])
+            delta = self._set(entry, len(workshop.attendees), workshop.capacity)
+            self._insert(entry)
+        self._publish(delta)
+
+    def untrack(self, workshop) -> None:
+        with self._lock:
+            entry = self._entries.pop(id(workshop), None)
+            if entry is None:
+                return
+            self._discard(entry)
+            delta = self._set(entry, 0, 0, removed=True)
+        self._publish(delta)
+
+    def update(self, workshop) -> None:
+        """Re-read workshop's roster size and capacity after a change."""
+        with self._lock:
+            entry = self._entries.get(id(workshop))
+            if entry is None:
+                return
+            registered, capacity = len(workshop.attendees), workshop.capacity
+            if registered == entry.registered and capacity == entry.capacity:
+                return
+            self._discard(entry)
+            delta = self._set(entry, registered, capacity)
+            self._insert(entry)
+        self._publish(delta)
+
+    def _insert(self, entry: _Entry) -> None:
+        # slots are unique, so the entry itself is never compared
+        fill = entry.registered / entry.capacity if entry.capacity > 0 else 1.0
+        entry.fill_key = (-fill, entry.workshop.workshop_id, entry.slot, entry)
+        bisect.insort(self._by_fill, entry.fill_key)
+        bucket = self._by_spots.get(entry.spots)
+        if bucket is None:
+            bucket = self._by_spots[entry.spots] = {}
+            bisect.insort(self._spot_levels, entry.spots)
+        bucket[entry.slot] = entry
+
+    def _discard(self, entry: _Entry) -> None:
+        keys = self._by_fill
+        i = bisect.bisect_left(keys, entry.fill_key)
+        if i < len(keys) and keys[i] is entry.fill_key:
+            del keys[i]
+        bucket = self._by_spots[entry.spots]
+        del bucket[entry.slot]
+        if not bucket:
+            del self._by_spots[entry.spots]
+            del self._spot_levels[bisect.bisect_left(self._spot_levels, entry.spots)]
+
+    def _set(self, entry: _Entry, registered: int, capacity: int, removed: bool = False) -> dict:
+        """Move entry to the new numbers, adjust the totals and record the delta (lock held)."""
+        d_reg, d_cap = registered - entry.registered, capacity - entry.capacity
+        entry.registered, entry.capacity = registered, capacity
+        entry.spots = capacity - registered if capacity > registered else 0
+        totals = self._exhibitions[entry.exhibition_id]
+        totals[0] += d_reg
+        totals[1] += d_cap
+        self.registered += d_reg
+        self.capacity += d_cap
+        self.seq += 1
+        delta = {
+            "seq": self.seq,
+            "exhibition_id": entry.exhibition_id,
+            "workshop_id": entry.workshop.workshop_id,
+            "registered": registered,
+            "capacity": capacity,
+            "spots_left": entry.spots,
+            "exhibition_registered": totals[0],
+            "exhibition_capacity": totals[1],
+            "total_registered": self.registered,
+            "total_capacity": self.capacity,
+        }
+        if removed:
+            delta["removed"] = True
+        self._history.append(delta)
+        return delta
+
+    # -------------------------
+    # Change notification
+    # -------------------------
+    def subscribe(self, callback: Callable[[dict], None]) -> Callable[[], None]:
+        """Call callback(delta) after every change; returns a function that unsubscribes."""
+        with self._lock:
+            self._subscribers = self._subscribers + [callback]
+
+        def unsubscribe() -> None:
+            with self._lock:
+                self._subscribers = [cb for cb in self._subscribers if cb is not callback]
+        return unsubscribe
+
+    def _publish(self, delta: dict) -> None:
+        for callback in self._subscribers:
+            try:
+                callback(delta)
+            except Exception:
+                # a broken subscriber must not fail the reservation that triggered it
+                traceback.print_exc()
+
+    def changes_since(self, seq: int) -> Optional[List[dict]]:
+        """
+        Deltas with a seq greater than seq, oldest first, or None if some of
+        them have already left the history (take a fresh snapshot instead).
+        """
+        with self._lock:
+            missing = self.seq - seq
+            if missing <= 0:
+                return []
+            if missing > len(self._history):
+                return None
+            changes = list(itertools.islice(reversed(self._history), missing))
+        changes.reverse()
+        return changes
+
+    # -------------------------
+    # Queries
+    # -------------------------
+    def totals(self) -> dict:
+        with self._lock:
+            return {
+                "seq": self.seq,
+                "registered": self.registered,
+                "capacity": self.capacity,
+                "spots_left": max(0, self.capacity - self.registered),
+                "exhibitions": {eid: {"registered": reg, "capacity": cap}
+                                for eid, (reg, cap) in self._exhibitions.items()},
+            }
+
+    def top_fullest(self, n: int) -> List[dict]:
+        """The n workshops with the highest registered/capacity ratio, fullest first."""
+        with self._lock:
+            return [key[3].row() for key in self._by_fill[:max(0, n)]]
+
+    def with_spots_left(self, k: int, limit: Optional[int] = None) -> List[dict]:
+        """Workshops with at least k spots left, fewest spots first (at most limit of them)."""
+        rows = []
+        with self._lock:
+            levels = self._spot_levels
+            for level in itertools.islice(levels, bisect.bisect_left(levels, k), None):
+                for entry in self._by_spots[level].values():
+                    if limit is not None and len(rows) >= limit:
+                        return rows
+                    rows.append(entry.row())
+        return rows
+
+    def snapshot(self) -> dict:
+        """One row per tracked workshop and the seq they are current as of."""
+        with self._lock:
+            return {"seq": self.seq, "workshops": [e.row() for e in self._entries.values()]}
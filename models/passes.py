@@ -1,37 +1,98 @@
 # models/passes.py
-from typing import List
+from typing import FrozenSet, Iterable, List, Optional
 
-class Pass:
+from models.slotted import SlottedModel
+
+class Pass(SlottedModel):
     """
     Base Pass class
+
+    Access is a frozenset of exhibition ids (O(1) allows_exhibition).
+    Catalogue passes are shared by every holder, so upgrade_pass never
+    changes them: the upgraded holder gets their own copy (upgraded()) that
+    remembers its catalogue pass (base) and the exhibitions it added
+    (upgrades).
     """
-    def __init__(self, pass_id: int, price: float, exhibitions_access: List[int], features: List[str] = None):
+    __slots__ = ("pass_id", "price", "_access", "features", "upgrades", "base")
+    all_access = False  # True: covers every exhibition, including ones added later
+
+    def __init__(self, pass_id: int, price: float, exhibitions_access: Iterable[int], features: List[str] = None):
         self.pass_id = pass_id
         self.price = price
-        self.exhibitions_access = list(exhibitions_access)
+        self._access: FrozenSet[int] = frozenset(exhibitions_access)
         self.features = features or []
+        self.upgrades: FrozenSet[int] = frozenset()
+        self.base: Optional["Pass"] = None
+
+    @property
+    def exhibitions_access(self) -> FrozenSet[int]:
+        return self._access
+
+    @exhibitions_access.setter
+    def exhibitions_access(self, exhibition_ids: Iterable[int]) -> None:
+        self._access = frozenset(exhibition_ids)
+
+    def __getstate__(self):
+        # same shape as before access became a frozenset
+        state = super().__getstate__()
+        state["exhibitions_access"] = sorted(state.pop("_access"))
+        return state
+
+    def __setstate__(self, state):
+        super().__setstate__(state)
+        if not hasattr(self, "upgrades"):
+            self.upgrades = frozenset()
+        if not hasattr(self, "base"):
+            self.base = None
 
     def allows_exhibition(self, exhibition_id: int) -> bool:
-        return exhibition_id in self.exhibitions_access
+        return exhibition_id in self._access
 
     def add_exhibition(self, exhibition_id: int):
-        if exhibition_id not in self.exhibitions_access:
-            self.exhibitions_access.append(exhibition_id)
+        """Extend this pass (a catalogue change, seen by every holder); see upgraded() for one holder."""
+        self._access = self._access | {exhibition_id}
+
+    def upgraded(self, exhibition_ids: Iterable[int]) -> "Pass":
+        """A copy for one holder that also covers exhibition_ids (this pass is left unchanged)."""
+        copy = self.__class__.__new__(self.__class__)
+        for name in self._fields():
+            setattr(copy, name, getattr(self, name))
+        added = frozenset(exhibition_ids) - self._access
+        copy._access = self._access | added
+        copy.upgrades = self.upgrades | added
+        copy.base = self.original
+        return copy
+
+    @property
+    def original(self) -> "Pass":
+        """The pass as sold, without the holder's upgrades."""
+        return self.base if self.base is not None else self
 
     def __str__(self):
-        return f"Pass({self.pass_id}) price={self.price} access={self.exhibitions_access}"
+        return f"Pass({self.pass_id}) price={self.price} access={sorted(self._access)}"
 
 class ExhibitionPass(Pass):
     """
     Pass allowing access to a specific set of exhibition IDs.
     """
+    __slots__ = ()
+
     def __init__(self, pass_id: int, price: float, exhibitions_access: List[int], features: List[str] = None):
         super().__init__(pass_id, price, exhibitions_access, features)
 
 class AllAccessPass(Pass):
     """
-    All access — can be represented as allowing any exhibition by convention.
-    In this implementation we will store access to all known exhibitions when created.
+    All access: allows every exhibition, including exhibitions added after
+    the pass was sold. exhibitions_access is not consulted.
     """
+    __slots__ = ()
+    all_access = True
+
     def __init__(self, pass_id: int, price: float, features: List[str] = None):
         super().__init__(pass_id, price, exhibitions_access=[], features=features)
+
+    def allows_exhibition(self, exhibition_id: int) -> bool:
+        return True
+
+    def __str__(self):
+        return f"Pass({self.pass_id}) price={self.price} access=all"
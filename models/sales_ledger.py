@@ -0,0 +1,291 @@
+# models/sales_ledger.py
+import array
+import datetime
+import struct
+import threading
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # optional: the pure-Python aggregation gives the same answers, slower
+    np = None
+
+from models.passes import Pass, ExhibitionPass, AllAccessPass
+
+# event kinds (VOID marks rows of a rolled-back event)
+SALE, UPGRADE, VOID = 0, 1, -1
+PASS_CLASSES = ("Pass", "ExhibitionPass", "AllAccessPass")
+NO_EXHIBITION = -1  # row of an event whose pass covers no exhibition
+UNKNOWN = -1        # attendee / pass id not known (sales counted before the ledger existed)
+
+# one row per (event, exhibition): amount is the event's price split evenly over
+# its exhibitions, units is 1 on the event's first row only
+COLUMNS = (("time", "d"), ("attendee_id", "q"), ("pass_id", "q"), ("exhibition_id", "q"),
+           ("amount", "d"), ("kind", "b"), ("pass_class", "b"), ("units", "b"))
+ROW = struct.Struct("<dqqqdbbb")
+
+_EPOCH = datetime.datetime(1970, 1, 1)
+_EPOCH_ORDINAL = _EPOCH.toordinal()
+DAY, HOUR = 86400, 3600
+
+
+def wall_clock(moment: Optional[datetime.datetime] = None) -> float:
+    """Local wall-clock time as seconds since 1970-01-01, so whole days match date.today()."""
+    return ((moment or datetime.datetime.now()) - _EPOCH).total_seconds()
+
+
+def day_start(date_key: str) -> float:
+    """wall_clock() of midnight on an ISO date."""
+    return float((datetime.date.fromisoformat(date_key).toordinal() - _EPOCH_ORDINAL) * DAY)
+
+
+def pass_class(p: Optional[Pass]) -> int:
+    if isinstance(p, AllAccessPass):
+        return 2
+    if isinstance(p, ExhibitionPass):
+        return 1
+    return 0
+
+
+def sale_event(kind: int, when: float, attendee_id: int, p: Optional[Pass], amount: float,
+               exhibitions: Sequence[int]) -> tuple:
+    """The event carried in purchase / upgrade storage records."""
+    pid = getattr(p, "pass_id", None)
+    return (kind, when, attendee_id, UNKNOWN if pid is None else pid, pass_class(p),
+            float(amount), tuple(exhibitions))
+
+
+def event_rows(event: tuple) -> List[tuple]:
+    """Expand an event into ledger rows, in COLUMNS order."""
+    kind, when, aid, pid, cls, amount, exhibitions = event
+    exhibitions = exhibitions or (NO_EXHIBITION,)
+    share = amount / len(exhibitions)
+    return [(when, aid, pid, eid, share, kind, cls, 1 if i == 0 else 0)
+            for i, eid in enumerate(exhibitions)]
+
+
+def pack_rows(rows: Iterable[tuple]) -> bytes:
+    return b"".join(ROW.pack(*row) for row in rows)
+
+
+class SalesLedger:
+    """
+    Every pass sale and upgrade as an event, stored column by column in
+    typed arrays (append-only, 43 bytes per row) and aggregated with NumPy
+    when it is installed.
+
+    An event becomes one row per exhibition its pass covers, with the price
+    split evenly between them, so revenue by exhibition is a plain sum like
+    every other grouping. Times are local wall-clock seconds (see
+    wall_clock()), so days line up with the date keys of sales_log.
+
+    Rows are never removed: a rolled-back event is voided in place, which
+    keeps row numbers stable for concurrent appends.
+    """
+
+    def __init__(self):
+        self._columns = {name: array.array(code) for name, code in COLUMNS}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._columns["time"])
+
+    def __getstate__(self):
+        with self._lock:
+            return {name: col.tobytes() for name, col in self._columns.items()}
+
+    def __setstate__(self, state):
+        self._columns = {}
+        for name, code in COLUMNS:
+            col = array.array(code)
+            col.frombytes(state.get(name, b""))
+            self._columns[name] = col
+        self._lock = threading.Lock()
+
+    # -------------------------
+    # Appending
+    # -------------------------
+    def append(self, event: tuple) -> range:
+        """Add an event; returns the row numbers it occupies."""
+        return self.extend_rows(event_rows(event))
+
+    def extend_rows(self, rows: Iterable[tuple]) -> range:
+        columns = [self._columns[name] for name, _ in COLUMNS]
+        with self._lock:
+            start = len(columns[0])
+            for row in rows:
+                for col, value in zip(columns, row):
+                    col.append(value)
+            return range(start, len(columns[0]))
+
+    def extend_packed(self, data: bytes) -> None:
+        """Append rows in ROW format (as written by pack_rows)."""
+        if len(data) % ROW.size:
+            data = data[:len(data) - len(data) % ROW.size]  # torn last row
+        if np is None:
+            self.extend_rows(ROW.iter_unpack(data))
+            return
+        records = np.frombuffer(data, dtype=_ROW_DTYPE)
+        with self._lock:
+            for name, _ in COLUMNS:
+                self._columns[name].frombytes(records[name].tobytes())
+
+    def void(self, rows: range) -> None:
+        """Cancel the event stored in rows (undo of append)."""
+        with self._lock:
+            for i in rows:
+                self._columns["kind"][i] = VOID
+                self._columns["amount"][i] = 0.0
+                self._columns["units"][i] = 0
+
+    def rows(self, start: int = 0) -> List[tuple]:
+        with self._lock:
+            return list(zip(*(col[start:] for col in self._columns.values())))
+
+    @classmethod
+    def from_sales_log(cls, sales_log: Dict[str, int]) -> "SalesLedger":
+        """Seed a ledger from the per-day counters kept before events were recorded."""
+        ledger = cls()
+        ledger.extend_rows((day_start(date_key), UNKNOWN, UNKNOWN, NO_EXHIBITION, 0.0, SALE, 0, 1)
+                           for date_key, count in sorted(sales_log.items()) for _ in range(count))
+        return ledger
+
+    # -------------------------
+    # Aggregation
+    # -------------------------
+    def revenue_by_day(self) -> Dict[str, float]:
+        return self._aggregate("day", "revenue")
+
+    def revenue_by_hour(self) -> Dict[str, float]:
+        """Keyed "YYYY-MM-DDTHH:00"."""
+        return self._aggregate("hour", "revenue")
+
+    def revenue_by_pass_class(self) -> Dict[str, float]:
+        return self._aggregate("pass_class", "revenue")
+
+    def revenue_by_exhibition(self) -> Dict[Optional[int], float]:
+        """Keyed by exhibition id; None collects passes that cover no exhibition."""
+        return self._aggregate("exhibition", "revenue")
+
+    def sales_by_day(self) -> Dict[str, int]:
+        """Passes sold per day: the same numbers as TicketSystem.daily_sales()."""
+        return self._aggregate("day", "sales")
+
+    def upgrades_by_day(self) -> Dict[str, int]:
+        return self._aggregate("day", "upgrades")
+
+    def rolling_revenue(self, days: int = 7) -> Dict[str, float]:
+        """For every day from the first sale to the last, revenue over the days-long window ending on it."""
+        daily = self._aggregate("day", "revenue", labels=False)
+        if not daily:
+            return {}
+        first, last = min(daily), max(daily)
+        totals = [daily.get(d, 0.0) for d in range(first, last + 1)]
+        if np is not None:
+            sums = np.cumsum(np.asarray(totals))
+            window = sums - np.concatenate((np.zeros(days), sums[:-days]))[:len(sums)]
+            rolled = window.tolist()
+        else:
+            rolled, running = [], 0.0
+            for i, value in enumerate(totals):
+                running += value - (totals[i - days] if i >= days else 0.0)
+                rolled.append(running)
+        return {_day_label(first + i): value for i, value in enumerate(rolled)}
+
+    def revenue_between(self, start: datetime.datetime, end: datetime.datetime) -> float:
+        """Revenue of events with start <= time < end."""
+        lo, hi = wall_clock(start), wall_clock(end)
+        with self._lock:
+            if np is not None and len(self):
+                time, amount = self._view("time"), self._view("amount")
+                return float(amount[(time >= lo) & (time < hi)].sum())
+            return sum(a for t, a in zip(self._columns["time"], self._columns["amount"]) if lo <= t < hi)
+
+    def _view(self, name: str):
+        # zero-copy; only used with the lock held, so no append resizes the array meanwhile
+        return np.frombuffer(self._columns[name], dtype=_NP_TYPES[name])
+
+    def _aggregate(self, key: str, measure: str, labels: bool = True) -> dict:
+        with self._lock:
+            if not len(self):
+                return {}
+            if np is not None:
+                keys, values = self._aggregate_numpy(key, measure)
+            else:
+                keys, values = self._aggregate_python(key, measure)
+        if measure != "revenue":
+            values = [int(v) for v in values]
+        if not labels:
+            return dict(zip(keys, values))
+        label = _LABELS[key]
+        return {label(k): v for k, v in zip(keys, values)}
+
+    def _aggregate_numpy(self, key: str, measure: str) -> Tuple[list, list]:
+        kind = self._view("kind")
+        if measure == "revenue":
+            counted, weights = kind != VOID, self._view("amount")
+        else:
+            counted = (kind == (SALE if measure == "sales" else UPGRADE)) & (self._view("units") == 1)
+            weights = counted
+        if key in ("day", "hour"):
+            # wall-clock times are positive, so truncating is flooring (and much cheaper)
+            keys = (self._view("time") / (DAY if key == "day" else HOUR)).astype(np.int64)
+        elif key == "pass_class":
+            keys = self._view("pass_class").astype(np.int64)
+        else:
+            keys = self._view("exhibition_id")
+        low, high = int(keys.min()), int(keys.max())
+        span = high - low + 1
+        if span <= 4 * len(keys) + 1024:
+            # dense keys (days, hours, classes, exhibitions): bincount, no sort and no masking copies
+            offsets = keys - low
+            present = np.flatnonzero(np.bincount(offsets, weights=counted, minlength=span))
+            sums = np.bincount(offsets, weights=weights, minlength=span)[present]
+            return (present + low).tolist(), sums.tolist()
+        unique, inverse = np.unique(keys, return_inverse=True)
+        present = np.flatnonzero(np.bincount(inverse, weights=counted))
+        return unique[present].tolist(), np.bincount(inverse, weights=weights)[present].tolist()
+
+    def _aggregate_python(self, key: str, measure: str) -> Tuple[list, list]:
+        cols = self._columns
+        source = {"day": cols["time"], "hour": cols["time"], "pass_class": cols["pass_class"],
+                  "exhibition": cols["exhibition_id"]}[key]
+        width = DAY if key == "day" else HOUR if key == "hour" else None
+        wanted = SALE if measure == "sales" else UPGRADE
+        sums: Dict[int, float] = {}
+        for k, kind, amount, units in zip(source, cols["kind"], cols["amount"], cols["units"]):
+            if measure == "revenue":
+                if kind == VOID:
+                    continue
+                value = amount
+            elif kind == wanted and units == 1:
+                value = 1
+            else:
+                continue
+            k = int(k // width) if width else k
+            sums[k] = sums.get(k, 0) + value
+        keys = sorted(sums)
+        return keys, [sums[k] for k in keys]
+
+
+def _day_label(day: int) -> str:
+    return datetime.date.fromordinal(_EPOCH_ORDINAL + day).isoformat()
+
+
+def _hour_label(hour: int) -> str:
+    day, h = divmod(hour, 24)
+    return f"{_day_label(day)}T{h:02d}:00"
+
+
+_LABELS = {
+    "day": _day_label,
+    "hour": _hour_label,
+    "pass_class": lambda k: PASS_CLASSES[k],
+    "exhibition": lambda k: None if k == NO_EXHIBITION else k,
+}
+
+if np is not None:
+    _NP_TYPES = {"time": np.float64, "attendee_id": np.int64, "pass_id": np.int64,
+                 "exhibition_id": np.int64, "amount": np.float64, "kind": np.int8,
+                 "pass_class": np.int8, "units": np.int8}
+    _ROW_DTYPE = np.dtype([(name, "<" + np.dtype(_NP_TYPES[name]).str[1:]) for name, _ in COLUMNS])
@@ -0,0 +1,172 @@
+# models/schedule.py
+import bisect
+import threading
+from typing import Callable, Dict, Iterable, List, Optional
+
+
+class IntervalIndex:
+    """
+    Half-open intervals [start, end) with a key, in a list sorted by start.
+
+    overlapping() bisects to the first interval that could reach the query
+    (one starting no earlier than the query start minus the longest interval
+    seen) and walks forward until intervals start after the query ends:
+    O(log n + k) for k candidates. Works with any ordered values whose
+    differences can be added back (datetimes and timedeltas, numbers).
+    """
+
+    __slots__ = ("_items", "_longest")
+
+    def __init__(self):
+        self._items: List[tuple] = []  # (start, end, key)
+        self._longest = None  # longest end - start added (never shrinks)
+
+    def __len__(self):
+        return len(self._items)
+
+    def __iter__(self):
+        """(start, end, key) by start."""
+        return iter(list(self._items))
+
+    def add(self, start, end, key) -> None:
+        length = end - start
+        if self._longest is None or length > self._longest:
+            self._longest = length
+        bisect.insort(self._items, (start, end, key))
+
+    def remove(self, start, end, key) -> bool:
+        item = (start, end, key)
+        i = bisect.bisect_left(self._items, item)
+        if i < len(self._items) and self._items[i] == item:
+            del self._items[i]
+            return True
+        return False
+
+    def overlapping(self, start, end) -> List:
+        """Keys of the intervals overlapping [start, end), by start."""
+        items = self._items
+        if not items:
+            return []
+        i = bisect.bisect_left(items, (start - self._longest,))
+        out = []
+        while i < len(items):
+            s, e, key = items[i]
+            if s >= end:
+                break
+            if e > start:
+                out.append(key)
+            i += 1
+        return out
+
+
+class Schedule:
+    """
+    Time-slot indexes over the timed workshops of one TicketSystem (workshops
+    without a start and end are ignored):
+
+    - every timed workshop, for "what runs between X and Y";
+    - one index per room, to catch double-bookings when a workshop is added;
+    - one index per attendee over their timed reservations, built from
+      Attendee.reservations the first time the attendee is checked and kept
+      current by book()/unbook() afterwards.
+
+    Keys are workshop ids. Attendee indexes are changed under the attendee's
+    lock in TicketSystem; the workshop and room indexes under the schedule's.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.workshops = IntervalIndex()
+        self.rooms: Dict[str, IntervalIndex] = {}
+        self._attendees: Dict[int, IntervalIndex] = {}
+
+    def clear(self) -> None:
+        with self._lock:
+            self.workshops = IntervalIndex()
+            self.rooms.clear()
+            self._attendees.clear()
+
+    # -------------------------
+    # Workshops and rooms
+    # -------------------------
+    def track(self, workshop) -> None:
+        if workshop.start is None:
+            return
+        with self._lock:
+            self.workshops.add(workshop.start, workshop.end, workshop.workshop_id)
+            if workshop.room:
+                self.rooms.setdefault(workshop.room, IntervalIndex()).add(
+                    workshop.start, workshop.end, workshop.workshop_id)
+        for aid in list(workshop.attendees):
+            index = self._attendees.get(aid)
+            if index is not None:
+                index.add(workshop.start, workshop.end, workshop.workshop_id)
+
+    def untrack(self, workshop) -> None:
+        if workshop.start is None:
+            return
+        with self._lock:
+            self.workshops.remove(workshop.start, workshop.end, workshop.workshop_id)
+            room = self.rooms.get(workshop.room)
+            if room is not None:
+                room.remove(workshop.start, workshop.end, workshop.workshop_id)
+        for aid in list(workshop.attendees):
+            index = self._attendees.get(aid)
+            if index is not None:
+                index.remove(workshop.start, workshop.end, workshop.workshop_id)
+
+    def room_conflicts(self, workshop, others: Iterable = ()) -> List[int]:
+        """
+        Ids of tracked workshops (and of `others`, not yet tracked) that use
+        the workshop's room at an overlapping time.
+        """
+        if workshop.start is None or not workshop.room:
+            return []
+        with self._lock:
+            room = self.rooms.get(workshop.room)
+            clash = [] if room is None else room.overlapping(workshop.start, workshop.end)
+        clash += [w.workshop_id for w in others
+                  if w is not workshop and w.room == workshop.room and w.overlaps(workshop)]
+        return [wid for wid in clash if wid != workshop.workshop_id]
+
+    def in_room(self, room: str) -> List[int]:
+        """Ids of the room's workshops, by start time."""
+        with self._lock:
+            index = self.rooms.get(room)
+            return [] if index is None else [wid for _, _, wid in index]
+
+    def between(self, start, end) -> List[int]:
+        """Ids of the timed workshops overlapping [start, end), by start time."""
+        with self._lock:
+            return self.workshops.overlapping(start, end)
+
+    # -------------------------
+    # Attendees
+    # -------------------------
+    def attendee_index(self, attendee, find_workshop: Callable[[int], Optional[object]]) -> IntervalIndex:
+        index = self._attendees.get(attendee.attendee_id)
+        if index is None:
+            index = IntervalIndex()
+            for wid in attendee.reservations:
+                w = find_workshop(wid)
+                if w is not None and w.start is not None:
+                    index.add(w.start, w.end, wid)
+            index = self._attendees.setdefault(attendee.attendee_id, index)
+        return index
+
+    def attendee_conflicts(self, attendee, workshop, find_workshop) -> List[int]:
+        """Ids of the attendee's reserved workshops overlapping this one's slot (O(log k))."""
+        if workshop.start is None:
+            return []
+        clash = self.attendee_index(attendee, find_workshop).overlapping(workshop.start, workshop.end)
+        return [wid for wid in clash if wid != workshop.workshop_id]
+
+    def book(self, attendee, workshop) -> None:
+        index = self._attendees.get(attendee.attendee_id)
+        if index is not None and workshop.start is not None:
+            index.add(workshop.start, workshop.end, workshop.workshop_id)
+
+    def unbook(self, attendee, workshop) -> None:
+        index = self._attendees.get(attendee.attendee_id)
+        if index is not None and workshop.start is not None:
+            index.remove(workshop.start, workshop.end, workshop.workshop_id)
@@ -0,0 +1,38 @@
+# models/slotted.py
+from typing import Dict, Tuple
+
+
+class SlottedModel:
+    """
+    Base for the __slots__ models (no per-instance __dict__).
+
+    Pickles as a plain {field: value} dict, the same shape the dict-backed
+    models used to pickle as, so data files written before and after the
+    switch load with the same __setstate__. Fields named in _transient (locks,
+    the owning TicketSystem) are never pickled and come back as None unless a
+    subclass restores them.
+    """
+
+    __slots__ = ()
+    _transient: Tuple[str, ...] = ()
+    _field_cache: Dict[type, Tuple[str, ...]] = {}
+
+    @classmethod
+    def _fields(cls) -> Tuple[str, ...]:
+        fields = SlottedModel._field_cache.get(cls)
+        if fields is None:
+            fields = tuple(name for klass in reversed(cls.__mro__)
+                           for name in klass.__dict__.get("__slots__", ())
+                           if name != "__weakref__")
+            SlottedModel._field_cache[cls] = fields
+        return fields
+
+    def __getstate__(self):
+        return {name: getattr(self, name) for name in self._fields()
+                if name not in self._transient and hasattr(self, name)}
+
+    def __setstate__(self, state):
+        for name in self._transient:
+            setattr(self, name, None)
+        for name, value in state.items():
+            setattr(self, name, value)
@@ -1,143 +1,710 @@
 # models/ticket_system.py
-from typing import List, Optional, Dict
+from typing import Callable, List, Optional, Dict
+import contextlib
 import datetime
+import threading
+import time
+import weakref
 
-from storage.data_manager import save_data, load_data
+from storage.backend import StorageBackend, PickleBackend, make_backend
 from models.attendee import Attendee
 from models.exhibition import Exhibition
 from models.workshop import Workshop
 from models.passes import Pass, ExhibitionPass, AllAccessPass
+from models.unit_of_work import UnitOfWork
+from models.concurrency import RWLock, StripedLock
+from models.attendee_cache import AttendeeCache
+from models.occupancy import OccupancyView
+from models.schedule import Schedule
+from models.waitlist import fifo
+from models.metrics import METRICS, instrumented
+from models.idempotency import IdempotencyCache, idempotent
+from models.sales_ledger import SalesLedger, SALE, UPGRADE, sale_event, wall_clock, day_start
 
 class TicketSystem:
     """
     Central controller for attendees, exhibitions, passes, and reservations.
-    Responsible for persistence via storage/data_manager.
+    Responsible for persistence via a pluggable storage/backend.py backend.
+
+    storage_mode selects the backend (storage_options are passed to it):
+    - "pickle":  every mutation rewrites the pickle files (original behaviour)
+    - "journal": every mutation appends one record to storage/journal.py's log;
+                 startup replays snapshot + log tail, and the log is compacted
+                 into a new snapshot every storage_options["compact_every"] records
+                 (storage/snapshot.py's binary format)
+    - "sqlite":  normalized tables in storage/sqlite_backend.py; each mutation is
+                 one small transaction and attendees are loaded on demand
+    - "lazy":    pickle files for exhibitions, passes and sales; attendees in the
+                 offset-indexed storage/attendee_store.py, loaded on demand
+    - "memory":  nothing is persisted
+    A ready-made StorageBackend instance can be passed as backend instead.
+
+    With the on-demand modes at most attendee_cache_size attendees are kept in
+    memory (least recently used ones are dropped), so startup time and memory
+    do not grow with the number of attendees.
+
+    Group several operations with `with ts.transaction():` to persist them in
+    one flush and roll the in-memory state back if any of them fails.
+
+    Public operations are thread-safe. Reservations lock only the attendee
+    (striped by id) and the workshop's own roster, so bookings for different
+    workshops run in parallel; full-state writes take the state lock exclusively.
+
+    register_attendee, purchase_pass, upgrade_pass, reserve_workshop,
+    cancel_reservation and leave_waitlist take an optional idempotency_key:
+    a retry with the same key returns the first call's result without
+    running or persisting anything (see _idempotent() and
+    models/idempotency.py).
     """
 
-    ATTENDEES_FILE = "attendees.pkl"
-    EXHIBITIONS_FILE = "exhibitions.pkl"
-    PASSES_FILE = "passes.pkl"
-    SALES_FILE = "sales.pkl"
+    ATTENDEES_FILE = PickleBackend.ATTENDEES_FILE
+    EXHIBITIONS_FILE = PickleBackend.EXHIBITIONS_FILE
+    PASSES_FILE = PickleBackend.PASSES_FILE
+    SALES_FILE = PickleBackend.SALES_FILE
+
+    ATTENDEE_CACHE_SIZE = 10_000
+
+    def __init__(self, storage_mode: str = "pickle", storage_options: Optional[dict] = None,
+                 backend: Optional[StorageBackend] = None, attendee_cache_size: Optional[int] = None,
+                 waitlist_priority: Callable[[Attendee], int] = fifo):
+        self._backend = backend or make_backend(storage_mode, storage_options)
+        self.storage_mode = storage_mode
+        # waitlist order: lower values are served first, ties by arrival (see models/waitlist.py)
+        self.waitlist_priority = waitlist_priority
+
+        # transaction / replay state is per thread
+        self._local = threading.local()
+        self._state_lock = RWLock()
+        self._attendee_locks = StripedLock()
+        self._email_locks = StripedLock()
+        self._load_lock = threading.Lock()
 
-    def __init__(self):
         # load or initialize
-        self.attendees: List[Attendee] = load_data(self.ATTENDEES_FILE) or []
-        self.exhibitions: List[Exhibition] = load_data(self.EXHIBITIONS_FILE) or []
-        self.passes: List[Pass] = load_data(self.PASSES_FILE) or []
-        self.sales_log: Dict[str, int] = load_data(self.SALES_FILE) or {}
+        with METRICS.timer("backend.load"):
+            state, records = self._backend.load()
+        self.attendees: List[Attendee] = state["attendees"]
+        if not self._backend.resident:
+            self.attendees = AttendeeCache(attendee_cache_size or self.ATTENDEE_CACHE_SIZE)
+        self.exhibitions: List[Exhibition] = state["exhibitions"]
+        self.passes: List[Pass] = state["passes"]
+        self.sales_log: Dict[str, int] = state["sales_log"]
+        # one event per sale / upgrade; data saved before it existed has only the per-day counts
+        self.sales_ledger: SalesLedger = state.get("sales_ledger")
+        if self.sales_ledger is None:
+            self.sales_ledger = SalesLedger.from_sales_log(self.sales_log)
+
+        # occupancy counters, kept current by the workshops (see _on_roster_changed)
+        self.occupancy = OccupancyView()
+        # time-slot indexes of timed workshops, per room and per attendee (see models/schedule.py)
+        self.schedule = Schedule()
+        # results of calls made with an idempotency key, persisted with the data
+        self.idempotency: IdempotencyCache = state.get("idempotency")
+        if self.idempotency is None:
+            self.idempotency = IdempotencyCache()
+        self._idempotency_locks = StripedLock()
+
+        # hash indexes over the collections above (rebuilt after every load)
+        self._rebuild_indexes()
+
+        # journaled mutations newer than the loaded state
+        self._replay(records)
 
         # 🔁 Auto-create sample data if system is empty
         if not self.exhibitions or not self.passes:
             self.create_sample_data()
 
 
+    # -------------------------
+    # Index maintenance
+    # -------------------------
+    @staticmethod
+    def _email_key(email: str) -> str:
+        key = email.casefold()
+        # most emails are already lower case: index them under the same string object
+        return email if key == email else key
+
+    def _rebuild_indexes(self) -> None:
+        """
+        Rebuild every lookup index from the loaded lists.
+        Called after loading from pickle and whenever a list is replaced wholesale.
+        """
+        # on-demand backends: the attendee cache holds the strong references
+        index = dict if self._backend.resident else weakref.WeakValueDictionary
+        self._attendees_by_email: Dict[str, Attendee] = index()
+        self._attendees_by_id: Dict[int, Attendee] = index()
+        self._passes_by_id: Dict[int, Pass] = {}
+        self._exhibitions_by_id: Dict[int, Exhibition] = {}
+        self._workshops_by_id: Dict[int, Workshop] = {}
+        self._workshop_parent: Dict[int, Exhibition] = {}
+        self.occupancy.clear()
+        self.schedule.clear()
+
+        for ex in self.exhibitions:
+            self._index_exhibition(ex)
+        for p in self.passes:
+            self._passes_by_id.setdefault(getattr(p, "pass_id", None), p)
+        for a in self.attendees:
+            self._index_attendee(a)
+
+    def _unindex_attendee(self, attendee: Attendee) -> None:
+        key = self._email_key(attendee.email)
+        if self._attendees_by_email.get(key) is attendee:
+            del self._attendees_by_email[key]
+        if self._attendees_by_id.get(attendee.attendee_id) is attendee:
+            del self._attendees_by_id[attendee.attendee_id]
+        attendee._registry = None
+
+    def _index_attendee(self, attendee: Attendee) -> None:
+        # first registration wins, matching the old first-match list scans
+        self._attendees_by_email.setdefault(self._email_key(attendee.email), attendee)
+        self._attendees_by_id.setdefault(attendee.attendee_id, attendee)
+        attendee._registry = self
+
+    def _index_exhibition(self, exhibition: Exhibition) -> None:
+        self._exhibitions_by_id.setdefault(exhibition.exhibition_id, exhibition)
+        for w in exhibition.workshops:
+            self._index_workshop(exhibition, w)
+            self._attach_workshop(exhibition, w)
+        exhibition._registry = self
+
+    def _index_workshop(self, exhibition: Exhibition, workshop: Workshop) -> None:
+        if workshop.workshop_id not in self._workshops_by_id:
+            self._workshops_by_id[workshop.workshop_id] = workshop
+            self._workshop_parent[workshop.workshop_id] = exhibition
+
+    def _attach_workshop(self, exhibition: Exhibition, workshop: Workshop) -> None:
+        workshop._registry = self
+        self.occupancy.track(exhibition.exhibition_id, workshop)
+        self.schedule.track(workshop)
+
+    def _detach_workshop(self, workshop: Workshop) -> None:
+        workshop._registry = None
+        self.occupancy.untrack(workshop)
+        self.schedule.untrack(workshop)
+
+    # Hooks called by model objects that are attached to this system.
+    def _on_roster_changed(self, workshop: Workshop) -> None:
+        self.occupancy.update(workshop)
+
+    def _on_workshop_adding(self, exhibition: Exhibition, workshop: Workshop) -> None:
+        if self._replaying:
+            return
+        clash = self.schedule.room_conflicts(workshop)
+        if clash:
+            raise ValueError(f"Room {workshop.room} is already booked at that time (workshop {clash[0]}).")
+
+    def _on_workshop_added(self, exhibition: Exhibition, workshop: Workshop) -> None:
+        self._index_workshop(exhibition, workshop)
+        self._attach_workshop(exhibition, workshop)
+        self._log_change(("add_workshop", exhibition.exhibition_id, workshop))
+        self._undo(exhibition.remove_workshop, workshop)
+
+    def _on_workshop_removed(self, exhibition: Exhibition, workshop: Workshop) -> None:
+        wid = workshop.workshop_id
+        self._log_change(("remove_workshop", exhibition.exhibition_id, wid))
+        self._undo(exhibition.add_workshop, workshop)
+        self._detach_workshop(workshop)
+        if self._workshops_by_id.get(wid) is not workshop:
+            return
+        del self._workshops_by_id[wid]
+        del self._workshop_parent[wid]
+        # another exhibition may still carry a workshop with the same id
+        for ex in self.exhibitions:
+            for w in ex.workshops:
+                if w.workshop_id == wid:
+                    self._index_workshop(ex, w)
+                    return
+
+    def _on_email_changing(self, attendee: Attendee, new_email: str) -> None:
+        new_key = self._email_key(new_email)
+        owner = self._attendees_by_email.get(new_key)
+        if owner is not None and owner is not attendee:
+            raise ValueError("Email already registered.")
+        old_key = self._email_key(attendee.email)
+        if self._attendees_by_email.get(old_key) is attendee:
+            del self._attendees_by_email[old_key]
+        self._attendees_by_email[new_key] = attendee
+
+    def _on_attendee_changed(self, attendee: Attendee, field: str, old_value) -> None:
+        self._log_change(("profile", attendee.attendee_id, field, getattr(attendee, field)))
+        self._undo(self._set_profile_field, attendee, field, old_value)
+
+    def _set_profile_field(self, attendee: Attendee, field: str, value) -> None:
+        if field == "email":
+            self._on_email_changing(attendee, value)
+        setattr(attendee, field, value)
+
     # -------------------------
     # Persistence helpers
     # -------------------------
+    @property
+    def _tx(self) -> Optional[UnitOfWork]:
+        return getattr(self._local, "tx", None)
+
+    @_tx.setter
+    def _tx(self, tx: Optional[UnitOfWork]) -> None:
+        self._local.tx = tx
+
+    @property
+    def _replaying(self) -> bool:
+        return getattr(self._local, "replaying", False)
+
+    @_replaying.setter
+    def _replaying(self, value: bool) -> None:
+        self._local.replaying = value
+
+    def _mutation(self) -> "_Mutation":
+        """
+        Hold the state lock around one operation: shared for backends that
+        write single records, exclusive for backends that rewrite whole
+        collections (unless a transaction defers the write). Backend
+        maintenance such as journal compaction runs afterwards, exclusively.
+        """
+        return _Mutation(self)
+
     def _save_all(self):
-        save_data(self.ATTENDEES_FILE, self.attendees)
-        save_data(self.EXHIBITIONS_FILE, self.exhibitions)
-        save_data(self.PASSES_FILE, self.passes)
-        save_data(self.SALES_FILE, self.sales_log)
+        with self._state_lock.exclusive():
+            with METRICS.timer("backend.save_all"):
+                self._backend.save_all(self)
+
+    def _persist(self, record: tuple) -> None:
+        """
+        Persist one mutation that has already been applied in memory.
+        The pickle backend rewrites the collections it touched; the others
+        write just the record. Inside a transaction the record is deferred.
+        """
+        if self._tx is not None:
+            self._tx.records.append(self._backend.prepare_record(record))
+            return
+        with METRICS.timer("backend.persist"):
+            self._backend.persist(record, self)
+
+    def _log_change(self, record: tuple) -> None:
+        """Persist a mutation made directly on a model object (via the registry hooks)."""
+        if self._replaying:
+            return
+        if self._tx is not None:
+            self._tx.records.append(self._backend.prepare_record(record))
+            return
+        with METRICS.timer("backend.persist"):
+            self._backend.log_change(record, self)
+
+    def _undo(self, fn, *args) -> None:
+        """Register how to reverse an in-memory change (only inside a transaction)."""
+        if self._tx is not None and not self._replaying:
+            self._tx.undo.append((fn, args))
+
+    def _on_commit(self, fn, *args) -> None:
+        """
+        Run fn once the outermost transaction has been persisted (right away
+        outside one). Dropped if the enclosing savepoint or the flush fails.
+        """
+        if self._tx is None:
+            fn(*args)
+            return
+        self._tx.on_commit.append((fn, args))
+        self._undo(self._tx.on_commit.pop)
+
+    @contextlib.contextmanager
+    def transaction(self):
+        """
+        Unit of work: persistence is deferred to a single flush when the block
+        exits, and in-memory changes are rolled back if it raises (or if that
+        flush fails). A nested transaction is a savepoint: if it raises, only
+        its own changes are rolled back and the outer block carries on.
+        """
+        if self._tx is not None:
+            tx, mark = self._tx, self._tx.mark()
+            try:
+                yield self
+            except BaseException:
+                self._rollback(tx, mark)
+                raise
+            return
+        tx = self._tx = UnitOfWork()
+        try:
+            yield self
+            self._tx = None
+            if tx.records:
+                with self._mutation(), METRICS.timer("backend.persist_batch"):
+                    self._backend.persist_batch(tx.records, self)
+        except BaseException:
+            self._tx = None
+            self._rollback(tx)
+            raise
+        for fn, args in tx.on_commit:
+            fn(*args)
+
+    def _rollback(self, tx: UnitOfWork, mark=(0, 0)) -> None:
+        # undo steps go through the model hooks; they must not be persisted again
+        self._replaying = True
+        try:
+            tx.rollback(mark)
+        finally:
+            self._replaying = False
+
+    def _replay(self, records: List[tuple]) -> None:
+        self._replaying = True
+        try:
+            for record in records:
+                self._apply_record(record)
+        finally:
+            self._replaying = False
+
+    def _apply_record(self, record: tuple) -> None:
+        """Re-apply one journaled mutation (used during replay)."""
+        op = record[0]
+        if op == "register":
+            self._add_attendee(record[1])
+        elif op == "add_pass":
+            self._add_pass(record[1])
+        elif op == "purchase":
+            # records journaled before the sales ledger carry no event
+            _, aid, pid, date_key, p, *event = record
+            self._apply_purchase(self.find_attendee_by_id(aid), p or self.find_pass_by_id(pid), date_key,
+                                 event=event[0] if event else None)
+        elif op == "upgrade":
+            _, aid, eids, *event = record
+            self._apply_upgrade(self.find_attendee_by_id(aid), eids, event=event[0] if event else None)
+        elif op == "add_exhibition":
+            self._add_exhibition(record[1])
+        elif op == "add_workshop":
+            _, eid, workshop = record
+            self.find_exhibition_by_id(eid).add_workshop(workshop)
+        elif op == "remove_workshop":
+            _, eid, wid = record
+            ex = self.find_exhibition_by_id(eid)
+            ex.remove_workshop(ex.get_workshop_by_id(wid))
+        elif op == "reserve":
+            _, aid, wid = record
+            self._apply_reserve(self.find_attendee_by_id(aid), self.find_workshop_by_id(wid))
+        elif op == "cancel":
+            _, aid, wid = record
+            self._apply_cancel(self.find_attendee_by_id(aid), self.find_workshop_by_id(wid))
+        elif op == "waitlist_join":
+            _, aid, wid, priority, seq = record
+            self._apply_waitlist_join(aid, self.find_workshop_by_id(wid), priority, seq)
+        elif op == "waitlist_leave":
+            _, aid, wid = record
+            self._apply_waitlist_leave(aid, self.find_workshop_by_id(wid))
+        elif op == "promote":
+            _, aid, wid = record
+            self._apply_promote(self.find_attendee_by_id(aid), self.find_workshop_by_id(wid))
+        elif op == "capacity":
+            _, wid, capacity = record
+            self._apply_capacity(self.find_workshop_by_id(wid), capacity)
+        elif op == "profile":
+            _, aid, field, value = record
+            attendee = self.find_attendee_by_id(aid)
+            if field == "email":
+                self._on_email_changing(attendee, value)
+            setattr(attendee, field, value)
+        elif op == "idempotency":
+            self._apply_idempotency(*record[1:])
+        else:
+            raise ValueError(f"Unknown journal record: {op}")
+
+    def _idempotent(self, key: str, fingerprint: tuple, run: Callable[[], object]):
+        """
+        Run an operation at most once per idempotency key. On a repeated key
+        the stored result is returned in O(1), with nothing run or persisted.
+        Otherwise the operation runs in a transaction together with an
+        "idempotency" record, so the key is persisted in the same flush as
+        the operation itself. A call that fails stores nothing, so retrying
+        it runs it again.
+        """
+        start = time.perf_counter()
+        with self._idempotency_locks(key):
+            entry = self.idempotency.lookup(key, fingerprint)
+            if entry is not None:
+                METRICS.observe("idempotency.hit", time.perf_counter() - start)
+                return entry[1]
+            with self.transaction():
+                result = run()
+                expires = self.idempotency.expiry()
+                self._apply_idempotency(key, fingerprint, result, expires)
+                self._persist(("idempotency", key, fingerprint, result, expires))
+            METRICS.observe("idempotency.miss", time.perf_counter() - start)
+            return result
+
+    def _apply_idempotency(self, key: str, fingerprint: tuple, result, expires: float) -> None:
+        self.idempotency.store(key, fingerprint, result, expires)
+        self._undo(self.idempotency.discard, key)
+
+    def sync(self) -> None:
+        """
+        Make every mutation persisted so far durable, also under a storage
+        policy that defers fsyncs (the journal's group commit).
+        """
+        self._backend.sync()
+
+    def close(self) -> None:
+        """Flush and release the storage backend."""
+        self._backend.close()
 
     # -------------------------
     # Attendee management
     # -------------------------
+    @instrumented
+    @idempotent(lambda attendee: ("register", attendee.email.casefold(), attendee.name, attendee.phone))
     def register_attendee(self, attendee: Attendee) -> None:
-        if self.find_attendee_by_email(attendee.email):
-            raise ValueError("Email already registered.")
+        with self._mutation(), self._email_locks(self._email_key(attendee.email)):
+            if self.find_attendee_by_email(attendee.email):
+                raise ValueError("Email already registered.")
+            if not self._backend.resident and self.find_attendee_by_id(attendee.attendee_id):
+                # on-disk backends key attendees by id
+                raise ValueError("Attendee ID already registered.")
+            self._add_attendee(attendee)
+            self._persist(("register", attendee))
+
+    def _add_attendee(self, attendee: Attendee) -> None:
         self.attendees.append(attendee)
-        self._save_all()
+        self._index_attendee(attendee)
+        self._undo(self._remove_attendee, attendee)
 
-    def find_attendee_by_email(self, email: str) -> Optional[Attendee]:
-        for a in self.attendees:
-            if a.email.lower() == email.lower():
-                return a
-        return None
+    def _remove_attendee(self, attendee: Attendee) -> None:
+        self.attendees.remove(attendee)
+        self._unindex_attendee(attendee)
 
+    @instrumented
+    def find_attendee_by_email(self, email: str) -> Optional[Attendee]:
+        key = self._email_key(email)
+        attendee = self._attendees_by_email.get(key)
+        if not self._backend.resident:
+            if attendee is None:
+                attendee = self._materialize(self._backend.fetch_attendee_by_email(key, self))
+            else:
+                self.attendees.append(attendee)  # refresh its place in the cache
+        return attendee
+
+    @instrumented
     def find_attendee_by_id(self, aid: int) -> Optional[Attendee]:
-        for a in self.attendees:
-            if a.attendee_id == aid:
-                return a
-        return None
+        attendee = self._attendees_by_id.get(aid)
+        if not self._backend.resident:
+            if attendee is None:
+                attendee = self._materialize(self._backend.fetch_attendee_by_id(aid, self))
+            else:
+                self.attendees.append(attendee)
+        return attendee
+
+    def _materialize(self, attendee: Optional[Attendee]) -> Optional[Attendee]:
+        """Cache an attendee loaded from a non-resident backend."""
+        if attendee is None:
+            return None
+        with self._load_lock:
+            # another thread may have loaded the same attendee meanwhile
+            loaded = self._attendees_by_id.get(attendee.attendee_id)
+            if loaded is not None:
+                return loaded
+            self.attendees.append(attendee)
+            self._index_attendee(attendee)
+        return attendee
+
+    @instrumented
+    def next_attendee_id(self) -> int:
+        """One more than the highest attendee id in use."""
+        return self._backend.max_attendee_id(self) + 1
+
+    def iter_attendees(self):
+        """Iterate over every attendee, including ones not loaded in memory."""
+        return self._backend.iter_attendees(self)
+
+    @instrumented
+    def attendee_count(self) -> int:
+        return self._backend.attendee_count(self)
 
     # -------------------------
     # Pass management
     # -------------------------
+    @instrumented
     def add_pass(self, p: Pass):
+        with self._mutation():
+            self._add_pass(p)
+            self._persist(("add_pass", p))
+
+    def _add_pass(self, p: Pass) -> None:
         self.passes.append(p)
-        self._save_all()
+        self._passes_by_id.setdefault(getattr(p, "pass_id", None), p)
+        self._undo(self._remove_pass, p)
+
+    def _remove_pass(self, p: Pass) -> None:
+        self.passes.remove(p)
+        pid = getattr(p, "pass_id", None)
+        if self._passes_by_id.get(pid) is p:
+            del self._passes_by_id[pid]
 
     def find_pass_by_id(self, pid: int) -> Optional[Pass]:
-        for p in self.passes:
-            if getattr(p, "pass_id", None) == pid:
-                return p
-        return None
+        return self._passes_by_id.get(pid)
 
+    @instrumented
+    @idempotent(lambda attendee, p: ("purchase", attendee.attendee_id, getattr(p, "pass_id", None)))
     def purchase_pass(self, attendee: Attendee, p: Pass) -> None:
         """
         Allow attendee to purchase a pass only once.
         Prevent duplicate purchases or overwriting an existing pass.
         """
 
-        # --- NEW RULE: Prevent buying a second pass ---
-        if attendee.purchased_pass is not None:
-            raise ValueError("Attendee has already purchased a pass.")
+        with self._mutation(), self._attendee_locks(attendee.attendee_id):
+            # --- NEW RULE: Prevent buying a second pass ---
+            if attendee.purchased_pass is not None:
+                raise ValueError("Attendee has already purchased a pass.")
+
+            now = datetime.datetime.now()
+            date_key = now.date().isoformat()
+            event = self._apply_purchase(attendee, p, date_key, when=wall_clock(now))
 
+            # Log sale + save system state (catalogue passes are journaled by id)
+            pid = getattr(p, "pass_id", None)
+            catalogued = self.find_pass_by_id(pid) is p
+            self._persist(("purchase", attendee.attendee_id, pid, date_key, None if catalogued else p, event))
+
+    def _apply_purchase(self, attendee: Attendee, p: Pass, date_key: str,
+                        when: Optional[float] = None, event: Optional[tuple] = None) -> tuple:
         # Attach pass to attendee
+        self._undo(setattr, attendee, "purchased_pass", attendee.purchased_pass)
         attendee.purchased_pass = p
 
-        # If AllAccessPass -> give it all exhibitions automatically
-        if isinstance(p, AllAccessPass):
-            p.exhibitions_access = [ex.exhibition_id for ex in self.exhibitions]
-
-        # Log sale + save system state
-        self._log_sale()
-        self._save_all()
+        self._log_sale(date_key)
+        if event is None:
+            event = sale_event(SALE, day_start(date_key) if when is None else when,
+                               attendee.attendee_id, p, p.price, self._covered_exhibitions(p))
+        self._record_sale_event(event)
+        return event
 
+    @instrumented
+    @idempotent(lambda attendee, additional_exhibitions: ("upgrade", attendee.attendee_id, tuple(additional_exhibitions)))
     def upgrade_pass(self, attendee: Attendee, additional_exhibitions: List[int]) -> None:
-        if not attendee.purchased_pass:
-            raise ValueError("Attendee has no pass to upgrade.")
-        for eid in additional_exhibitions:
-            attendee.purchased_pass.add_exhibition(eid)
-        self._save_all()
+        with self._mutation(), self._attendee_locks(attendee.attendee_id):
+            if not attendee.purchased_pass:
+                raise ValueError("Attendee has no pass to upgrade.")
+            event = self._apply_upgrade(attendee, additional_exhibitions, when=wall_clock())
+            self._persist(("upgrade", attendee.attendee_id, list(additional_exhibitions), event))
+
+    def _apply_upgrade(self, attendee: Attendee, additional_exhibitions: List[int],
+                       when: Optional[float] = None, event: Optional[tuple] = None) -> Optional[tuple]:
+        p = attendee.purchased_pass
+        added = [eid for eid in dict.fromkeys(additional_exhibitions) if not p.allows_exhibition(eid)]
+        if added:
+            # the holder gets their own copy: the catalogue pass is shared with every other holder
+            self._undo(setattr, attendee, "purchased_pass", p)
+            attendee.purchased_pass = p.upgraded(added)
+        # upgrades are free in this system; the event records which exhibitions were added
+        if event is None and when is not None:
+            event = sale_event(UPGRADE, when, attendee.attendee_id, p, 0.0, added)
+        if event is not None:
+            self._record_sale_event(event)
+        return event
+
+    def _covered_exhibitions(self, p: Pass) -> List[int]:
+        if p.all_access:
+            return [ex.exhibition_id for ex in self.exhibitions]
+        return sorted(p.exhibitions_access)
+
+    @instrumented
+    def attendees_allowed(self, exhibition_ids: List[int]) -> Dict[int, List[int]]:
+        """
+        For each exhibition id, the ids of the attendees whose pass covers it.
+        One pass over the attendees for all the exhibitions at once; each
+        distinct pass is checked once and its holders share the answer.
+        """
+        wanted = list(dict.fromkeys(exhibition_ids))
+        allowed: List[List[int]] = [[] for _ in wanted]
+        covers: Dict[Pass, tuple] = {}  # pass -> positions in wanted that it covers
+        for a in self.iter_attendees():
+            p = a.purchased_pass
+            if p is None:
+                continue
+            hits = covers.get(p)
+            if hits is None:
+                hits = covers[p] = tuple(i for i, eid in enumerate(wanted) if p.allows_exhibition(eid))
+            for i in hits:
+                allowed[i].append(a.attendee_id)
+        return dict(zip(wanted, allowed))
 
     # -------------------------
     # Exhibition & Workshop helpers
     # -------------------------
+    @instrumented
     def add_exhibition(self, exhibition: Exhibition) -> None:
-        if self.find_exhibition_by_id(exhibition.exhibition_id):
-            raise ValueError("Exhibition with this ID already exists.")
+        with self._mutation():
+            if self.find_exhibition_by_id(exhibition.exhibition_id):
+                raise ValueError("Exhibition with this ID already exists.")
+            for w in exhibition.workshops:
+                clash = self.schedule.room_conflicts(w, exhibition.workshops)
+                if clash:
+                    raise ValueError(f"Room {w.room} is double-booked: workshops {w.workshop_id} and {clash[0]}.")
+            self._add_exhibition(exhibition)
+            self._persist(("add_exhibition", exhibition))
+
+    def _add_exhibition(self, exhibition: Exhibition) -> None:
         self.exhibitions.append(exhibition)
-        self._save_all()
+        self._index_exhibition(exhibition)
+        self._undo(self._remove_exhibition, exhibition)
+
+    def _remove_exhibition(self, exhibition: Exhibition) -> None:
+        self.exhibitions.remove(exhibition)
+        if self._exhibitions_by_id.get(exhibition.exhibition_id) is exhibition:
+            del self._exhibitions_by_id[exhibition.exhibition_id]
+        for w in exhibition.workshops:
+            self._detach_workshop(w)
+            if self._workshops_by_id.get(w.workshop_id) is w:
+                del self._workshops_by_id[w.workshop_id]
+                del self._workshop_parent[w.workshop_id]
+        exhibition._registry = None
 
     def find_exhibition_by_id(self, eid: int) -> Optional[Exhibition]:
-        for ex in self.exhibitions:
-            if ex.exhibition_id == eid:
-                return ex
-        return None
+        return self._exhibitions_by_id.get(eid)
 
     def find_workshop_by_id(self, wid: int) -> Optional[Workshop]:
-        for ex in self.exhibitions:
-            for w in ex.workshops:
-                if w.workshop_id == wid:
-                    return w
-        return None
+        return self._workshops_by_id.get(wid)
+
+    def find_workshop_exhibition(self, workshop: Workshop) -> Optional[Exhibition]:
+        """Return the exhibition that owns this workshop object, or None."""
+        if self._workshops_by_id.get(workshop.workshop_id) is not workshop:
+            return None
+        return self._workshop_parent[workshop.workshop_id]
 
     # -------------------------
     # Reservation logic
     # -------------------------
-    def reserve_workshop(self, attendee: Attendee, workshop: Workshop) -> None:
+    @instrumented
+    @idempotent(lambda attendee, workshop, waitlist=False:
+                ("reserve", attendee.attendee_id, workshop.workshop_id, bool(waitlist)))
+    def reserve_workshop(self, attendee: Attendee, workshop: Workshop, waitlist: bool = False) -> Optional[int]:
+        """
+        Reserve a spot. If the workshop is full (or others are already waiting),
+        raise ValueError, or with waitlist=True join its waitlist and return
+        the attendee's position. Returns None once a spot is reserved.
+        """
+        with self._mutation():
+            if workshop.waitlist and workshop.spots_left():
+                # spots freed without anyone being promoted (e.g. a crash in between)
+                self._promote_waitlisted(workshop)
+            with self._attendee_locks(attendee.attendee_id):
+                if attendee.attendee_id in workshop.attendees:
+                    # checked up front: with others waiting the roster is never consulted below
+                    raise ValueError("Workshop already reserved.")
+                self._check_can_reserve(attendee, workshop)
+                if not workshop.waitlist:
+                    try:
+                        self._apply_reserve(attendee, workshop)
+                    except ValueError:
+                        if not waitlist or attendee.attendee_id in workshop.attendees:
+                            raise
+                    else:
+                        self._persist(("reserve", attendee.attendee_id, workshop.workshop_id))
+                        return None
+                if not waitlist:
+                    raise ValueError("Workshop is full or attendee already reserved.")
+                return self._join_waitlist(attendee, workshop)
+
+    def _check_can_reserve(self, attendee: Attendee, workshop: Workshop) -> None:
         # Pre-checks
         if attendee.purchased_pass is None:
             raise PermissionError("Attendee must purchase a pass before reserving workshops.")
 
         # find which exhibition this workshop belongs to
-        parent_exhibition = None
-        for ex in self.exhibitions:
-            if workshop in ex.workshops:
-                parent_exhibition = ex
-                break
+        parent_exhibition = self.find_workshop_exhibition(workshop)
         if parent_exhibition is None:
             raise ValueError("Workshop not attached to any exhibition.")
 
@@ -145,29 +712,174 @@ class TicketSystem:
         if not attendee.purchased_pass.allows_exhibition(parent_exhibition.exhibition_id):
             raise PermissionError("Attendee's pass does not include this exhibition.")
 
+        clash = self.schedule.attendee_conflicts(attendee, workshop, self.find_workshop_by_id)
+        if clash:
+            raise ValueError(f"Workshop overlaps the attendee's reservation for workshop {clash[0]}.")
+
+    def _apply_reserve(self, attendee: Attendee, workshop: Workshop) -> None:
         # Try to reserve spot in workshop
         if not workshop.reserve_spot(attendee.attendee_id):
             raise ValueError("Workshop is full or attendee already reserved.")
+        self._undo(workshop.cancel_reservation, attendee.attendee_id)
 
-        # Add to attendee reservations (store actual Workshop object)
+        # Add to attendee reservations (by workshop id)
+        self._undo(setattr, attendee, "reservations", attendee.reservations)
         attendee.reserve_workshop(workshop)
-        self._save_all()
+        self.schedule.book(attendee, workshop)
+        self._undo(self.schedule.unbook, attendee, workshop)
 
+    @instrumented
+    @idempotent(lambda attendee, workshop: ("cancel", attendee.attendee_id, workshop.workshop_id))
     def cancel_reservation(self, attendee: Attendee, workshop: Workshop) -> None:
+        """Cancel a reservation; the freed spot goes to the next eligible attendee on the waitlist."""
+        with self._mutation():
+            with self._attendee_locks(attendee.attendee_id):
+                self._apply_cancel(attendee, workshop)
+                self._persist(("cancel", attendee.attendee_id, workshop.workshop_id))
+            # outside the canceller's lock: promotion takes the promoted attendees' locks
+            self._promote_waitlisted(workshop)
+
+    def _apply_cancel(self, attendee: Attendee, workshop: Workshop) -> None:
         # Remove from workshop and attendee
-        if attendee.attendee_id in workshop.attendees:
-            workshop.cancel_reservation(attendee.attendee_id)
+        if workshop.cancel_reservation(attendee.attendee_id):
+            self._undo(workshop.reserve_spot, attendee.attendee_id)
+        self._undo(setattr, attendee, "reservations", attendee.reservations)
         attendee.cancel_reservation(workshop)
-        self._save_all()
+        self.schedule.unbook(attendee, workshop)
+        self._undo(self.schedule.book, attendee, workshop)
+
+    # -------------------------
+    # Waitlists
+    # -------------------------
+    def _join_waitlist(self, attendee: Attendee, workshop: Workshop) -> int:
+        priority = self.waitlist_priority(attendee)
+        seq = self._apply_waitlist_join(attendee.attendee_id, workshop, priority)
+        self._persist(("waitlist_join", attendee.attendee_id, workshop.workshop_id, priority, seq))
+        return workshop.waitlist.position(attendee.attendee_id)
+
+    def _apply_waitlist_join(self, aid: int, workshop: Workshop, priority: int, seq: Optional[int] = None) -> int:
+        seq = workshop.waitlist.add(aid, priority, seq)
+        self._undo(workshop.waitlist.remove, aid)
+        return seq
+
+    @instrumented
+    @idempotent(lambda attendee, workshop: ("waitlist_leave", attendee.attendee_id, workshop.workshop_id))
+    def leave_waitlist(self, attendee: Attendee, workshop: Workshop) -> None:
+        with self._mutation(), self._attendee_locks(attendee.attendee_id):
+            if attendee.attendee_id not in workshop.waitlist:
+                raise ValueError("Attendee is not on this workshop's waitlist.")
+            self._apply_waitlist_leave(attendee.attendee_id, workshop)
+            self._persist(("waitlist_leave", attendee.attendee_id, workshop.workshop_id))
+
+    def _apply_waitlist_leave(self, aid: int, workshop: Workshop) -> None:
+        entry = workshop.waitlist.remove(aid)
+        if entry is not None:
+            self._undo(workshop.waitlist.restore, aid, *entry)
+
+    # -------------------------
+    # Schedule
+    # -------------------------
+    @instrumented
+    def free_workshops(self, attendee: Attendee, start: datetime.datetime,
+                       end: datetime.datetime) -> List[Workshop]:
+        """
+        Timed workshops running in [start, end) that the attendee could still
+        book: a spot is left, their pass covers the exhibition, they have not
+        reserved it, and it does not overlap one of their reservations.
+        """
+        p = attendee.purchased_pass
+        if p is None:
+            return []
+        out = []
+        with self._attendee_locks(attendee.attendee_id):
+            for wid in self.schedule.between(start, end):
+                w = self.find_workshop_by_id(wid)
+                if (w is not None and w.spots_left() > 0 and not w.waitlist
+                        and p.allows_exhibition(self._workshop_parent[wid].exhibition_id)
+                        and wid not in attendee.reservations
+                        and not self.schedule.attendee_conflicts(attendee, w, self.find_workshop_by_id)):
+                    out.append(w)
+        return out
+
+    def room_schedule(self, room: str) -> List[Workshop]:
+        """The room's workshops by start time."""
+        return [self.find_workshop_by_id(wid) for wid in self.schedule.in_room(room)]
+
+    def waitlist_position(self, attendee: Attendee, workshop: Workshop) -> Optional[int]:
+        """1-based place on the workshop's waitlist (O(log n)), or None if not waiting."""
+        return workshop.waitlist.position(attendee.attendee_id)
+
+    @instrumented
+    def set_workshop_capacity(self, workshop: Workshop, capacity: int) -> List[Attendee]:
+        """Change a workshop's capacity; if it grew, promote waitlisted attendees into the new spots."""
+        if capacity < 0:
+            raise ValueError("Capacity cannot be negative.")
+        with self._mutation():
+            if self.find_workshop_exhibition(workshop) is None:
+                raise ValueError("Workshop not attached to any exhibition.")
+            self._apply_capacity(workshop, capacity)
+            self._persist(("capacity", workshop.workshop_id, capacity))
+            return self._promote_waitlisted(workshop)
+
+    def _apply_capacity(self, workshop: Workshop, capacity: int) -> None:
+        self._undo(workshop.set_capacity, workshop.capacity)
+        workshop.set_capacity(capacity)
+
+    def _promote_waitlisted(self, workshop: Workshop) -> List[Attendee]:
+        """
+        Fill free spots from the waitlist, in order. Attendees whose pass no
+        longer covers the exhibition, or who hold a spot already, are dropped
+        from the list. Returns the attendees promoted.
+        """
+        promoted = []
+        exhibition = self.find_workshop_exhibition(workshop)
+        while workshop.spots_left() > 0:
+            entry = workshop.waitlist.pop()
+            if entry is None:
+                break
+            aid, priority, seq = entry
+            self._undo(workshop.waitlist.restore, aid, priority, seq)
+            attendee = self.find_attendee_by_id(aid)
+            with self._attendee_locks(aid):
+                eligible = (attendee is not None and attendee.purchased_pass is not None
+                            and exhibition is not None
+                            and attendee.purchased_pass.allows_exhibition(exhibition.exhibition_id)
+                            and aid not in workshop.attendees
+                            and not self.schedule.attendee_conflicts(attendee, workshop, self.find_workshop_by_id))
+                if not eligible:
+                    self._persist(("waitlist_leave", aid, workshop.workshop_id))
+                    continue
+                try:
+                    self._apply_reserve(attendee, workshop)
+                except ValueError:
+                    # the spot went to someone else meanwhile: back to the head of the line
+                    workshop.waitlist.restore(aid, priority, seq)
+                    break
+                self._persist(("promote", aid, workshop.workshop_id))
+            promoted.append(attendee)
+        return promoted
+
+    def _apply_promote(self, attendee: Attendee, workshop: Workshop) -> None:
+        self._apply_waitlist_leave(attendee.attendee_id, workshop)
+        self._apply_reserve(attendee, workshop)
 
     # -------------------------
     # Admin reports
     # -------------------------
+    @instrumented
     def workshop_capacity_report(self):
-        report = []
-        for ex in self.exhibitions:
-            for w in ex.workshops:
-                report.append({
+        """
+        Full report, one dict per workshop (iter_capacity_report() streams
+        the same rows). Screens that poll should use self.occupancy instead:
+        totals(), top_fullest(n), with_spots_left(k), and subscribe() or
+        changes_since(seq) for deltas.
+        """
+        return list(self.iter_capacity_report())
+
+    def iter_capacity_report(self):
+        for ex in list(self.exhibitions):
+            for w in list(ex.workshops):
+                yield {
                     "exhibition_id": ex.exhibition_id,
                     "exhibition_name": ex.name,
                     "workshop_id": w.workshop_id,
@@ -175,19 +887,31 @@ class TicketSystem:
                     "capacity": w.capacity,
                     "registered": len(w.attendees),
                     "spots_left": w.spots_left(),
-                })
-        return report
+                }
 
+    @instrumented
     def daily_sales(self):
+        """Passes sold per ISO date. Revenue and finer breakdowns: self.sales_ledger."""
         return dict(self.sales_log)
 
     # -------------------------
     # Utility
     # -------------------------
-    def _log_sale(self):
-        date_key = datetime.date.today().isoformat()
+    def _log_sale(self, date_key: Optional[str] = None):
+        date_key = date_key or datetime.date.today().isoformat()
+        self._undo(self._restore_sale_count, date_key, self.sales_log.get(date_key))
         self.sales_log[date_key] = self.sales_log.get(date_key, 0) + 1
 
+    def _record_sale_event(self, event: tuple) -> None:
+        rows = self.sales_ledger.append(event)
+        self._undo(self.sales_ledger.void, rows)
+
+    def _restore_sale_count(self, date_key: str, count: Optional[int]) -> None:
+        if count is None:
+            self.sales_log.pop(date_key, None)
+        else:
+            self.sales_log[date_key] = count
+
     # -------------------------
     # Sample data creation helper
     # -------------------------
@@ -222,11 +946,35 @@ class TicketSystem:
         # Create passes
         p1 = ExhibitionPass(1, price=30.0, exhibitions_access=[1])   # Exhibition 1 only
         p2 = ExhibitionPass(2, price=45.0, exhibitions_access=[1,2]) # two exhibitions
-        p3 = AllAccessPass(99, price=100.0)
-
-        # For AllAccessPass, set access to all existing exhibitions
-        p3.exhibitions_access = [ex.exhibition_id for ex in self.exhibitions]
+        p3 = AllAccessPass(99, price=100.0)  # every exhibition, including ones added later
 
         self.passes = [p1, p2, p3]
 
+        self._rebuild_indexes()
         self._save_all()
+
+
+class _Mutation:
+    """Context manager returned by TicketSystem._mutation() (a class: it sits on every hot call)."""
+
+    __slots__ = ("ts", "lock")
+
+    def __init__(self, ts: TicketSystem):
+        self.ts = ts
+        if ts._backend.needs_exclusive and ts._tx is None:
+            self.lock = ts._state_lock.exclusive()
+        else:
+            self.lock = ts._state_lock.shared()
+
+    def __enter__(self):
+        self.lock.__enter__()
+
+    def __exit__(self, *exc):
+        self.lock.__exit__(*exc)
+        backend = self.ts._backend
+        if backend.maintenance_due():
+            with self.ts._state_lock.exclusive():
+                if backend.maintenance_due():
+                    with METRICS.timer("backend.maintenance"):
+                        backend.run_maintenance(self.ts)
+        return False
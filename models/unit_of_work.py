@@ -0,0 +1,29 @@
+# models/unit_of_work.py
+from typing import Callable, List, Tuple
+
+
+class UnitOfWork:
+    """
+    Bookkeeping for one TicketSystem.transaction() block.
+
+    records:   storage records produced inside the block, persisted together at commit
+    undo:      (fn, args) steps that reverse the in-memory changes, run newest-first on rollback
+    on_commit: (fn, args) steps run once the records have been persisted
+    """
+
+    def __init__(self):
+        self.records: List[tuple] = []
+        self.undo: List[Tuple[Callable, tuple]] = []
+        self.on_commit: List[Tuple[Callable, tuple]] = []
+
+    def mark(self) -> Tuple[int, int]:
+        """Savepoint: remember how far records and undo steps have got."""
+        return len(self.records), len(self.undo)
+
+    def rollback(self, mark: Tuple[int, int] = (0, 0)) -> None:
+        """Undo everything after mark (the whole unit by default) and drop its records."""
+        n_records, n_undo = mark
+        while len(self.undo) > n_undo:
+            fn, args = self.undo.pop()
+            fn(*args)
+        del self.records[n_records:]
@@ -0,0 +1,163 @@
+# models/waitlist.py
+import heapq
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from models.passes import AllAccessPass
+
+
+def fifo(attendee) -> int:
+    """Waitlist priority: everyone in arrival order."""
+    return 0
+
+
+def all_access_first(attendee) -> int:
+    """Waitlist priority: all-access pass holders ahead of everyone else, each in arrival order."""
+    return 0 if isinstance(attendee.purchased_pass, AllAccessPass) else 1
+
+
+class _ArrivalCounter:
+    """Fenwick tree over arrival numbers: how many entries still waiting arrived before a given one."""
+
+    __slots__ = ("_tree", "_flags", "total")
+
+    def __init__(self):
+        self._tree = [0] * 17  # 1-based
+        self._flags = bytearray(16)
+        self.total = 0
+
+    def _grow(self, n: int) -> None:
+        size = len(self._flags)
+        while size < n:
+            size *= 2
+        self._flags.extend(bytes(size - len(self._flags)))
+        tree = [0] + list(self._flags)
+        for i in range(1, size + 1):  # linear-time build
+            j = i + (i & -i)
+            if j <= size:
+                tree[j] += tree[i]
+        self._tree = tree
+
+    def add(self, index: int, delta: int) -> None:
+        if index >= len(self._flags):
+            self._grow(index + 1)
+        self._flags[index] += delta
+        self.total += delta
+        tree = self._tree
+        i = index + 1
+        while i < len(tree):
+            tree[i] += delta
+            i += i & -i
+
+    def before(self, index: int) -> int:
+        tree = self._tree
+        i = min(index, len(self._flags))
+        count = 0
+        while i > 0:
+            count += tree[i]
+            i -= i & -i
+        return count
+
+
+class Waitlist:
+    """
+    Attendees waiting for a spot in one workshop, served by (priority, arrival):
+    lower priority values first, first come first served within a priority.
+
+    The next attendee comes off a heap in O(log n); entries that leave early
+    stay in the heap and are skipped when they surface. A Fenwick tree per
+    priority over arrival numbers gives an attendee's position in O(log n).
+    """
+
+    def __init__(self):
+        self._heap: List[Tuple[int, int, int]] = []  # (priority, seq, attendee_id)
+        self._entries: Dict[int, Tuple[int, int]] = {}  # attendee_id -> (priority, seq)
+        self._tiers: Dict[int, _ArrivalCounter] = {}
+        self._next_seq = 0
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        with self._lock:
+            return {"entries": sorted((p, s, aid) for aid, (p, s) in self._entries.items()),
+                    "next_seq": self._next_seq}
+
+    def __setstate__(self, state):
+        self.__init__()
+        for priority, seq, aid in state["entries"]:
+            self.restore(aid, priority, seq)
+        self._next_seq = max(self._next_seq, state["next_seq"])
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, attendee_id: int) -> bool:
+        return attendee_id in self._entries
+
+    def entry(self, attendee_id: int) -> Optional[Tuple[int, int]]:
+        """(priority, seq) of a waiting attendee, or None."""
+        return self._entries.get(attendee_id)
+
+    def add(self, attendee_id: int, priority: int = 0, seq: Optional[int] = None) -> int:
+        """Queue attendee_id; returns its arrival number. seq is given when replaying."""
+        with self._lock:
+            if attendee_id in self._entries:
+                raise ValueError("Attendee is already on the waitlist.")
+            if seq is None:
+                seq = self._next_seq
+            self._insert(attendee_id, priority, seq)
+            return seq
+
+    def restore(self, attendee_id: int, priority: int, seq: int) -> None:
+        """Put an entry back with its original place (loading, undo)."""
+        with self._lock:
+            if attendee_id not in self._entries:
+                self._insert(attendee_id, priority, seq)
+
+    def _insert(self, attendee_id: int, priority: int, seq: int) -> None:
+        self._next_seq = max(self._next_seq, seq + 1)
+        self._entries[attendee_id] = (priority, seq)
+        heapq.heappush(self._heap, (priority, seq, attendee_id))
+        tier = self._tiers.get(priority)
+        if tier is None:
+            tier = self._tiers[priority] = _ArrivalCounter()
+        tier.add(seq, 1)
+
+    def remove(self, attendee_id: int) -> Optional[Tuple[int, int]]:
+        """Take attendee_id off the list; returns its (priority, seq), or None if it was not waiting."""
+        with self._lock:
+            entry = self._entries.pop(attendee_id, None)
+            if entry is None:
+                return None
+            self._tiers[entry[0]].add(entry[1], -1)
+            if len(self._heap) > 2 * len(self._entries) + 16:
+                # too many departed entries left in the heap
+                self._heap = [(p, s, aid) for aid, (p, s) in self._entries.items()]
+                heapq.heapify(self._heap)
+            return entry
+
+    def pop(self) -> Optional[Tuple[int, int, int]]:
+        """Remove and return the next (attendee_id, priority, seq), or None if nobody is waiting."""
+        with self._lock:
+            heap = self._heap
+            while heap:
+                priority, seq, aid = heapq.heappop(heap)
+                if self._entries.get(aid) == (priority, seq):
+                    del self._entries[aid]
+                    self._tiers[priority].add(seq, -1)
+                    return aid, priority, seq
+            return None
+
+    def position(self, attendee_id: int) -> Optional[int]:
+        """1-based place in the queue, or None if attendee_id is not waiting."""
+        with self._lock:
+            entry = self._entries.get(attendee_id)
+            if entry is None:
+                return None
+            priority, seq = entry
+            ahead = sum(t.total for p, t in self._tiers.items() if p < priority)
+            return ahead + self._tiers[priority].before(seq) + 1
+
+    def waiting(self) -> List[int]:
+        """Attendee ids in serving order."""
+        with self._lock:
+            return [aid for _, _, aid in sorted((p, s, aid) for aid, (p, s) in self._entries.items())]
@@ -1,36 +1,101 @@
-# models/workshop.py
-from typing import List
+import datetime
+import threading
+from typing import Optional, Set
 
-class Workshop:
+from models.slotted import SlottedModel
+from models.waitlist import Waitlist
+
+
+class Workshop(SlottedModel):
     """
-    Represents a single workshop with capacity and a list of attendee IDs.
+    Represents a single workshop with capacity and a set of attendee IDs
+    (O(1) membership tests, reservations and cancellations).
+    Roster changes are guarded by a per-workshop lock, so concurrent
+    reservations can never exceed capacity. Once the lock is released the
+    owning TicketSystem is told, so its occupancy counters follow along.
+    When full, attendees can queue on the workshop's waitlist.
+
+    A workshop may have a time slot [start, end) and a room; an attendee
+    cannot reserve two workshops whose slots overlap, and two workshops in
+    the same room cannot overlap (see models/schedule.py).
     """
-    def __init__(self, workshop_id: int, title: str, capacity: int):
+
+    __slots__ = ("workshop_id", "title", "capacity", "attendees", "waitlist", "start", "end", "room",
+                 "_lock", "_registry")
+    # _registry: TicketSystem this workshop belongs to (never pickled)
+    _transient = ("_lock", "_registry")
+
+    def __init__(self, workshop_id: int, title: str, capacity: int,
+                 start: Optional[datetime.datetime] = None, end: Optional[datetime.datetime] = None,
+                 room: Optional[str] = None):
+        if (start is None) != (end is None):
+            raise ValueError("A workshop slot needs both a start and an end.")
+        if start is not None and end <= start:
+            raise ValueError("A workshop must end after it starts.")
         self.workshop_id = workshop_id
         self.title = title
         self.capacity = int(capacity)
-        self.attendees: List[int] = []
+        self.attendees: Set[int] = set()
+        self.waitlist = Waitlist()
+        self.start = start
+        self.end = end
+        self.room = room or None
+        self._lock = threading.Lock()
+        self._registry = None
+
+    def __setstate__(self, state):
+        super().__setstate__(state)
+        self._lock = threading.Lock()
+        # pickles from before the roster became a set hold a list
+        if not isinstance(self.attendees, set):
+            self.attendees = set(self.attendees)
+        if not hasattr(self, "waitlist"):
+            self.waitlist = Waitlist()
+        for name in ("start", "end", "room"):
+            if not hasattr(self, name):
+                setattr(self, name, None)
 
     def reserve_spot(self, attendee_id: int) -> bool:
         """
         Try to reserve a spot for attendee_id.
         Returns True if successful, False if full or already reserved.
         """
-        if attendee_id in self.attendees:
-            return False
-        if len(self.attendees) >= self.capacity:
-            return False
-        self.attendees.append(attendee_id)
+        with self._lock:
+            if attendee_id in self.attendees:
+                return False
+            if len(self.attendees) >= self.capacity:
+                return False
+            self.attendees.add(attendee_id)
+        if self._registry is not None:
+            self._registry._on_roster_changed(self)
         return True
 
     def cancel_reservation(self, attendee_id: int) -> bool:
-        if attendee_id in self.attendees:
+        with self._lock:
+            if attendee_id not in self.attendees:
+                return False
             self.attendees.remove(attendee_id)
-            return True
-        return False
+        if self._registry is not None:
+            self._registry._on_roster_changed(self)
+        return True
+
+    def set_capacity(self, capacity: int) -> None:
+        """Change capacity; existing reservations are kept even if it drops below them."""
+        with self._lock:
+            self.capacity = int(capacity)
+        if self._registry is not None:
+            self._registry._on_roster_changed(self)
+
+    def overlaps(self, other: "Workshop") -> bool:
+        """True if both workshops have a slot and the slots overlap."""
+        return (self.start is not None and other.start is not None
+                and self.start < other.end and other.start < self.end)
 
     def spots_left(self) -> int:
         return max(0, self.capacity - len(self.attendees))
 
     def __str__(self):
-        return f"Workshop({self.workshop_id}) {self.title} [{len(self.attendees)}/{self.capacity}]"
+        slot = ""
+        if self.start is not None:
+            slot = f" {self.start:%Y-%m-%d %H:%M}-{self.end:%H:%M}" + (f" in {self.room}" if self.room else "")
+        return f"Workshop({self.workshop_id}) {self.title}{slot} [{len(self.attendees)}/{self.capacity}]"
@@ -0,0 +1,262 @@
+# server/batch_processor.py
+"""
+Headless batch front-end for one TicketSystem: reads a JSONL stream of
+commands from a file or stdin, runs them in batches and streams one JSONL
+result per command to stdout. Meant for load replay, rebuilding a system
+from a command log, and overnight bulk jobs.
+
+Commands use ticket_server.py's request shape, and results its response shape:
+
+    {"id": 1, "op": "reserve", "params": {"attendee_id": 7, "workshop_id": 101}}
+    {"id": 1, "ok": true, "result": {...}}
+    {"id": 1, "ok": false, "error": "Workshop is full or attendee already reserved.", "type": "ValueError"}
+
+A command without an "id" is answered with its line number as "line".
+
+Operations:
+- register (name, email, phone, optional attendee_id)
+- purchase (attendee_id or email, pass_id)
+- upgrade (attendee_id or email, exhibitions)
+- reserve (attendee_id or email, workshop_id, optional waitlist)
+- cancel (attendee_id or email, workshop_id)
+- report ("kind": capacity, daily_sales, revenue, occupancy, attendees)
+
+The server's names purchase_pass and upgrade_pass are accepted as well.
+register, purchase, upgrade, reserve and cancel take an optional
+"idempotency_key", so a batch file can be re-run after a crash without
+applying its commands twice.
+
+Parsing runs on a reader thread ahead of execution. Each batch of
+--batch-size commands runs in one TicketSystem.transaction(), so it is
+persisted once, and each command runs in its own savepoint, so a rejected
+command affects nothing else (server/operations.py's run_batch(), as in the
+server). A batch's results are written after it is persisted and synced
+(TicketSystem.sync()), so every result printed is durable. Reports see every command before them, including earlier
+commands of the same batch. If a flush or an unexpected error fails a
+batch, the whole batch is rolled back, reported as failed, and the run
+stops. With --fail-fast the run also stops at the first rejected command:
+the commands before it are persisted, the ones after it get no result.
+
+A summary (commands per second, errors by type) goes to stderr, or to a
+JSON file with --stats. The exit status is 0 when every command succeeded,
+1 if any was rejected, and 2 if a batch failed.
+
+Run: python -m server.batch_processor [FILE|-] [--storage journal] [--batch-size 500] [--fail-fast] [--stats FILE]
+"""
+import argparse
+import functools
+import json
+import queue
+import sys
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, TextIO, Tuple
+
+from models.ticket_system import TicketSystem
+from server.operations import Operations, Outcome, run_batch
+
+Command = Tuple[int, Any, Optional[str], dict]  # (line number, id, op, params)
+
+_END = object()
+
+
+class BatchStats:
+    """Counters for one run."""
+
+    def __init__(self):
+        self.commands = 0
+        self.ok = 0
+        self.errors: Dict[str, int] = {}
+        self.batches = 0
+        self.aborted = False
+        self.started = time.perf_counter()
+        self.elapsed = 0.0
+
+    @property
+    def failed(self) -> int:
+        return sum(self.errors.values())
+
+    @property
+    def commands_per_sec(self) -> float:
+        return self.commands / self.elapsed if self.elapsed else 0.0
+
+    def as_dict(self) -> dict:
+        return {"commands": self.commands, "ok": self.ok, "failed": self.failed, "errors": dict(self.errors),
+                "batches": self.batches, "aborted": self.aborted, "seconds": self.elapsed,
+                "commands_per_sec": self.commands_per_sec}
+
+    def summary(self) -> str:
+        errors = ", ".join(f"{name}: {n}" for name, n in sorted(self.errors.items())) or "none"
+        return (f"{self.commands} commands in {self.elapsed:.2f}s ({self.commands_per_sec:,.0f}/sec), "
+                f"{self.ok} ok, {self.failed} failed ({errors}), {self.batches} batches persisted"
+                + (", aborted" if self.aborted else ""))
+
+
+def parse_commands(lines: Iterable[str]) -> Iterator[Command]:
+    for line_no, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError("Command must be a JSON object.")
+        except ValueError as e:
+            yield line_no, None, None, {"_error": f"Invalid command: {e}"}
+            continue
+        params = request.get("params")
+        yield line_no, request.get("id"), request.get("op"), params if isinstance(params, dict) else {}
+
+
+def _read_ahead(commands: Iterator[Command], depth: int) -> Iterator[Command]:
+    """Parse on a background thread, up to depth commands ahead of the consumer."""
+    q: "queue.Queue" = queue.Queue(maxsize=depth)
+    failure: List[BaseException] = []
+
+    def produce():
+        try:
+            for command in commands:
+                q.put(command)
+        except BaseException as e:  # e.g. a decoding error: surfaced in the consumer
+            failure.append(e)
+        finally:
+            q.put(_END)
+
+    threading.Thread(target=produce, name="batch-reader", daemon=True).start()
+    while True:
+        item = q.get()
+        if item is _END:
+            break
+        yield item
+    if failure:
+        raise failure[0]
+
+
+class BatchProcessor(Operations):
+    """Runs command streams against a TicketSystem in batches (see the module docstring)."""
+
+    REPORTS = ("capacity", "daily_sales", "revenue", "occupancy", "attendees")
+
+    def __init__(self, ts: TicketSystem, batch_size: int = 500, fail_fast: bool = False):
+        super().__init__(ts)
+        self.batch_size = batch_size
+        self.fail_fast = fail_fast
+        self.operations: Dict[str, Callable[[dict], Any]] = {
+            "register": self.op_register,
+            "purchase": self.op_purchase_pass,
+            "purchase_pass": self.op_purchase_pass,
+            "upgrade": self.op_upgrade_pass,
+            "upgrade_pass": self.op_upgrade_pass,
+            "reserve": self.op_reserve,
+            "cancel": self.op_cancel,
+            "report": self.op_report,
+        }
+
+    # -------------------------
+    # Running
+    # -------------------------
+    def run(self, lines: Iterable[str], out: TextIO) -> BatchStats:
+        stats = BatchStats()
+        commands = _read_ahead(parse_commands(lines), depth=4 * self.batch_size)
+        batch: List[Command] = []
+        for command in commands:
+            batch.append(command)
+            if len(batch) < self.batch_size:
+                continue
+            if not self._flush(batch, out, stats):
+                break
+            batch = []
+        else:
+            if batch:
+                self._flush(batch, out, stats)
+        stats.elapsed = time.perf_counter() - stats.started
+        return stats
+
+    def _flush(self, batch: List[Command], out: TextIO, stats: BatchStats) -> bool:
+        """Run and persist one batch, then write its results. False: stop the run."""
+        outcomes, failure = self.run_batch(batch)
+        if failure is not None:
+            # every command gets the batch's error; none of them is acknowledged
+            outcomes = [(False, failure)] * len(batch)
+        else:
+            stats.batches += 1
+        lines = []
+        for (line_no, rid, _, _), (ok, value) in zip(batch, outcomes):  # nothing for commands not run
+            stats.commands += 1
+            key = {"id": rid} if rid is not None else {"line": line_no}
+            if ok:
+                stats.ok += 1
+                lines.append(json.dumps({**key, "ok": True, "result": value}))
+                continue
+            name = type(value).__name__
+            stats.errors[name] = stats.errors.get(name, 0) + 1
+            # KeyError's str() adds quotes
+            message = value.args[0] if isinstance(value, KeyError) and value.args else str(value)
+            lines.append(json.dumps({**key, "ok": False, "error": message, "type": name}))
+        out.write("\n".join(lines) + "\n")
+        out.flush()
+        stats.aborted = failure is not None
+        return failure is None and not (self.fail_fast and stats.failed)
+
+    def run_batch(self, batch: List[Command]) -> Tuple[List[Outcome], Optional[Exception]]:
+        """Outcomes of the commands run (fewer than the batch if --fail-fast stopped it), or the batch's error."""
+        outcomes, failure = run_batch(self.ts, [functools.partial(self.execute, op, params)
+                                                for _, _, op, params in batch], fail_fast=self.fail_fast)
+        if failure is not None:
+            self._forget_attendee_ids()
+        return outcomes, failure
+
+    def execute(self, op: Optional[str], params: dict) -> Any:
+        if "_error" in params:
+            raise ValueError(params["_error"])
+        fn = self.operations.get(op)
+        if fn is None:
+            raise ValueError(f"Unknown operation: {op}")
+        return fn(params)
+
+    # -------------------------
+    # Operations (the mutations are in Operations)
+    # -------------------------
+    def op_report(self, params: dict) -> Any:
+        kind = params.get("kind", "capacity")
+        if kind == "capacity":
+            return self.ts.workshop_capacity_report()
+        if kind == "daily_sales":
+            return self.ts.daily_sales()
+        if kind == "revenue":
+            return self.ts.sales_ledger.revenue_by_day()
+        if kind == "occupancy":
+            return self.ts.occupancy.totals()
+        if kind == "attendees":
+            return {"attendees": self.ts.attendee_count()}
+        raise ValueError(f"Unknown report: {kind} (expected one of {', '.join(self.REPORTS)})")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run a JSONL stream of TicketSystem commands.")
+    parser.add_argument("file", nargs="?", default="-", help="command file, or - for stdin (default)")
+    parser.add_argument("--storage", default="journal", choices=["pickle", "journal", "sqlite", "lazy", "memory"])
+    parser.add_argument("--batch-size", type=int, default=500, help="commands persisted per flush")
+    parser.add_argument("--fail-fast", action="store_true", help="stop at the first rejected command")
+    parser.add_argument("--stats", help="write the summary as JSON to this file instead of stderr")
+    args = parser.parse_args(argv)
+
+    source = sys.stdin if args.file == "-" else open(args.file, encoding="utf-8")
+    ts = TicketSystem(args.storage)
+    try:
+        stats = BatchProcessor(ts, args.batch_size, args.fail_fast).run(source, sys.stdout)
+    finally:
+        ts.close()
+        if source is not sys.stdin:
+            source.close()
+    if args.stats:
+        with open(args.stats, "w", encoding="utf-8") as f:
+            json.dump(stats.as_dict(), f, indent=2)
+    else:
+        print(stats.summary(), file=sys.stderr)
+    if stats.aborted:
+        return 2
+    return 0 if stats.failed == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
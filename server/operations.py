@@ -0,0 +1,176 @@
+# server/operations.py
+"""
+Request operations shared by the front-ends (server/ticket_server.py,
+server/batch_processor.py and the shard workers of server/shard_router.py).
+
+Operations take a request's params dict and return a JSON-ready result, or
+raise one of REQUEST_ERRORS to reject the request. run_batch() runs a batch
+of them the way every front-end does: one TicketSystem.transaction() for
+the batch, a savepoint per request, and a sync before anything is answered.
+"""
+from typing import Any, Callable, Iterable, List, Optional, Tuple
+
+from models.attendee import Attendee
+from models.ticket_system import TicketSystem
+
+# exceptions from rejected requests; they are rolled back alone, and anything
+# else aborts the whole batch
+REQUEST_ERRORS = (ValueError, PermissionError, KeyError, TypeError)
+
+Outcome = Tuple[bool, Any]
+
+
+def attendee_info(attendee: Attendee) -> dict:
+    p = attendee.purchased_pass
+    return {
+        "attendee_id": attendee.attendee_id,
+        "name": attendee.name,
+        "email": attendee.email,
+        "phone": attendee.phone,
+        "pass_id": getattr(p, "pass_id", None),
+        "reservations": list(attendee.reservations),
+    }
+
+
+def _text(params: dict, key: str) -> str:
+    value = params.get(key)
+    return "" if value is None else str(value).strip()
+
+
+def run_batch(ts: TicketSystem, calls: Iterable[Callable[[], Any]], sync: Optional[Callable[[], None]] = None,
+              fail_fast: bool = False) -> Tuple[List[Outcome], Optional[Exception]]:
+    """
+    Run calls in one transaction, each in its own savepoint, then make the
+    batch durable with sync() (default ts.sync). Returns one (ok, result or
+    exception) per call run, fewer than the calls if fail_fast stopped at
+    the first rejected one, and no error; or no outcomes and the error that
+    failed the whole batch (a flush, an unexpected exception or the sync).
+    """
+    outcomes: List[Outcome] = []
+    try:
+        with ts.transaction():
+            for call in calls:
+                try:
+                    with ts.transaction():
+                        outcomes.append((True, call()))
+                except REQUEST_ERRORS as e:
+                    outcomes.append((False, e))
+                    if fail_fast:
+                        break
+    except Exception as e:
+        # the flush failed or a call broke: the whole batch was rolled back
+        return [], e
+    try:
+        (sync or ts.sync)()
+    except OSError as e:
+        # written but maybe not durable: acknowledge nothing
+        return [], e
+    return outcomes, None
+
+
+class Operations:
+    """
+    The lookups and mutations every front-end offers on one TicketSystem.
+    Mutations must run on one thread at a time (a front-end's batch
+    thread): attendee ids are handed out here.
+    """
+
+    def __init__(self, ts: TicketSystem):
+        self.ts = ts
+        self._next_id: Optional[int] = None
+
+    # -------------------------
+    # Lookups
+    # -------------------------
+    def _attendee(self, params: dict) -> Attendee:
+        if "attendee_id" in params:
+            attendee = self.ts.find_attendee_by_id(int(params["attendee_id"]))
+        else:
+            attendee = self.ts.find_attendee_by_email(_text(params, "email"))
+        if attendee is None:
+            raise KeyError("Attendee not found.")
+        return attendee
+
+    def _workshop(self, params: dict):
+        workshop = self.ts.find_workshop_by_id(int(params["workshop_id"]))
+        if workshop is None:
+            raise KeyError("Workshop not found.")
+        return workshop
+
+    def _allocate_attendee_id(self, requested: Optional[int]) -> int:
+        # keeps next_attendee_id()'s scan off the hot path
+        if self._next_id is None:
+            self._next_id = self.ts.next_attendee_id()
+        aid = self._next_id if requested is None else requested
+        self._next_id = max(self._next_id, aid + 1)
+        return aid
+
+    def _forget_attendee_ids(self) -> None:
+        """After a rolled-back batch: ids handed out in it are free again."""
+        self._next_id = None
+
+    # -------------------------
+    # Mutations
+    # -------------------------
+    def op_register(self, params: dict) -> dict:
+        name, email, phone = _text(params, "name"), _text(params, "email"), _text(params, "phone")
+        Attendee.validate_name(name)
+        Attendee.validate_email(email)
+        Attendee.validate_phone(phone)
+        requested = params.get("attendee_id")
+        requested = None if requested is None else int(requested)
+
+        def register() -> None:
+            if requested is not None and self.ts.find_attendee_by_id(requested) is not None:
+                raise ValueError("Attendee ID already registered.")
+            self.ts.register_attendee(Attendee(self._allocate_attendee_id(requested), name, email, phone))
+
+        key = params.get("idempotency_key")
+        if key is None:
+            register()
+        else:
+            # the key is looked up before the id is checked or allocated, so a retry
+            # registers nothing and answers with the attendee the first call registered
+            # (same fingerprint as register_attendee's)
+            self.ts._idempotent(key, ("register", email.casefold(), name, phone), register)
+        return attendee_info(self.ts.find_attendee_by_email(email))
+
+    def op_purchase_pass(self, params: dict) -> dict:
+        attendee = self._attendee(params)
+        p = self.ts.find_pass_by_id(int(params["pass_id"]))
+        if p is None:
+            raise KeyError("Pass not found.")
+        self.ts.purchase_pass(attendee, p, idempotency_key=params.get("idempotency_key"))
+        return attendee_info(attendee)
+
+    def op_upgrade_pass(self, params: dict) -> dict:
+        attendee = self._attendee(params)
+        self.ts.upgrade_pass(attendee, [int(eid) for eid in params["exhibitions"]],
+                             idempotency_key=params.get("idempotency_key"))
+        return attendee_info(attendee)
+
+    def op_reserve(self, params: dict) -> dict:
+        attendee = self._attendee(params)
+        position = self.ts.reserve_workshop(attendee, self._workshop(params),
+                                            waitlist=bool(params.get("waitlist")),
+                                            idempotency_key=params.get("idempotency_key"))
+        info = attendee_info(attendee)
+        if position is not None:
+            info["waitlist_position"] = position
+        return info
+
+    def op_cancel(self, params: dict) -> dict:
+        attendee = self._attendee(params)
+        self.ts.cancel_reservation(attendee, self._workshop(params), idempotency_key=params.get("idempotency_key"))
+        return attendee_info(attendee)
+
+    def op_leave_waitlist(self, params: dict) -> dict:
+        attendee = self._attendee(params)
+        self.ts.leave_waitlist(attendee, self._workshop(params), idempotency_key=params.get("idempotency_key"))
+        return attendee_info(attendee)
+
+    def op_set_capacity(self, params: dict) -> dict:
+        workshop = self._workshop(params)
+        promoted = self.ts.set_workshop_capacity(workshop, int(params["capacity"]))
+        return {"workshop_id": workshop.workshop_id, "capacity": workshop.capacity,
+                "spots_left": workshop.spots_left(), "promoted": [a.attendee_id for a in promoted]}
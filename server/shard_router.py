@@ -0,0 +1,475 @@
+# server/shard_router.py
+"""
+Sharded deployment: exhibitions are partitioned across worker processes,
+each running its own TicketSystem on its own storage directory
+(<root>/shard-<i>), so bookings for exhibitions owned by different shards
+run on different cores instead of queueing behind one GIL and one data
+directory.
+
+- Exhibition e is owned by shard e % shards. reserve, cancel and
+  set_capacity for its workshops go to the owner only, so reservations,
+  waitlists and rosters are partitioned.
+- The catalogue (exhibitions, workshops, passes) and attendees with their
+  passes are replicated. register, purchase, upgrade, add_exhibition and
+  add_pass go to every shard in the same order, so any shard checks any
+  attendee's pass, including access to exhibitions owned elsewhere.
+  Workshops keep an unused copy on the shards that do not own them.
+- Reads are scatter-gather. The capacity report takes each workshop's row
+  from its owner. Occupancy is summed over the owners. An attendee's
+  reservations are the union over the shards. Every shard applies every
+  purchase, so daily sales and revenue are read from shard 0.
+
+The router assigns attendee ids. Commands passed to execute() together are
+grouped per shard, sent to all the shards involved at once and run there
+as one batch (one transaction, one savepoint per command; see
+batch_processor.BatchProcessor), so the shards work in parallel while the
+router waits. Commands keep their order on every shard they reach.
+
+Limits:
+- Time-slot conflicts are only checked against the attendee's reservations
+  on the same shard.
+- If a batch fails on one shard (a flush error) while other shards
+  committed their part, or the shards disagree on a broadcast command, the
+  replicated state may have diverged. The router then refuses further
+  commands and reads.
+- The number of shards is fixed for a storage root (recorded in
+  shards.json).
+
+Run: python -m server.shard_router [FILE|-] [--shards 4] [--storage journal] [--batch-size 2000]
+(the JSONL command format of server/batch_processor.py)
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from models.exhibition import Exhibition
+from models.passes import Pass
+from models.ticket_system import TicketSystem
+from server.batch_processor import BatchProcessor, BatchStats, _read_ahead, parse_commands
+from server.operations import REQUEST_ERRORS, attendee_info
+from storage import data_manager
+
+Outcome = Tuple[bool, Any]
+
+BROADCAST = ("register", "purchase", "purchase_pass", "upgrade", "upgrade_pass", "add_exhibition", "add_pass")
+ROUTED = ("reserve", "cancel", "set_capacity")
+_ERROR_TYPES = {cls.__name__: cls for cls in REQUEST_ERRORS}
+
+
+class ShardError(RuntimeError):
+    """A shard failed or the shards' replicated state may have diverged."""
+
+
+# -------------------------
+# Worker side
+# -------------------------
+class ShardProcessor(BatchProcessor):
+    """BatchProcessor plus the catalogue and read operations the router needs."""
+
+    def __init__(self, ts: TicketSystem):
+        super().__init__(ts)
+        self.operations.update({
+            "get_attendee": lambda params: attendee_info(self._attendee(params)),
+            "next_attendee_id": lambda params: self.ts.next_attendee_id(),
+            "catalogue": self.op_catalogue,
+            "add_exhibition": self.op_add_exhibition,
+            "add_pass": self.op_add_pass,
+            "set_capacity": self.op_set_capacity,
+        })
+
+    def op_catalogue(self, params: dict) -> Dict[int, List[int]]:
+        """Workshop ids per exhibition id."""
+        return {ex.exhibition_id: [w.workshop_id for w in ex.workshops] for ex in self.ts.exhibitions}
+
+    def op_add_exhibition(self, params: dict) -> int:
+        exhibition: Exhibition = params["exhibition"]
+        self.ts.add_exhibition(exhibition)
+        return exhibition.exhibition_id
+
+    def op_add_pass(self, params: dict) -> int:
+        p: Pass = params["pass"]
+        if self.ts.find_pass_by_id(p.pass_id) is not None:
+            raise ValueError("Pass with this ID already exists.")
+        self.ts.add_pass(p)
+        return p.pass_id
+
+
+def _encode(outcome: Outcome) -> Outcome:
+    # exceptions are sent as (type name, message): not every exception pickles
+    ok, value = outcome
+    if ok:
+        return outcome
+    message = value.args[0] if isinstance(value, KeyError) and value.args else str(value)
+    return False, (type(value).__name__, message)
+
+
+def _shard_main(index: int, data_dir: str, storage: str, conn) -> None:
+    """Worker process: one TicketSystem, answering batches of (op, params) until it gets None."""
+    try:
+        data_manager.ROOT_DATA_DIR = data_dir
+        os.makedirs(data_dir, exist_ok=True)
+        ts = TicketSystem(storage)
+        processor = ShardProcessor(ts)
+    except Exception as e:
+        conn.send(("error", _encode((False, e))[1]))
+        return
+    conn.send(("ready", index))
+    try:
+        while True:
+            commands = conn.recv()
+            if commands is None:
+                break
+            outcomes, failure = processor.run_batch([(i, None, op, params) for i, (op, params) in enumerate(commands)])
+            if failure is not None:
+                conn.send(("failed", _encode((False, failure))[1]))
+            else:
+                conn.send(("ok", [_encode(o) for o in outcomes]))
+    except (EOFError, KeyboardInterrupt):
+        pass  # the router went away
+    finally:
+        ts.close()
+
+
+# -------------------------
+# Router
+# -------------------------
+def _error(encoded: Tuple[str, str]) -> Exception:
+    name, message = encoded
+    cls = _ERROR_TYPES.get(name)
+    return cls(message) if cls is not None else ShardError(f"{name}: {message}")
+
+
+class ShardRouter:
+    """
+    Starts `shards` worker processes and routes commands to them (see the
+    module docstring). Use as a context manager, or call close().
+    """
+
+    def __init__(self, shards: int = 4, storage: str = "journal", root: Optional[str] = None):
+        if shards < 1:
+            raise ValueError("At least one shard is needed.")
+        self.shards = shards
+        self.storage = storage
+        self.root = root or os.path.join(data_manager.ROOT_DATA_DIR, "shards")
+        self.diverged = False
+        if storage != "memory":
+            self._check_layout()
+
+        ctx = multiprocessing.get_context()
+        self._conns = []
+        self._procs = []
+        for i in range(shards):
+            parent, child = ctx.Pipe()
+            proc = ctx.Process(target=_shard_main, name=f"shard-{i}", daemon=True,
+                               args=(i, os.path.join(self.root, f"shard-{i}"), storage, child))
+            proc.start()
+            child.close()
+            self._conns.append(parent)
+            self._procs.append(proc)
+        try:
+            for conn in self._conns:
+                status, detail = conn.recv()
+                if status != "ready":
+                    raise ShardError(f"Shard failed to start: {detail[0]}: {detail[1]}")
+            catalogue = self._gather("catalogue")[0]
+            self._owner: Dict[int, int] = {}  # workshop id -> shard
+            for eid, wids in catalogue.items():
+                self._own(eid, wids)
+            self._next_id = max(self._gather("next_attendee_id"))
+        except BaseException:
+            self.close()
+            raise
+
+    def _check_layout(self) -> None:
+        path = os.path.join(self.root, "shards.json")
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                recorded = json.load(f)["shards"]
+            if recorded != self.shards:
+                raise ValueError(f"{self.root} holds {recorded} shards, not {self.shards}.")
+            return
+        os.makedirs(self.root, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"shards": self.shards}, f)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self) -> None:
+        for conn in self._conns:
+            try:
+                conn.send(None)
+            except (OSError, ValueError):
+                pass
+        for proc in self._procs:
+            proc.join(timeout=30)
+            if proc.is_alive():
+                proc.terminate()
+        for conn in self._conns:
+            conn.close()
+        self._conns, self._procs = [], []
+
+    # -------------------------
+    # Routing
+    # -------------------------
+    def shard_of_exhibition(self, exhibition_id: int) -> int:
+        return exhibition_id % self.shards
+
+    def _own(self, exhibition_id: int, workshop_ids: List[int]) -> None:
+        shard = self.shard_of_exhibition(exhibition_id)
+        for wid in workshop_ids:
+            self._owner[wid] = shard
+
+    def _targets(self, op: str, params: dict) -> List[int]:
+        if op in BROADCAST:
+            return list(range(self.shards))
+        if op in ROUTED:
+            shard = self._owner.get(int(params["workshop_id"]))
+            if shard is None:
+                raise KeyError("Workshop not found.")
+            return [shard]
+        raise ValueError(f"Unknown operation: {op}")
+
+    def execute(self, commands: List[Tuple[str, dict]]) -> List[Outcome]:
+        """
+        Run (op, params) commands; one (ok, result or exception) per command.
+        Commands sent together run in parallel on their shards.
+        """
+        if self.diverged:
+            raise ShardError("A shard failed a batch; the shards may have diverged.")
+        outcomes: List[Optional[Outcome]] = [None] * len(commands)
+        per_shard: List[List[int]] = [[] for _ in range(self.shards)]
+        sent: List[List[Tuple[str, dict]]] = [[] for _ in range(self.shards)]
+        for i, (op, params) in enumerate(commands):
+            try:
+                if op == "register" and params.get("attendee_id") is None:
+                    params = dict(params, attendee_id=self._next_id)
+                if op == "register":
+                    self._next_id = max(self._next_id, int(params["attendee_id"]) + 1)
+                targets = self._targets(op, params)
+            except REQUEST_ERRORS as e:
+                outcomes[i] = (False, e)
+                continue
+            for shard in targets:
+                per_shard[shard].append(i)
+                sent[shard].append((op, params))
+
+        replies = self._exchange(sent)
+        results: List[List[Tuple[int, Outcome]]] = [[] for _ in commands]
+        failures = []
+        for shard, (status, payload) in replies.items():
+            if status == "failed":
+                failures.append(_error(payload))
+                for i in per_shard[shard]:
+                    results[i].append((shard, (False, _error(payload))))
+                continue
+            for i, (ok, value) in zip(per_shard[shard], payload):
+                results[i].append((shard, (True, value) if ok else (False, _error(value))))
+        if failures and len(replies) > 1:
+            self.diverged = True
+
+        for i, (op, _) in enumerate(commands):
+            if outcomes[i] is None:
+                outcomes[i] = self._merge(op, results[i])
+        return outcomes
+
+    def _exchange(self, sent: List[List[Tuple[str, dict]]]) -> Dict[int, tuple]:
+        # send to every shard before waiting on any, so they run in parallel
+        busy = [shard for shard, batch in enumerate(sent) if batch]
+        for shard in busy:
+            self._conns[shard].send(sent[shard])
+        return {shard: self._conns[shard].recv() for shard in busy}
+
+    def _merge(self, op: str, results: List[Tuple[int, Outcome]]) -> Outcome:
+        if len(results) == 1:
+            return results[0][1]
+        failed = [outcome for _, outcome in results if not outcome[0]]
+        if failed:
+            if len(failed) < len(results):
+                # some shards applied the command and some did not
+                self.diverged = True
+                return False, ShardError(f"Shards disagree on {op}: {failed[0][1]}")
+            return failed[0]
+        first = results[0][1][1]
+        if isinstance(first, dict) and "reservations" in first:
+            # each shard holds the reservations for the workshops it owns
+            merged = dict(first, reservations=[wid for _, (_, info) in results for wid in info["reservations"]])
+            return True, merged
+        return True, first
+
+    def _gather(self, op: str, params: Optional[dict] = None) -> List[Any]:
+        """Run one read on every shard; results by shard."""
+        if self.diverged:
+            raise ShardError("The shards may have diverged; reads are refused.")
+        replies = self._exchange([[(op, params or {})]] * self.shards)
+        out = []
+        for shard in range(self.shards):
+            status, payload = replies[shard]
+            if status == "failed":
+                raise _error(payload)
+            ok, value = payload[0]
+            if not ok:
+                raise _error(value)
+            out.append(value)
+        return out
+
+    def _one(self, op: str, params: dict) -> Any:
+        ok, value = self.execute([(op, params)])[0]
+        if not ok:
+            raise value
+        return value
+
+    # -------------------------
+    # Operations
+    # -------------------------
+    def register_attendee(self, name: str, email: str, phone: str, attendee_id: Optional[int] = None) -> dict:
+        return self._one("register", {"name": name, "email": email, "phone": phone, "attendee_id": attendee_id})
+
+    def purchase_pass(self, attendee_id: int, pass_id: int) -> dict:
+        return self._one("purchase", {"attendee_id": attendee_id, "pass_id": pass_id})
+
+    def upgrade_pass(self, attendee_id: int, exhibition_ids: List[int]) -> dict:
+        return self._one("upgrade", {"attendee_id": attendee_id, "exhibitions": list(exhibition_ids)})
+
+    def reserve_workshop(self, attendee_id: int, workshop_id: int, waitlist: bool = False) -> dict:
+        return self._one("reserve", {"attendee_id": attendee_id, "workshop_id": workshop_id, "waitlist": waitlist})
+
+    def cancel_reservation(self, attendee_id: int, workshop_id: int) -> dict:
+        return self._one("cancel", {"attendee_id": attendee_id, "workshop_id": workshop_id})
+
+    def set_workshop_capacity(self, workshop_id: int, capacity: int) -> dict:
+        return self._one("set_capacity", {"workshop_id": workshop_id, "capacity": capacity})
+
+    def add_exhibition(self, exhibition: Exhibition) -> None:
+        self._one("add_exhibition", {"exhibition": exhibition})
+        self._own(exhibition.exhibition_id, [w.workshop_id for w in exhibition.workshops])
+
+    def add_pass(self, p: Pass) -> None:
+        self._one("add_pass", {"pass": p})
+
+    # -------------------------
+    # Scatter-gather reads
+    # -------------------------
+    def get_attendee(self, attendee_id: int) -> dict:
+        infos = self._gather("get_attendee", {"attendee_id": attendee_id})
+        return dict(infos[0], reservations=[wid for info in infos for wid in info["reservations"]])
+
+    def workshop_capacity_report(self) -> List[dict]:
+        reports = self._gather("report", {"kind": "capacity"})
+        by_shard = [{row["workshop_id"]: row for row in report} for report in reports]
+        return [by_shard[self._owner.get(row["workshop_id"], 0)][row["workshop_id"]] for row in reports[0]]
+
+    def occupancy(self) -> dict:
+        totals = self._gather("report", {"kind": "occupancy"})
+        # every shard holds every workshop, but only the owner of an exhibition
+        # sees its reservations and capacity changes: take its counts from there
+        exhibitions = {eid: totals[self.shard_of_exhibition(eid)]["exhibitions"][eid]
+                       for eid in totals[0]["exhibitions"]}
+        registered = sum(counts["registered"] for counts in exhibitions.values())
+        capacity = sum(counts["capacity"] for counts in exhibitions.values())
+        return {"registered": registered, "capacity": capacity, "spots_left": max(0, capacity - registered),
+                "exhibitions": exhibitions}
+
+    def daily_sales(self) -> dict:
+        return self._gather("report", {"kind": "daily_sales"})[0]
+
+    def revenue(self) -> dict:
+        return self._gather("report", {"kind": "revenue"})[0]
+
+    def attendee_count(self) -> int:
+        return self._gather("report", {"kind": "attendees"})[0]["attendees"]
+
+
+# -------------------------
+# Command-line front-end
+# -------------------------
+def run_stream(router: ShardRouter, lines, out, batch_size: int = 2000) -> BatchStats:
+    """batch_processor's JSONL protocol, executed through the router; reports are scatter-gather reads."""
+    stats = BatchStats()
+    reports = {"capacity": router.workshop_capacity_report, "daily_sales": router.daily_sales,
+               "revenue": router.revenue, "occupancy": router.occupancy,
+               "attendees": lambda: {"attendees": router.attendee_count()}}
+    pending: list = []
+
+    def flush():
+        runnable = [c for c in pending if "_error" not in c[3]]
+        outcomes = iter(router.execute([(op, params) for _, _, op, params in runnable]) if runnable else ())
+        for line_no, rid, _, params in pending:
+            if "_error" in params:
+                write(line_no, rid, False, ValueError(params["_error"]))
+            else:
+                write(line_no, rid, *next(outcomes))
+        if runnable:
+            stats.batches += 1
+        pending.clear()
+
+    def write(line_no, rid, ok, value):
+        stats.commands += 1
+        key = {"id": rid} if rid is not None else {"line": line_no}
+        if ok:
+            stats.ok += 1
+            out.write(json.dumps({**key, "ok": True, "result": value}) + "\n")
+            return
+        name = type(value).__name__
+        stats.errors[name] = stats.errors.get(name, 0) + 1
+        message = value.args[0] if isinstance(value, KeyError) and value.args else str(value)
+        out.write(json.dumps({**key, "ok": False, "error": message, "type": name}) + "\n")
+
+    for command in _read_ahead(parse_commands(lines), depth=2 * batch_size):
+        line_no, rid, op, params = command
+        if op == "report" and "_error" not in params:
+            flush()  # reports see every command before them
+            kind = params.get("kind", "capacity")
+            try:
+                if kind not in reports:
+                    raise ValueError(f"Unknown report: {kind}")
+                write(line_no, rid, True, reports[kind]())
+            except REQUEST_ERRORS as e:
+                write(line_no, rid, False, e)
+            continue
+        pending.append(command)
+        if len(pending) >= batch_size:
+            flush()
+            if router.diverged:
+                stats.aborted = True
+                break
+    else:
+        if pending:
+            flush()
+    out.flush()
+    stats.aborted = stats.aborted or router.diverged
+    stats.elapsed = time.perf_counter() - stats.started
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run a JSONL stream of commands on a sharded deployment.")
+    parser.add_argument("file", nargs="?", default="-", help="command file, or - for stdin (default)")
+    parser.add_argument("--shards", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--storage", default="journal", choices=["pickle", "journal", "sqlite", "lazy", "memory"])
+    parser.add_argument("--root", help="storage root (default: storage/data/shards)")
+    parser.add_argument("--batch-size", type=int, default=2000, help="commands sent to the shards at once")
+    args = parser.parse_args(argv)
+
+    source = sys.stdin if args.file == "-" else open(args.file, encoding="utf-8")
+    try:
+        with ShardRouter(args.shards, args.storage, args.root) as router:
+            stats = run_stream(router, source, sys.stdout, args.batch_size)
+    finally:
+        if source is not sys.stdin:
+            source.close()
+    print(stats.summary(), file=sys.stderr)
+    if stats.aborted:
+        return 2
+    return 0 if stats.failed == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
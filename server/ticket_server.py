@@ -0,0 +1,469 @@
+# server/ticket_server.py
+"""
+asyncio front-end for one TicketSystem, speaking line-delimited JSON over TCP.
+
+Request:  {"id": 1, "op": "reserve", "params": {"attendee_id": 7, "workshop_id": 101}}
+Response: {"id": 1, "ok": true, "result": {...}}
+          {"id": 1, "ok": false, "error": "Workshop is full or attendee already reserved.", "type": "ValueError"}
+
+A connection may pipeline requests; responses carry the request id and can
+come back out of order.
+
+Mutations (register, purchase_pass, upgrade_pass, reserve, cancel,
+leave_waitlist, set_capacity, run_lottery, lottery_submit, scan) are queued
+and run in micro-batches: one TicketSystem.transaction() per batch, so the
+backend persists (and fsyncs) once per batch instead of once per request.
+Each request runs in its own savepoint, so a rejected request does not affect
+the rest of its batch. Responses are sent only after the batch is persisted
+and synced (TicketServer.sync(): TicketSystem.sync(), which fsyncs a
+journal's pending group, then the check-in and lottery files that scan and
+lottery_submit append to).
+Batches form naturally while the previous one is being written; max_delay
+adds an optional linger to make them bigger.
+
+Reads (get_attendee, exhibitions, passes, capacity_report, daily_sales,
+revenue, stats, occupancy, top_workshops, available_workshops, occupancy_changes,
+waitlist_position, metrics, profile, badge, checkins, free_workshops,
+room_schedule, attendees_allowed) are answered directly on the event loop.
+Dashboards poll occupancy_changes with the last seq they saw and get only the
+deltas since then.
+
+metrics returns models/metrics.py's snapshot (or {"text": ...} in the
+Prometheus format with "format": "prometheus"); --metrics-port also serves
+the Prometheus text over HTTP at /metrics. profile with "action": "start"
+(optional "every", "ops") samples cProfile on the instrumented operations;
+"action": "stop" returns the report.
+
+badge returns a signed check-in token for an attendee (models/checkin.py).
+scan verifies one at a gate ({"gate_id", "exhibition_id" or "workshop_id",
+"token"}) without touching the TicketSystem, and records first entries
+(batched like a mutation, since it writes them to disk); checkins gives the
+number admitted per gate.
+
+reserve with "waitlist": true joins the workshop's waitlist when it is full;
+the result then carries "waitlist_position". Waitlisted attendees are
+promoted automatically when a spot is cancelled or capacity is raised.
+
+register, purchase_pass, upgrade_pass, reserve, cancel and leave_waitlist
+take an optional "idempotency_key": a client retrying after a timeout sends
+the same key and gets the first call's outcome instead of a second booking
+(models/idempotency.py). Reusing a key for a different request is an error.
+stats includes the idempotency cache's hit rate.
+
+lottery_submit records an attendee's ranked "workshops" for the workshop
+lottery (models/lottery.py); run_lottery ({"seed", "max_seats"}) closes the
+window, draws and books every seat within its batch. Both take an optional
+"lottery" name (default "default"), one per workshop or draw: a committed
+lottery cannot run again, so the next draw uses a new name.
+
+Run: python -m server.ticket_server [--port 8765] [--storage pickle|journal|sqlite|lazy|memory] [--metrics-port 9100]
+"""
+import argparse
+import asyncio
+import concurrent.futures
+import datetime
+import functools
+import json
+import signal
+import sys
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from models.checkin import BadgeSigner, CheckInRecorder, Gate
+from models.lottery import Lottery
+from models.metrics import METRICS
+from models.ticket_system import TicketSystem
+from server.operations import REQUEST_ERRORS, Operations, attendee_info, run_batch, _text
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _time(params: dict, key: str) -> datetime.datetime:
+    return datetime.datetime.fromisoformat(_text(params, key))
+
+
+def workshop_info(w) -> dict:
+    return {"workshop_id": w.workshop_id, "title": w.title, "capacity": w.capacity,
+            "spots_left": w.spots_left(), "room": w.room,
+            "start": None if w.start is None else w.start.isoformat(),
+            "end": None if w.end is None else w.end.isoformat()}
+
+
+class MicroBatcher:
+    """
+    Collects mutation calls from many coroutines and runs them in batches on a
+    single worker thread (persistence may fsync; the event loop never blocks on it).
+    """
+
+    def __init__(self, ts: TicketSystem, max_batch: int = 256, max_delay: float = 0.0,
+                 sync: Optional[Callable[[], None]] = None):
+        self.ts = ts
+        # makes a persisted batch durable before it is acknowledged
+        self.sync = sync or ts.sync
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.batches = 0
+        self.requests = 0
+        self._queue: Optional[asyncio.Queue] = None
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="batcher")
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        self._queue = asyncio.Queue()
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._executor.shutdown(wait=True)
+
+    async def submit(self, fn: Callable, *args) -> Any:
+        """Queue fn(*args) for the next batch and wait until it is persisted."""
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((fn, args, future))
+        return await future
+
+    def _drain(self, batch: List) -> None:
+        while len(batch) < self.max_batch and not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            self._drain(batch)
+            if self.max_delay and len(batch) < self.max_batch:
+                await asyncio.sleep(self.max_delay)
+                self._drain(batch)
+
+            outcomes = await loop.run_in_executor(self._executor, self._run_batch, batch)
+            self.batches += 1
+            self.requests += len(batch)
+            for (_, _, future), (ok, value) in zip(batch, outcomes):
+                if future.done():
+                    continue  # client went away
+                if ok:
+                    future.set_result(value)
+                else:
+                    future.set_exception(value)
+
+    def _run_batch(self, batch: List) -> List[Tuple[bool, Any]]:
+        outcomes, failure = run_batch(self.ts, [functools.partial(fn, *args) for fn, args, _ in batch], self.sync)
+        if failure is not None:
+            # nothing of the batch is acknowledged
+            return [(False, failure)] * len(batch)
+        return outcomes
+
+
+class TicketServer(Operations):
+    """Maps protocol operations onto one TicketSystem (the common mutations come from Operations)."""
+
+    MUTATIONS = ("register", "purchase_pass", "upgrade_pass", "reserve", "cancel", "leave_waitlist",
+                 "set_capacity", "run_lottery", "lottery_submit", "scan")
+    READS = ("get_attendee", "exhibitions", "passes", "capacity_report", "daily_sales", "revenue", "stats",
+             "occupancy", "top_workshops", "available_workshops", "occupancy_changes", "waitlist_position",
+             "metrics", "profile", "badge", "checkins", "free_workshops", "room_schedule", "attendees_allowed")
+
+    def __init__(self, ts: TicketSystem, max_batch: int = 256, max_delay: float = 0.0):
+        super().__init__(ts)
+        self.batcher = MicroBatcher(ts, max_batch, max_delay, self.sync)
+        self._server: Optional[asyncio.AbstractServer] = None
+        self.signer = BadgeSigner.default()
+        self.checkins = CheckInRecorder(None if ts.storage_mode == "memory" else "checkins.bin")
+        self.gates: Dict[int, Gate] = {}
+        self.lotteries: Dict[str, Lottery] = {}
+        self._lotteries_lock = threading.Lock()
+
+    def sync(self) -> None:
+        """Make a batch durable: the TicketSystem, then the check-in and lottery files."""
+        self.ts.sync()
+        self.checkins.sync()
+        with self._lotteries_lock:
+            lotteries = list(self.lotteries.values())
+        for lottery in lotteries:
+            lottery.sync()
+
+    # -------------------------
+    # Connection handling
+    # -------------------------
+    async def start(self, host: str = "127.0.0.1", port: int = 8765) -> Tuple[str, int]:
+        self.batcher.start()
+        self._server = await asyncio.start_server(self._handle_connection, host, port)
+        return self._server.sockets[0].getsockname()[:2]
+
+    async def stop(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        await self.batcher.stop()
+        self.checkins.close()
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        pending = set()
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                task = asyncio.ensure_future(self._respond(line, writer))
+                pending.add(task)
+                task.add_done_callback(pending.discard)
+            if pending:
+                await asyncio.wait(pending)
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def _respond(self, line: bytes, writer: asyncio.StreamWriter) -> None:
+        rid = None
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError("Request must be a JSON object.")
+            rid = request.get("id")
+            result = await self.dispatch(request.get("op"), request.get("params") or {})
+            response = {"id": rid, "ok": True, "result": result}
+        except REQUEST_ERRORS as e:
+            # KeyError's str() adds quotes
+            message = e.args[0] if isinstance(e, KeyError) and e.args else str(e)
+            response = {"id": rid, "ok": False, "error": message, "type": type(e).__name__}
+        except Exception as e:
+            response = {"id": rid, "ok": False, "error": f"Internal error: {e}", "type": "InternalError"}
+        if writer.is_closing():
+            return
+        try:
+            writer.write(json.dumps(response).encode() + b"\n")
+            await writer.drain()
+        except ConnectionError:
+            pass
+
+    async def dispatch(self, op: str, params: dict) -> Any:
+        if op in self.MUTATIONS:
+            return await self.batcher.submit(getattr(self, "op_" + op), params)
+        if op in self.READS:
+            return getattr(self, "op_" + op)(params)
+        raise ValueError(f"Unknown operation: {op}")
+
+    # -------------------------
+    # Lookups
+    # -------------------------
+    def _lottery(self, params: dict) -> Lottery:
+        # looked up by the operations and by sync()
+        name = _text(params, "lottery") or "default"
+        with self._lotteries_lock:
+            lottery = self.lotteries.get(name)
+            if lottery is None:
+                lottery = self.lotteries[name] = Lottery(self.ts, name)
+        return lottery
+
+    # -------------------------
+    # Mutations (batch thread; the others are in Operations)
+    # -------------------------
+    def op_run_lottery(self, params: dict) -> dict:
+        lottery = self._lottery(params)
+        allocation = lottery.run(int(params["seed"]), int(params.get("max_seats", 1)))
+        return {"lottery": lottery.name, "seed": allocation.seed, "seats": allocation.seats,
+                "attendees": len(allocation.assignments),
+                "unassigned": len(allocation.unassigned),
+                "by_rank": {str(rank): n for rank, n in sorted(allocation.by_rank.items())}}
+
+    def op_scan(self, params: dict) -> dict:
+        gate_id = int(params["gate_id"])
+        gate = self.gates.get(gate_id)
+        if gate is None:
+            eid, wid = params.get("exhibition_id"), params.get("workshop_id")
+            gate = self.gates[gate_id] = Gate(gate_id, self.signer, None if eid is None else int(eid),
+                                              None if wid is None else int(wid), self.checkins)
+        result = gate.scan(str(params["token"]))
+        return {"status": result.status, "admitted": result.admitted, "attendee_id": result.attendee_id}
+
+    def op_lottery_submit(self, params: dict) -> dict:
+        attendee = self._attendee(params)
+        ranked = self._lottery(params).submit(attendee, [int(wid) for wid in params["workshops"]])
+        return {"attendee_id": attendee.attendee_id, "workshops": ranked}
+
+    # -------------------------
+    # Reads (event loop)
+    # -------------------------
+    def op_get_attendee(self, params: dict) -> dict:
+        return attendee_info(self._attendee(params))
+
+    def op_exhibitions(self, params: dict) -> list:
+        return [{
+            "exhibition_id": ex.exhibition_id,
+            "name": ex.name,
+            "description": ex.description,
+            "workshops": [workshop_info(w) for w in ex.workshops],
+        } for ex in self.ts.exhibitions]
+
+    def op_passes(self, params: dict) -> list:
+        return [{"pass_id": p.pass_id, "type": type(p).__name__, "price": p.price, "all_access": p.all_access,
+                 "exhibitions_access": sorted(p.exhibitions_access)} for p in self.ts.passes]
+
+    def op_attendees_allowed(self, params: dict) -> dict:
+        """Ids of the attendees allowed into each of params["exhibitions"]."""
+        allowed = self.ts.attendees_allowed([int(eid) for eid in params["exhibitions"]])
+        return {str(eid): ids for eid, ids in allowed.items()}
+
+    def op_capacity_report(self, params: dict) -> list:
+        return self.ts.workshop_capacity_report()
+
+    def op_occupancy(self, params: dict) -> dict:
+        return self.ts.occupancy.totals()
+
+    def op_top_workshops(self, params: dict) -> list:
+        return self.ts.occupancy.top_fullest(int(params.get("n", 10)))
+
+    def op_available_workshops(self, params: dict) -> list:
+        limit = params.get("limit")
+        return self.ts.occupancy.with_spots_left(int(params.get("min_spots", 1)),
+                                                 None if limit is None else int(limit))
+
+    def op_free_workshops(self, params: dict) -> list:
+        """Workshops the attendee can still book between "start" and "end" (ISO 8601)."""
+        attendee = self._attendee(params)
+        return [workshop_info(w) for w in self.ts.free_workshops(attendee, _time(params, "start"),
+                                                                 _time(params, "end"))]
+
+    def op_room_schedule(self, params: dict) -> list:
+        return [workshop_info(w) for w in self.ts.room_schedule(_text(params, "room")) if w is not None]
+
+    def op_occupancy_changes(self, params: dict) -> dict:
+        """Deltas after params["since"]; a full snapshot if the history no longer reaches back that far."""
+        since = int(params.get("since", 0))
+        changes = self.ts.occupancy.changes_since(since)
+        if changes is None:
+            return self.ts.occupancy.snapshot()
+        return {"seq": changes[-1]["seq"] if changes else since, "changes": changes}
+
+    def op_waitlist_position(self, params: dict) -> dict:
+        workshop = self._workshop(params)
+        return {"workshop_id": workshop.workshop_id, "waiting": len(workshop.waitlist),
+                "position": self.ts.waitlist_position(self._attendee(params), workshop)}
+
+    def op_badge(self, params: dict) -> dict:
+        attendee = self._attendee(params)
+        valid_for = float(params.get("valid_hours", 72)) * 3600
+        return {"attendee_id": attendee.attendee_id, "token": self.signer.issue(attendee, valid_for)}
+
+    def op_checkins(self, params: dict) -> dict:
+        return {str(gate_id): count for gate_id, count in self.checkins.counts().items()}
+
+    def op_daily_sales(self, params: dict) -> dict:
+        return self.ts.daily_sales()
+
+    REVENUE_GROUPINGS = ("day", "hour", "pass_class", "exhibition")
+
+    def op_revenue(self, params: dict) -> dict:
+        """Revenue grouped by params["by"] (day, hour, pass_class, exhibition), or a rolling window."""
+        ledger = self.ts.sales_ledger
+        if "rolling_days" in params:
+            return ledger.rolling_revenue(int(params["rolling_days"]))
+        by = params.get("by", "day")
+        if by not in self.REVENUE_GROUPINGS:
+            raise ValueError(f"Unknown revenue grouping: {by}")
+        return getattr(ledger, "revenue_by_" + by)()
+
+    def op_stats(self, params: dict) -> dict:
+        b = self.batcher
+        return {"batches": b.batches, "requests": b.requests,
+                "avg_batch": b.requests / b.batches if b.batches else 0.0,
+                "idempotency": self.ts.idempotency.stats()}
+
+    def op_metrics(self, params: dict) -> dict:
+        if params.get("format", "json") == "prometheus":
+            return {"content_type": PROMETHEUS_CONTENT_TYPE, "text": METRICS.prometheus()}
+        snapshot = METRICS.snapshot()
+        snapshot["server"] = self.op_stats(params)
+        return snapshot
+
+    def op_profile(self, params: dict) -> dict:
+        """Start ({"action": "start", "every": 100, "ops": [...]}) or stop sampling cProfile."""
+        action = params.get("action")
+        if action == "start":
+            ops = params.get("ops")
+            METRICS.start_profiling(int(params.get("every", 100)), None if ops is None else [str(op) for op in ops])
+            return {"profiling": True}
+        if action == "stop":
+            stats = METRICS.stop_profiling()
+            report = "" if stats is None else METRICS.profile_report(
+                stats, int(params.get("limit", 30)), str(params.get("sort", "cumulative")))
+            return {"profiling": False, "report": report}
+        raise ValueError("profile action must be start or stop.")
+
+
+async def _serve_metrics_http(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+    """Minimal HTTP/1.0 responder for Prometheus scrapes: GET /metrics."""
+    try:
+        request = await reader.readline()
+        while (await reader.readline()).strip():  # skip the headers
+            pass
+        parts = request.decode("latin-1").split()
+        if len(parts) >= 2 and parts[0] == "GET" and parts[1].split("?")[0] == "/metrics":
+            body, status = METRICS.prometheus().encode(), "200 OK"
+        else:
+            body, status = b"not found\n", "404 Not Found"
+        writer.write(f"HTTP/1.0 {status}\r\nContent-Type: {PROMETHEUS_CONTENT_TYPE}\r\n"
+                     f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode() + body)
+        await writer.drain()
+    except (ConnectionError, UnicodeDecodeError):
+        pass
+    finally:
+        writer.close()
+
+
+async def serve(args) -> None:
+    # hand the GIL back to the event loop promptly while a batch is being applied
+    sys.setswitchinterval(0.0005)
+    ts = TicketSystem(args.storage)
+    server = TicketServer(ts, args.max_batch, args.max_delay_ms / 1000)
+    host, port = await server.start(args.host, args.port)
+    print(f"listening on {host}:{port}", flush=True)
+    metrics_server = None
+    if args.metrics_port is not None:
+        metrics_server = await asyncio.start_server(_serve_metrics_http, args.host, args.metrics_port)
+        metrics_port = metrics_server.sockets[0].getsockname()[1]
+        print(f"metrics on http://{args.host}:{metrics_port}/metrics", flush=True)
+
+    # stop cleanly (pending journal records flushed) on Ctrl+C or SIGTERM
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except NotImplementedError:  # Windows: KeyboardInterrupt ends asyncio.run()
+            pass
+    try:
+        await stop.wait()
+    finally:
+        if metrics_server is not None:
+            metrics_server.close()
+        await server.stop()
+        ts.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve a TicketSystem over line-delimited JSON.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765, help="0 picks a free port")
+    parser.add_argument("--storage", default="journal", choices=["pickle", "journal", "sqlite", "lazy", "memory"])
+    parser.add_argument("--max-batch", type=int, default=256, help="most mutations persisted together")
+    parser.add_argument("--max-delay-ms", type=float, default=0.0,
+                        help="extra time to wait for a batch to fill (0: batch whatever is queued)")
+    parser.add_argument("--metrics-port", type=int, default=None,
+                        help="also serve Prometheus metrics over HTTP on this port (0 picks a free one)")
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,401 @@
+# storage/attendee_store.py
+import atexit
+import hashlib
+import mmap
+import os
+import pickle
+import struct
+import threading
+import time
+import zlib
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from storage.data_manager import _fullpath
+from models.metrics import METRICS
+
+# Data file: magic, then frames of <payload length, crc32> + pickled record
+_DATA_MAGIC = b"GWATTD01"
+_FRAME = struct.Struct("<II")
+
+# Index file: header, then `capacity` slots of <key hash, frame offset>
+_INDEX_MAGIC = b"GWATTI01"
+_INDEX_HEADER = struct.Struct("<8sQQQQQqB")  # magic, capacity, used, live, data_end, frames, max_id, clean
+_SLOT = struct.Struct("<QQ")
+_EMPTY, _DELETED = 0, 1  # never valid frame offsets (the data file starts with its magic)
+_MAX_LOAD = 0.7
+_M64 = (1 << 64) - 1
+
+# Record layout: (attendee_id, name, email, phone, pass_id, unlisted_pass, reservations)
+Record = tuple
+
+
+def id_hash(aid: int) -> int:
+    x = (aid * 0x9E3779B97F4A7C15) & _M64
+    return x ^ (x >> 31)
+
+
+def email_hash(email_key: str) -> int:
+    return int.from_bytes(hashlib.blake2b(email_key.encode(), digest_size=8).digest(), "little")
+
+
+class HashIndex:
+    """
+    Open-addressing hash table (linear probing) in a memory-mapped file,
+    mapping 64-bit key hashes to frame offsets. Keys themselves live in the
+    data file, so a hash match is confirmed by the caller's match(offset).
+
+    Opening is O(1): nothing is read until a lookup touches its slots.
+    The header's clean flag is cleared on the first write and set again by
+    close(), so an index left behind by a crash is detected and rebuilt.
+    """
+
+    def __init__(self, path: str, capacity: int = 1024):
+        self.path = path
+        if not os.path.exists(path):
+            self._create(path, capacity)
+        self._map()
+
+    @staticmethod
+    def _create(path: str, capacity: int) -> None:
+        with open(path, "wb") as f:
+            f.write(_INDEX_HEADER.pack(_INDEX_MAGIC, capacity, 0, 0, 0, 0, 0, 1))
+            f.truncate(_INDEX_HEADER.size + capacity * _SLOT.size)
+
+    def _map(self) -> None:
+        self._fh = open(self.path, "r+b")
+        self._mm = mmap.mmap(self._fh.fileno(), 0)
+        (magic, self.capacity, self.used, self.live, self.data_end, self.frames,
+         self.max_id, self.clean) = _INDEX_HEADER.unpack_from(self._mm, 0)
+        if magic != _INDEX_MAGIC:
+            raise ValueError(f"{self.path} is not an attendee index")
+        self._mask = self.capacity - 1
+
+    def _write_header(self) -> None:
+        _INDEX_HEADER.pack_into(self._mm, 0, _INDEX_MAGIC, self.capacity, self.used, self.live,
+                                self.data_end, self.frames, self.max_id, self.clean)
+
+    def _touch(self) -> None:
+        if self.clean:
+            self.clean = 0
+            self._write_header()
+            self._mm.flush()
+
+    def find(self, h: int, match: Callable[[int], bool]) -> int:
+        """Offset stored for the key hashing to h (confirmed by match), or 0."""
+        mm, i = self._mm, h & self._mask
+        while True:
+            sh, off = _SLOT.unpack_from(mm, _INDEX_HEADER.size + i * _SLOT.size)
+            if off == _EMPTY:
+                return 0
+            if off != _DELETED and sh == h and match(off):
+                return off
+            i = (i + 1) & self._mask
+
+    def put(self, h: int, offset: int, match: Callable[[int], bool]) -> None:
+        """Point the key hashing to h (confirmed by match) at offset, inserting it if new."""
+        self._touch()
+        mm, i, free = self._mm, h & self._mask, -1
+        while True:
+            pos = _INDEX_HEADER.size + i * _SLOT.size
+            sh, off = _SLOT.unpack_from(mm, pos)
+            if off == _EMPTY:
+                break
+            if off == _DELETED:
+                if free < 0:
+                    free = pos
+            elif sh == h and match(off):
+                _SLOT.pack_into(mm, pos, h, offset)
+                return
+            i = (i + 1) & self._mask
+        if free < 0:
+            free = pos
+            self.used += 1
+        _SLOT.pack_into(mm, free, h, offset)
+        self.live += 1
+        if self.used > self.capacity * _MAX_LOAD:
+            self._resize(self.capacity * 2 if self.live > self.capacity * _MAX_LOAD / 2 else self.capacity)
+
+    def delete(self, h: int, match: Callable[[int], bool]) -> None:
+        self._touch()
+        mm, i = self._mm, h & self._mask
+        while True:
+            pos = _INDEX_HEADER.size + i * _SLOT.size
+            sh, off = _SLOT.unpack_from(mm, pos)
+            if off == _EMPTY:
+                return
+            if off != _DELETED and sh == h and match(off):
+                _SLOT.pack_into(mm, pos, sh, _DELETED)
+                self.live -= 1
+                return
+            i = (i + 1) & self._mask
+
+    def slots(self) -> Iterator[Tuple[int, int]]:
+        """Live (hash, offset) pairs in slot order."""
+        mm = self._mm
+        for i in range(self.capacity):
+            sh, off = _SLOT.unpack_from(mm, _INDEX_HEADER.size + i * _SLOT.size)
+            if off > _DELETED:
+                yield sh, off
+
+    def _resize(self, capacity: int) -> None:
+        """Rehash into a new file; stored hashes make this independent of the data file."""
+        live = list(self.slots())
+        tmp = self.path + ".tmp"
+        self._create(tmp, capacity)
+        with open(tmp, "r+b") as f, mmap.mmap(f.fileno(), 0) as mm:
+            mask = capacity - 1
+            for sh, off in live:
+                i = sh & mask
+                while _SLOT.unpack_from(mm, _INDEX_HEADER.size + i * _SLOT.size)[1] != _EMPTY:
+                    i = (i + 1) & mask
+                _SLOT.pack_into(mm, _INDEX_HEADER.size + i * _SLOT.size, sh, off)
+            _INDEX_HEADER.pack_into(mm, 0, _INDEX_MAGIC, capacity, len(live), len(live),
+                                    self.data_end, self.frames, self.max_id, 0)
+            mm.flush()
+        self._unmap()
+        os.replace(tmp, self.path)
+        self._map()
+
+    def reset(self, capacity: int) -> None:
+        self._unmap()
+        os.remove(self.path)
+        self._create(self.path, capacity)
+        self._map()
+
+    def flush(self, clean: bool = False) -> None:
+        if clean:
+            self.clean = 1
+        self._write_header()
+        self._mm.flush()
+
+    def _unmap(self) -> None:
+        self._mm.close()
+        self._fh.close()
+
+    def close(self) -> None:
+        self.flush(clean=True)
+        self._unmap()
+
+
+def _capacity_for(n: int) -> int:
+    capacity = 1024
+    while capacity * _MAX_LOAD < n * 1.5:
+        capacity *= 2
+    return capacity
+
+
+class AttendeeStore:
+    """
+    Offset-indexed attendee records on disk, for the "lazy" storage mode.
+
+    <name>.dat holds append-only frames, one per attendee version; an update
+    appends a new frame and repoints the indexes, and compact() drops the
+    superseded ones. <name>.id.idx and <name>.email.idx map attendee ids and
+    case-folded emails to the latest frame. Opening reads two index headers,
+    whatever the number of attendees; only an unclean shutdown costs a full
+    scan (rebuild()) on the next open.
+    """
+
+    def __init__(self, name: str = "attendees"):
+        self.data_path = _fullpath(name + ".dat")
+        os.makedirs(os.path.dirname(self.data_path), exist_ok=True)
+        self._lock = threading.RLock()
+        self._fd = os.open(self.data_path, os.O_RDWR | os.O_CREAT, 0o644)
+        end = os.fstat(self._fd).st_size
+        if end == 0:
+            os.pwrite(self._fd, _DATA_MAGIC, 0)
+            end = len(_DATA_MAGIC)
+        elif os.pread(self._fd, len(_DATA_MAGIC), 0) != _DATA_MAGIC:
+            raise ValueError(f"{self.data_path} is not an attendee store")
+        self._end = end
+        self.by_id = HashIndex(_fullpath(name + ".id.idx"))
+        self.by_email = HashIndex(_fullpath(name + ".email.idx"))
+        if not (self.by_id.clean and self.by_email.clean) or self.by_id.data_end != end:
+            self.rebuild()
+        self._closed = False
+        atexit.register(self.close)
+
+    # -------------------------
+    # Frames
+    # -------------------------
+    def read(self, offset: int) -> Optional[Record]:
+        head = os.pread(self._fd, _FRAME.size, offset)
+        if len(head) < _FRAME.size:
+            return None
+        length, crc = _FRAME.unpack(head)
+        payload = os.pread(self._fd, length, offset + _FRAME.size)
+        if len(payload) < length or zlib.crc32(payload) != crc:
+            return None
+        return pickle.loads(payload)
+
+    def _append(self, record: Record) -> int:
+        payload = pickle.dumps(record, protocol=pickle.HIGHEST_PROTOCOL)
+        offset = self._end
+        os.pwrite(self._fd, _FRAME.pack(len(payload), zlib.crc32(payload)) + payload, offset)
+        self._end += _FRAME.size + len(payload)
+        self.by_id.frames += 1
+        return offset
+
+    def _frames(self, start: int, end: int) -> Iterator[Tuple[int, int, Record]]:
+        """Sequential scan yielding (offset, next offset, record); stops at the first torn or corrupt frame."""
+        with open(self.data_path, "rb") as f:
+            f.seek(start)
+            offset = start
+            while offset + _FRAME.size <= end:
+                head = f.read(_FRAME.size)
+                if len(head) < _FRAME.size:
+                    return
+                length, crc = _FRAME.unpack(head)
+                payload = f.read(length)
+                if len(payload) < length or zlib.crc32(payload) != crc:
+                    return
+                next_offset = offset + _FRAME.size + length
+                yield offset, next_offset, pickle.loads(payload)
+                offset = next_offset
+
+    # -------------------------
+    # Lookups
+    # -------------------------
+    def _id_match(self, aid: int) -> Callable[[int], bool]:
+        return lambda off: (self.read(off) or (None,))[0] == aid
+
+    def _email_match(self, key: str) -> Callable[[int], bool]:
+        return lambda off: (self.read(off) or (None, None, ""))[2].casefold() == key
+
+    def _lookup(self, index: HashIndex, h: int, accept: Callable[[Record], bool]) -> Optional[Record]:
+        # decode each candidate frame once and keep the one that matched
+        found: List[Record] = []
+
+        def match(off):
+            record = self.read(off)
+            if record is not None and accept(record):
+                found.append(record)
+                return True
+            return False
+
+        with self._lock:
+            index.find(h, match)
+        return found[0] if found else None
+
+    def get_by_id(self, aid: int) -> Optional[Record]:
+        return self._lookup(self.by_id, id_hash(aid), lambda r: r[0] == aid)
+
+    def get_by_email(self, email_key: str) -> Optional[Record]:
+        return self._lookup(self.by_email, email_hash(email_key), lambda r: r[2].casefold() == email_key)
+
+    def __len__(self) -> int:
+        return self.by_id.live
+
+    def max_id(self) -> int:
+        return self.by_id.max_id
+
+    def iter_records(self) -> Iterator[Record]:
+        """Every current record, in the order they were last written."""
+        with self._lock:
+            end = self._end
+        for offset, _, record in self._frames(len(_DATA_MAGIC), end):
+            aid = record[0]
+            with self._lock:
+                # the common case (this frame is current) needs no second read
+                current = self.by_id.find(
+                    id_hash(aid), lambda off: off == offset or (self.read(off) or (None,))[0] == aid)
+            if current == offset:
+                yield record
+
+    # -------------------------
+    # Writes
+    # -------------------------
+    def put(self, record: Record) -> None:
+        """Write the latest version of one attendee."""
+        self.put_many((record,))
+
+    def put_many(self, records) -> None:
+        start = time.perf_counter()
+        with self._lock:
+            first = self._end
+            for record in records:
+                aid, key = record[0], record[2].casefold()
+                id_h, id_match = id_hash(aid), self._id_match(aid)
+                old_off = self.by_id.find(id_h, id_match)
+                if old_off:
+                    old_key = self.read(old_off)[2].casefold()
+                    if old_key != key:
+                        self.by_email.delete(email_hash(old_key), self._email_match(old_key))
+                offset = self._append(record)
+                self.by_id.put(id_h, offset, id_match)
+                self.by_email.put(email_hash(key), offset, self._email_match(key))
+                if aid > self.by_id.max_id:
+                    self.by_id.max_id = aid
+            written = self._end - first
+        if written:
+            METRICS.record_io("write", os.path.basename(self.data_path), written, time.perf_counter() - start)
+
+    def needs_compaction(self) -> bool:
+        return self.by_id.frames > 2 * self.by_id.live + 10_000
+
+    # -------------------------
+    # Maintenance
+    # -------------------------
+    def rebuild(self) -> None:
+        """Recreate both indexes from the data file (after a crash); truncates a torn tail."""
+        with self._lock:
+            latest: Dict[int, Tuple[int, str]] = {}
+            frames, end = 0, len(_DATA_MAGIC)
+            for offset, end, record in self._frames(len(_DATA_MAGIC), os.fstat(self._fd).st_size):
+                latest[record[0]] = (offset, record[2].casefold())
+                frames += 1
+            self._reindex(latest, frames, end)
+
+    def _reindex(self, latest: Dict[int, Tuple[int, str]], frames: int, end: int) -> None:
+        os.ftruncate(self._fd, end)
+        self._end = end
+        capacity = _capacity_for(len(latest))
+        self.by_id.reset(capacity)
+        self.by_email.reset(capacity)
+        # offsets are unique per key here, so an offset comparison confirms matches
+        for aid, (offset, key) in latest.items():
+            self.by_id.put(id_hash(aid), offset, lambda off, o=offset: off == o)
+            self.by_email.put(email_hash(key), offset, lambda off, o=offset: off == o)
+        self.by_id.frames = frames
+        self.by_id.max_id = max(latest, default=0)
+        self.flush()
+
+    def compact(self) -> None:
+        """Rewrite the data file with only the current version of each attendee."""
+        with self._lock:
+            tmp = self.data_path + ".tmp"
+            latest: Dict[int, Tuple[int, str]] = {}
+            with open(tmp, "wb") as out:
+                out.write(_DATA_MAGIC)
+                offset = len(_DATA_MAGIC)
+                for record in self.iter_records():
+                    payload = pickle.dumps(record, protocol=pickle.HIGHEST_PROTOCOL)
+                    out.write(_FRAME.pack(len(payload), zlib.crc32(payload)) + payload)
+                    latest[record[0]] = (offset, record[2].casefold())
+                    offset += _FRAME.size + len(payload)
+                out.flush()
+                os.fsync(out.fileno())
+            os.close(self._fd)
+            os.replace(tmp, self.data_path)
+            self._fd = os.open(self.data_path, os.O_RDWR)
+            self._reindex(latest, len(latest), offset)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._reindex({}, 0, len(_DATA_MAGIC))
+
+    def flush(self) -> None:
+        with self._lock:
+            self.by_id.flush()
+            self.by_email.flush()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            os.fsync(self._fd)
+            self.by_id.data_end = self._end
+            self.by_id.close()
+            self.by_email.close()
+            os.close(self._fd)
@@ -0,0 +1,488 @@
+# storage/backend.py
+import os
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+from storage.data_manager import save_data, load_data, save_bytes, append_bytes, load_bytes, _fullpath
+from storage.journal import Journal
+from storage.attendee_store import AttendeeStore
+from models.attendee import Attendee
+from models.passes import Pass
+from models.sales_ledger import SalesLedger, ROW, event_rows, pack_rows
+
+# TicketSystem collections touched by each storage record
+RECORD_COLLECTIONS = {
+    "register": ("attendees",),
+    "add_pass": ("passes",),
+    "purchase": ("attendees", "sales_log", "sales_ledger"),
+    "upgrade": ("attendees", "sales_ledger"),
+    "add_exhibition": ("exhibitions",),
+    "add_workshop": ("exhibitions",),
+    "remove_workshop": ("exhibitions",),
+    "reserve": ("attendees", "exhibitions"),
+    "cancel": ("attendees", "exhibitions"),
+    "waitlist_join": ("exhibitions",),
+    "waitlist_leave": ("exhibitions",),
+    "promote": ("attendees", "exhibitions"),
+    "capacity": ("exhibitions",),
+    "profile": ("attendees",),
+    "idempotency": ("idempotency",),
+}
+ALL_COLLECTIONS = ("attendees", "exhibitions", "passes", "sales_log", "sales_ledger", "idempotency")
+
+# records that only change one workshop's roster -> position of its workshop id
+ROSTER_RECORDS = {
+    "reserve": 2,
+    "cancel": 2,
+    "waitlist_join": 2,
+    "waitlist_leave": 2,
+    "promote": 2,
+    "capacity": 1,
+}
+
+
+def sale_events(records) -> Iterator[tuple]:
+    """Sales-ledger events carried by purchase / upgrade records (older records have none)."""
+    for record in records:
+        if record[0] == "purchase" and len(record) > 5:
+            yield record[5]
+        elif record[0] == "upgrade" and len(record) > 3:
+            yield record[3]
+
+
+class StorageBackend:
+    """
+    Persistence strategy used by TicketSystem.
+
+    TicketSystem applies every mutation in memory first and then hands the
+    backend a small record describing it, e.g. ("reserve", attendee_id, workshop_id).
+    Backends decide how (and how much) to write for that record.
+
+    Backends with resident = False keep attendees on disk; TicketSystem then
+    materializes them on demand through the fetch_* methods.
+
+    Backends with needs_exclusive = True serialize live object graphs on every
+    persist, so TicketSystem stops all other mutations while they run.
+    """
+
+    resident = True
+    needs_exclusive = False
+
+    def load(self) -> Tuple[Dict[str, Any], List[tuple]]:
+        """
+        Return (state, records). state has the keys attendees, exhibitions,
+        passes and sales_log, and sales_ledger and idempotency (an
+        IdempotencyCache) unless the data predates them; records are
+        journaled mutations to replay on top.
+        """
+        raise NotImplementedError
+
+    def persist(self, record: tuple, ts) -> None:
+        """Persist a mutation made through a TicketSystem method."""
+        raise NotImplementedError
+
+    def log_change(self, record: tuple, ts) -> None:
+        """Persist a mutation made directly on a model object (profile edits, workshops)."""
+        self.persist(record, ts)
+
+    def prepare_record(self, record: tuple):
+        """
+        Called when a record is deferred by a transaction. Backends that
+        serialize record payloads do it here, before later operations in the
+        same transaction mutate the objects it refers to.
+        """
+        return record
+
+    def persist_batch(self, records: List, ts) -> None:
+        """Persist the (prepared) records of one transaction together."""
+        for record in records:
+            self.persist(record, ts)
+
+    def save_all(self, ts) -> None:
+        """Write the complete in-memory state."""
+        raise NotImplementedError
+
+    def sync(self) -> None:
+        """Make everything persisted so far durable (backends that defer their fsyncs)."""
+
+    def maintenance_due(self) -> bool:
+        """True when run_maintenance() should be called (with all mutations paused)."""
+        return False
+
+    def run_maintenance(self, ts) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+    # Non-resident backends only
+    def fetch_attendee_by_email(self, email_key: str, ts):
+        return None
+
+    def fetch_attendee_by_id(self, aid: int, ts):
+        return None
+
+    def iter_attendees(self, ts) -> Iterator:
+        return iter(ts.attendees)
+
+    def attendee_count(self, ts) -> int:
+        return len(ts.attendees)
+
+    def max_attendee_id(self, ts) -> int:
+        return max((a.attendee_id for a in ts.attendees), default=0)
+
+
+class PickleBackend(StorageBackend):
+    """
+    One pickle file per collection. Each mutation marks the collections it
+    touched as dirty and only those files are rewritten. The sales ledger is
+    the exception: it is an append-only file of fixed-size rows, and only the
+    rows of new events are appended.
+    """
+
+    needs_exclusive = True
+
+    ATTENDEES_FILE = "attendees.pkl"
+    EXHIBITIONS_FILE = "exhibitions.pkl"
+    PASSES_FILE = "passes.pkl"
+    SALES_FILE = "sales.pkl"
+    LEDGER_FILE = "sales_ledger.bin"
+    IDEMPOTENCY_FILE = "idempotency.pkl"
+
+    FILES = {
+        "attendees": ATTENDEES_FILE,
+        "exhibitions": EXHIBITIONS_FILE,
+        "passes": PASSES_FILE,
+        "sales_log": SALES_FILE,
+        "idempotency": IDEMPOTENCY_FILE,  # last: an operation's key is saved after its effects
+    }
+
+    def __init__(self):
+        self._dirty = set()
+
+    def _mark_dirty(self, record) -> None:
+        self._dirty.update(RECORD_COLLECTIONS.get(record[0], ALL_COLLECTIONS))
+
+    def _flush_dirty(self, ts) -> None:
+        for name, filename in self.FILES.items():
+            if name in self._dirty:
+                save_data(filename, getattr(ts, name))
+        self._dirty.clear()
+
+    def _append_sales(self, records) -> None:
+        data = pack_rows(row for event in sale_events(records) for row in event_rows(event))
+        if data:
+            append_bytes(self.LEDGER_FILE, data)
+
+    def _load_ledger(self, sales_log) -> SalesLedger:
+        data = load_bytes(self.LEDGER_FILE)
+        if data is None:
+            # first start since the ledger was added: seed it from the per-day counts
+            ledger = SalesLedger.from_sales_log(sales_log)
+            save_bytes(self.LEDGER_FILE, pack_rows(ledger.rows()))
+            return ledger
+        if len(data) % ROW.size:
+            # torn final row from a crash mid-append
+            data = data[:len(data) - len(data) % ROW.size]
+            save_bytes(self.LEDGER_FILE, data)
+        ledger = SalesLedger()
+        ledger.extend_packed(data)
+        return ledger
+
+    def load(self):
+        state = {
+            "attendees": load_data(self.ATTENDEES_FILE) or [],
+            "exhibitions": load_data(self.EXHIBITIONS_FILE) or [],
+            "passes": load_data(self.PASSES_FILE) or [],
+            "sales_log": load_data(self.SALES_FILE) or {},
+            "idempotency": load_data(self.IDEMPOTENCY_FILE) or None,
+        }
+        state["sales_ledger"] = self._load_ledger(state["sales_log"])
+        return state, []
+
+    def persist(self, record, ts):
+        self._append_sales((record,))
+        self._mark_dirty(record)
+        self._flush_dirty(ts)
+
+    def log_change(self, record, ts):
+        # written out with the next persisted mutation, as before
+        self._mark_dirty(record)
+
+    def persist_batch(self, records, ts):
+        self._append_sales(records)
+        for record in records:
+            self._mark_dirty(record)
+        self._flush_dirty(ts)
+
+    def save_all(self, ts):
+        save_bytes(self.LEDGER_FILE, pack_rows(ts.sales_ledger.rows()))
+        self._dirty.update(ALL_COLLECTIONS)
+        self._flush_dirty(ts)
+
+
+class JournalBackend(PickleBackend):
+    """
+    Appends each record to storage/journal.py's log. Startup replays the
+    latest snapshot plus the log tail; the log is compacted into a new
+    snapshot every compact_every records. With no snapshot yet, the pickle
+    files seed the journal. Snapshots use storage/snapshot.py's binary
+    format (journal option snapshot_format="pickle" keeps the old one).
+    """
+
+    needs_exclusive = False
+
+    def __init__(self, **journal_options):
+        super().__init__()
+        self.journal = Journal(**journal_options)
+
+    def load(self):
+        state, records = self.journal.recover()
+        if state is None:
+            state, _ = super().load()
+        return state, records
+
+    def persist(self, record, ts):
+        self.journal.append(record)
+
+    def log_change(self, record, ts):
+        self.persist(record, ts)
+
+    def prepare_record(self, record):
+        return self.journal.encode(record)
+
+    def persist_batch(self, records, ts):
+        # one group commit for the whole transaction
+        self.journal.append_encoded(records)
+
+    def sync(self):
+        self.journal.flush(sync=True)
+
+    def maintenance_due(self):
+        return self.journal.needs_compaction()
+
+    def run_maintenance(self, ts):
+        self.save_all(ts)
+
+    def save_all(self, ts):
+        # full save == compaction: fold the log into a fresh snapshot
+        self.journal.write_snapshot({
+            "attendees": ts.attendees,
+            "exhibitions": ts.exhibitions,
+            "passes": ts.passes,
+            "sales_log": ts.sales_log,
+            "sales_ledger": ts.sales_ledger,
+            "idempotency": ts.idempotency,
+        })
+
+    def close(self):
+        self.journal.close()
+
+
+class LazyBackend(PickleBackend):
+    """
+    Exhibitions, passes and sales stay in their pickle files and load eagerly
+    (they are small). Attendees live in storage/attendee_store.py's
+    offset-indexed store and are read only when looked up, so startup does
+    not depend on the number of attendees. On first use an existing
+    attendees.pkl is imported into the store.
+
+    Workshop rosters (capacity, attendees, waitlist) changed by reservations
+    are saved one workshop per file under rosters/, so a reservation rewrites
+    one small file instead of the whole catalogue. They are applied on top of
+    exhibitions.pkl at load, and folded into it (and removed) whenever the
+    catalogue itself is saved.
+
+    Attendee ids must be unique in this mode (they key the store).
+    """
+
+    resident = False
+
+    ROSTER_DIR = "rosters"
+
+    def __init__(self, name: str = "attendees"):
+        super().__init__()
+        self.store = AttendeeStore(name)
+        self._unlisted_passes: Dict[int, Pass] = {}
+        self._dirty_rosters: Set[int] = set()
+
+    def load(self):
+        state = {
+            "attendees": [],
+            "exhibitions": load_data(self.EXHIBITIONS_FILE) or [],
+            "passes": load_data(self.PASSES_FILE) or [],
+            "sales_log": load_data(self.SALES_FILE) or {},
+            "idempotency": load_data(self.IDEMPOTENCY_FILE) or None,
+        }
+        state["sales_ledger"] = self._load_ledger(state["sales_log"])
+        self._load_rosters(state["exhibitions"])
+        if len(self.store) == 0:
+            legacy = load_data(self.ATTENDEES_FILE) or []
+            # attendees.pkl holds its own copies of catalogue passes: match them by id
+            catalogued = {p.pass_id for p in state["passes"]}
+            self.store.put_many(self._to_record(a, getattr(a.purchased_pass, "pass_id", None) in catalogued)
+                                for a in legacy)
+            self.store.flush()
+        return state, []
+
+    # records <-> attendees
+    @staticmethod
+    def _to_record(a: Attendee, catalogued: bool) -> tuple:
+        # catalogue passes are stored by id, others (unlisted, or upgraded for this holder) in full
+        p = a.purchased_pass
+        unlisted = p if p is not None and (not catalogued or p.upgrades) else None
+        return (a.attendee_id, a.name, a.email, a.phone,
+                getattr(p, "pass_id", None), unlisted, tuple(a.reservations))
+
+    @staticmethod
+    def _catalogued(a: Attendee, ts) -> bool:
+        p = a.purchased_pass
+        return p is not None and ts.find_pass_by_id(p.pass_id) is p
+
+    def _from_record(self, record, ts) -> Attendee:
+        aid, name, email, phone, pass_id, unlisted, reservations = record
+        a = Attendee(aid, name, email, phone)
+        if unlisted is not None and unlisted.upgrades:
+            # rebuilt on the shared pass it was sold as, so the holders keep sharing that
+            base = ts.find_pass_by_id(pass_id) or self._unlisted_passes.setdefault(pass_id, unlisted.original)
+            a.purchased_pass = base.upgraded(unlisted.upgrades)
+        elif unlisted is not None:
+            a.purchased_pass = self._unlisted_passes.setdefault(unlisted.pass_id, unlisted)
+        elif pass_id is not None:
+            a.purchased_pass = ts.find_pass_by_id(pass_id)
+        a.reservations = reservations
+        return a
+
+    def _write_attendees(self, records, ts) -> None:
+        touched = {}
+        for record in records:
+            if record[0] == "register":
+                touched[record[1].attendee_id] = record[1]
+            elif record[0] in ("purchase", "upgrade", "reserve", "cancel", "promote", "profile"):
+                touched[record[1]] = None
+        if touched:
+            attendees = [a if a is not None else ts.find_attendee_by_id(aid) for aid, a in touched.items()]
+            self.store.put_many(self._to_record(a, self._catalogued(a, ts)) for a in attendees)
+
+    # per-workshop rosters
+    def _roster_file(self, workshop_id: int) -> str:
+        return os.path.join(self.ROSTER_DIR, f"{workshop_id}.pkl")
+
+    def _roster_files(self) -> List[str]:
+        try:
+            names = os.listdir(_fullpath(self.ROSTER_DIR))
+        except FileNotFoundError:
+            return []
+        return [name for name in names if name.endswith(".pkl")]
+
+    def _load_rosters(self, exhibitions) -> None:
+        workshops = {}
+        for ex in exhibitions:
+            for w in ex.workshops:
+                workshops.setdefault(w.workshop_id, w)  # the one TicketSystem indexes
+        for name in self._roster_files():
+            w = workshops.get(int(name[:-len(".pkl")]))
+            if w is not None:
+                w.capacity, w.attendees, w.waitlist = load_data(os.path.join(self.ROSTER_DIR, name))
+
+    def _mark_dirty(self, record) -> None:
+        position = ROSTER_RECORDS.get(record[0])
+        if position is None:
+            super()._mark_dirty(record)
+        else:
+            # the attendee side of the record goes to the store
+            self._dirty_rosters.add(record[position])
+
+    def _flush_dirty(self, ts) -> None:
+        self._dirty.discard("attendees")  # written to the store instead
+        # rosters first: if the catalogue save below is interrupted they are still current
+        for workshop_id in self._dirty_rosters:
+            w = ts.find_workshop_by_id(workshop_id)
+            if w is not None:
+                save_data(self._roster_file(workshop_id), (w.capacity, w.attendees, w.waitlist))
+        self._dirty_rosters.clear()
+        catalogue_saved = "exhibitions" in self._dirty
+        super()._flush_dirty(ts)
+        if catalogue_saved:
+            # exhibitions.pkl now holds every roster
+            for name in self._roster_files():
+                os.remove(_fullpath(os.path.join(self.ROSTER_DIR, name)))
+
+    def persist(self, record, ts):
+        self._write_attendees((record,), ts)
+        super().persist(record, ts)
+
+    def log_change(self, record, ts):
+        self.persist(record, ts)
+
+    def persist_batch(self, records, ts):
+        self._write_attendees(records, ts)
+        super().persist_batch(records, ts)
+
+    def save_all(self, ts):
+        # attendees not in memory are already in the store
+        self.store.put_many(self._to_record(a, self._catalogued(a, ts)) for a in ts.attendees)
+        super().save_all(ts)
+
+    def maintenance_due(self):
+        return self.store.needs_compaction()
+
+    def run_maintenance(self, ts):
+        self.store.compact()
+
+    def close(self):
+        self.store.close()
+
+    # attendee lookups
+    def fetch_attendee_by_email(self, email_key, ts):
+        record = self.store.get_by_email(email_key)
+        return self._from_record(record, ts) if record is not None else None
+
+    def fetch_attendee_by_id(self, aid, ts):
+        record = self.store.get_by_id(aid)
+        return self._from_record(record, ts) if record is not None else None
+
+    def iter_attendees(self, ts):
+        for record in self.store.iter_records():
+            loaded = ts._attendees_by_id.get(record[0])
+            yield loaded if loaded is not None else self._from_record(record, ts)
+
+    def attendee_count(self, ts):
+        # registrations in a transaction that has not been flushed yet are not counted
+        return len(self.store)
+
+    def max_attendee_id(self, ts):
+        return max(self.store.max_id(), super().max_attendee_id(ts))
+
+
+class MemoryBackend(StorageBackend):
+    """
+    Keeps nothing on disk. Starts empty (TicketSystem then creates the sample
+    data); used by benchmarks and throw-away systems.
+    """
+
+    def load(self):
+        return {"attendees": [], "exhibitions": [], "passes": [], "sales_log": {},
+                "sales_ledger": SalesLedger()}, []
+
+    def persist(self, record, ts):
+        pass
+
+    def save_all(self, ts):
+        pass
+
+
+def make_backend(mode: str, options: Optional[dict] = None) -> StorageBackend:
+    """Build the backend for a TicketSystem storage_mode name."""
+    options = options or {}
+    if mode == "memory":
+        return MemoryBackend(**options)
+    if mode == "pickle":
+        return PickleBackend(**options)
+    if mode == "journal":
+        return JournalBackend(**options)
+    if mode == "lazy":
+        return LazyBackend(**options)
+    if mode == "sqlite":
+        from storage.sqlite_backend import SQLiteBackend
+        return SQLiteBackend(**options)
+    raise ValueError(f"Unknown storage mode: {mode}")
@@ -1,7 +1,10 @@
 # storage/data_manager.py
 import pickle
 import os
-from typing import Any
+import time
+from typing import Any, Optional
+
+from models.metrics import METRICS
 
 # Save data files inside project_root/storage/data/
 ROOT_DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "storage", "data")
@@ -10,22 +13,82 @@ os.makedirs(ROOT_DATA_DIR, exist_ok=True)
 def _fullpath(filename: str) -> str:
     return os.path.join(ROOT_DATA_DIR, filename)
 
-def save_data(filename: str, data: Any) -> None:
-    """Serialize data to filename (binary)."""
+def save_data(filename: str, data: Any, fsync: bool = False) -> None:
+    """
+    Serialize data to filename (binary).
+    The file is written to a temporary sibling first and renamed into place,
+    so a crash mid-write never leaves a truncated pickle behind.
+    """
+    start = time.perf_counter()
     full = _fullpath(filename)
     # ensure directory exists
     os.makedirs(os.path.dirname(full), exist_ok=True)
-    with open(full, "wb") as f:
+    tmp = full + ".tmp"
+    with open(tmp, "wb") as f:
         pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+        if fsync:
+            f.flush()
+            os.fsync(f.fileno())
+        size = f.tell()
+    os.replace(tmp, full)
+    METRICS.record_io("write", filename, size, time.perf_counter() - start)
+
+def save_bytes(filename: str, data: bytes) -> None:
+    """Replace filename with raw bytes (atomically, like save_data)."""
+    start = time.perf_counter()
+    full = _fullpath(filename)
+    os.makedirs(os.path.dirname(full), exist_ok=True)
+    tmp = full + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, full)
+    METRICS.record_io("write", filename, len(data), time.perf_counter() - start)
+
+def append_bytes(filename: str, data: bytes) -> None:
+    """Append raw bytes to filename, creating it if needed."""
+    start = time.perf_counter()
+    full = _fullpath(filename)
+    os.makedirs(os.path.dirname(full), exist_ok=True)
+    with open(full, "ab") as f:
+        f.write(data)
+    METRICS.record_io("write", filename, len(data), time.perf_counter() - start)
+
+def sync_file(filename: str) -> None:
+    """fsync filename, making what was appended to it so far durable."""
+    try:
+        fd = os.open(_fullpath(filename), os.O_RDONLY)
+    except FileNotFoundError:
+        return
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+def load_bytes(filename: str) -> Optional[bytes]:
+    """Raw contents of filename, or None if it does not exist."""
+    start = time.perf_counter()
+    try:
+        with open(_fullpath(filename), "rb") as f:
+            data = f.read()
+    except FileNotFoundError:
+        return None
+    METRICS.record_io("read", filename, len(data), time.perf_counter() - start)
+    return data
 
 def load_data(filename: str) -> Any:
-    """Load and return object from filename. Returns default empty list if not present."""
+    """
+    Load and return object from filename. Returns default empty list if not present.
+    A file that cannot be unpickled raises ValueError: loading it as empty
+    would silently drop its data at the next save.
+    """
+    start = time.perf_counter()
     full = _fullpath(filename)
     try:
         with open(full, "rb") as f:
-            return pickle.load(f)
+            data = pickle.load(f)
+            METRICS.record_io("read", filename, f.tell(), time.perf_counter() - start)
+            return data
     except FileNotFoundError:
         return []
-    except Exception:
-        # If the file is corrupted or can't be unpickled, return empty list to avoid crash.
-        return []
+    except Exception as e:
+        raise ValueError(f"Cannot load {filename}: {e}") from e
@@ -0,0 +1,236 @@
+# storage/journal.py
+import atexit
+import os
+import pickle
+import struct
+import threading
+import time
+import zlib
+from typing import Any, List, Optional, Tuple
+
+from storage.data_manager import _fullpath, save_data, load_data
+from storage.snapshot import save_snapshot, load_snapshot
+from models.metrics import METRICS
+
+# Frame header: payload length, crc32 of payload, sequence number
+_HEADER = struct.Struct("<IIQ")
+
+FSYNC_ALWAYS = "always"   # fsync after every record
+FSYNC_GROUP = "group"     # group commit: fsync every N records, or T seconds after the first unsynced one
+FSYNC_NEVER = "never"     # hand records to the OS, never fsync
+
+SNAPSHOT_BINARY = "binary"  # storage/snapshot.py's columnar format
+SNAPSHOT_PICKLE = "pickle"  # a pickle of the live objects (the format before binary snapshots)
+
+
+class Journal:
+    """
+    Append-only write-ahead log of mutation records plus a compacted snapshot.
+
+    Each record is framed as <length, crc32, seq> + pickled payload so a torn
+    write at the tail is detected on recovery and discarded. The snapshot is
+    written atomically and remembers the last sequence number it contains, so
+    records already folded into it are skipped on replay.
+
+    Snapshots are written in snapshot_format: storage/snapshot.py's binary
+    format (encoded and decoded on snapshot_workers threads) or a pickle.
+    Recovery reads either, so switching formats takes effect at the next
+    compaction, which also removes the snapshot in the other format.
+    """
+
+    def __init__(self, name: str = "journal", fsync: str = FSYNC_GROUP,
+                 group_size: int = 64, group_interval: float = 0.05,
+                 compact_every: int = 10_000, snapshot_format: str = SNAPSHOT_BINARY,
+                 snapshot_workers: Optional[int] = None):
+        if fsync not in (FSYNC_ALWAYS, FSYNC_GROUP, FSYNC_NEVER):
+            raise ValueError(f"Unknown fsync policy: {fsync}")
+        if snapshot_format not in (SNAPSHOT_BINARY, SNAPSHOT_PICKLE):
+            raise ValueError(f"Unknown snapshot format: {snapshot_format}")
+        self.log_file = name + ".log"
+        files = {SNAPSHOT_BINARY: name + ".snapshot.bin", SNAPSHOT_PICKLE: name + ".snapshot.pkl"}
+        self.snapshot_format = snapshot_format
+        self.snapshot_file = files[snapshot_format]
+        # (format, file), the configured format first: after a switch both files may briefly exist
+        self._snapshot_files = sorted(files.items(), key=lambda item: item[0] != snapshot_format)
+        self.snapshot_workers = snapshot_workers
+        self.fsync = fsync
+        self.group_size = group_size
+        self.group_interval = group_interval
+        self.compact_every = compact_every
+
+        self._seq = 0
+        self._records_since_snapshot = 0
+        self._unsynced = 0  # records written to the log since its last fsync
+        self._last_sync = time.monotonic()
+        self._syncer: Optional[threading.Thread] = None
+        self._fh = None
+        self._lock = threading.RLock()
+        atexit.register(self.close)
+
+    # -------------------------
+    # Recovery
+    # -------------------------
+    def recover(self) -> Tuple[Optional[Any], List[tuple]]:
+        """
+        Return (snapshot_state, records) where records are the log entries
+        newer than the snapshot. snapshot_state is None if no snapshot exists.
+        A corrupt or torn tail is truncated so new appends start cleanly.
+        """
+        state, snap_seq = self._load_snapshot()
+
+        records = []
+        path = _fullpath(self.log_file)
+        good_offset = 0
+        last_seq = snap_seq
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                data = f.read()
+            offset = 0
+            while offset + _HEADER.size <= len(data):
+                length, crc, seq = _HEADER.unpack_from(data, offset)
+                start = offset + _HEADER.size
+                payload = data[start:start + length]
+                if len(payload) < length or zlib.crc32(payload) != crc:
+                    break
+                offset = start + length
+                good_offset = offset
+                if seq <= snap_seq:
+                    continue  # already folded into the snapshot
+                records.append(pickle.loads(payload))
+                last_seq = seq
+            if good_offset < len(data):
+                with open(path, "r+b") as f:
+                    f.truncate(good_offset)
+
+        self._seq = last_seq
+        self._records_since_snapshot = len(records)
+        return state, records
+
+    def _load_snapshot(self) -> Tuple[Optional[Any], int]:
+        for snapshot_format, filename in self._snapshot_files:
+            if snapshot_format == SNAPSHOT_BINARY:
+                loaded = load_snapshot(filename, self.snapshot_workers)
+                if loaded is not None:
+                    return loaded
+            else:
+                snapshot = load_data(filename) or None
+                if snapshot:
+                    return snapshot["state"], snapshot["seq"]
+        return None, 0
+
+    # -------------------------
+    # Appending
+    # -------------------------
+    def _open(self):
+        if self._fh is None:
+            path = _fullpath(self.log_file)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            self._fh = open(path, "ab")
+        return self._fh
+
+    def append(self, record: tuple) -> None:
+        """Append one record; durability follows the configured fsync policy."""
+        self.append_many((record,))
+
+    @staticmethod
+    def encode(record: tuple) -> bytes:
+        return pickle.dumps(record, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def append_many(self, records) -> None:
+        """Append several records with a single durability decision (one fsync at most)."""
+        self.append_encoded([self.encode(record) for record in records])
+
+    def append_encoded(self, payloads) -> None:
+        """
+        Like append_many, for records already passed through encode().
+        The records are written to the log (handed to the OS) before this
+        returns, so they survive the process dying; the fsync policy only
+        decides when they also survive the machine going down.
+        """
+        with self._lock:
+            frames = []
+            for payload in payloads:
+                self._seq += 1
+                self._records_since_snapshot += 1
+                frames.append(_HEADER.pack(len(payload), zlib.crc32(payload), self._seq) + payload)
+            if not frames:
+                return
+            start = time.perf_counter()
+            data = b"".join(frames)
+            fh = self._open()
+            fh.write(data)
+            fh.flush()
+            METRICS.record_io("write", self.log_file, len(data), time.perf_counter() - start)
+            if not self._unsynced:
+                self._last_sync = time.monotonic()  # the group's interval starts with its first record
+            self._unsynced += len(frames)
+
+            if self.fsync == FSYNC_ALWAYS:
+                self.flush(sync=True)
+            elif self.fsync == FSYNC_GROUP:
+                if (self._unsynced >= self.group_size
+                        or time.monotonic() - self._last_sync >= self.group_interval):
+                    self.flush(sync=True)
+                elif self._syncer is None:
+                    self._syncer = threading.Thread(target=self._sync_loop, name="journal-sync", daemon=True)
+                    self._syncer.start()
+
+    def _sync_loop(self) -> None:
+        # fsyncs a group that no later append completes, group_interval after its first record
+        while True:
+            with self._lock:
+                if not self._unsynced:
+                    self._syncer = None
+                    return
+                wait = self._last_sync + self.group_interval - time.monotonic()
+                if wait <= 0:
+                    self.flush(sync=True)
+                    continue
+            time.sleep(wait)
+
+    def flush(self, sync: bool = True) -> None:
+        """
+        Make the records appended so far durable. Records are already in the
+        log when append returns, so only sync=True (fsync) does anything.
+        """
+        with self._lock:
+            if sync and self._unsynced and self._fh is not None:
+                with METRICS.timer("journal.fsync"):
+                    os.fsync(self._fh.fileno())
+                self._unsynced = 0
+            self._last_sync = time.monotonic()
+
+    def needs_compaction(self) -> bool:
+        return self.compact_every > 0 and self._records_since_snapshot >= self.compact_every
+
+    # -------------------------
+    # Snapshot / compaction
+    # -------------------------
+    def write_snapshot(self, state: Any) -> None:
+        """
+        Fold everything up to the current sequence number into a new snapshot
+        and truncate the log. Safe to crash at any point: the old snapshot
+        stays valid until the rename, and stale log records are skipped by seq.
+        """
+        with self._lock:
+            self.flush(sync=True)
+            if self.snapshot_format == SNAPSHOT_BINARY:
+                save_snapshot(self.snapshot_file, state, self._seq, self.snapshot_workers, fsync=True)
+            else:
+                save_data(self.snapshot_file, {"seq": self._seq, "state": state}, fsync=True)
+            for _, filename in self._snapshot_files[1:]:
+                if os.path.exists(_fullpath(filename)):
+                    os.remove(_fullpath(filename))
+            fh = self._open()
+            fh.truncate(0)
+            fh.flush()
+            os.fsync(fh.fileno())
+            self._records_since_snapshot = 0
+
+    def close(self) -> None:
+        with self._lock:
+            if self._unsynced:
+                self.flush(sync=self.fsync != FSYNC_NEVER)
+            if self._fh is not None:
+                self._fh.close()
+                self._fh = None
@@ -0,0 +1,48 @@
+# storage/migrate_to_sqlite.py
+"""
+Import the existing pickle files from storage/data/ into the SQLite backend.
+Run: python -m storage.migrate_to_sqlite [--db greenwave.db] [--force]
+"""
+import argparse
+import os
+import sqlite3
+import sys
+
+from storage.backend import PickleBackend
+from storage.sqlite_backend import SQLiteBackend
+
+
+def migrate(db_path: str = "greenwave.db", force: bool = False) -> dict:
+    """Copy attendees, passes, exhibitions, reservations and sales into db_path."""
+    target = SQLiteBackend(db_path)
+    try:
+        if not target.is_empty():
+            if not force:
+                raise ValueError(f"{target.path} already contains data (use --force to replace it).")
+            target.close()
+            os.remove(target.path)
+            target = SQLiteBackend(db_path)
+        state, _ = PickleBackend().load()
+        return target.import_state(state)
+    finally:
+        target.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Migrate pickle data files into SQLite.")
+    parser.add_argument("--db", default="greenwave.db", help="database file (relative to storage/data/)")
+    parser.add_argument("--force", action="store_true", help="replace an existing database")
+    args = parser.parse_args(argv)
+
+    try:
+        counts = migrate(args.db, args.force)
+    except (ValueError, sqlite3.IntegrityError) as e:
+        print("Migration failed:", e, file=sys.stderr)
+        return 1
+    for name, count in counts.items():
+        print(f"{name:>13}: {count}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
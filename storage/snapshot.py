@@ -0,0 +1,474 @@
+# storage/snapshot.py
+"""
+Versioned binary snapshot of a TicketSystem's state: the dict that
+StorageBackend.load() returns (attendees, exhibitions, passes, sales_log,
+sales_ledger, idempotency).
+
+Unlike a pickle of the live objects, the file holds flat columns, so it does
+not depend on the classes' layouts in models/ and loads without running
+their __setstate__ for every object.
+
+File layout (little-endian):
+- header: magic, format version, number of sections, journal sequence
+  number, then the crc32 of the header and the section table;
+- section table: name, offset, length and crc32 of every section;
+- sections: runs of length-prefixed blocks. A block is a typed column
+  (struct-packed fixed-size values: ids, prices, capacities), a string
+  column (the lengths, then the NUL-joined UTF-8 text: names, emails,
+  titles) or an opaque blob.
+
+Sections are encoded, checksummed and decoded independently on a thread
+pool, and attendees are split into sections of ATTENDEES_PER_SECTION, so
+large files spread over several workers. Reads go through mmap. Writes go
+to a temporary file that is renamed into place, so a crash never leaves a
+half-written snapshot behind.
+
+A file with a newer format version, a bad magic or a failed checksum raises
+SnapshotError instead of loading as empty.
+
+Run: python -m storage.snapshot FILE   (prints the header and sections, verifying checksums)
+"""
+import argparse
+import array
+import concurrent.futures
+import datetime
+import itertools
+import mmap
+import os
+import pickle
+import struct
+import sys
+import time
+import zlib
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from storage.data_manager import _fullpath
+from models.attendee import Attendee
+from models.exhibition import Exhibition
+from models.workshop import Workshop
+from models.passes import Pass, ExhibitionPass, AllAccessPass
+from models.sales_ledger import SalesLedger, COLUMNS
+from models.metrics import METRICS
+
+MAGIC = b"GWSNAPSH"
+VERSION = 1  # bump when a section's layout changes; readers refuse newer versions
+
+_HEADER = struct.Struct("<8sHHq")   # magic, version, section count, journal seq
+_CRC = struct.Struct("<I")          # crc32 of the header and the section table
+_ENTRY = struct.Struct("<16sQQI")   # section name, offset, length, crc32
+_BLOCK = struct.Struct("<Q")        # block length
+
+ATTENDEES_PER_SECTION = 100_000
+NO_PASS = -1  # pass index of an attendee without a pass
+
+# array columns are written little-endian whatever the machine's byte order
+_SWAP = sys.byteorder != "little"
+
+_PASS_KINDS = {cls.__name__: cls for cls in (Pass, ExhibitionPass, AllAccessPass)}
+
+
+class SnapshotError(ValueError):
+    """Not a snapshot, written by a newer version, or damaged."""
+
+
+# -------------------------
+# Blocks
+# -------------------------
+class _Writer:
+    """Collects a section's blocks."""
+
+    def __init__(self):
+        self._parts: List[bytes] = []
+
+    def blob(self, data: bytes) -> None:
+        self._parts += (_BLOCK.pack(len(data)), data)
+
+    def column(self, values, code: str) -> None:
+        col = array.array(code, values)
+        if _SWAP:
+            col.byteswap()
+        self.blob(col.tobytes())
+
+    def packed(self, data: bytes, code: str) -> None:
+        """A column already in array.tobytes() form (native byte order)."""
+        if _SWAP:
+            self.column(array.array(code, data), code)
+        else:
+            self.blob(data)
+
+    def strings(self, values: Sequence[str]) -> None:
+        self.column(map(len, values), "I")
+        self.blob("\0".join(values).encode("utf-8", "surrogatepass"))
+
+    def ragged(self, groups, code: str = "q") -> None:
+        """A list of int sequences: their lengths, then all values in one column."""
+        groups = list(groups)
+        self.column(map(len, groups), "I")
+        self.column(itertools.chain.from_iterable(groups), code)
+
+    def getvalue(self) -> bytes:
+        return b"".join(self._parts)
+
+
+class _Reader:
+    """Reads a section's blocks back in the order they were written."""
+
+    def __init__(self, view: memoryview):
+        self._view = view
+        self._pos = 0
+
+    def blob(self) -> memoryview:
+        (length,) = _BLOCK.unpack_from(self._view, self._pos)
+        start = self._pos + _BLOCK.size
+        self._pos = start + length
+        if self._pos > len(self._view):
+            raise SnapshotError("Snapshot section is truncated.")
+        return self._view[start:self._pos]
+
+    def column(self, code: str) -> array.array:
+        col = array.array(code)
+        col.frombytes(self.blob())
+        if _SWAP:
+            col.byteswap()
+        return col
+
+    def packed(self, code: str) -> bytes:
+        return self.column(code).tobytes() if _SWAP else bytes(self.blob())
+
+    def strings(self) -> List[str]:
+        lengths = self.column("I")
+        text = str(self.blob(), "utf-8", "surrogatepass")
+        if not lengths:
+            return []
+        if text.count("\0") == len(lengths) - 1:
+            return text.split("\0")  # no string contains a NUL itself
+        out, pos = [], 0
+        for length in lengths:
+            out.append(text[pos:pos + length])
+            pos += length + 1
+        return out
+
+    def ragged(self, code: str = "q") -> List[tuple]:
+        ends = list(itertools.accumulate(self.column("I")))
+        flat = self.column(code).tolist()
+        return list(map(tuple, map(flat.__getitem__, map(slice, [0] + ends[:-1], ends))))
+
+
+def _format_time(moment: Optional[datetime.datetime]) -> str:
+    return "" if moment is None else moment.isoformat()
+
+
+def _parse_time(text: str) -> Optional[datetime.datetime]:
+    return datetime.datetime.fromisoformat(text) if text else None
+
+
+# -------------------------
+# Sections
+# -------------------------
+def _write_passes(out: _Writer, passes: List[Tuple[Pass, bool]]) -> None:
+    # catalogue passes (listed) and the unlisted passes attendees hold, as sold
+    out.strings([type(p).__name__ for p, _ in passes])
+    out.column([p.pass_id for p, _ in passes], "q")
+    out.column([p.price for p, _ in passes], "d")
+    out.column([listed for _, listed in passes], "b")
+    out.ragged([sorted(p.exhibitions_access) for p, _ in passes])
+    out.column([len(p.features) for p, _ in passes], "I")
+    out.strings([feature for p, _ in passes for feature in p.features])
+
+
+def _read_passes(r: _Reader) -> List[Tuple[Pass, bool]]:
+    kinds, ids, prices, listed = r.strings(), r.column("q"), r.column("d"), r.column("b")
+    access, counts, features = r.ragged(), r.column("I"), r.strings()
+    out, pos = [], 0
+    for kind, pid, price, is_listed, exhibitions, count in zip(kinds, ids, prices, listed, access, counts):
+        cls = _PASS_KINDS.get(kind, Pass)
+        p = cls.__new__(cls)
+        Pass.__init__(p, pid, price, exhibitions, features[pos:pos + count])
+        pos += count
+        out.append((p, bool(is_listed)))
+    return out
+
+
+def _write_attendees(out: _Writer, attendees: Sequence[Attendee], pass_index: Dict[int, int]) -> None:
+    out.column([a.attendee_id for a in attendees], "q")
+    out.strings([a.name for a in attendees])
+    out.strings([a.email for a in attendees])
+    out.strings([a.phone for a in attendees])
+    held, upgrades = array.array("i"), []
+    for a in attendees:
+        p = a.purchased_pass
+        held.append(NO_PASS if p is None else pass_index[id(p.original)])
+        upgrades.append(sorted(p.upgrades) if p is not None and p.upgrades else ())
+    out.column(held, "i")
+    out.ragged(upgrades)
+    out.ragged([a.reservations for a in attendees])
+
+
+def _read_attendees(r: _Reader, passes: List[Tuple[Pass, bool]]) -> List[Attendee]:
+    ids, names, emails, phones = r.column("q"), r.strings(), r.strings(), r.strings()
+    held, upgrades, reservations = r.column("i"), r.ragged(), r.ragged()
+    out = []
+    for aid, name, email, phone, index, added, reserved in zip(ids, names, emails, phones, held, upgrades,
+                                                               reservations):
+        a = Attendee(aid, name, email, phone)
+        if index != NO_PASS:
+            p = passes[index][0]
+            a.purchased_pass = p.upgraded(added) if added else p
+        a.reservations = reserved
+        out.append(a)
+    return out
+
+
+def _write_exhibitions(out: _Writer, exhibitions: List[Exhibition]) -> None:
+    out.column([ex.exhibition_id for ex in exhibitions], "q")
+    out.strings([ex.name for ex in exhibitions])
+    out.strings([ex.description for ex in exhibitions])
+    workshops = [(i, w) for i, ex in enumerate(exhibitions) for w in ex.workshops]
+    out.column([i for i, _ in workshops], "I")
+    out.column([w.workshop_id for _, w in workshops], "q")
+    out.strings([w.title for _, w in workshops])
+    out.column([w.capacity for _, w in workshops], "q")
+    out.strings([_format_time(w.start) for _, w in workshops])
+    out.strings([_format_time(w.end) for _, w in workshops])
+    out.strings([w.room or "" for _, w in workshops])
+    out.ragged([sorted(w.attendees) for _, w in workshops])
+    waiting = [(w.waitlist, w.waitlist.waiting()) for _, w in workshops]
+    out.ragged([ids for _, ids in waiting])
+    out.ragged([[waitlist.entry(aid)[0] for aid in ids] for waitlist, ids in waiting])
+    out.ragged([[waitlist.entry(aid)[1] for aid in ids] for waitlist, ids in waiting])
+
+
+def _read_exhibitions(r: _Reader) -> List[Exhibition]:
+    exhibitions = [Exhibition(eid, name, description)
+                   for eid, name, description in zip(r.column("q"), r.strings(), r.strings())]
+    parents, ids, titles, capacities = r.column("I"), r.column("q"), r.strings(), r.column("q")
+    starts, ends, rooms, rosters = r.strings(), r.strings(), r.strings(), r.ragged()
+    waiting, priorities, seqs = r.ragged(), r.ragged(), r.ragged()
+    for i, wid, title, capacity, start, end, room, roster, queued, priority, seq in zip(
+            parents, ids, titles, capacities, starts, ends, rooms, rosters, waiting, priorities, seqs):
+        w = Workshop(wid, title, capacity, _parse_time(start), _parse_time(end), room)
+        w.attendees = set(roster)
+        for entry in zip(queued, priority, seq):
+            w.waitlist.restore(*entry)
+        exhibitions[i].workshops.append(w)
+    return exhibitions
+
+
+def _write_sales_log(out: _Writer, sales_log: Dict[str, int]) -> None:
+    out.strings(list(sales_log))
+    out.column(sales_log.values(), "q")
+
+
+def _read_sales_log(r: _Reader) -> Dict[str, int]:
+    return dict(zip(r.strings(), r.column("q")))
+
+
+def _write_ledger(out: _Writer, ledger: SalesLedger) -> None:
+    columns = ledger.__getstate__()
+    for name, code in COLUMNS:
+        out.packed(columns[name], code)
+
+
+def _read_ledger(r: _Reader) -> SalesLedger:
+    ledger = SalesLedger()
+    ledger.__setstate__({name: r.packed(code) for name, code in COLUMNS})
+    return ledger
+
+
+def _write_idempotency(out: _Writer, cache) -> None:
+    # stored results are whatever the operations returned, so this section stays a pickle
+    out.blob(pickle.dumps(cache, protocol=pickle.HIGHEST_PROTOCOL))
+
+
+def _read_idempotency(r: _Reader):
+    return pickle.loads(r.blob())
+
+
+# -------------------------
+# Encoding / decoding
+# -------------------------
+def _pool_map(workers: Optional[int], fn: Callable, items: list) -> list:
+    workers = min(workers or os.cpu_count() or 1, len(items))
+    if workers <= 1:
+        return [fn(item) for item in items]
+    with concurrent.futures.ThreadPoolExecutor(workers) as pool:
+        return list(pool.map(fn, items))
+
+
+def _section(write: Callable, *args) -> bytes:
+    out = _Writer()
+    write(out, *args)
+    return out.getvalue()
+
+
+def encode(state: Dict[str, Any], workers: Optional[int] = None) -> List[Tuple[str, bytes]]:
+    """The (name, data) sections of a state dict, encoded on up to workers threads."""
+    attendees = state.get("attendees") or []
+    passes = [(p, True) for p in state.get("passes") or []]
+    pass_index = {id(p): i for i, (p, _) in enumerate(passes)}
+    for a in attendees:
+        p = a.purchased_pass
+        if p is not None and id(p.original) not in pass_index:
+            pass_index[id(p.original)] = len(passes)
+            passes.append((p.original, False))
+
+    jobs = [("passes", _write_passes, passes),
+            ("exhibitions", _write_exhibitions, state.get("exhibitions") or []),
+            ("sales_log", _write_sales_log, state.get("sales_log") or {})]
+    if state.get("sales_ledger") is not None:
+        jobs.append(("sales_ledger", _write_ledger, state["sales_ledger"]))
+    if state.get("idempotency") is not None:
+        jobs.append(("idempotency", _write_idempotency, state["idempotency"]))
+    for start in range(0, len(attendees), ATTENDEES_PER_SECTION):
+        jobs.append(("attendees", _write_attendees, attendees[start:start + ATTENDEES_PER_SECTION], pass_index))
+    data = _pool_map(workers, lambda job: _section(*job[1:]), jobs)
+    return [(job[0], section) for job, section in zip(jobs, data)]
+
+
+_READERS = {
+    "exhibitions": _read_exhibitions,
+    "sales_log": _read_sales_log,
+    "sales_ledger": _read_ledger,
+    "idempotency": _read_idempotency,
+}
+
+
+def _sections(view: memoryview, source: str) -> Tuple[int, List[Tuple[str, memoryview, int]]]:
+    """(seq, [(name, data, crc32)]) from a snapshot's header and section table."""
+    if len(view) < _HEADER.size + _CRC.size:
+        raise SnapshotError(f"{source} is too short to be a snapshot.")
+    magic, version, count, seq = _HEADER.unpack_from(view, 0)
+    if magic != MAGIC:
+        raise SnapshotError(f"{source} is not a snapshot.")
+    if version > VERSION:
+        raise SnapshotError(f"{source} has snapshot format {version}; this version reads up to {VERSION}.")
+    (crc,) = _CRC.unpack_from(view, _HEADER.size)
+    table = _HEADER.size + _CRC.size
+    end = table + count * _ENTRY.size
+    if end > len(view) or zlib.crc32(view[table:end], zlib.crc32(view[:_HEADER.size])) != crc:
+        raise SnapshotError(f"{source} has a damaged header.")
+    sections = []
+    for i in range(count):
+        name, offset, length, section_crc = _ENTRY.unpack_from(view, table + i * _ENTRY.size)
+        if offset + length > len(view):
+            raise SnapshotError(f"{source} is truncated.")
+        sections.append((name.rstrip(b"\0").decode("ascii"), view[offset:offset + length], section_crc))
+    return seq, sections
+
+
+def _checked(section: Tuple[str, memoryview, int], source: str) -> _Reader:
+    name, data, crc = section
+    if zlib.crc32(data) != crc:
+        raise SnapshotError(f"{source}: section {name} fails its checksum.")
+    return _Reader(data)
+
+
+def decode(view: memoryview, workers: Optional[int] = None, source: str = "snapshot") -> Tuple[Dict[str, Any], int]:
+    """(state, seq) from a snapshot's bytes; sections are checked and decoded on up to workers threads."""
+    seq, sections = _sections(view, source)
+    # attendees refer to passes by their position, so the (small) pass table comes first
+    passes = []
+    for section in sections:
+        if section[0] == "passes":
+            passes = _read_passes(_checked(section, source))
+
+    def run(section):
+        reader = _checked(section, source)
+        if section[0] == "attendees":
+            return _read_attendees(reader, passes)
+        return _READERS[section[0]](reader)
+
+    wanted = [section for section in sections if section[0] == "attendees" or section[0] in _READERS]
+    state: Dict[str, Any] = {"attendees": [], "exhibitions": [], "sales_log": {},
+                             "passes": [p for p, listed in passes if listed]}
+    for section, value in zip(wanted, _pool_map(workers, run, wanted)):
+        if section[0] == "attendees":
+            state["attendees"] += value
+        else:
+            state[section[0]] = value
+    return state, seq
+
+
+# -------------------------
+# Files
+# -------------------------
+def save_snapshot(filename: str, state: Dict[str, Any], seq: int = 0, workers: Optional[int] = None,
+                  fsync: bool = False) -> int:
+    """
+    Write state to filename (in the data directory) and return its size.
+    The file is written to a temporary sibling and renamed into place.
+    """
+    start = time.perf_counter()
+    sections = encode(state, workers)
+    crcs = _pool_map(workers, zlib.crc32, [data for _, data in sections])
+    offset = _HEADER.size + _CRC.size + len(sections) * _ENTRY.size
+    entries = []
+    for (name, data), crc in zip(sections, crcs):
+        entries.append(_ENTRY.pack(name.encode("ascii"), offset, len(data), crc))
+        offset += len(data)
+    header = _HEADER.pack(MAGIC, VERSION, len(sections), seq)
+    table = b"".join(entries)
+
+    full = _fullpath(filename)
+    os.makedirs(os.path.dirname(full), exist_ok=True)
+    tmp = full + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(header)
+        f.write(_CRC.pack(zlib.crc32(table, zlib.crc32(header))))
+        f.write(table)
+        for _, data in sections:
+            f.write(data)
+        if fsync:
+            f.flush()
+            os.fsync(f.fileno())
+        size = f.tell()
+    os.replace(tmp, full)
+    METRICS.record_io("write", filename, size, time.perf_counter() - start)
+    return size
+
+
+def load_snapshot(filename: str, workers: Optional[int] = None) -> Optional[Tuple[Dict[str, Any], int]]:
+    """(state, seq) from filename (memory-mapped), or None if it does not exist."""
+    start = time.perf_counter()
+    try:
+        f = open(_fullpath(filename), "rb")
+    except FileNotFoundError:
+        return None
+    with f:
+        size = os.fstat(f.fileno()).st_size
+        if not size:
+            raise SnapshotError(f"{filename} is empty.")
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            loaded = decode(memoryview(mm), workers, filename)
+        finally:
+            try:
+                mm.close()
+            except BufferError:
+                pass  # a traceback still holds a view of it; closed when collected
+    METRICS.record_io("read", filename, size, time.perf_counter() - start)
+    return loaded
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Show and verify a binary snapshot.")
+    parser.add_argument("file", help="path of the snapshot")
+    args = parser.parse_args(argv)
+    with open(args.file, "rb") as f:
+        data = f.read()
+    try:
+        seq, sections = _sections(memoryview(data), args.file)
+    except SnapshotError as e:
+        print(e, file=sys.stderr)
+        return 1
+    print(f"format {_HEADER.unpack_from(data)[1]}, seq {seq}, {len(data)} bytes")
+    damaged = 0
+    for name, section, crc in sections:
+        ok = zlib.crc32(section) == crc
+        damaged += not ok
+        print(f"{name:<14} {len(section):>12} bytes  {'ok' if ok else 'BAD CHECKSUM'}")
+    return 1 if damaged else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,532 @@
+# storage/sqlite_backend.py
+import datetime
+import json
+import pickle
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterator, List, Optional
+
+from storage.backend import StorageBackend, sale_events
+from storage.data_manager import _fullpath
+from models.attendee import Attendee
+from models.exhibition import Exhibition
+from models.workshop import Workshop
+from models.passes import Pass, ExhibitionPass, AllAccessPass
+from models.idempotency import IdempotencyCache
+from models.sales_ledger import (SalesLedger, COLUMNS, PASS_CLASSES, SALE, UNKNOWN,
+                                 day_start, event_rows)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS exhibitions (
+    exhibition_id INTEGER PRIMARY KEY,
+    name          TEXT NOT NULL,
+    description   TEXT NOT NULL DEFAULT ''
+);
+CREATE TABLE IF NOT EXISTS workshops (
+    workshop_id   INTEGER PRIMARY KEY,
+    exhibition_id INTEGER NOT NULL REFERENCES exhibitions(exhibition_id),
+    title         TEXT NOT NULL,
+    capacity      INTEGER NOT NULL,
+    starts_at     TEXT,  -- ISO 8601; NULL for workshops without a time slot
+    ends_at       TEXT,
+    room          TEXT
+);
+CREATE INDEX IF NOT EXISTS ix_workshops_exhibition ON workshops(exhibition_id);
+
+-- listed = 0 for passes sold outside the catalogue
+CREATE TABLE IF NOT EXISTS passes (
+    pass_id  INTEGER PRIMARY KEY,
+    kind     TEXT NOT NULL,
+    price    REAL NOT NULL,
+    features TEXT NOT NULL DEFAULT '[]',
+    listed   INTEGER NOT NULL DEFAULT 1
+);
+CREATE TABLE IF NOT EXISTS pass_access (
+    pass_id       INTEGER NOT NULL REFERENCES passes(pass_id),
+    exhibition_id INTEGER NOT NULL,
+    PRIMARY KEY (pass_id, exhibition_id)
+);
+
+CREATE TABLE IF NOT EXISTS attendees (
+    attendee_id INTEGER PRIMARY KEY,
+    name        TEXT NOT NULL,
+    email       TEXT NOT NULL,
+    email_key   TEXT NOT NULL UNIQUE,
+    phone       TEXT NOT NULL,
+    pass_id     INTEGER REFERENCES passes(pass_id)
+);
+
+-- exhibitions added to one holder's pass by upgrade_pass (the catalogue pass is shared)
+CREATE TABLE IF NOT EXISTS pass_upgrades (
+    attendee_id   INTEGER NOT NULL REFERENCES attendees(attendee_id),
+    exhibition_id INTEGER NOT NULL,
+    PRIMARY KEY (attendee_id, exhibition_id)
+);
+
+CREATE TABLE IF NOT EXISTS reservations (
+    attendee_id INTEGER NOT NULL REFERENCES attendees(attendee_id),
+    workshop_id INTEGER NOT NULL,
+    PRIMARY KEY (attendee_id, workshop_id)
+);
+CREATE INDEX IF NOT EXISTS ix_reservations_workshop ON reservations(workshop_id);
+
+-- workshop waitlists (models/waitlist.py): served by (priority, seq)
+CREATE TABLE IF NOT EXISTS waitlist (
+    workshop_id INTEGER NOT NULL,
+    attendee_id INTEGER NOT NULL,
+    priority    INTEGER NOT NULL,
+    seq         INTEGER NOT NULL,
+    PRIMARY KEY (workshop_id, attendee_id)
+);
+
+CREATE TABLE IF NOT EXISTS sales (
+    sale_id     INTEGER PRIMARY KEY AUTOINCREMENT,
+    sale_date   TEXT NOT NULL,
+    attendee_id INTEGER,
+    pass_id     INTEGER
+);
+CREATE INDEX IF NOT EXISTS ix_sales_date ON sales(sale_date);
+
+-- sales ledger rows (models/sales_ledger.py): one per sold / upgraded pass and exhibition
+CREATE TABLE IF NOT EXISTS sale_items (
+    time          REAL NOT NULL,
+    attendee_id   INTEGER NOT NULL,
+    pass_id       INTEGER NOT NULL,
+    exhibition_id INTEGER NOT NULL,
+    amount        REAL NOT NULL,
+    kind          INTEGER NOT NULL,
+    pass_class    INTEGER NOT NULL,
+    units         INTEGER NOT NULL
+);
+
+-- results of calls made with an idempotency key (models/idempotency.py)
+CREATE TABLE IF NOT EXISTS idempotency_keys (
+    key         TEXT PRIMARY KEY,
+    fingerprint BLOB NOT NULL,
+    result      BLOB NOT NULL,
+    expires     REAL NOT NULL
+);
+"""
+
+# columns added after the first release: (table, column, declaration)
+_ADDED_COLUMNS = (
+    ("workshops", "starts_at", "TEXT"),
+    ("workshops", "ends_at", "TEXT"),
+    ("workshops", "room", "TEXT"),
+)
+
+_PASS_KINDS = {cls.__name__: cls for cls in (Pass, ExhibitionPass, AllAccessPass)}
+
+# page size used when streaming attendees
+_PAGE = 1000
+
+_ITEM_COLUMNS = ", ".join(name for name, _ in COLUMNS)
+_INSERT_ITEM = f"INSERT INTO sale_items ({_ITEM_COLUMNS}) VALUES ({', '.join('?' * len(COLUMNS))})"
+
+
+def _format_time(moment: Optional[datetime.datetime]) -> Optional[str]:
+    return None if moment is None else moment.isoformat()
+
+
+def _parse_time(text: Optional[str]) -> Optional[datetime.datetime]:
+    return None if text is None else datetime.datetime.fromisoformat(text)
+
+
+def _build_pass(pid, kind, price, features, access) -> Pass:
+    cls = _PASS_KINDS.get(kind, Pass)
+    p = cls.__new__(cls)
+    Pass.__init__(p, pid, price, access, json.loads(features))
+    return p
+
+
+class SQLiteBackend(StorageBackend):
+    """
+    Normalized stdlib sqlite3 storage.
+
+    Exhibitions, workshops (with their rosters) and passes are small and loaded
+    at startup; attendees stay in the database and are fetched through the
+    indexed attendee_id / email_key columns when TicketSystem looks them up.
+    Every mutation is a single transaction touching a handful of rows.
+
+    Attendee ids must be unique in this mode (they are the primary key).
+    The single connection is shared between threads behind a lock.
+    """
+
+    resident = False
+
+    def __init__(self, path: str = "greenwave.db"):
+        self.path = _fullpath(path)
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._add_missing_columns()
+        self._unlisted_passes: Dict[int, Pass] = {}
+
+    def _add_missing_columns(self) -> None:
+        # databases created before a column existed get it added (NULL in old rows)
+        for table, column, declaration in _ADDED_COLUMNS:
+            existing = {row[1] for row in self._conn.execute(f"PRAGMA table_info({table})")}
+            if column not in existing:
+                self._conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {declaration}")
+
+    # -------------------------
+    # Loading
+    # -------------------------
+    def load(self):
+        conn = self._conn
+        access: Dict[int, List[int]] = {}
+        for pid, eid in conn.execute("SELECT pass_id, exhibition_id FROM pass_access ORDER BY rowid"):
+            access.setdefault(pid, []).append(eid)
+
+        passes = []
+        for pid, kind, price, features, listed in conn.execute(
+                "SELECT pass_id, kind, price, features, listed FROM passes ORDER BY rowid"):
+            p = _build_pass(pid, kind, price, features, access.get(pid, []))
+            if listed:
+                passes.append(p)
+            else:
+                self._unlisted_passes[pid] = p
+
+        exhibitions = {}
+        for eid, name, description in conn.execute(
+                "SELECT exhibition_id, name, description FROM exhibitions ORDER BY rowid"):
+            exhibitions[eid] = Exhibition(eid, name, description)
+
+        workshops = {}
+        for wid, eid, title, capacity, starts_at, ends_at, room in conn.execute(
+                "SELECT workshop_id, exhibition_id, title, capacity, starts_at, ends_at, room "
+                "FROM workshops ORDER BY rowid"):
+            w = Workshop(wid, title, capacity, _parse_time(starts_at), _parse_time(ends_at), room)
+            workshops[wid] = w
+            if eid in exhibitions:
+                exhibitions[eid].add_workshop(w)
+
+        for wid, aid in conn.execute("SELECT workshop_id, attendee_id FROM reservations ORDER BY rowid"):
+            if wid in workshops:
+                workshops[wid].attendees.add(aid)
+        for wid, aid, priority, seq in conn.execute(
+                "SELECT workshop_id, attendee_id, priority, seq FROM waitlist"):
+            if wid in workshops:
+                workshops[wid].waitlist.restore(aid, priority, seq)
+
+        sales_log = dict(conn.execute(
+            "SELECT sale_date, COUNT(*) FROM sales GROUP BY sale_date ORDER BY sale_date"))
+
+        ledger = SalesLedger()
+        ledger.extend_rows(conn.execute(f"SELECT {_ITEM_COLUMNS} FROM sale_items ORDER BY rowid"))
+        if not len(ledger) and sales_log:
+            ledger = self._seed_ledger(access)
+
+        state = {
+            "attendees": [],
+            "exhibitions": list(exhibitions.values()),
+            "passes": passes,
+            "sales_log": sales_log,
+            "sales_ledger": ledger,
+            "idempotency": self._load_idempotency(),
+        }
+        return state, []
+
+    def _load_idempotency(self) -> IdempotencyCache:
+        cache = IdempotencyCache()
+        with self._conn:
+            self._conn.execute("DELETE FROM idempotency_keys WHERE expires <= ?", (time.time(),))
+        # the newest last, so the cache's size limit keeps them
+        for key, fingerprint, result, expires in self._conn.execute(
+                "SELECT key, fingerprint, result, expires FROM idempotency_keys ORDER BY expires"):
+            cache.store(key, pickle.loads(fingerprint), pickle.loads(result), expires)
+        return cache
+
+    def _seed_ledger(self, access: Dict[int, List[int]]) -> SalesLedger:
+        """Build (and store) ledger rows for the sales recorded before the ledger existed."""
+        ledger = SalesLedger()
+        for date_key, aid, pid, kind, price in self._conn.execute(
+                "SELECT s.sale_date, s.attendee_id, s.pass_id, p.kind, p.price "
+                "FROM sales s LEFT JOIN passes p ON p.pass_id = s.pass_id ORDER BY s.sale_id"):
+            cls = PASS_CLASSES.index(kind) if kind in PASS_CLASSES else 0
+            ledger.append((SALE, day_start(date_key), UNKNOWN if aid is None else aid,
+                           UNKNOWN if pid is None else pid, cls, price or 0.0,
+                           tuple(access.get(pid, ()))))
+        with self._lock, self._conn:
+            self._conn.executemany(_INSERT_ITEM, ledger.rows())
+        return ledger
+
+    # -------------------------
+    # Attendee lookups
+    # -------------------------
+    _ATTENDEE_COLUMNS = "attendee_id, name, email, phone, pass_id"
+
+    def _build_attendee(self, row, workshop_ids, ts, upgrades=()) -> Attendee:
+        aid, name, email, phone, pass_id = row
+        a = Attendee(aid, name, email, phone)
+        if pass_id is not None:
+            a.purchased_pass = ts.find_pass_by_id(pass_id) or self._unlisted_passes.get(pass_id)
+            if upgrades and a.purchased_pass is not None:
+                a.purchased_pass = a.purchased_pass.upgraded(upgrades)
+        a.reservations = tuple(wid for wid in workshop_ids if ts.find_workshop_by_id(wid) is not None)
+        return a
+
+    def _fetch_one(self, where: str, value, ts) -> Optional[Attendee]:
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {self._ATTENDEE_COLUMNS} FROM attendees WHERE {where} = ?", (value,)).fetchone()
+            if row is None:
+                return None
+            wids = [wid for (wid,) in self._conn.execute(
+                "SELECT workshop_id FROM reservations WHERE attendee_id = ? ORDER BY rowid", (row[0],))]
+            upgrades = [eid for (eid,) in self._conn.execute(
+                "SELECT exhibition_id FROM pass_upgrades WHERE attendee_id = ?", (row[0],))]
+        return self._build_attendee(row, wids, ts, upgrades)
+
+    def fetch_attendee_by_email(self, email_key, ts):
+        return self._fetch_one("email_key", email_key, ts)
+
+    def fetch_attendee_by_id(self, aid, ts):
+        return self._fetch_one("attendee_id", aid, ts)
+
+    def iter_attendees(self, ts) -> Iterator[Attendee]:
+        """Stream attendees page by page; loaded ones are returned as-is."""
+        last = 0
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    f"SELECT rowid, {self._ATTENDEE_COLUMNS} FROM attendees WHERE rowid > ? "
+                    f"ORDER BY rowid LIMIT ?", (last, _PAGE)).fetchall()
+                if not rows:
+                    return
+                ids = [r[1] for r in rows]
+                reserved: Dict[int, List[int]] = {}
+                marks = ",".join("?" * len(ids))
+                for aid, wid in self._conn.execute(
+                        f"SELECT attendee_id, workshop_id FROM reservations WHERE attendee_id IN ({marks}) "
+                        f"ORDER BY rowid", ids):
+                    reserved.setdefault(aid, []).append(wid)
+                upgrades: Dict[int, List[int]] = {}
+                for aid, eid in self._conn.execute(
+                        f"SELECT attendee_id, exhibition_id FROM pass_upgrades WHERE attendee_id IN ({marks})", ids):
+                    upgrades.setdefault(aid, []).append(eid)
+            last = rows[-1][0]
+            for r in rows:
+                loaded = ts._attendees_by_id.get(r[1])
+                yield loaded if loaded is not None else self._build_attendee(
+                    r[1:], reserved.get(r[1], []), ts, upgrades.get(r[1], ()))
+
+    def attendee_count(self, ts):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM attendees").fetchone()[0]
+
+    def max_attendee_id(self, ts):
+        with self._lock:
+            stored = self._conn.execute("SELECT COALESCE(MAX(attendee_id), 0) FROM attendees").fetchone()[0]
+        # attendees registered in a transaction that has not been flushed yet
+        return max(stored, super().max_attendee_id(ts))
+
+    # -------------------------
+    # Row writers
+    # -------------------------
+    def _upsert_pass(self, p: Pass, listed: bool) -> None:
+        self._conn.execute(
+            "INSERT INTO passes (pass_id, kind, price, features, listed) VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT(pass_id) DO UPDATE SET kind = excluded.kind, price = excluded.price, "
+            "features = excluded.features, listed = MAX(listed, excluded.listed)",
+            (p.pass_id, type(p).__name__, p.price, json.dumps(list(p.features)), int(listed)))
+        self._conn.execute("DELETE FROM pass_access WHERE pass_id = ?", (p.pass_id,))
+        self._conn.executemany(
+            "INSERT OR IGNORE INTO pass_access (pass_id, exhibition_id) VALUES (?, ?)",
+            [(p.pass_id, eid) for eid in p.exhibitions_access])
+        if not listed:
+            self._unlisted_passes[p.pass_id] = p
+
+    def _upsert_exhibition(self, ex: Exhibition) -> None:
+        self._conn.execute(
+            "INSERT INTO exhibitions (exhibition_id, name, description) VALUES (?, ?, ?) "
+            "ON CONFLICT(exhibition_id) DO UPDATE SET name = excluded.name, "
+            "description = excluded.description",
+            (ex.exhibition_id, ex.name, ex.description))
+        for w in ex.workshops:
+            self._upsert_workshop(ex.exhibition_id, w)
+
+    def _upsert_workshop(self, eid: int, w: Workshop) -> None:
+        self._conn.execute(
+            "INSERT INTO workshops (workshop_id, exhibition_id, title, capacity, starts_at, ends_at, room) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT(workshop_id) DO UPDATE SET exhibition_id = excluded.exhibition_id, "
+            "title = excluded.title, capacity = excluded.capacity, starts_at = excluded.starts_at, "
+            "ends_at = excluded.ends_at, room = excluded.room",
+            (w.workshop_id, eid, w.title, w.capacity, _format_time(w.start), _format_time(w.end), w.room))
+        self._conn.executemany(
+            "INSERT OR IGNORE INTO reservations (attendee_id, workshop_id) VALUES (?, ?)",
+            [(aid, w.workshop_id) for aid in w.attendees])
+        self._conn.execute("DELETE FROM waitlist WHERE workshop_id = ?", (w.workshop_id,))
+        self._conn.executemany(
+            "INSERT INTO waitlist (workshop_id, attendee_id, priority, seq) VALUES (?, ?, ?, ?)",
+            [(w.workshop_id, aid) + w.waitlist.entry(aid) for aid in w.waitlist.waiting()])
+
+    def _upsert_attendee(self, a: Attendee, ts) -> None:
+        p = a.purchased_pass
+        if p is not None and ts.find_pass_by_id(p.pass_id) is not p.original:
+            self._upsert_pass(p.original, listed=False)
+        self._conn.execute(
+            "INSERT INTO attendees (attendee_id, name, email, email_key, phone, pass_id) "
+            "VALUES (?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT(attendee_id) DO UPDATE SET name = excluded.name, email = excluded.email, "
+            "email_key = excluded.email_key, phone = excluded.phone, pass_id = excluded.pass_id",
+            (a.attendee_id, a.name, a.email, ts._email_key(a.email), a.phone,
+             p.pass_id if p is not None else None))
+        self._conn.execute("DELETE FROM reservations WHERE attendee_id = ?", (a.attendee_id,))
+        self._conn.executemany(
+            "INSERT OR IGNORE INTO reservations (attendee_id, workshop_id) VALUES (?, ?)",
+            [(a.attendee_id, wid) for wid in a.reservations])
+        self._conn.execute("DELETE FROM pass_upgrades WHERE attendee_id = ?", (a.attendee_id,))
+        if p is not None:
+            self._conn.executemany(
+                "INSERT INTO pass_upgrades (attendee_id, exhibition_id) VALUES (?, ?)",
+                [(a.attendee_id, eid) for eid in sorted(p.upgrades)])
+
+    # -------------------------
+    # StorageBackend API
+    # -------------------------
+    def persist(self, record, ts):
+        with self._lock, self._conn:
+            self._write(record, ts)
+
+    def persist_batch(self, records, ts):
+        # the whole transaction is one SQL transaction
+        with self._lock, self._conn:
+            for record in records:
+                self._write(record, ts)
+
+    def _write(self, record, ts):
+        op = record[0]
+        conn = self._conn
+        if op == "register":
+            self._upsert_attendee(record[1], ts)
+        elif op == "add_pass":
+            self._upsert_pass(record[1], listed=True)
+        elif op == "purchase":
+            _, aid, pid, date_key, unlisted, *_ = record
+            if unlisted is not None:
+                self._upsert_pass(unlisted, listed=False)
+            conn.execute("UPDATE attendees SET pass_id = ? WHERE attendee_id = ?", (pid, aid))
+            conn.execute("INSERT INTO sales (sale_date, attendee_id, pass_id) VALUES (?, ?, ?)",
+                         (date_key, aid, pid))
+        elif op == "upgrade":
+            # the holder's own upgrades; the catalogue pass is unchanged
+            conn.executemany("INSERT OR IGNORE INTO pass_upgrades (attendee_id, exhibition_id) VALUES (?, ?)",
+                             [(record[1], eid) for eid in record[2]])
+        elif op == "add_exhibition":
+            self._upsert_exhibition(record[1])
+        elif op == "add_workshop":
+            _, eid, w = record
+            self._upsert_workshop(eid, w)
+        elif op == "remove_workshop":
+            conn.execute("DELETE FROM workshops WHERE workshop_id = ?", (record[2],))
+            conn.execute("DELETE FROM waitlist WHERE workshop_id = ?", (record[2],))
+        elif op == "reserve":
+            conn.execute("INSERT OR IGNORE INTO reservations (attendee_id, workshop_id) VALUES (?, ?)",
+                         record[1:])
+        elif op == "cancel":
+            conn.execute("DELETE FROM reservations WHERE attendee_id = ? AND workshop_id = ?",
+                         record[1:])
+        elif op == "waitlist_join":
+            _, aid, wid, priority, seq = record
+            conn.execute("INSERT OR REPLACE INTO waitlist (workshop_id, attendee_id, priority, seq) "
+                         "VALUES (?, ?, ?, ?)", (wid, aid, priority, seq))
+        elif op == "waitlist_leave":
+            conn.execute("DELETE FROM waitlist WHERE attendee_id = ? AND workshop_id = ?", record[1:])
+        elif op == "promote":
+            conn.execute("DELETE FROM waitlist WHERE attendee_id = ? AND workshop_id = ?", record[1:])
+            conn.execute("INSERT OR IGNORE INTO reservations (attendee_id, workshop_id) VALUES (?, ?)",
+                         record[1:])
+        elif op == "capacity":
+            conn.execute("UPDATE workshops SET capacity = ? WHERE workshop_id = ?", (record[2], record[1]))
+        elif op == "profile":
+            _, aid, field, value = record
+            if field == "email":
+                conn.execute("UPDATE attendees SET email = ?, email_key = ? WHERE attendee_id = ?",
+                             (value, ts._email_key(value), aid))
+            elif field in ("name", "phone"):
+                conn.execute(f"UPDATE attendees SET {field} = ? WHERE attendee_id = ?", (value, aid))
+        elif op == "idempotency":
+            _, key, fingerprint, result, expires = record
+            conn.execute("INSERT OR REPLACE INTO idempotency_keys (key, fingerprint, result, expires) "
+                         "VALUES (?, ?, ?, ?)", (key, pickle.dumps(fingerprint), pickle.dumps(result), expires))
+        else:
+            raise ValueError(f"Unknown storage record: {op}")
+        for event in sale_events((record,)):
+            conn.executemany(_INSERT_ITEM, event_rows(event))
+
+    def save_all(self, ts):
+        """
+        Upsert the catalogue and every attendee currently loaded.
+        Sales events are only ever appended by purchases.
+        """
+        with self._lock, self._conn:
+            for p in ts.passes:
+                self._upsert_pass(p, listed=True)
+            for ex in ts.exhibitions:
+                self._upsert_exhibition(ex)
+            for a in ts.attendees:
+                self._upsert_attendee(a, ts)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    # -------------------------
+    # Migration
+    # -------------------------
+    def import_state(self, state: dict) -> Dict[str, int]:
+        """
+        Bulk-load a state dict as returned by PickleBackend.load() into this
+        database in one transaction. Returns row counts per entity.
+        """
+        conn = self._conn
+        passes = {p.pass_id: p for p in state["passes"]}
+        with conn:
+            for p in state["passes"]:
+                self._upsert_pass(p, listed=True)
+            for ex in state["exhibitions"]:
+                self._upsert_exhibition(ex)
+
+            rows, reservations, upgrades = [], [], []
+            for a in state["attendees"]:
+                p = a.purchased_pass
+                if p is not None and p.pass_id not in passes:
+                    self._upsert_pass(p.original, listed=False)
+                if p is not None:
+                    upgrades.extend((a.attendee_id, eid) for eid in sorted(p.upgrades))
+                rows.append((a.attendee_id, a.name, a.email, a.email.casefold(), a.phone,
+                             p.pass_id if p is not None else None))
+                reservations.extend((a.attendee_id, wid) for wid in a.reservations)
+            conn.executemany(
+                "INSERT INTO attendees (attendee_id, name, email, email_key, phone, pass_id) "
+                "VALUES (?, ?, ?, ?, ?, ?)", rows)
+            conn.executemany(
+                "INSERT OR IGNORE INTO reservations (attendee_id, workshop_id) VALUES (?, ?)",
+                reservations)
+            conn.executemany("INSERT INTO pass_upgrades (attendee_id, exhibition_id) VALUES (?, ?)", upgrades)
+
+            sales = 0
+            for date_key, count in state["sales_log"].items():
+                conn.executemany("INSERT INTO sales (sale_date) VALUES (?)", [(date_key,)] * count)
+                sales += count
+            ledger = state.get("sales_ledger") or SalesLedger.from_sales_log(state["sales_log"])
+            conn.executemany(_INSERT_ITEM, ledger.rows())
+
+        return {
+            "attendees": len(rows),
+            "exhibitions": len(state["exhibitions"]),
+            "passes": len(state["passes"]),
+            "reservations": conn.execute("SELECT COUNT(*) FROM reservations").fetchone()[0],
+            "sales": sales,
+            "sale_items": len(ledger),
+        }
+
+    def is_empty(self) -> bool:
+        return self._conn.execute(
+            "SELECT NOT EXISTS (SELECT 1 FROM attendees) AND NOT EXISTS (SELECT 1 FROM exhibitions)"
+        ).fetchone()[0] == 1
@@ -0,0 +1,17 @@
+# tests/conftest.py
+import os
+import sys
+
+import pytest
+
+# the tests import the packages from the repository root, as the scripts do
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from storage import data_manager  # noqa: E402
+
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    """Point storage/data_manager at a temporary directory for the test."""
+    monkeypatch.setattr(data_manager, "ROOT_DATA_DIR", str(tmp_path))
+    return str(tmp_path)
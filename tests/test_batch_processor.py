@@ -0,0 +1,144 @@
+# tests/test_batch_processor.py
+import io
+import json
+
+import pytest
+
+from models.ticket_system import TicketSystem
+from server.batch_processor import BatchProcessor, main
+from server.operations import Operations
+from server.ticket_server import TicketServer
+from storage.backend import JournalBackend
+
+
+def command(op, rid=None, **params):
+    return json.dumps({"id": rid, "op": op, "params": params})
+
+
+def register(i, **extra):
+    return command("register", i, name=f"Attendee {i}", email=f"b{i}@example.com", phone="00971-555-000", **extra)
+
+
+def results(out):
+    return [json.loads(line) for line in out.getvalue().splitlines()]
+
+
+class DurableOut(io.StringIO):
+    """Output that checks every result it is given has already been fsynced."""
+
+    def __init__(self, ts):
+        super().__init__()
+        self.ts = ts
+
+    def write(self, text):
+        assert self.ts._backend.journal._unsynced == 0
+        return super().write(text)
+
+
+def test_results_are_written_after_the_batch_is_synced(data_dir):
+    # a group that would otherwise wait a minute for its fsync
+    ts = TicketSystem("journal", {"group_size": 1000, "group_interval": 60})
+    out = DurableOut(ts)
+    lines = [register(i) for i in range(5)] + [command("purchase", 9, attendee_id=1, pass_id=99)]
+    stats = BatchProcessor(ts, batch_size=2).run(lines, out)
+    assert (stats.ok, stats.batches) == (6, 3)
+    assert [r["ok"] for r in results(out)] == [True] * 6
+    ts.close()
+
+
+def test_rejected_command_is_rolled_back_alone(data_dir):
+    ts = TicketSystem("memory")
+    out = io.StringIO()
+    lines = [register(1), command("purchase", 2, attendee_id=1, pass_id=1),
+             command("reserve", 3, attendee_id=1, workshop_id=201),  # pass 1 does not cover exhibition 2
+             command("reserve", 4, attendee_id=1, workshop_id=101),
+             "not json", command("report", 5, kind="attendees")]
+    stats = BatchProcessor(ts).run(lines, out)
+    rows = results(out)
+    assert rows[2] == {"id": 3, "ok": False, "error": "Attendee's pass does not include this exhibition.",
+                       "type": "PermissionError"}
+    assert rows[3]["result"]["reservations"] == [101]
+    assert rows[4]["line"] == 5 and rows[4]["type"] == "ValueError"
+    assert rows[5]["result"] == {"attendees": 1}
+    assert (stats.ok, stats.failed, stats.errors) == (4, 2, {"PermissionError": 1, "ValueError": 1})
+    ts.close()
+
+
+def test_fail_fast_stops_after_the_first_rejection(data_dir):
+    ts = TicketSystem("memory")
+    out = io.StringIO()
+    lines = [register(1), command("purchase", 2, attendee_id=7, pass_id=1), register(3)]
+    stats = BatchProcessor(ts, fail_fast=True).run(lines, out)
+    assert [r["id"] for r in results(out)] == [1, 2]
+    assert ts.attendee_count() == 1 and stats.failed == 1
+    ts.close()
+
+
+def test_failed_flush_aborts_the_batch_and_frees_its_ids(data_dir):
+    class FlakyBackend(JournalBackend):
+        fail = True
+
+        def persist_batch(self, records, ts):
+            if self.fail:
+                raise OSError("disk full")
+            super().persist_batch(records, ts)
+
+    backend = FlakyBackend()
+    ts = TicketSystem("journal", backend=backend)
+    processor = BatchProcessor(ts, batch_size=2)
+    out = io.StringIO()
+    stats = processor.run([register(1), register(2), register(3)], out)
+    assert stats.aborted and stats.batches == 0
+    assert [r["error"] for r in results(out)] == ["disk full"] * 2
+    assert ts.attendee_count() == 0
+
+    backend.fail = False
+    out = io.StringIO()
+    processor.run([register(1)], out)
+    assert results(out)[0]["result"]["attendee_id"] == 1
+    ts.close()
+
+
+def test_rerun_batch_with_idempotency_keys_replays_its_results(data_dir):
+    lines = [register(1, attendee_id=500, idempotency_key="r1"), register(2, idempotency_key="r2"),
+             command("purchase", 3, attendee_id=500, pass_id=1, idempotency_key="p1"),
+             command("reserve", 4, attendee_id=500, workshop_id=101, idempotency_key="w1")]
+    runs = []
+    for _ in range(2):
+        # e.g. the client lost the first run's output and submitted the batch again
+        ts = TicketSystem("journal")
+        out = io.StringIO()
+        stats = BatchProcessor(ts).run(lines, out)
+        assert stats.failed == 0
+        runs.append(results(out))
+        ts.close()
+    # replies describe the attendee as it is now, so only the ids must match
+    for run in runs:
+        assert [r["ok"] for r in run] == [True] * 4
+        assert [r["result"]["attendee_id"] for r in run] == [500, 501, 500, 500]
+    assert runs[1][3]["result"]["reservations"] == [101]
+
+    ts = TicketSystem("journal")
+    assert ts.attendee_count() == 2 and ts.find_workshop_by_id(101).spots_left() == 2
+    assert sum(ts.sales_log.values()) == 1
+    ts.close()
+
+
+def test_server_and_batch_processor_share_the_operations():
+    for name in ("op_register", "op_purchase_pass", "op_upgrade_pass", "op_reserve", "op_cancel",
+                 "op_set_capacity", "_attendee", "_workshop"):
+        assert getattr(TicketServer, name) is getattr(Operations, name) is getattr(BatchProcessor, name)
+
+
+def test_command_line_exit_status(data_dir, tmp_path, capsys):
+    commands = tmp_path / "commands.jsonl"
+    commands.write_text("\n".join([register(1), command("reserve", 2, attendee_id=1, workshop_id=101)]) + "\n")
+    stats = tmp_path / "stats.json"
+    assert main([str(commands), "--storage", "journal", "--stats", str(stats)]) == 1
+    assert json.loads(stats.read_text())["errors"] == {"PermissionError": 1}
+    assert len(capsys.readouterr().out.splitlines()) == 2
+
+    commands.write_text(command("purchase", 3, attendee_id=1, pass_id=99) + "\n")
+    assert main([str(commands), "--storage", "journal", "--stats", str(stats)]) == 0
+    with pytest.raises(SystemExit):
+        main(["--storage", "nowhere"])
@@ -0,0 +1,64 @@
+# tests/test_benchmark_suite.py
+import json
+import random
+import sys
+
+import pytest
+
+from benchmarks import suite
+from models.ticket_system import TicketSystem
+
+SMALL = ["--attendees", "40", "--exhibitions", "2", "--workshops", "3", "--passes", "3",
+         "--ops", "5", "--repeat", "1"]
+
+
+def run(monkeypatch, *args):
+    monkeypatch.setattr(sys, "argv", ["suite", *SMALL, *args])
+    suite.main()
+
+
+def test_compare_flags_regressions_beyond_the_tolerance():
+    baseline = {"results": {"1000": {"a": 1.0, "b": 1.0, "c": 1.0, "d": 1e-9, "gone": 1.0}}}
+    results = {"results": {"1000": {"a": 1.2, "b": 1.5, "c": 0.5, "d": 1e-8, "new": 1.0}}}
+    status = {row[1]: row[5] for row in suite.compare(results, baseline, tolerance=0.25, min_delta=1e-6)}
+    assert status == {"a": "ok", "b": "REGRESSION", "c": "faster", "d": "ok", "gone": "missing", "new": "missing"}
+
+
+def test_synthetic_event_respects_capacities(data_dir):
+    ts = TicketSystem("memory")
+    suite.build_catalogue(ts, 2, 3, 3, random.Random(1))
+    suite.populate(ts, 200, random.Random(1))
+    for w in suite.bench_workshops(ts):
+        assert len(w.attendees) <= int(w.capacity * 0.7)
+    assert ts.attendee_count() == 200
+    assert ts.find_attendee_by_email("attendee7@example.com").attendee_id == 1_000_007
+    assert sum(ts.sales_ledger.sales_by_day().values()) == 200
+    ts.close()
+
+
+def test_results_are_written_and_compared_with_a_baseline(data_dir, tmp_path, monkeypatch, capsys):
+    output = tmp_path / "results.json"
+    run(monkeypatch, "--modes", "pickle,lazy", "--ops-storage", "journal", "--output", str(output))
+    results = json.loads(output.read_text())
+    assert results["meta"]["format"] == suite.FORMAT and results["meta"]["ops_storage"] == "journal"
+    metrics = results["results"]["40"]
+    assert {"save_all[pickle]", "load[lazy]", "cold_start[lazy]", "reserve_workshop",
+            "workshop_capacity_report"} <= set(metrics)
+    assert all(seconds > 0 for seconds in metrics.values())
+
+    # a baseline far faster than anything measurable makes every metric a regression
+    for name in metrics:
+        metrics[name] = 1e-12
+    output.write_text(json.dumps(results))
+    with pytest.raises(SystemExit) as exit_info:
+        run(monkeypatch, "--modes", "pickle,lazy", "--ops-storage", "journal", "--baseline", str(output),
+            "--min-delta", "0")
+    assert exit_info.value.code == 1
+    assert "REGRESSION" in capsys.readouterr().out
+
+
+def test_baseline_of_another_format_is_refused(data_dir, tmp_path, monkeypatch):
+    baseline = tmp_path / "other.json"
+    baseline.write_text(json.dumps({"meta": {"format": 0}, "results": {}}))
+    with pytest.raises(SystemExit, match="not a benchmark suite result"):
+        run(monkeypatch, "--modes", "pickle", "--baseline", str(baseline))
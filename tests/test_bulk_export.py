@@ -0,0 +1,126 @@
+# tests/test_bulk_export.py
+import csv
+import gzip
+import io
+import json
+import os
+
+import pytest
+
+from models.attendee import Attendee
+from models.bulk_export import export_capacity, export_roster, main
+from models.ticket_system import TicketSystem
+
+
+def populate(ts, n, pass_ids=(1, 2, 99, None)):
+    for i in range(n):
+        a = Attendee(ts.next_attendee_id(), f"Attendee {i}", f"x{i}@example.com", "00971-555-000")
+        ts.register_attendee(a)
+        pass_id = pass_ids[i % len(pass_ids)]
+        if pass_id is not None:
+            ts.purchase_pass(a, ts.find_pass_by_id(pass_id))
+
+
+@pytest.fixture
+def ts(data_dir):
+    ts = TicketSystem("memory")
+    populate(ts, 8)
+    a = ts.find_attendee_by_id(1)
+    ts.reserve_workshop(a, ts.find_workshop_by_id(101))
+    ts.reserve_workshop(a, ts.find_workshop_by_id(102))
+    ts.upgrade_pass(ts.find_attendee_by_id(2), [3])
+    yield ts
+    ts.close()
+
+
+def roster(ts, **filters):
+    out = io.StringIO()
+    export_roster(ts, out, **filters)
+    return list(csv.DictReader(io.StringIO(out.getvalue())))
+
+
+def test_roster_rows(ts):
+    rows = roster(ts)
+    assert [r["attendee_id"] for r in rows] == [str(i) for i in range(1, 9)]
+    assert rows[0]["workshops"] == "; ".join(ts.find_attendee_by_id(1).get_reserved_workshop_titles())
+    assert (rows[0]["pass_type"], rows[0]["exhibitions"]) == ("exhibition", "1")
+    assert rows[1]["exhibitions"] == "1;2;3"
+    assert (rows[2]["pass_type"], rows[2]["exhibitions"]) == ("all_access", "all")
+    assert (rows[3]["pass_type"], rows[3]["pass_id"]) == ("none", "")
+
+
+def test_roster_filters(ts):
+    ids = lambda **filters: [int(r["attendee_id"]) for r in roster(ts, **filters)]
+    assert ids(exhibition_id=3) == [2, 3, 7]  # the upgrade and the all-access passes
+    assert ids(workshop_id=101) == [1]
+    assert ids(pass_type="none") == [4, 8]
+    assert ids(pass_type="all_access") == [3, 7]
+    assert ids(pass_type=2) == [2, 6]  # catalogue pass 2, upgraded or not
+    assert ids(exhibition_id=2, pass_type="exhibition") == [2, 6]
+    with pytest.raises(ValueError, match="Unknown pass type"):
+        roster(ts, pass_type="gold")
+    with pytest.raises(KeyError):
+        roster(ts, workshop_id=999)
+
+
+def test_capacity_report_matches_the_full_report(ts):
+    out = io.StringIO()
+    report = export_capacity(ts, out, fmt="jsonl", exhibition_id=1)
+    rows = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert rows == [r for r in ts.workshop_capacity_report() if r["exhibition_id"] == 1]
+    assert (report.written, report.scanned) == (2, 5)
+
+
+def test_gzip_jsonl_file_with_progress(ts, tmp_path):
+    target = str(tmp_path / "roster.jsonl.gz")
+    calls = []
+    report = export_roster(ts, target, progress=lambda done, total: calls.append((done, total)),
+                           progress_every=3)
+    assert calls == [(3, 8), (6, 8), (8, 8)]
+    with gzip.open(target, "rt", encoding="utf-8") as f:
+        rows = [json.loads(line) for line in f]
+    assert len(rows) == report.written == 8 and rows[0]["attendee_id"] == 1
+
+
+def test_failed_export_leaves_the_previous_file(ts, tmp_path):
+    target = tmp_path / "roster.csv"
+    target.write_text("previous")
+
+    def cancel(done, total):
+        raise KeyboardInterrupt
+
+    with pytest.raises(KeyboardInterrupt):
+        export_roster(ts, str(target), progress=cancel, progress_every=2)
+    assert target.read_text() == "previous"
+    assert os.listdir(tmp_path) == ["roster.csv"]
+
+
+def test_roster_streams_with_bounded_memory(data_dir):
+    ts = TicketSystem("sqlite")
+    populate(ts, 60)
+    ts.close()
+
+    ts = TicketSystem("sqlite", attendee_cache_size=5)
+    out = io.StringIO()
+    seen = []
+
+    def progress(done, total):
+        # rows are written as they are scanned (the one just scanned is next), and the
+        # cache never grows past its bound
+        seen.append((done, len(out.getvalue().splitlines()) - 1, len(ts.attendees)))
+
+    export_roster(ts, out, progress=progress, progress_every=20)
+    assert [(done, written) for done, written, _ in seen[:2]] == [(20, 19), (40, 39)]
+    assert all(cached <= 5 for _, _, cached in seen)
+    assert len(out.getvalue().splitlines()) == 61
+    ts.close()
+
+
+def test_command_line(ts, tmp_path, capsys):
+    ts.close()
+    target = str(tmp_path / "capacity.csv")
+    assert main(["capacity", target, "--storage", "journal", "--quiet"]) == 0
+    with open(target, newline="") as f:
+        assert len(list(csv.DictReader(f))) == 5
+    assert main(["roster", "-", "--storage", "journal", "--quiet", "--pass-type", "gold"]) == 1
+    assert "Unknown pass type" in capsys.readouterr().err
@@ -0,0 +1,78 @@
+# tests/test_bulk_import.py
+import pytest
+
+from models.bulk_import import BulkImporter
+from models.ticket_system import TicketSystem
+
+
+def rows(*dicts):
+    return [(line, row) for line, row in enumerate(dicts, start=2)]
+
+
+@pytest.mark.parametrize("storage", ["memory", "pickle", "lazy", "sqlite"])
+def test_corrected_row_after_rolled_back_row_is_imported(data_dir, storage):
+    ts = TicketSystem(storage, attendee_cache_size=1 if storage in ("lazy", "sqlite") else None)
+    report = BulkImporter(ts).import_rows(rows(
+        {"name": "Ann", "email": "ann@example.com", "phone": "00971-555-000", "pass_id": "12345"},
+        {"name": "Ann", "email": "ann@example.com", "phone": "00971-555-000", "pass_id": "99"},
+    ))
+    assert (report.imported, report.failed) == (1, 1)
+    assert "Unknown pass id" in report.errors[0].message
+    assert ts.find_attendee_by_email("ann@example.com").purchased_pass.pass_id == 99
+    ts.close()
+
+
+@pytest.mark.parametrize("storage", ["memory", "lazy", "sqlite"])
+def test_duplicate_email_in_the_same_chunk_is_rejected(data_dir, storage):
+    ts = TicketSystem(storage, attendee_cache_size=1 if storage in ("lazy", "sqlite") else None)
+    report = BulkImporter(ts).import_rows(rows(
+        {"name": "Ann", "email": "ann@example.com", "phone": "00971-555-000"},
+        {"name": "Bob", "email": "bob@example.com", "phone": "00971-555-000"},
+        {"name": "Ann again", "email": "ANN@example.com", "phone": "00971-555-000"},
+    ))
+    assert (report.imported, report.failed) == (2, 1)
+    assert report.errors[0].line == 4
+    ts.close()
+
+
+def test_csv_import_with_passes_and_reservations_across_chunks(data_dir, tmp_path):
+    path = tmp_path / "attendees.csv"
+    path.write_text(
+        "name,email,phone,pass_id,workshops\n"
+        "Ann,ann@example.com,00971-555-000,99,101;201\n"
+        "Bob,bob@example.com,00971-555-000,1,\n"
+        "Cy,cy@example.com,00971-555-000,1,201\n"
+        "Di,di@example.com,00971-555-000,,\n",
+        encoding="utf-8")
+    ts = TicketSystem("journal")
+    report = BulkImporter(ts, chunk_size=2).import_file(str(path))
+    assert (report.rows, report.imported, report.failed, report.chunks) == (4, 3, 1, 2)
+    assert (report.passes, report.reservations) == (2, 2)
+    # Cy's pass does not cover exhibition 2: the whole row is rolled back
+    assert report.errors[0].line == 4 and ts.find_attendee_by_email("cy@example.com") is None
+    ts.close()
+
+    ts = TicketSystem("journal")
+    ann = ts.find_attendee_by_email("ann@example.com")
+    assert ann.purchased_pass.pass_id == 99 and ann.reservations == (101, 201)
+    assert ts.find_attendee_by_email("di@example.com").purchased_pass is None
+    assert ts.attendee_count() == 3
+    ts.close()
+
+
+def test_jsonl_import_reports_bad_lines_and_keeps_going(data_dir, tmp_path):
+    path = tmp_path / "attendees.jsonl"
+    path.write_text(
+        '{"name": "Ann", "email": "ann@example.com", "phone": "00971-555-000", "workshops": [101]}\n'
+        "{not json\n"
+        '{"attendee_id": 40, "name": "Bob", "email": "bob@example.com", "phone": "00971-555-000"}\n'
+        '{"name": "Cy", "email": "cy@example.com", "phone": "00971-555-000"}\n',
+        encoding="utf-8")
+    ts = TicketSystem("memory")
+    errors = []
+    report = BulkImporter(ts, on_error=errors.append).import_file(str(path))
+    assert (report.imported, report.failed) == (2, 2)
+    assert [e.line for e in errors] == [1, 2]
+    assert "purchase a pass" in errors[0].message and "Invalid JSON" in errors[1].message
+    assert ts.find_attendee_by_email("cy@example.com").attendee_id == 41
+    ts.close()
@@ -0,0 +1,93 @@
+# tests/test_checkin.py
+import base64
+import secrets
+
+import pytest
+
+from models.attendee import Attendee
+from models.checkin import (ADMITTED, DENIED, DUPLICATE, EXPIRED, INVALID, BadgeSigner, CheckInRecorder, Gate,
+                            InvalidToken)
+from models.passes import AllAccessPass, ExhibitionPass
+
+NOW = 1_700_000_000
+
+
+@pytest.fixture
+def signer():
+    return BadgeSigner({1: secrets.token_bytes(32)})
+
+
+def holder(p, reservations=()):
+    a = Attendee(7, "Ann", "ann@example.com", "00971-555-000")
+    a.purchased_pass = p
+    a.reservations = tuple(reservations)
+    return a
+
+
+def tamper(token, position):
+    raw = bytearray(base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)))
+    raw[position] ^= 0x01
+    return base64.urlsafe_b64encode(bytes(raw)).rstrip(b"=").decode("ascii")
+
+
+def test_issued_badge_round_trips(signer):
+    token = signer.issue(holder(ExhibitionPass(2, 50.0, [1, 2]), [101, 201]), valid_for=60, now=NOW)
+    badge = signer.verify(token)
+    assert (badge.attendee_id, badge.pass_id, badge.expires) == (7, 2, NOW + 60)
+    assert badge.exhibitions == {1, 2} and badge.workshops == {101, 201}
+    assert not badge.allows_exhibition(3)
+
+
+def test_forged_badges_are_rejected(signer):
+    token = signer.issue(holder(ExhibitionPass(1, 30.0, [1])), now=NOW)
+    gate = Gate(1, signer, exhibition_id=1)
+    with pytest.raises(InvalidToken, match="signature"):
+        signer.verify(tamper(token, 3))  # attendee id changed
+    other = BadgeSigner({1: secrets.token_bytes(32)})
+    with pytest.raises(InvalidToken, match="signature"):
+        other.verify(token)
+    for forged in (tamper(token, 3), tamper(token, -1), other.issue(holder(AllAccessPass(99, 90.0))),
+                   token[:20], "not a badge!", ""):
+        assert gate.scan(forged, now=NOW).status == INVALID
+    assert gate.seen == set()
+
+
+def test_expired_and_unauthorized_badges_are_turned_away(signer):
+    token = signer.issue(holder(ExhibitionPass(1, 30.0, [1]), [101]), valid_for=60, now=NOW)
+    assert Gate(1, signer, exhibition_id=1).scan(token, now=NOW + 61).status == EXPIRED
+    assert Gate(2, signer, exhibition_id=2).scan(token, now=NOW).status == DENIED
+    assert Gate(3, signer, workshop_id=102).scan(token, now=NOW).status == DENIED
+    assert Gate(4, signer, workshop_id=101).scan(token, now=NOW).status == ADMITTED
+
+
+def test_all_access_badge_opens_exhibitions_added_later(signer):
+    token = signer.issue(holder(AllAccessPass(99, 90.0)), now=NOW)
+    assert signer.verify(token).all_access
+    assert Gate(1, signer, exhibition_id=12345).scan(token, now=NOW).admitted
+
+
+def test_rotated_keys_still_verify_old_badges():
+    old_key = secrets.token_bytes(32)
+    old = BadgeSigner({1: old_key})
+    token = old.issue(holder(ExhibitionPass(1, 30.0, [1])), now=NOW)
+    rotated = BadgeSigner({1: old_key, 2: secrets.token_bytes(32)})
+    assert rotated.active == 2
+    assert rotated.verify(token).attendee_id == 7
+    with pytest.raises(InvalidToken, match="Unknown"):
+        BadgeSigner({2: rotated.keys[2]}).verify(token)
+
+
+def test_duplicates_are_caught_at_the_gate_and_centrally(data_dir, signer):
+    token = signer.issue(holder(ExhibitionPass(1, 30.0, [1])), now=NOW)
+    recorder = CheckInRecorder(batch_size=2)
+    gate = Gate(1, signer, exhibition_id=1, recorder=recorder)
+    assert gate.scan(token, now=NOW).status == ADMITTED
+    assert gate.scan(token, now=NOW).status == DUPLICATE
+    restarted = Gate(1, signer, exhibition_id=1, recorder=recorder)
+    result = restarted.scan(token, now=NOW)
+    assert result.status == DUPLICATE and result.admitted
+    recorder.close()
+
+    reloaded = CheckInRecorder()
+    assert reloaded.seen(1, 7) and reloaded.counts() == {1: 1}
+    assert not reloaded.record(1, 7)
@@ -0,0 +1,117 @@
+# tests/test_concurrency.py
+import random
+import sys
+import threading
+
+import pytest
+
+from models.attendee import Attendee
+from models.exhibition import Exhibition
+from models.passes import AllAccessPass
+from models.ticket_system import TicketSystem
+from models.workshop import Workshop
+
+THREADS = 8
+
+
+@pytest.fixture
+def fast_switching():
+    # switch threads far more often than every 5ms to shake out races
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    yield
+    sys.setswitchinterval(interval)
+
+
+def build(storage, attendees, capacity):
+    ts = TicketSystem(storage)
+    ex = Exhibition(900, "Stress Hall")
+    ts.add_exhibition(ex)
+    workshop = Workshop(9000, "Stress", capacity)
+    ex.add_workshop(workshop)
+    p = AllAccessPass(900, 0.0)
+    ts.add_pass(p)
+    people = []
+    with ts.transaction():
+        for i in range(1, attendees + 1):
+            a = Attendee(i, f"Stress {i}", f"stress{i}@example.com", "00971-555-000")
+            ts.register_attendee(a)
+            ts.purchase_pass(a, p)
+            people.append(a)
+    return ts, people, workshop
+
+
+def run_threads(target):
+    barrier = threading.Barrier(THREADS)
+
+    def worker(i):
+        barrier.wait()
+        target(i)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(THREADS)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+
+def assert_consistent(ts, people, workshop):
+    assert len(workshop.attendees) <= workshop.capacity
+    for a in people:
+        assert (workshop.workshop_id in a.reservations) == (a.attendee_id in workshop.attendees)
+
+
+@pytest.mark.parametrize("storage", ["memory", "journal"])
+def test_racing_reservations_never_oversell(data_dir, fast_switching, storage):
+    capacity = 10
+    ts, people, workshop = build(storage, 4 * capacity, capacity)
+    won = []
+
+    def grab(i):
+        for a in people[i::THREADS]:
+            for _ in range(2):  # every attendee tries twice
+                try:
+                    ts.reserve_workshop(a, workshop)
+                    won.append(a.attendee_id)
+                except ValueError:
+                    pass
+
+    run_threads(grab)
+    assert len(won) == len(set(won)) == capacity
+    assert workshop.attendees == set(won)
+    assert_consistent(ts, people, workshop)
+    ts.close()
+
+
+def test_reserve_cancel_churn_keeps_rosters_consistent(data_dir, fast_switching):
+    ts, people, workshop = build("memory", 40, 5)
+    oversold = []
+    stop = threading.Event()
+
+    def monitor():
+        while not stop.is_set():
+            if len(workshop.attendees) > workshop.capacity:
+                oversold.append(len(workshop.attendees))
+
+    def churn(i):
+        rng = random.Random(i)
+        mine = people[i::THREADS]
+        for _ in range(300):
+            a = rng.choice(mine)
+            if a.has_reservation(workshop):
+                ts.cancel_reservation(a, workshop)
+            else:
+                try:
+                    ts.reserve_workshop(a, workshop)
+                except ValueError:
+                    pass
+
+    watcher = threading.Thread(target=monitor)
+    watcher.start()
+    run_threads(churn)
+    stop.set()
+    watcher.join()
+    assert oversold == []
+    assert_consistent(ts, people, workshop)
+    assert ts.occupancy.totals()["registered"] == len(workshop.attendees)
+    ts.close()
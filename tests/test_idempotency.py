@@ -0,0 +1,83 @@
+# tests/test_idempotency.py
+import pytest
+
+from models.attendee import Attendee
+from models.idempotency import IdempotencyCache
+from models.ticket_system import TicketSystem
+
+
+def attendee(i):
+    return Attendee(i, f"Attendee {i}", f"i{i}@example.com", "00971-555-000")
+
+
+def test_replayed_calls_run_once(data_dir):
+    ts = TicketSystem("memory")
+    a = attendee(1)
+    ts.register_attendee(a, idempotency_key="r1")
+    ts.register_attendee(attendee(1), idempotency_key="r1")  # a retry with a fresh object
+    assert ts.attendee_count() == 1
+
+    ts.purchase_pass(a, ts.find_pass_by_id(1), idempotency_key="p1")
+    ts.purchase_pass(a, ts.find_pass_by_id(1), idempotency_key="p1")
+    workshop = ts.find_workshop_by_id(101)
+    ts.reserve_workshop(a, workshop, idempotency_key="w1")
+    ts.reserve_workshop(a, workshop, idempotency_key="w1")
+    assert a.reservations == (101,) and workshop.spots_left() == 2
+    assert sum(ts.sales_log.values()) == 1
+    assert ts.idempotency.stats()["hits"] == 3
+
+    ts.cancel_reservation(a, workshop, idempotency_key="c1")
+    ts.cancel_reservation(a, workshop, idempotency_key="c1")  # would raise if run again
+    assert workshop.spots_left() == 3
+    ts.close()
+
+
+def test_key_reused_for_another_request_is_rejected(data_dir):
+    ts = TicketSystem("memory")
+    a, b = attendee(1), attendee(2)
+    ts.register_attendee(a)
+    ts.register_attendee(b)
+    ts.purchase_pass(a, ts.find_pass_by_id(1), idempotency_key="k")
+    with pytest.raises(ValueError, match="different request"):
+        ts.purchase_pass(b, ts.find_pass_by_id(1), idempotency_key="k")
+    assert b.purchased_pass is None and ts.idempotency.conflicts == 1
+    ts.close()
+
+
+def test_failed_call_stores_nothing(data_dir):
+    ts = TicketSystem("memory")
+    a = attendee(1)
+    ts.register_attendee(a)
+    with pytest.raises(PermissionError):
+        ts.reserve_workshop(a, ts.find_workshop_by_id(101), idempotency_key="k")  # no pass yet
+    ts.purchase_pass(a, ts.find_pass_by_id(1))
+    ts.reserve_workshop(a, ts.find_workshop_by_id(101), idempotency_key="k")
+    assert a.reservations == (101,)
+    ts.close()
+
+
+@pytest.mark.parametrize("storage", ["journal", "sqlite", "lazy"])
+def test_keys_survive_a_restart(data_dir, storage):
+    ts = TicketSystem(storage)
+    a = attendee(1)
+    ts.register_attendee(a)
+    ts.purchase_pass(a, ts.find_pass_by_id(1), idempotency_key="p1")
+    ts.close()
+
+    ts = TicketSystem(storage)
+    a = ts.find_attendee_by_id(1)
+    ts.purchase_pass(a, ts.find_pass_by_id(1), idempotency_key="p1")
+    assert sum(ts.sales_log.values()) == 1
+    assert ts.idempotency.stats()["hits"] == 1
+    ts.close()
+
+
+def test_expired_and_evicted_keys_are_new():
+    now = [1000.0]
+    cache = IdempotencyCache(max_keys=2, ttl=10, clock=lambda: now[0])
+    for key in ("a", "b", "c"):
+        cache.store(key, ("op",), key, cache.expiry())
+    assert cache.lookup("a", ("op",)) is None and cache.evictions == 1
+    assert cache.lookup("b", ("op",))[1] == "b"
+    now[0] += 10
+    assert cache.lookup("c", ("op",)) is None and len(cache) == 1
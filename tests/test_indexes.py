@@ -0,0 +1,84 @@
+# tests/test_indexes.py
+import pytest
+
+from models.attendee import Attendee
+from models.exhibition import Exhibition
+from models.ticket_system import TicketSystem
+from models.workshop import Workshop
+
+
+@pytest.fixture
+def ts(data_dir):
+    ts = TicketSystem("memory")
+    yield ts
+    ts.close()
+
+
+def register(ts, aid, email):
+    a = Attendee(aid, f"Attendee {aid}", email, "00971-555-000")
+    ts.register_attendee(a)
+    return a
+
+
+def test_lookups_are_case_insensitive_on_email(ts):
+    a = register(ts, 1, "Ann@Example.com")
+    assert ts.find_attendee_by_email("ann@example.com") is a
+    assert ts.find_attendee_by_id(1) is a
+    with pytest.raises(ValueError, match="Email already registered"):
+        register(ts, 2, "ANN@example.com")
+
+
+def test_email_index_follows_update_email(ts):
+    a = register(ts, 1, "ann@example.com")
+    b = register(ts, 2, "ben@example.com")
+    a.update_email("anna@example.com")
+    assert ts.find_attendee_by_email("ann@example.com") is None
+    assert ts.find_attendee_by_email("anna@example.com") is a
+
+    with pytest.raises(ValueError, match="Email already registered"):
+        a.update_email("ben@example.com")
+    assert a.email == "anna@example.com"
+    assert ts.find_attendee_by_email("ben@example.com") is b
+
+
+def test_email_change_rolled_back_restores_the_index(ts):
+    a = register(ts, 1, "ann@example.com")
+    with pytest.raises(RuntimeError):
+        with ts.transaction():
+            a.update_email("anna@example.com")
+            raise RuntimeError
+    assert a.email == "ann@example.com"
+    assert ts.find_attendee_by_email("ann@example.com") is a
+    assert ts.find_attendee_by_email("anna@example.com") is None
+
+
+def test_workshop_index_follows_remove_workshop(ts):
+    ex = ts.find_exhibition_by_id(1)
+    w = ts.find_workshop_by_id(101)
+    ex.remove_workshop(w)
+    assert ts.find_workshop_by_id(101) is None
+    assert ts.find_workshop_exhibition(w) is None
+
+    ex.add_workshop(w)
+    assert ts.find_workshop_by_id(101) is w
+    assert ts.find_workshop_exhibition(w) is ex
+
+
+def test_removed_workshop_falls_back_to_a_same_id_workshop_elsewhere(ts):
+    other = Exhibition(4, "Other")
+    twin = Workshop(101, "Twin", 1)
+    other.add_workshop(twin)
+    ts.add_exhibition(other)
+    original = ts.find_workshop_by_id(101)
+    assert original is not twin  # first one indexed wins
+
+    ts.find_exhibition_by_id(1).remove_workshop(original)
+    assert ts.find_workshop_by_id(101) is twin
+    assert ts.find_workshop_exhibition(twin) is other
+
+
+def test_pass_and_exhibition_lookups(ts):
+    assert ts.find_pass_by_id(99).all_access
+    assert ts.find_pass_by_id(1000) is None
+    assert ts.find_exhibition_by_id(2).name == "Renewable Energy"
+    assert ts.find_exhibition_by_id(7) is None
@@ -0,0 +1,86 @@
+# tests/test_journal.py
+import os
+import subprocess
+import sys
+import time
+
+from models.attendee import Attendee
+from models.ticket_system import TicketSystem
+from storage.journal import Journal, FSYNC_GROUP
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CRASH_AFTER_BURST = """
+import os, sys, time
+from storage import data_manager
+data_manager.ROOT_DATA_DIR = sys.argv[1]
+from models.attendee import Attendee
+from models.ticket_system import TicketSystem
+ts = TicketSystem("journal")
+for i in range(5):
+    ts.register_attendee(Attendee(ts.next_attendee_id(), f"Attendee {i}", f"a{i}@example.com", "00971-555-000"))
+time.sleep(1)
+os._exit(0)  # no atexit, no close()
+"""
+
+
+def test_group_commit_tail_survives_process_death(data_dir):
+    subprocess.run([sys.executable, "-c", CRASH_AFTER_BURST, data_dir], cwd=ROOT, check=True)
+    ts = TicketSystem("journal")
+    emails = {a.email for a in ts.attendees}
+    assert {f"a{i}@example.com" for i in range(5)} <= emails
+    ts.close()
+
+
+def test_group_records_reach_the_log_before_append_returns(data_dir):
+    journal = Journal(fsync=FSYNC_GROUP, group_size=1000, group_interval=60)
+    journal.append(("profile", 1, "name", "Ann"))
+    assert os.path.getsize(os.path.join(data_dir, journal.log_file)) > 0
+    assert Journal().recover()[1] == [("profile", 1, "name", "Ann")]
+    journal.close()
+
+
+def test_idle_group_is_fsynced_after_group_interval(data_dir):
+    journal = Journal(fsync=FSYNC_GROUP, group_size=1000, group_interval=0.05)
+    journal.append(("profile", 1, "name", "Ann"))
+    assert journal._unsynced == 1
+    deadline = time.monotonic() + 2
+    while journal._unsynced and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert journal._unsynced == 0
+    journal.close()
+
+
+def test_state_survives_restart_across_compactions(data_dir):
+    ts = TicketSystem("journal", {"compact_every": 5})
+    for i in range(12):
+        a = Attendee(ts.next_attendee_id(), f"Attendee {i}", f"c{i}@example.com", "00971-555-000")
+        ts.register_attendee(a)
+        ts.purchase_pass(a, ts.find_pass_by_id(99))
+    ts.reserve_workshop(ts.find_attendee_by_email("c3@example.com"), ts.find_workshop_by_id(201))
+    ts.close()
+    assert os.path.exists(os.path.join(data_dir, "journal.snapshot.bin"))
+
+    ts = TicketSystem("journal")
+    assert ts.attendee_count() == 12
+    a = ts.find_attendee_by_email("c3@example.com")
+    assert a.purchased_pass.pass_id == 99 and a.reservations == (201,)
+    assert a.attendee_id in ts.find_workshop_by_id(201).attendees
+    ts.close()
+
+
+def test_torn_tail_is_dropped_and_appends_continue(data_dir):
+    journal = Journal()
+    journal.append(("profile", 1, "name", "Ann"))
+    journal.append(("profile", 1, "name", "Anna"))
+    journal.close()
+    with open(os.path.join(data_dir, journal.log_file), "ab") as f:
+        f.write(b"\x40\x00\x00\x00torn")
+
+    journal = Journal()
+    assert journal.recover()[1] == [("profile", 1, "name", "Ann"), ("profile", 1, "name", "Anna")]
+    journal.append(("profile", 1, "name", "Annie"))
+    journal.close()
+    journal = Journal()
+    assert journal.recover()[1][-1] == ("profile", 1, "name", "Annie")
+    journal.close()
@@ -0,0 +1,96 @@
+# tests/test_lazy_backend.py
+import os
+
+from models.attendee import Attendee
+from models.exhibition import Exhibition
+from models.ticket_system import TicketSystem
+from models.workshop import Workshop
+from storage import data_manager
+
+
+def register(ts, i):
+    a = Attendee(ts.next_attendee_id(), f"Attendee {i}", f"l{i}@example.com", "00971-555-000")
+    ts.register_attendee(a)
+    ts.purchase_pass(a, ts.find_pass_by_id(99))
+    return a
+
+
+def catalogue_mtime():
+    return os.stat(os.path.join(data_manager.ROOT_DATA_DIR, TicketSystem.EXHIBITIONS_FILE)).st_mtime_ns
+
+
+def test_cache_evicts_and_reloads_attendees(data_dir):
+    ts = TicketSystem("lazy")
+    for i in range(6):
+        register(ts, i)
+    ts.close()
+
+    ts = TicketSystem("lazy", attendee_cache_size=2)
+    assert len(ts.attendees) == 0
+    first = ts.find_attendee_by_id(1)
+    for aid in (2, 3, 4):
+        ts.find_attendee_by_id(aid)
+    assert len(ts.attendees) <= 2 and 1 not in ts.attendees
+    again = ts.find_attendee_by_email("l0@example.com")
+    assert again.attendee_id == first.attendee_id and again.purchased_pass is ts.find_pass_by_id(99)
+    ts.reserve_workshop(again, ts.find_workshop_by_id(101))
+    for aid in (5, 6):
+        ts.find_attendee_by_id(aid)
+    assert ts.find_attendee_by_id(1).reservations == (101,)
+    assert ts.attendee_count() == 6
+    ts.close()
+
+
+def test_reservations_save_rosters_without_rewriting_the_catalogue(data_dir):
+    ts = TicketSystem("lazy")
+    people = [register(ts, i) for i in range(4)]
+    workshop = ts.find_workshop_by_id(102)  # capacity 2
+    before = catalogue_mtime()
+    for a in people[:2]:
+        ts.reserve_workshop(a, workshop)
+    assert ts.reserve_workshop(people[2], workshop, waitlist=True) == 1
+    ts.cancel_reservation(people[0], workshop)  # promotes people[2]
+    ts.reserve_workshop(people[3], ts.find_workshop_by_id(101))
+    ts.set_workshop_capacity(ts.find_workshop_by_id(301), 8)
+    assert catalogue_mtime() == before
+    assert sorted(os.listdir(os.path.join(data_dir, "rosters"))) == ["101.pkl", "102.pkl", "301.pkl"]
+    ts.close()
+
+    ts = TicketSystem("lazy")
+    assert ts.find_workshop_by_id(102).attendees == {people[1].attendee_id, people[2].attendee_id}
+    assert ts.find_workshop_by_id(101).attendees == {people[3].attendee_id}
+    assert ts.find_workshop_by_id(301).capacity == 8
+    assert ts.find_attendee_by_id(people[2].attendee_id).reservations == (102,)
+    ts.close()
+
+
+def test_waitlist_survives_a_restart(data_dir):
+    ts = TicketSystem("lazy")
+    people = [register(ts, i) for i in range(4)]
+    workshop = ts.find_workshop_by_id(102)
+    for a in people:
+        ts.reserve_workshop(a, workshop, waitlist=True)
+    ts.close()
+
+    ts = TicketSystem("lazy")
+    workshop = ts.find_workshop_by_id(102)
+    assert [ts.waitlist_position(a, workshop) for a in people[2:]] == [1, 2]
+    ts.cancel_reservation(ts.find_attendee_by_id(people[0].attendee_id), workshop)
+    assert people[2].attendee_id in workshop.attendees
+    ts.close()
+
+
+def test_catalogue_save_folds_in_the_rosters(data_dir):
+    ts = TicketSystem("lazy")
+    a = register(ts, 1)
+    ts.reserve_workshop(a, ts.find_workshop_by_id(201))
+    ex = Exhibition(4, "Storage")
+    ex.add_workshop(Workshop(401, "Batteries", 2))
+    ts.add_exhibition(ex)
+    assert os.listdir(os.path.join(data_dir, "rosters")) == []
+    ts.close()
+
+    ts = TicketSystem("lazy")
+    assert ts.find_workshop_by_id(201).attendees == {a.attendee_id}
+    assert ts.find_workshop_by_id(401).capacity == 2
+    ts.close()
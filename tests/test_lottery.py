@@ -0,0 +1,83 @@
+# tests/test_lottery.py
+import pytest
+
+from models.attendee import Attendee
+from models.lottery import Lottery
+from models.ticket_system import TicketSystem
+from server.ticket_server import TicketServer
+
+
+def attendee(ts, i):
+    a = Attendee(ts.next_attendee_id(), f"Attendee {i}", f"l{i}@example.com", "00971-555-000")
+    ts.register_attendee(a)
+    ts.purchase_pass(a, ts.find_pass_by_id(99))
+    return a
+
+
+def test_commit_rolled_back_by_the_outer_transaction_can_run_again(data_dir):
+    ts = TicketSystem("journal")
+    workshop = ts.exhibitions[0].workshops[0]
+    a = attendee(ts, 1)
+    lottery = Lottery(ts, "rollback")
+    lottery.submit(a, [workshop.workshop_id])
+    lottery.close()
+    allocation = lottery.allocate(seed=1)
+
+    # as in a server batch: the commit is a savepoint and the outer block fails
+    with pytest.raises(RuntimeError):
+        with ts.transaction():
+            lottery.commit(allocation)
+            raise RuntimeError("flush failed")
+    assert lottery.committed_seed is None
+    assert a.attendee_id not in workshop.attendees
+    ts.close()
+
+    ts = TicketSystem("journal")
+    reloaded = Lottery(ts, "rollback")
+    assert reloaded.committed_seed is None
+    assert reloaded.run(seed=1).seats == 1
+    assert reloaded.committed_seed == 1
+    assert Lottery(ts, "rollback").committed_seed == 1
+    ts.close()
+
+
+def test_lost_commit_marker_is_recovered_from_the_booked_seats(data_dir, monkeypatch):
+    ts = TicketSystem("journal")
+    people = [attendee(ts, i) for i in range(3)]
+    lottery = Lottery(ts, "crash")
+    for a in people:
+        lottery.submit(a, [101, 102])
+    # the process dies after the seats are flushed, before the marker is written
+    with monkeypatch.context() as patch:
+        patch.setattr(Lottery, "_write_committed", lambda self, seed: None)
+        booked = lottery.run(seed=4).seats
+    ts.close()
+
+    ts = TicketSystem("journal")
+    reloaded = Lottery(ts, "crash")
+    assert (reloaded.closed, reloaded.committed_seed) == (True, 4)
+    with pytest.raises(ValueError, match="already committed"):
+        reloaded.commit(reloaded.allocate(seed=5))
+    held = sum(len(ts.find_attendee_by_id(a.attendee_id).reservations) for a in people)
+    assert held == booked == 3
+    assert Lottery(ts, "crash").committed_seed == 4  # the marker was repaired
+    ts.close()
+
+
+def test_server_keeps_one_lottery_per_name(data_dir):
+    ts = TicketSystem("memory")
+    server = TicketServer(ts)
+    first, second = ts.exhibitions[0].workshops[:2]
+    a = attendee(ts, 1)
+    server.op_lottery_submit({"attendee_id": a.attendee_id, "workshops": [first.workshop_id]})
+    server.op_lottery_submit({"attendee_id": a.attendee_id, "workshops": [second.workshop_id],
+                              "lottery": "second"})
+    assert server.op_run_lottery({"seed": 1})["seats"] == 1
+    result = server.op_run_lottery({"seed": 2, "lottery": "second"})
+    assert (result["lottery"], result["seats"]) == ("second", 1)
+    assert set(a.reservations) == {first.workshop_id, second.workshop_id}
+    with pytest.raises(ValueError, match="already committed"):
+        server.op_run_lottery({"seed": 3})
+    with pytest.raises(ValueError, match="Invalid lottery name"):
+        server.op_lottery_submit({"attendee_id": a.attendee_id, "workshops": [], "lottery": "../x"})
+    ts.close()
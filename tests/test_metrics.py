@@ -0,0 +1,115 @@
+# tests/test_metrics.py
+import threading
+
+import pytest
+
+from models.attendee import Attendee
+from models.metrics import METRICS, Histogram, Metrics
+from models.ticket_system import TicketSystem
+
+
+def test_histogram_buckets_and_quantiles():
+    hist = Histogram((1.0, 2.0, 4.0))
+    for value in (0.5, 1.5, 1.5, 3.0, 10.0):
+        hist.observe(value)
+    counts, total = hist.state()
+    assert counts == [1, 2, 1, 1] and total == 16.5
+    assert hist.quantile(0.5) == 2.0
+    assert hist.quantile(1.0) is None  # beyond the last bound
+    hist.reset()
+    assert hist.quantile(0.5) is None
+
+
+def test_histogram_adds_up_the_threads():
+    hist = Histogram()
+
+    def record():
+        for _ in range(1000):
+            hist.observe(1e-4)
+
+    threads = [threading.Thread(target=record) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert sum(hist.state()[0]) == 4000
+
+
+def test_instrumented_calls_and_failures():
+    metrics = Metrics()
+
+    @metrics.instrument(op="work")
+    def work(fail=False):
+        if fail:
+            raise ValueError("no")
+        return 42
+
+    assert work() == 42
+    with pytest.raises(ValueError):
+        work(fail=True)
+    with pytest.raises(KeyError):
+        with metrics.timer("lookup"):
+            raise KeyError(1)
+    metrics.record_io("write", "attendees.pkl", 1000, 1e-3)
+
+    snapshot = metrics.snapshot()
+    assert snapshot["operations"]["work"]["calls"] == 2
+    assert snapshot["operations"]["work"]["failures"] == {"ValueError": 1}
+    assert snapshot["operations"]["lookup"]["failures"] == {"KeyError": 1}
+    assert snapshot["storage"]["attendees.pkl"]["write"]["bytes"] == 1000
+
+    metrics.enabled = False
+    work()
+    metrics.enabled = True
+    assert metrics.snapshot()["operations"]["work"]["calls"] == 2
+    metrics.reset()
+    assert metrics.snapshot()["operations"] == {}
+
+
+def test_prometheus_export():
+    metrics = Metrics()
+    metrics.observe("reserve_workshop", 3e-6)
+    metrics.observe("reserve_workshop", 0.2, error=ValueError())
+    metrics.record_io("read", 'odd"name', 300, 1e-4)
+    text = metrics.prometheus()
+    assert 'greenwave_operation_seconds_bucket{op="reserve_workshop",le="5e-06"} 1' in text
+    assert 'greenwave_operation_seconds_bucket{op="reserve_workshop",le="+Inf"} 2' in text
+    assert 'greenwave_operation_seconds_count{op="reserve_workshop"} 2' in text
+    assert 'greenwave_operation_failures_total{op="reserve_workshop",type="ValueError"} 1' in text
+    assert 'greenwave_storage_read_bytes_sum{file="odd\\"name"} 300' in text
+    assert text.endswith("\n")
+
+
+def test_sampling_profiler():
+    metrics = Metrics()
+
+    @metrics.instrument
+    def step():
+        return sum(range(100))
+
+    assert metrics.stop_profiling() is None
+    metrics.start_profiling(every=2, ops=["step"])
+    assert metrics.profiling
+    for _ in range(10):
+        step()
+    stats = metrics.stop_profiling()
+    assert not metrics.profiling
+    assert "step" in Metrics.profile_report(stats, limit=5)
+    assert metrics.snapshot()["operations"]["step"]["calls"] == 10
+
+
+def test_ticket_system_operations_and_storage_are_recorded(data_dir):
+    METRICS.reset()
+    ts = TicketSystem("pickle")
+    a = Attendee(1, "Ann", "ann@example.com", "00971-555-000")
+    ts.register_attendee(a)
+    ts.purchase_pass(a, ts.find_pass_by_id(1))
+    with pytest.raises(PermissionError):
+        ts.reserve_workshop(a, ts.find_workshop_by_id(201))  # pass 1 does not cover exhibition 2
+    ts.close()
+
+    snapshot = METRICS.snapshot()
+    assert snapshot["operations"]["register_attendee"]["calls"] == 1
+    assert snapshot["operations"]["reserve_workshop"]["failures"] == {"PermissionError": 1}
+    assert snapshot["operations"]["backend.persist"]["calls"] >= 2
+    assert snapshot["storage"]["attendees.pkl"]["write"]["calls"] >= 2
@@ -0,0 +1,50 @@
+# tests/test_models.py
+import pickle
+
+from models.attendee import Attendee
+from models.exhibition import Exhibition
+from models.passes import ExhibitionPass
+from models.ticket_system import TicketSystem
+from models.workshop import Workshop
+
+
+def test_models_have_no_instance_dict():
+    a = Attendee(1, "Ann", "ann@example.com", "00971-555-000")
+    w = Workshop(101, "Solar", 3)
+    for obj in (a, w, Exhibition(1, "Energy"), ExhibitionPass(1, 30.0, [1])):
+        assert not hasattr(obj, "__dict__")
+    assert a.reservations == ()
+
+
+def test_pickle_round_trip_drops_the_registry(data_dir):
+    ts = TicketSystem("memory")
+    a = Attendee(1, "Ann", "ann@example.com", "00971-555-000")
+    ts.register_attendee(a)
+    ts.purchase_pass(a, ts.find_pass_by_id(2))
+    w = ts.find_workshop_by_id(201)
+    ts.reserve_workshop(a, w)
+
+    a2, w2 = pickle.loads(pickle.dumps((a, w)))
+    assert (a2.attendee_id, a2.email, a2.reservations) == (1, "ann@example.com", (201,))
+    assert a2.purchased_pass.exhibitions_access == frozenset({1, 2})
+    assert a2._registry is None and w2._registry is None
+    assert w2.attendees == {1}
+    assert w2.reserve_spot(2)  # the lock is recreated
+    ts.close()
+
+
+def test_state_from_before_slots_is_upgraded_on_load():
+    w = Workshop.__new__(Workshop)
+    w.__setstate__({"workshop_id": 101, "title": "Solar", "capacity": 3, "attendees": [1, 2]})
+    assert w.attendees == {1, 2}
+    assert len(w.waitlist) == 0 and w.start is None and w.room is None
+    assert w.spots_left() == 1
+
+    a = Attendee.__new__(Attendee)
+    a.__setstate__({"attendee_id": 1, "name": "Ann", "email": "ann@example.com", "phone": "00971-555-000",
+                    "purchased_pass": None, "reservations": [w]})
+    assert a.reservations == (101,)
+
+    p = ExhibitionPass.__new__(ExhibitionPass)
+    p.__setstate__({"pass_id": 1, "price": 30.0, "exhibitions_access": [1, 2], "features": []})
+    assert p.allows_exhibition(2) and p.upgrades == frozenset() and p.original is p
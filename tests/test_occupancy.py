@@ -0,0 +1,101 @@
+# tests/test_occupancy.py
+import pytest
+
+from models.attendee import Attendee
+from models.ticket_system import TicketSystem
+from models.workshop import Workshop
+
+
+@pytest.fixture
+def ts(data_dir):
+    ts = TicketSystem("memory")
+    yield ts
+    ts.close()
+
+
+def register(ts, i):
+    a = Attendee(i, f"Attendee {i}", f"o{i}@example.com", "00971-555-000")
+    ts.register_attendee(a)
+    ts.purchase_pass(a, ts.find_pass_by_id(99))
+    return a
+
+
+def test_totals_follow_reservations_and_cancellations(ts):
+    start = ts.occupancy.totals()
+    assert (start["registered"], start["capacity"]) == (0, 16)
+    assert start["exhibitions"][1] == {"registered": 0, "capacity": 5}
+
+    a, b = register(ts, 1), register(ts, 2)
+    ts.reserve_workshop(a, ts.find_workshop_by_id(101))
+    ts.reserve_workshop(b, ts.find_workshop_by_id(101))
+    ts.reserve_workshop(a, ts.find_workshop_by_id(201))
+    ts.cancel_reservation(b, ts.find_workshop_by_id(101))
+    totals = ts.occupancy.totals()
+    assert (totals["registered"], totals["spots_left"]) == (2, 14)
+    assert totals["exhibitions"][1] == {"registered": 1, "capacity": 5}
+    assert totals["exhibitions"][2] == {"registered": 1, "capacity": 6}
+    report = {row["workshop_id"]: row["registered"] for row in ts.workshop_capacity_report()}
+    assert {row["workshop_id"]: row["registered"] for row in ts.occupancy.snapshot()["workshops"]} == report
+
+
+def test_deltas_are_published_and_replayable(ts):
+    seen = []
+    unsubscribe = ts.occupancy.subscribe(seen.append)
+    seq = ts.occupancy.seq
+    a = register(ts, 1)
+    ts.reserve_workshop(a, ts.find_workshop_by_id(102))
+    ts.set_workshop_capacity(ts.find_workshop_by_id(102), 4)
+    assert [(d["workshop_id"], d["registered"], d["capacity"], d["spots_left"]) for d in seen] == [
+        (102, 1, 2, 1), (102, 1, 4, 3)]
+    assert seen[-1]["exhibition_capacity"] == 7 and seen[-1]["total_capacity"] == 18
+    assert ts.occupancy.changes_since(seq) == seen
+    assert ts.occupancy.changes_since(seen[-1]["seq"]) == []
+
+    unsubscribe()
+    ts.cancel_reservation(a, ts.find_workshop_by_id(102))
+    assert len(seen) == 2
+
+
+def test_rollback_publishes_reverting_deltas(ts):
+    a = register(ts, 1)
+    seq = ts.occupancy.seq
+    with pytest.raises(RuntimeError):
+        with ts.transaction():
+            ts.reserve_workshop(a, ts.find_workshop_by_id(301))
+            raise RuntimeError
+    assert [d["registered"] for d in ts.occupancy.changes_since(seq)] == [1, 0]
+    assert ts.occupancy.totals()["registered"] == 0
+
+
+def test_history_overflow_asks_for_a_snapshot(ts):
+    a = register(ts, 1)
+    workshop = ts.find_workshop_by_id(301)
+    seq = ts.occupancy.seq
+    for _ in range(ts.occupancy.HISTORY):
+        ts.reserve_workshop(a, workshop)
+        ts.cancel_reservation(a, workshop)
+    assert ts.occupancy.changes_since(seq) is None
+
+
+def test_ordered_views(ts):
+    people = [register(ts, i) for i in range(1, 5)]
+    for a in people[:2]:
+        ts.reserve_workshop(a, ts.find_workshop_by_id(102))  # full
+    ts.reserve_workshop(people[2], ts.find_workshop_by_id(101))  # 1/3
+    ts.reserve_workshop(people[3], ts.find_workshop_by_id(201))  # 1/4
+    assert [row["workshop_id"] for row in ts.occupancy.top_fullest(3)] == [102, 101, 201]
+    assert ts.occupancy.top_fullest(0) == []
+    assert [(row["spots_left"], row["workshop_id"]) for row in ts.occupancy.with_spots_left(2)] in (
+        [(2, 101), (2, 202), (3, 201), (5, 301)], [(2, 202), (2, 101), (3, 201), (5, 301)])
+    assert [row["workshop_id"] for row in ts.occupancy.with_spots_left(3, limit=2)] == [201, 301]
+    assert [row["workshop_id"] for row in ts.occupancy.with_spots_left(6)] == []
+
+
+def test_catalogue_changes_are_tracked(ts):
+    ex = ts.find_exhibition_by_id(3)
+    w = Workshop(302, "Wind", 6)
+    ex.add_workshop(w)
+    assert ts.occupancy.totals()["exhibitions"][3] == {"registered": 0, "capacity": 11}
+    ex.remove_workshop(ts.find_workshop_by_id(301))
+    assert ts.occupancy.totals()["exhibitions"][3] == {"registered": 0, "capacity": 6}
+    assert ts.occupancy.changes_since(ts.occupancy.seq - 1)[0]["removed"]
@@ -0,0 +1,78 @@
+# tests/test_passes.py
+import pickle
+
+import pytest
+
+from models.attendee import Attendee
+from models.exhibition import Exhibition
+from models.passes import AllAccessPass, ExhibitionPass
+from models.ticket_system import TicketSystem
+from models.workshop import Workshop
+
+
+def holder(ts, i, pass_id):
+    a = Attendee(ts.next_attendee_id(), f"Attendee {i}", f"p{i}@example.com", "00971-555-000")
+    ts.register_attendee(a)
+    ts.purchase_pass(a, ts.find_pass_by_id(pass_id))
+    return a
+
+
+def test_all_access_covers_exhibitions_added_later(data_dir):
+    ts = TicketSystem("memory")
+    vip, regular = holder(ts, 1, 99), holder(ts, 2, 2)
+    ex = Exhibition(4, "Added later")
+    ex.add_workshop(Workshop(401, "New", 3))
+    ts.add_exhibition(ex)
+    ts.reserve_workshop(vip, ts.find_workshop_by_id(401))
+    with pytest.raises(PermissionError):
+        ts.reserve_workshop(regular, ts.find_workshop_by_id(401))
+    assert ts.attendees_allowed([1, 4]) == {1: [vip.attendee_id, regular.attendee_id], 4: [vip.attendee_id]}
+    ts.close()
+
+
+def test_upgrade_gives_the_holder_a_copy(data_dir):
+    ts = TicketSystem("memory")
+    upgraded, other = holder(ts, 1, 1), holder(ts, 2, 1)
+    catalogue = ts.find_pass_by_id(1)
+    ts.upgrade_pass(upgraded, [2, 2, 1])
+    p = upgraded.purchased_pass
+    assert p is not catalogue and p.original is catalogue
+    assert p.exhibitions_access == {1, 2} and p.upgrades == {2}
+    assert catalogue.exhibitions_access == {1} and other.purchased_pass is catalogue
+    ts.reserve_workshop(upgraded, ts.find_workshop_by_id(201))
+    with pytest.raises(PermissionError):
+        ts.reserve_workshop(other, ts.find_workshop_by_id(201))
+
+    again = p.upgraded([3])
+    assert again.original is catalogue and again.upgrades == {2, 3}
+    ts.close()
+
+
+def test_catalogue_change_is_seen_by_every_holder():
+    p = ExhibitionPass(1, 30.0, [1])
+    p.add_exhibition(2)
+    assert p.allows_exhibition(2) and p.exhibitions_access == frozenset({1, 2})
+    p.exhibitions_access = [3]
+    assert not p.allows_exhibition(1) and p.allows_exhibition(3)
+
+
+def test_all_access_pass_round_trips():
+    p = pickle.loads(pickle.dumps(AllAccessPass(99, 90.0, ["lounge"])))
+    assert p.all_access and p.allows_exhibition(12345) and p.features == ["lounge"]
+    assert str(p) == "Pass(99) price=90.0 access=all"
+
+
+@pytest.mark.parametrize("storage", ["journal", "sqlite", "lazy"])
+def test_upgrades_survive_a_restart(data_dir, storage):
+    ts = TicketSystem(storage)
+    upgraded, other = holder(ts, 1, 1), holder(ts, 2, 1)
+    ts.upgrade_pass(upgraded, [3])
+    ts.close()
+
+    ts = TicketSystem(storage)
+    p = ts.find_attendee_by_id(upgraded.attendee_id).purchased_pass
+    assert p.allows_exhibition(3) and p.upgrades == {3}
+    assert p.original is ts.find_pass_by_id(1)
+    assert not ts.find_pass_by_id(1).allows_exhibition(3)
+    assert ts.find_attendee_by_id(other.attendee_id).purchased_pass is ts.find_pass_by_id(1)
+    ts.close()
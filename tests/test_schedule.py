@@ -0,0 +1,109 @@
+# tests/test_schedule.py
+import datetime
+
+import pytest
+
+from models.attendee import Attendee
+from models.exhibition import Exhibition
+from models.schedule import IntervalIndex
+from models.ticket_system import TicketSystem
+from models.workshop import Workshop
+
+DAY = datetime.datetime(2024, 5, 6)
+
+
+def at(hour, minute=0):
+    return DAY + datetime.timedelta(hours=hour, minutes=minute)
+
+
+def slot(wid, start, end, room=None, capacity=5):
+    return Workshop(wid, f"Workshop {wid}", capacity, start=at(*start), end=at(*end), room=room)
+
+
+@pytest.fixture
+def ts(data_dir):
+    ts = TicketSystem("memory")
+    ex = Exhibition(7, "Timed")
+    ex.add_workshop(slot(701, (9,), (10,), "A"))
+    ex.add_workshop(slot(702, (9, 30), (11,), "B"))
+    ex.add_workshop(slot(703, (10,), (11,), "A"))  # starts as 701 ends: no overlap
+    ex.add_workshop(slot(704, (13,), (14,), "B", capacity=1))
+    ts.add_exhibition(ex)
+    yield ts
+    ts.close()
+
+
+def attendee(ts, i):
+    a = Attendee(ts.next_attendee_id(), f"Attendee {i}", f"s{i}@example.com", "00971-555-000")
+    ts.register_attendee(a)
+    ts.purchase_pass(a, ts.find_pass_by_id(99))
+    return a
+
+
+def test_interval_index_overlaps_are_half_open():
+    index = IntervalIndex()
+    index.add(0, 100, "long")
+    index.add(10, 20, "a")
+    index.add(20, 30, "b")
+    assert index.overlapping(20, 21) == ["long", "b"]
+    assert index.overlapping(30, 40) == ["long"]
+    assert index.overlapping(100, 200) == []
+    assert index.remove(10, 20, "a") and not index.remove(10, 20, "a")
+
+
+def test_overlapping_reservation_is_rejected(ts):
+    a = attendee(ts, 1)
+    ts.reserve_workshop(a, ts.find_workshop_by_id(701))
+    with pytest.raises(ValueError, match="overlaps the attendee's reservation for workshop 701"):
+        ts.reserve_workshop(a, ts.find_workshop_by_id(702))
+    ts.reserve_workshop(a, ts.find_workshop_by_id(703))  # back to back is fine
+    ts.reserve_workshop(a, ts.find_workshop_by_id(101))  # untimed workshops never conflict
+    assert a.reservations == (701, 703, 101)
+
+    ts.cancel_reservation(a, ts.find_workshop_by_id(701))
+    with pytest.raises(ValueError, match="workshop 703"):
+        ts.reserve_workshop(a, ts.find_workshop_by_id(702))
+
+
+def test_room_double_booking_is_rejected(ts):
+    ex = ts.find_exhibition_by_id(7)
+    with pytest.raises(ValueError, match="Room A is already booked"):
+        ex.add_workshop(slot(705, (9, 45), (10, 15), "A"))
+    ex.add_workshop(slot(705, (9, 45), (10, 15), "C"))
+    assert [w.workshop_id for w in ts.room_schedule("A")] == [701, 703]
+
+    clashing = Exhibition(8, "Clashing")
+    clashing.add_workshop(slot(801, (15,), (16,), "D"))
+    clashing.add_workshop(slot(802, (15, 30), (16, 30), "D"))
+    with pytest.raises(ValueError, match="double-booked"):
+        ts.add_exhibition(clashing)
+    assert ts.find_exhibition_by_id(8) is None
+
+
+def test_free_workshops(ts):
+    a = attendee(ts, 1)
+    ts.reserve_workshop(a, ts.find_workshop_by_id(701))
+    ts.reserve_workshop(attendee(ts, 2), ts.find_workshop_by_id(704))  # now full
+    assert [w.workshop_id for w in ts.free_workshops(a, at(8), at(18))] == [703]
+    assert ts.free_workshops(a, at(12), at(13)) == []
+
+
+def test_slots_must_be_complete_and_ordered():
+    with pytest.raises(ValueError, match="both a start and an end"):
+        Workshop(1, "Half", 5, start=at(9))
+    with pytest.raises(ValueError, match="end after it starts"):
+        Workshop(1, "Backwards", 5, start=at(10), end=at(9))
+
+
+def test_promotion_skips_attendees_with_a_new_clash(ts):
+    full = ts.find_workshop_by_id(704)
+    booked, waiting, other = attendee(ts, 1), attendee(ts, 2), attendee(ts, 3)
+    ts.reserve_workshop(booked, full)
+    ts.reserve_workshop(waiting, full, waitlist=True)
+    ts.reserve_workshop(other, full, waitlist=True)
+    ex = ts.find_exhibition_by_id(7)
+    ex.add_workshop(slot(706, (13, 30), (14, 30), "E"))
+    ts.reserve_workshop(waiting, ts.find_workshop_by_id(706))
+
+    ts.cancel_reservation(booked, full)
+    assert full.attendees == {other.attendee_id}
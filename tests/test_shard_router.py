@@ -0,0 +1,37 @@
+# tests/test_shard_router.py
+import pytest
+
+from server.shard_router import ShardError, ShardRouter
+
+
+def test_disagreeing_shards_mark_the_router_diverged(tmp_path):
+    with ShardRouter(2, "memory", str(tmp_path)) as router:
+        ann = router.register_attendee("Ann", "ann@example.com", "00971-555-000")
+        # shard 0 alone already knows the email, so only shard 1 accepts the broadcast
+        params = {"name": "Ben", "email": "ben@example.com", "phone": "00971-555-000", "attendee_id": 500}
+        router._exchange([[("register", dict(params, attendee_id=400))], []])
+
+        with pytest.raises(ShardError, match="disagree"):
+            router.register_attendee(**params)
+        assert router.diverged
+        with pytest.raises(ShardError):
+            router.get_attendee(ann["attendee_id"])
+        with pytest.raises(ShardError):
+            router.register_attendee("Cy", "cy@example.com", "00971-555-000")
+
+
+def test_occupancy_totals_come_from_the_owner_shards(tmp_path):
+    with ShardRouter(2, "memory", str(tmp_path)) as router:
+        ann = router.register_attendee("Ann", "ann@example.com", "00971-555-000")
+        router.purchase_pass(ann["attendee_id"], 99)
+        router.reserve_workshop(ann["attendee_id"], 101)  # exhibition 1, shard 1
+        router.set_workshop_capacity(201, 10)  # exhibition 2, shard 0: 4 -> 10
+        router.set_workshop_capacity(102, 5)  # exhibition 1, shard 1: 2 -> 5
+
+        occupancy = router.occupancy()
+        rows = router.workshop_capacity_report()
+        assert occupancy["capacity"] == sum(row["capacity"] for row in rows) == 25
+        assert occupancy["registered"] == sum(row["registered"] for row in rows) == 1
+        assert occupancy["spots_left"] == 24
+        assert occupancy["exhibitions"][1] == {"registered": 1, "capacity": 8}
+        assert occupancy["exhibitions"][2] == {"registered": 0, "capacity": 12}
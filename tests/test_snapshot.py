@@ -0,0 +1,133 @@
+# tests/test_snapshot.py
+import datetime
+import os
+
+import pytest
+
+from models.attendee import Attendee
+from models.exhibition import Exhibition
+from models.ticket_system import TicketSystem
+from models.workshop import Workshop
+from storage import snapshot
+from storage.snapshot import SnapshotError, load_snapshot, save_snapshot
+
+START = datetime.datetime(2024, 5, 6, 9)
+
+
+@pytest.fixture
+def ts(data_dir):
+    ts = TicketSystem("memory")
+    ex = Exhibition(4, "Ünïcode hall", "rooms\0and\0NULs")
+    ex.add_workshop(Workshop(401, "Timed", 1, start=START, end=START + datetime.timedelta(hours=1), room="R1"))
+    ts.add_exhibition(ex)
+    for i, pass_id in enumerate([1, 2, 99, None, 1], start=1):
+        a = Attendee(i, f"Attendee {i} 名", f"s{i}@example.com", "00971-555-000")
+        ts.register_attendee(a)
+        if pass_id is not None:
+            ts.purchase_pass(a, ts.find_pass_by_id(pass_id), idempotency_key=f"p{i}")
+    ts.upgrade_pass(ts.find_attendee_by_id(1), [4])
+    ts.upgrade_pass(ts.find_attendee_by_id(2), [3, 4])
+    timed = ts.find_workshop_by_id(401)
+    ts.reserve_workshop(ts.find_attendee_by_id(1), timed)
+    ts.reserve_workshop(ts.find_attendee_by_id(3), timed, waitlist=True)
+    ts.reserve_workshop(ts.find_attendee_by_id(2), timed, waitlist=True)
+    ts.reserve_workshop(ts.find_attendee_by_id(2), ts.find_workshop_by_id(101))
+    yield ts
+    ts.close()
+
+
+def state_of(ts):
+    return {"attendees": list(ts.attendees), "exhibitions": ts.exhibitions, "passes": ts.passes,
+            "sales_log": ts.sales_log, "sales_ledger": ts.sales_ledger, "idempotency": ts.idempotency}
+
+
+def summary(state):
+    def pass_row(p):
+        if p is None:
+            return None
+        return (type(p).__name__, p.pass_id, p.price, sorted(p.exhibitions_access), sorted(p.upgrades),
+                p.original.pass_id)
+
+    return {
+        "attendees": [(a.attendee_id, a.name, a.email, a.phone, pass_row(a.purchased_pass), tuple(a.reservations))
+                      for a in state["attendees"]],
+        "exhibitions": [(ex.exhibition_id, ex.name, ex.description,
+                         [(w.workshop_id, w.title, w.capacity, w.start, w.end, w.room, sorted(w.attendees),
+                           [(aid, w.waitlist.entry(aid)) for aid in w.waitlist.waiting()])
+                          for w in ex.workshops])
+                        for ex in state["exhibitions"]],
+        "passes": [pass_row(p) for p in state["passes"]],
+        "sales_log": dict(state["sales_log"]),
+        "sales_ledger": state["sales_ledger"].__getstate__(),
+        "idempotency": state["idempotency"].entries(),
+    }
+
+
+@pytest.mark.parametrize("workers", [1, 4])
+def test_state_round_trips(ts, data_dir, monkeypatch, workers):
+    monkeypatch.setattr(snapshot, "ATTENDEES_PER_SECTION", 2)  # three attendee sections
+    state = state_of(ts)
+    size = save_snapshot("state.bin", state, seq=42, workers=workers)
+    assert os.path.getsize(os.path.join(data_dir, "state.bin")) == size
+    assert os.listdir(data_dir) == ["state.bin"]
+
+    loaded, seq = load_snapshot("state.bin", workers=workers)
+    assert seq == 42
+    assert summary(loaded) == summary(state)
+    # catalogue passes stay shared, upgraded ones point back at the catalogue
+    passes = {p.pass_id: p for p in loaded["passes"]}
+    by_id = {a.attendee_id: a for a in loaded["attendees"]}
+    assert by_id[5].purchased_pass is passes[1]
+    assert by_id[1].purchased_pass.original is passes[1]
+    assert passes[99].all_access
+
+
+def test_empty_state_round_trips(data_dir):
+    save_snapshot("empty.bin", {})
+    state, seq = load_snapshot("empty.bin")
+    assert (state, seq) == ({"attendees": [], "exhibitions": [], "sales_log": {}, "passes": []}, 0)
+    assert load_snapshot("missing.bin") is None
+
+
+def test_damaged_files_are_refused(ts, data_dir):
+    save_snapshot("state.bin", state_of(ts))
+    path = os.path.join(data_dir, "state.bin")
+    with open(path, "rb") as f:
+        data = bytearray(f.read())
+
+    def damaged(position=None, value=None, data=data):
+        data = bytearray(data)
+        if position is not None:
+            data[position] ^= value
+        with open(path, "wb") as f:
+            f.write(data)
+        with pytest.raises(SnapshotError) as info:
+            load_snapshot("state.bin")
+        return str(info.value)
+
+    assert "checksum" in damaged(len(data) - 10, 0x01)
+    assert "damaged header" in damaged(snapshot._HEADER.size + 5, 0x01)
+    assert "not a snapshot" in damaged(0, 0x20)
+    data[8:10] = (snapshot.VERSION + 1).to_bytes(2, "little")
+    assert "reads up to" in damaged()
+    assert "too short" in damaged(data=data[:4])
+    assert snapshot.main([path]) == 1
+
+
+@pytest.mark.parametrize("snapshot_format", ["binary", "pickle"])
+def test_journal_restart_from_snapshot(data_dir, snapshot_format):
+    options = {"compact_every": 4, "snapshot_format": snapshot_format}
+    ts = TicketSystem("journal", options)
+    for i in range(1, 7):
+        a = Attendee(i, f"Attendee {i}", f"j{i}@example.com", "00971-555-000")
+        ts.register_attendee(a)
+        ts.purchase_pass(a, ts.find_pass_by_id(2))
+    ts.reserve_workshop(ts.find_attendee_by_id(3), ts.find_workshop_by_id(201))
+    before = summary(state_of(ts))
+    ts.close()
+    suffix = "bin" if snapshot_format == "binary" else "pkl"
+    assert os.path.exists(os.path.join(data_dir, f"journal.snapshot.{suffix}"))
+
+    ts = TicketSystem("journal", options)
+    assert summary(state_of(ts)) == before
+    ts.close()
@@ -0,0 +1,77 @@
+# tests/test_sqlite_backend.py
+import pytest
+
+from models.attendee import Attendee
+from models.ticket_system import TicketSystem
+from storage.migrate_to_sqlite import migrate
+
+
+def register(ts, i, pass_id=99):
+    a = Attendee(ts.next_attendee_id(), f"Attendee {i}", f"s{i}@example.com", "00971-555-000")
+    ts.register_attendee(a)
+    ts.purchase_pass(a, ts.find_pass_by_id(pass_id))
+    return a
+
+
+def test_rows_survive_a_restart(data_dir):
+    ts = TicketSystem("sqlite")
+    ann, ben = register(ts, 1), register(ts, 2, pass_id=1)
+    ts.reserve_workshop(ann, ts.find_workshop_by_id(101))
+    ts.reserve_workshop(ann, ts.find_workshop_by_id(201))
+    ts.reserve_workshop(ben, ts.find_workshop_by_id(101))
+    ts.cancel_reservation(ann, ts.find_workshop_by_id(201))
+    ts.upgrade_pass(ben, [2])
+    ben.update_phone("00971-555-999")
+    ts.set_workshop_capacity(ts.find_workshop_by_id(102), 7)
+    ts.close()
+
+    ts = TicketSystem("sqlite")
+    ann, ben = ts.find_attendee_by_email("s1@example.com"), ts.find_attendee_by_id(2)
+    assert ann.reservations == (101,)
+    assert ben.phone == "00971-555-999"
+    assert ben.purchased_pass.allows_exhibition(2) and not ben.purchased_pass.allows_exhibition(3)
+    assert ts.find_workshop_by_id(101).attendees == {ann.attendee_id, ben.attendee_id}
+    assert ts.find_workshop_by_id(201).attendees == set()
+    assert ts.find_workshop_by_id(102).capacity == 7
+    assert sum(ts.daily_sales().values()) == 2
+    ts.close()
+
+
+def test_attendees_are_loaded_on_demand(data_dir):
+    ts = TicketSystem("sqlite")
+    for i in range(5):
+        register(ts, i)
+    ts.close()
+
+    ts = TicketSystem("sqlite", attendee_cache_size=2)
+    assert ts.attendee_count() == 5
+    assert len(ts.attendees) == 0
+    assert ts.find_attendee_by_email("s3@example.com").attendee_id == 4
+    assert sorted(a.attendee_id for a in ts.iter_attendees()) == [1, 2, 3, 4, 5]
+    assert len(ts.attendees) <= 2
+    assert ts.next_attendee_id() == 6
+    ts.close()
+
+
+def test_duplicate_email_is_rejected_by_the_database_too(data_dir):
+    ts = TicketSystem("sqlite", attendee_cache_size=1)
+    register(ts, 1)
+    register(ts, 2)  # evicts the first from the cache
+    with pytest.raises(ValueError, match="Email already registered"):
+        ts.register_attendee(Attendee(9, "Copy", "S1@example.com", "00971-555-000"))
+    ts.close()
+
+
+def test_migration_copies_the_pickle_files(data_dir):
+    ts = TicketSystem("pickle")
+    a = register(ts, 1)
+    ts.reserve_workshop(a, ts.find_workshop_by_id(301))
+    ts.close()
+
+    counts = migrate()
+    assert counts["attendees"] == 1
+    ts = TicketSystem("sqlite")
+    assert ts.find_attendee_by_id(a.attendee_id).reservations == (301,)
+    with pytest.raises(ValueError, match="already contains data"):
+        migrate()
+    ts.close()
@@ -0,0 +1,47 @@
+# tests/test_ticket_server.py
+import asyncio
+import os
+
+from models.ticket_system import TicketSystem
+from server.ticket_server import MicroBatcher, TicketServer
+
+
+def test_batch_is_fsynced_before_it_is_acknowledged(data_dir):
+    # a group that would otherwise wait a minute for its fsync
+    ts = TicketSystem("journal", {"group_size": 1000, "group_interval": 60})
+    server = TicketServer(ts)
+    batcher = MicroBatcher(ts)
+    params = {"name": "Ann", "email": "ann@example.com", "phone": "00971-555-000"}
+    outcomes = batcher._run_batch([(server.op_register, (params,), None)])
+    assert outcomes[0][0] is True
+    assert ts._backend.journal._unsynced == 0
+    ts.close()
+
+
+def test_scan_and_lottery_submit_are_batched_and_synced(data_dir):
+    ts = TicketSystem("journal", {"group_size": 1000, "group_interval": 60})
+    server = TicketServer(ts)
+
+    async def session():
+        server.batcher.start()
+        try:
+            ann = await server.dispatch("register", {"name": "Ann", "email": "ann@example.com",
+                                                     "phone": "00971-555-000"})
+            aid = ann["attendee_id"]
+            await server.dispatch("purchase_pass", {"attendee_id": aid, "pass_id": 99})
+            token = (await server.dispatch("badge", {"attendee_id": aid}))["token"]
+            scan = await server.dispatch("scan", {"gate_id": 1, "exhibition_id": 1, "token": token})
+            assert scan["status"] == "admitted"
+            # written and fsynced before the reply, not left for the recorder's next batch
+            assert server.checkins._pending == [] and not server.checkins._unsynced
+            assert os.path.getsize(os.path.join(data_dir, "checkins.bin")) == server.checkins.ROW.size
+            await server.dispatch("lottery_submit", {"attendee_id": aid, "workshops": [101]})
+            assert not server.lotteries["default"]._unsynced
+        finally:
+            await server.batcher.stop()
+
+    asyncio.run(session())
+    assert server.batcher.batches == 4  # the badge is a read
+    assert ts._backend.journal._unsynced == 0
+    server.checkins.close()
+    ts.close()
@@ -0,0 +1,96 @@
+# tests/test_transaction.py
+import pytest
+
+from models.attendee import Attendee
+from models.ticket_system import TicketSystem
+from storage import data_manager
+from storage.backend import JournalBackend
+
+
+class CountingBackend(JournalBackend):
+    def __init__(self):
+        super().__init__()
+        self.batches = []
+
+    def persist_batch(self, records, ts):
+        self.batches.append(len(records))
+        super().persist_batch(records, ts)
+
+
+def attendee(ts, i):
+    a = Attendee(ts.next_attendee_id(), f"Attendee {i}", f"t{i}@example.com", "00971-555-000")
+    ts.register_attendee(a)
+    return a
+
+
+def test_transaction_is_persisted_in_one_flush(data_dir):
+    backend = CountingBackend()
+    ts = TicketSystem("journal", backend=backend)
+    with ts.transaction():
+        a = attendee(ts, 1)
+        ts.purchase_pass(a, ts.find_pass_by_id(99))
+        ts.reserve_workshop(a, ts.find_workshop_by_id(101))
+    assert backend.batches == [3]
+    ts.close()
+
+    ts = TicketSystem("journal")
+    assert ts.find_attendee_by_email("t1@example.com").reservations == (101,)
+    ts.close()
+
+
+def test_failed_transaction_rolls_back_memory_and_persists_nothing(data_dir):
+    ts = TicketSystem("journal")
+    workshop = ts.find_workshop_by_id(101)
+    with pytest.raises(RuntimeError):
+        with ts.transaction():
+            a = attendee(ts, 1)
+            ts.purchase_pass(a, ts.find_pass_by_id(99))
+            ts.reserve_workshop(a, workshop)
+            raise RuntimeError("abort")
+    assert ts.find_attendee_by_email("t1@example.com") is None
+    assert a.purchased_pass is None and a.reservations == ()
+    assert workshop.attendees == set()
+    assert ts.daily_sales() == {}
+    assert ts.sales_ledger.revenue_by_day() == {}
+    ts.close()
+
+    ts = TicketSystem("journal")
+    assert ts.attendee_count() == 0
+    ts.close()
+
+
+def test_savepoint_rolls_back_only_its_own_changes(data_dir):
+    ts = TicketSystem("pickle")
+    workshop = ts.find_workshop_by_id(102)  # capacity 2
+    with ts.transaction():
+        a, b, c = (attendee(ts, i) for i in range(3))
+        for x in (a, b, c):
+            ts.purchase_pass(x, ts.find_pass_by_id(99))
+        ts.reserve_workshop(a, workshop)
+        with pytest.raises(ValueError):
+            with ts.transaction():
+                ts.reserve_workshop(b, workshop)
+                ts.reserve_workshop(b, ts.find_workshop_by_id(101))
+                b.update_name("Changed")
+                raise ValueError("rejected")
+        ts.reserve_workshop(c, workshop)
+    assert workshop.attendees == {a.attendee_id, c.attendee_id}
+    assert b.reservations == () and b.name == "Attendee 1"
+    ts.close()
+
+    on_disk = {x.attendee_id: x for x in data_manager.load_data(TicketSystem.ATTENDEES_FILE)}
+    assert on_disk[b.attendee_id].reservations == ()
+    assert on_disk[c.attendee_id].reservations == (102,)
+
+
+def test_failed_flush_rolls_back(data_dir):
+    class FailingBackend(JournalBackend):
+        def persist_batch(self, records, ts):
+            raise OSError("disk full")
+
+    ts = TicketSystem("journal", backend=FailingBackend())
+    with pytest.raises(OSError):
+        with ts.transaction():
+            a = attendee(ts, 1)
+    assert ts.find_attendee_by_id(a.attendee_id) is None
+    ts.close()
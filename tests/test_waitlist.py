@@ -0,0 +1,114 @@
+# tests/test_waitlist.py
+import pytest
+
+from models.attendee import Attendee
+from models.passes import ExhibitionPass
+from models.ticket_system import TicketSystem
+from models.waitlist import Waitlist, all_access_first
+from models.workshop import Workshop
+
+
+@pytest.fixture
+def ts(data_dir):
+    ts = TicketSystem("memory")
+    yield ts
+    ts.close()
+
+
+def attendee(ts, i):
+    a = Attendee(ts.next_attendee_id(), f"Attendee {i}", f"w{i}@example.com", "00971-555-000")
+    ts.register_attendee(a)
+    ts.purchase_pass(a, ts.find_pass_by_id(99))
+    return a
+
+
+def test_booked_attendee_cannot_join_the_waitlist_of_the_same_workshop(ts):
+    workshop = Workshop(9001, "Small", 1)
+    ts.exhibitions[0].add_workshop(workshop)
+    booked, waiting = attendee(ts, 1), attendee(ts, 2)
+    assert ts.reserve_workshop(booked, workshop) is None
+    assert ts.reserve_workshop(waiting, workshop, waitlist=True) == 1
+
+    with pytest.raises(ValueError, match="already reserved"):
+        ts.reserve_workshop(booked, workshop, waitlist=True)
+    assert booked.attendee_id not in workshop.waitlist
+    assert workshop.waitlist.waiting() == [waiting.attendee_id]
+
+
+def test_booked_attendee_with_empty_waitlist_is_rejected(ts):
+    workshop = Workshop(9002, "Small", 1)
+    ts.exhibitions[0].add_workshop(workshop)
+    booked = attendee(ts, 1)
+    ts.reserve_workshop(booked, workshop)
+    with pytest.raises(ValueError):
+        ts.reserve_workshop(booked, workshop, waitlist=True)
+    assert len(workshop.waitlist) == 0
+
+
+def test_positions_and_pops_follow_priority_then_arrival():
+    waitlist = Waitlist()
+    for aid, priority in ((1, 1), (2, 0), (3, 1), (4, 0)):
+        waitlist.add(aid, priority)
+    assert [waitlist.position(aid) for aid in (1, 2, 3, 4)] == [3, 1, 4, 2]
+    waitlist.remove(2)
+    assert waitlist.position(4) == 1 and waitlist.position(2) is None
+    assert [waitlist.pop()[0] for _ in range(3)] == [4, 1, 3]
+    assert waitlist.pop() is None
+
+
+def test_many_departures_keep_positions_right():
+    waitlist = Waitlist()
+    for aid in range(1000):
+        waitlist.add(aid)
+    for aid in range(0, 1000, 2):
+        waitlist.remove(aid)
+    assert waitlist.position(999) == 500
+    assert waitlist.pop()[0] == 1
+
+
+def test_cancellation_promotes_the_next_eligible_attendee(ts):
+    workshop = ts.find_workshop_by_id(102)  # capacity 2
+    first, second, lapsed, next_up = (attendee(ts, i) for i in range(4))
+    ts.reserve_workshop(first, workshop)
+    ts.reserve_workshop(second, workshop)
+    assert ts.reserve_workshop(lapsed, workshop, waitlist=True) == 1
+    assert ts.reserve_workshop(next_up, workshop, waitlist=True) == 2
+    lapsed.purchased_pass = ExhibitionPass(50, 10.0, [2])  # no longer covers exhibition 1
+
+    ts.cancel_reservation(first, workshop)
+    assert workshop.attendees == {second.attendee_id, next_up.attendee_id}
+    assert next_up.reservations == (102,)
+    assert len(workshop.waitlist) == 0
+
+
+def test_capacity_increase_promotes_and_rollback_restores_the_queue(ts):
+    workshop = ts.find_workshop_by_id(102)
+    people = [attendee(ts, i) for i in range(5)]
+    for a in people:
+        ts.reserve_workshop(a, workshop, waitlist=True)
+    with pytest.raises(RuntimeError):
+        with ts.transaction():
+            assert ts.set_workshop_capacity(workshop, 4) == people[2:4]
+            raise RuntimeError
+    assert workshop.waitlist.waiting() == [a.attendee_id for a in people[2:]]
+    assert ts.waitlist_position(people[4], workshop) == 3
+
+    ts.leave_waitlist(people[2], workshop)
+    assert ts.set_workshop_capacity(workshop, 3) == [people[3]]
+
+
+def test_all_access_holders_go_first(data_dir):
+    ts = TicketSystem("memory", waitlist_priority=all_access_first)
+    workshop = ts.find_workshop_by_id(102)
+    people = []
+    for i, pass_id in enumerate((1, 1, 1, 99)):
+        a = Attendee(ts.next_attendee_id(), f"Attendee {i}", f"p{i}@example.com", "00971-555-000")
+        ts.register_attendee(a)
+        ts.purchase_pass(a, ts.find_pass_by_id(pass_id))
+        people.append(a)
+    for a in people:
+        ts.reserve_workshop(a, workshop, waitlist=True)
+    assert ts.waitlist_position(people[3], workshop) == 1
+    ts.cancel_reservation(people[0], workshop)
+    assert people[3].attendee_id in workshop.attendees
+    ts.close()